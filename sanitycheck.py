@@ -8,6 +8,8 @@ Shows you exactly where you are and what exists.
 import os
 from pathlib import Path
 
+from sensing.pair_index import PairIndex
+
 def sanity_check():
     print("🏥 SANITY CHECK & GET WELL SOON 🏥")
     print("=" * 50)
@@ -65,20 +67,17 @@ def sanity_check():
         facts_dir = kb_dir / "facts"
         rules_dir = kb_dir / "rules"
         
-        fact_files = {f.stem.replace('fact', ''): f for f in facts_dir.glob('fact*.txt')}
-        rule_files = {f.stem.replace('rule', ''): f for f in rules_dir.glob('rule*.txt')}
-        
-        all_ids = set(fact_files.keys()) | set(rule_files.keys())
+        index = PairIndex(kb_dir).build()
         
-        if all_ids:
-            print(f"   📊 Found {len(all_ids)} knowledge units")
-            for id in sorted(all_ids):
-                has_fact = id in fact_files
-                has_rule = id in rule_files
-                status = "✅" if has_fact and has_rule else "⚠️"
-                print(f"   {status} Unit {id}: fact={has_fact}, rule={has_rule}")
+        if len(index):
+            print(f"   📊 Found {len(index)} knowledge units")
+            for pair in index.pairs():
+                has_fact = pair.fact is not None
+                has_rule = pair.rule is not None
+                status = "✅" if pair.complete else "⚠️"
+                print(f"   {status} Unit {pair.pair_id}: fact={has_fact}, rule={has_rule}")
         else:
-            print(f"   📝 No fact*.txt or rule*.txt files found")
+            print(f"   📝 No fact/rule files (factN.txt, fact-NNN.yaml) found")
     
     print(f"\n💊 RECOMMENDATIONS:")
     if current_dir.name != "gamma_delta_sense":
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Chunked Hashing Benchmark
+=========================
+
+Compares whole-file hashing with content-defined chunk hashing on a large
+YAML fact list, and shows how precisely a one-line edit is localized.
+
+Usage:
+    python scripts/benchmark_chunking.py --size-mb 100
+"""
+
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.gamma_detector import FileState
+from sensing.chunking import chunk_file, diff_manifests
+
+
+def build_fact_list(path: Path, size_mb: int, seed: int = 42) -> int:
+    """Write a kb/facts.yaml-shaped file of roughly size_mb; returns the line count."""
+    rng = random.Random(seed)
+    concepts = ["BTN3A1", "BTN2A1", "Vγ9Vδ2 T cells", "IPP", "HMBPP", "CD277"]
+    properties = ["activated", "bound_by", "expressed", "inhibited", "upregulated"]
+    target = size_mb * 1024 * 1024
+    written = 0
+    lines = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            entry = (f"- concept: {rng.choice(concepts)}\n"
+                     f"  property: {rng.choice(properties)}\n"
+                     f"  context: sample {rng.randrange(10**9)}\n"
+                     f"  source: PMID:{rng.randrange(10**7, 10**8)}\n"
+                     f"  confidence: {rng.random():.2f}\n")
+            f.write(entry)
+            written += len(entry.encode('utf-8'))
+            lines += 5
+    return lines
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content-defined chunk hashing")
+    parser.add_argument("--size-mb", type=int, default=100, help="Size of the synthetic fact list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "facts.yaml"
+        print(f"🏗️  Writing {args.size_mb} MiB fact list...")
+        line_count = build_fact_list(path, args.size_mb)
+        size_mib = path.stat().st_size / (1024 * 1024)
+        FileState._calculate_hash(path)  # warm the page cache
+
+        whole_time, whole_hash = timed(FileState._calculate_hash, path)
+        hasher = hashlib.sha256()
+        chunk_time, old_chunks = timed(chunk_file, path, hasher)
+        assert hasher.hexdigest() == whole_hash
+
+        # Edit one line in the middle of the file
+        target_line = line_count // 2
+        with open(path, 'r+b') as f:
+            content = f.read()
+            start = 0
+            for _ in range(target_line - 1):
+                start = content.index(b"\n", start) + 1
+            end = content.index(b"\n", start)
+            f.seek(0)
+            f.write(content[:start] + b"  context: edited in benchmark" + content[end:])
+            f.truncate()
+        del content
+
+        rechunk_time, new_chunks = timed(chunk_file, path)
+        diff_time, regions = timed(diff_manifests, old_chunks, new_chunks)
+
+        print(f"\n{'method':<28} {'seconds':>9} {'MiB/s':>9}")
+        print(f"{'whole-file SHA-256':<28} {whole_time:>9.3f} {size_mib / whole_time:>9.1f}")
+        print(f"{'chunked (SHA-256 + CDC)':<28} {chunk_time:>9.3f} {size_mib / chunk_time:>9.1f}")
+        print(f"{'re-chunk after edit':<28} {rechunk_time:>9.3f} {size_mib / rechunk_time:>9.1f}")
+        print(f"{'manifest diff':<28} {diff_time:>9.4f}")
+
+        print(f"\n📦 {len(new_chunks)} chunks, avg {path.stat().st_size / len(new_chunks) / 1024:.1f} KiB")
+        print(f"✏️  Edited line {target_line} of {line_count}")
+        changed_bytes = sum(r["length"] for r in regions)
+        for region in regions:
+            print(f"   changed lines {region['start_line']}-{region['end_line']} "
+                  f"({region['length']} bytes)")
+        print(f"   {changed_bytes / path.stat().st_size:.4%} of the file needs reprocessing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Cross-Reference Checker Benchmark
+=================================
+
+Writes a synthetic knowledge base of YAML fact and rule files, runs a
+full cross-reference check with CrossReferenceChecker (hash join), then
+edits one fact file and one rule file and times the incremental
+re-check. The baseline is the nested loop the hash join replaces: every
+condition tested against every fact. It is timed on a sample of the
+conditions and scaled to all of them.
+
+Usage:
+    python scripts/benchmark_cross_reference.py --facts 100k,1m --rules 10k
+"""
+
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+import yaml
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.cross_reference import CrossReferenceChecker
+from sensing.rule_engine import compile_rule, fact_tuple
+from generate_kb import parse_count
+
+CONCEPTS = 20000
+PROPERTIES = 20
+CONTEXTS = 50
+FACTS_PER_FILE = 1000
+RULES_PER_FILE = 100
+DANGLING_RATE = 0.05  # conditions naming a concept no fact has; the rest copy a fact
+NAIVE_SAMPLE = 200
+
+
+def random_fact(rng: random.Random):
+    return {"concept": f"c{rng.randrange(CONCEPTS)}", "property": f"p{rng.randrange(PROPERTIES)}",
+            "context": f"x{rng.randrange(CONTEXTS)}"}
+
+
+def random_rule(rng: random.Random, number: int, facts):
+    conditions = []
+    for _ in range(rng.randint(1, 3)):
+        condition = dict(rng.choice(facts))
+        if rng.random() < DANGLING_RATE:
+            condition["concept"] = f"missing{rng.randrange(CONCEPTS)}"
+        if rng.random() < 0.5:
+            condition["context"] = "?ctx"
+        conditions.append(condition)
+    conclusion = random_fact(rng)
+    conclusion["context"] = "?ctx" if any(c["context"] == "?ctx" for c in conditions) else "x0"
+    return {"rule_id": f"rule-{number}", "if": conditions, "then": [conclusion]}
+
+
+def write_kb(root: Path, facts, rules) -> None:
+    (root / "facts").mkdir(parents=True)
+    (root / "rules").mkdir(parents=True)
+    for start in range(0, len(facts), FACTS_PER_FILE):
+        (root / "facts" / f"facts-{start // FACTS_PER_FILE:05d}.yaml").write_text(
+            yaml.safe_dump(facts[start:start + FACTS_PER_FILE]), encoding="utf-8")
+    for start in range(0, len(rules), RULES_PER_FILE):
+        (root / "rules" / f"rules-{start // RULES_PER_FILE:05d}.yaml").write_text(
+            yaml.safe_dump(rules[start:start + RULES_PER_FILE], sort_keys=False), encoding="utf-8")
+
+
+def naive_check(conditions, facts) -> int:
+    """Test every condition against every fact; returns the conditions without a match."""
+    dangling = 0
+    for (mask, values, same, present), _, _ in conditions:
+        if not any(all(fact[i] == v for i, v in zip(mask, values)) and
+                   all(fact[i] is not None for i in present) and
+                   all(fact[a] == fact[b] for a, b in same) for fact in facts):
+            dangling += 1
+    return dangling
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cross-reference checker")
+    parser.add_argument("--facts", default="100k,1m", help="Comma-separated fact counts")
+    parser.add_argument("--rules", type=parse_count, default=10000, help="Structured rules")
+    args = parser.parse_args()
+
+    print(f"{'facts':>9} {'rules':>7} {'conditions':>11} {'dangling':>9} {'check s':>8} "
+          f"{'update ms':>10} {'rechecked':>10} {'nested loop s':>14}")
+    for fact_count in (parse_count(f) for f in args.facts.split(",")):
+        rng = random.Random(42)
+        facts = [random_fact(rng) for _ in range(fact_count)]
+        rules = [random_rule(rng, number, facts) for number in range(args.rules)]
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "kb"
+            write_kb(root, facts, rules)
+            checker = CrossReferenceChecker(kb_path=str(root))
+
+            start = time.perf_counter()
+            checker.update_from_kb()
+            check_time = time.perf_counter() - start
+            stats = checker.stats()
+
+            # Replace one fact file and one rule file
+            (root / "facts" / "facts-00000.yaml").write_text(
+                yaml.safe_dump([random_fact(rng) for _ in range(FACTS_PER_FILE)]), encoding="utf-8")
+            (root / "rules" / "rules-00000.yaml").write_text(
+                yaml.safe_dump([random_rule(rng, args.rules + n, facts) for n in range(RULES_PER_FILE)],
+                               sort_keys=False), encoding="utf-8")
+            start = time.perf_counter()
+            summary = checker.update_from_kb(changes=["facts/facts-00000.yaml", "rules/rules-00000.yaml"])
+            update_time = time.perf_counter() - start
+
+        # Parsing is not part of the nested loop: compare the matching alone
+        conditions = [condition for rule in rules[:NAIVE_SAMPLE]
+                      for condition in compile_rule(rule["if"], rule["then"])[0]]
+        known = [fact_tuple(fact) for fact in facts]
+        start = time.perf_counter()
+        naive_check(conditions, known)
+        naive_time = (time.perf_counter() - start) * stats["conditions"] / len(conditions)
+
+        print(f"{fact_count:>9} {stats['rules']:>7} {stats['conditions']:>11} {stats['dangling']:>9} "
+              f"{check_time:>8.2f} {update_time * 1000:>10.1f} {summary['rules_checked']:>10} "
+              f"{naive_time:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
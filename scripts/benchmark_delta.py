@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Delta Analysis Benchmark
+========================
+
+Times DeltaAnalyzer.analyze_fact_rule_pairs over a synthetic knowledge
+base against the former eager behaviour, where every complete pair was
+also diffed, and shows the cost of an on-demand pair diff. With
+--workers the analysis is also timed on a process pool, and its results
+are checked against the serial run.
+
+Usage:
+    python scripts/benchmark_delta.py --pairs 1000,10000 --workers 4
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.delta_analyzer import DeltaAnalyzer
+from generate_kb import generate_kb
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def analyze_eagerly(analyzer: DeltaAnalyzer) -> int:
+    """Score and fully diff every complete pair, as the analyzer used to."""
+    diffed = 0
+    for _, fact_path, rule_path in analyzer._all_pairs(None):
+        if fact_path is None or rule_path is None:
+            continue
+        fact = analyzer._read_file(fact_path)
+        rule = analyzer._read_file(rule_path)
+        analyzer._compare_words(fact, rule)
+        diffed += bool(list(analyzer._unified_diff(fact, rule)))
+    return diffed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark delta analysis with and without eager diffs")
+    parser.add_argument("--pairs", default="1000,10000", help="Comma-separated pair counts")
+    parser.add_argument("--workers", type=int, default=1, help="Also time a process pool of this size")
+    parser.add_argument("--batch-size", type=int, default=50, help="Pairs per worker batch")
+    args = parser.parse_args()
+
+    parallel_header = f" {'parallel s':>11}" if args.workers > 1 else ""
+    print(f"{'pairs':>8} {'eager s':>9} {'lazy s':>9} {'speedup':>8} {'1 diff ms':>10} "
+          f"{'cached ms':>10}{parallel_header}")
+    for pairs in (int(p) for p in args.pairs.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            kb_path = Path(tmp) / "kb"
+            # generate_kb puts half of its files into fact/rule pairs
+            generate_kb(kb_path, pairs * 4)
+
+            eager_time, _ = timed(analyze_eagerly, DeltaAnalyzer(kb_path=str(kb_path)))
+            analyzer = DeltaAnalyzer(kb_path=str(kb_path))
+            lazy_time, serial = timed(analyzer.analyze_fact_rule_pairs)
+            diff_time, _ = timed(lambda: list(analyzer.pair_diff("txt:1")))
+            cached_time, _ = timed(lambda: list(analyzer.pair_diff("txt:1")))
+
+            parallel_column = ""
+            if args.workers > 1:
+                pool_analyzer = DeltaAnalyzer(kb_path=str(kb_path), max_workers=args.workers,
+                                              batch_size=args.batch_size)
+                parallel_time, parallel = timed(pool_analyzer.analyze_fact_rule_pairs)
+                if parallel["pair_analyses"] != serial["pair_analyses"] or \
+                        parallel["summary"] != serial["summary"]:
+                    print(f"❌ Parallel results differ from the serial run at {pairs} pairs")
+                    sys.exit(1)
+                parallel_column = f" {parallel_time:>11.3f}"
+
+            print(f"{pairs:>8} {eager_time:>9.3f} {lazy_time:>9.3f} {eager_time / lazy_time:>7.2f}x "
+                  f"{diff_time * 1000:>10.3f} {cached_time * 1000:>10.3f}{parallel_column}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Line Diff Benchmark
+===================
+
+Times sensing.diff_engine on large YAML-style fact lists, for a 1% edit,
+moved blocks, two unrelated documents and a highly repetitive document,
+and checks that every diff turns the first document into the second.
+difflib.unified_diff can be timed alongside with --difflib (it can take
+minutes on 100k lines).
+
+Usage:
+    python scripts/benchmark_diff.py --lines 10000,100000 --difflib
+"""
+
+import sys
+import time
+import random
+import argparse
+import difflib
+from pathlib import Path
+from typing import Dict, List
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.diff_engine import ALGORITHMS, opcodes, unified_diff
+
+
+def fact_list(line_count: int, seed: int) -> List[str]:
+    """A YAML fact list with many repeated lines."""
+    rng = random.Random(seed)
+    lines = []
+    fact = 0
+    while len(lines) < line_count:
+        lines += [f"- id: fact_{fact}", "  type: fact", f"  value: {rng.randint(0, 50)}",
+                  "  tags:", "    - legal", ""]
+        fact += 1
+    return lines[:line_count]
+
+
+def scenarios(line_count: int, seed: int) -> Dict[str, List[str]]:
+    """Second documents to diff against fact_list(line_count, seed)."""
+    rng = random.Random(seed)
+    original = fact_list(line_count, seed)
+
+    edited = list(original)
+    for _ in range(line_count // 100):
+        index = rng.randrange(len(edited))
+        roll = rng.random()
+        if roll < 0.33:
+            del edited[index]
+        elif roll < 0.66:
+            edited.insert(index, f"  note: {rng.random()}")
+        else:
+            edited[index] = f"  value: {rng.randint(0, 50)}"
+
+    blocks = [original[i:i + 600] for i in range(0, line_count, 600)]
+    rng.shuffle(blocks)
+
+    return {
+        "edit 1%": edited,
+        "moved": [line for block in blocks for line in block],
+        "unrelated": fact_list(line_count, seed + 1),
+        "repetitive": (["  type: fact", "    - legal", ""] * line_count)[:line_count]
+    }
+
+
+def applies(a: List[str], b: List[str], algorithm: str) -> bool:
+    """Whether the opcodes rebuild b from a."""
+    rebuilt = []
+    for tag, i1, i2, j1, j2 in opcodes(a, b, algorithm):
+        if tag == "equal" and a[i1:i2] != b[j1:j2]:
+            return False
+        rebuilt.extend(b[j1:j2])
+    return rebuilt == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the line diff engine")
+    parser.add_argument("--lines", default="10000,100000", help="Comma-separated document sizes")
+    parser.add_argument("--difflib", action="store_true", help="Also time difflib.unified_diff")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    methods = list(ALGORITHMS) + (["difflib"] if args.difflib else [])
+    print(f"{'lines':>8} {'scenario':<12} " + " ".join(f"{m + ' s':>12}" for m in methods))
+    for line_count in (int(n) for n in args.lines.split(",")):
+        original = fact_list(line_count, args.seed)
+        for name, changed in scenarios(line_count, args.seed).items():
+            row = []
+            for method in methods:
+                start = time.perf_counter()
+                if method == "difflib":
+                    for _ in difflib.unified_diff(original, changed, lineterm=""):
+                        pass
+                else:
+                    for _ in unified_diff(original, changed, lineterm="", algorithm=method):
+                        pass
+                row.append(time.perf_counter() - start)
+                if method != "difflib" and not applies(original, changed, method):
+                    print(f"❌ {method} produced a wrong diff for {name} at {line_count} lines")
+                    sys.exit(1)
+            print(f"{line_count:>8} {name:<12} " + " ".join(f"{t:>12.3f}" for t in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Gamma Hashing Benchmark
+=======================
+
+Measures how the stat/hash phase of GammaDetector.scan_for_changes scales
+with the number of worker threads on a synthetic knowledge base.
+
+Usage:
+    python scripts/benchmark_hashing.py --files 20000 --size-kb 16
+"""
+
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.gamma_detector import GammaDetector
+
+
+def build_synthetic_kb(root: Path, file_count: int, size_kb: int, seed: int = 42) -> None:
+    """Create facts/ and rules/ with numbered .txt files of roughly size_kb each."""
+    rng = random.Random(seed)
+    words = ["BTN3A1", "antigen", "phospho", "gamma", "delta", "T", "cell",
+             "activation", "binding", "pathway", "Vγ9Vδ2", "butyrophilin"]
+    line_count = max(1, (size_kb * 1024) // 64)
+    for directory, prefix in [("facts", "fact"), ("rules", "rule")]:
+        (root / directory).mkdir(parents=True, exist_ok=True)
+        for i in range(1, file_count // 2 + 1):
+            lines = (" ".join(rng.choice(words) for _ in range(8)) for _ in range(line_count))
+            (root / directory / f"{prefix}{i}.txt").write_text("\n".join(lines), encoding="utf-8")
+
+
+def run_scan(kb_path: Path, state_file: Path, workers: int, batch_size: int,
+             algorithm: str = "sha256") -> tuple:
+    """Run one paranoid (full-hash) scan and return (seconds, baseline hashes)."""
+    for stale in state_file.parent.glob(state_file.name + "*"):
+        stale.unlink()
+    detector = GammaDetector(kb_path=str(kb_path), paranoid=True, max_workers=workers,
+                             batch_size=batch_size, state_file=str(state_file),
+                             hash_algorithm=algorithm)
+    start = time.perf_counter()
+    detector.scan_for_changes()
+    elapsed = time.perf_counter() - start
+    hashes = {k: v.content_hash for k, v in detector.baseline_states.items()}
+    detector.close()
+    return elapsed, hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel hashing in GammaDetector")
+    parser.add_argument("--files", type=int, default=4000, help="Total synthetic files")
+    parser.add_argument("--size-kb", type=int, default=64, help="Approximate size of each file")
+    parser.add_argument("--batch-size", type=int, default=50, help="Files per worker batch")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best is kept)")
+    parser.add_argument("--algorithm", default="sha256", help="hashlib algorithm (e.g. blake2b)")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path = Path(tmp) / "kb"
+        state_file = Path(tmp) / "state.db"
+        print(f"🏗️  Building synthetic KB: {args.files} files x ~{args.size_kb} KiB")
+        build_synthetic_kb(kb_path, args.files, args.size_kb)
+
+        # Warm the page cache so every run measures the same thing
+        run_scan(kb_path, state_file, 1, args.batch_size, args.algorithm)
+
+        print(f"🔑 Hash algorithm: {args.algorithm}")
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>10} {'MiB/s':>8} {'speedup':>8}")
+        reference = None
+        serial_time = None
+        total_mib = args.files * args.size_kb / 1024
+        for workers in worker_counts:
+            best = None
+            for _ in range(args.repeat):
+                elapsed, hashes = run_scan(kb_path, state_file, workers, args.batch_size,
+                                           args.algorithm)
+                best = elapsed if best is None else min(best, elapsed)
+                if reference is None:
+                    reference = hashes
+                elif hashes != reference:
+                    print(f"❌ Results with {workers} workers differ from the first run")
+                    sys.exit(1)
+            serial_time = serial_time or best
+            print(f"{workers:>8} {best:>9.3f} {args.files / best:>10.0f} "
+                  f"{total_mib / best:>8.1f} {serial_time / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Knowledge Indexer Benchmark
+===========================
+
+Builds a KnowledgeIndexer over a synthetic knowledge base of YAML fact
+lists (plus numbered text pairs), then times an incremental update after
+a few edits and the median latency of exact, field, prefix and
+conjunctive queries. The queries are compared with a linear scan that
+reads every file and checks the terms as substrings, which is what a
+lookup costs without the index.
+
+The index is then exported as a memory-mapped snapshot, and each query
+is also run against it: "cold" opens the snapshot and answers the query
+once (what `sense_changes.py query --snapshot` pays besides interpreter
+start-up), "snapshot" is the median on an open snapshot.
+
+Usage:
+    python scripts/benchmark_indexer.py --entries 100k,1m
+"""
+
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.indexer import KnowledgeIndexer
+from sensing.mmap_index import MappedIndex
+from generate_kb import _fact_entry, pair_texts, parse_count
+
+ENTRIES_PER_FILE = 100
+TEXT_PAIRS_PER_FILE = 0.1  # one fact/rule text pair per ten YAML files
+EDITED_FILES = 10
+
+QUERIES = [
+    ("exact", ["NKG2D"]),
+    ("field", ["context:zoledronate treatment"]),
+    ("prefix", ["tum*"]),
+    ("conjunctive", ["concept:IL-17", "property:secreted", "infection"]),
+]
+
+
+def write_kb(root: Path, entries: int, seed: int = 42) -> int:
+    """Write YAML fact lists holding the given number of entries; returns the file count."""
+    rng = random.Random(seed)
+    facts_dir = root / "facts"
+    rules_dir = root / "rules"
+    facts_dir.mkdir(parents=True)
+    rules_dir.mkdir(parents=True)
+    files = (entries + ENTRIES_PER_FILE - 1) // ENTRIES_PER_FILE
+    for i in range(1, files + 1):
+        count = min(ENTRIES_PER_FILE, entries - (i - 1) * ENTRIES_PER_FILE)
+        (facts_dir / f"fact-{i:03d}.yaml").write_text(
+            "".join(_fact_entry(rng) for _ in range(count)), encoding="utf-8")
+    pairs = int(files * TEXT_PAIRS_PER_FILE)
+    for i, (fact, rule) in enumerate(pair_texts(pairs, seed), 1):
+        (facts_dir / f"fact{i}.txt").write_text(fact, encoding="utf-8")
+        (rules_dir / f"rule{i}.txt").write_text(rule, encoding="utf-8")
+    return files + 2 * pairs
+
+
+def scan_query(root: Path, terms) -> int:
+    """Files containing every term: the linear scan the index replaces."""
+    needles = [term.split(":", 1)[-1].rstrip("*").lower() for term in terms]
+    matches = 0
+    for path in root.rglob("*"):
+        if path.is_file():
+            text = path.read_text(encoding="utf-8").lower()
+            matches += all(needle in text for needle in needles)
+    return matches
+
+
+def median_ms(func, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def cold_query_ms(path: Path, terms, limit: int) -> float:
+    """Open the snapshot, answer one query and close it."""
+    start = time.perf_counter()
+    index = MappedIndex(str(path))
+    index.query(terms, limit=limit)
+    index.close()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inverted concept index")
+    parser.add_argument("--entries", default="10k,100k", help="Comma-separated YAML entry counts")
+    parser.add_argument("--repeats", type=int, default=20, help="Runs per query")
+    parser.add_argument("--limit", type=int, default=20, help="Hits fetched per query")
+    args = parser.parse_args()
+
+    for entries in (parse_count(e) for e in args.entries.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "kb"
+            files = write_kb(root, entries)
+            indexer = KnowledgeIndexer(kb_path=str(root), index_file=str(Path(tmp) / "index.db"))
+
+            start = time.perf_counter()
+            indexer.update_from_kb()
+            build_time = time.perf_counter() - start
+            stats = indexer.stats()
+
+            # Append one entry to a few files and re-index just those
+            rng = random.Random(7)
+            edited = [f"facts/fact-{i:03d}.yaml"
+                      for i in rng.sample(range(1, entries // ENTRIES_PER_FILE + 1),
+                                          min(EDITED_FILES, entries // ENTRIES_PER_FILE))]
+            for key in edited:
+                with open(root / key, "a", encoding="utf-8") as f:
+                    f.write(_fact_entry(rng))
+            start = time.perf_counter()
+            indexer.update_from_kb(changes=edited)
+            update_time = time.perf_counter() - start
+
+            print(f"{entries:,} entries in {files:,} files: {stats['terms']:,} terms, "
+                  f"{stats['postings']:,} postings")
+            print(f"  build {build_time:.1f} s, incremental update of {len(edited)} files "
+                  f"{update_time * 1000:.1f} ms")
+            snapshot = Path(tmp) / "index.snap"
+            start = time.perf_counter()
+            size = indexer.export_snapshot(str(snapshot))
+            export_time = time.perf_counter() - start
+            mapped = MappedIndex(str(snapshot))
+            print(f"  snapshot export {export_time:.1f} s, {size / 2 ** 20:.1f} MiB")
+
+            print(f"  {'query':<12} {'hits':>6} {'median ms':>10} {'cold ms':>8} "
+                  f"{'snapshot ms':>12} {'scan ms':>9}")
+            for name, terms in QUERIES:
+                hits = len(indexer.query(terms, limit=args.limit))
+                elapsed = median_ms(lambda: indexer.query(terms, limit=args.limit), args.repeats)
+                cold_ms = cold_query_ms(snapshot, terms, args.limit)
+                mapped_ms = median_ms(lambda: mapped.query(terms, limit=args.limit), args.repeats)
+                scan_ms = median_ms(lambda: scan_query(root, terms), 1)
+                print(f"  {name:<12} {hits:>6} {elapsed:>10.2f} {cold_ms:>8.2f} "
+                      f"{mapped_ms:>12.2f} {scan_ms:>9.0f}")
+            mapped.close()
+            indexer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pair Result Memory Benchmark
+============================
+
+Measures with tracemalloc the bytes each fact/rule pair result occupies
+while DeltaAnalyzer keeps it between runs, in three representations:
+dataclasses holding the word sets (the original ContentAnalysis), the
+serialized dictionaries kept until now, and the slotted, count-only
+PairAnalysis/ContentAnalysis objects. Word strings come from a shared
+vocabulary in every case, so only the per-pair structures are counted.
+
+Usage:
+    python scripts/benchmark_memory.py --pairs 10000,100000
+"""
+
+import gc
+import sys
+import argparse
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Set
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.delta_analyzer import ContentAnalysis, DeltaAnalyzer, PairWords
+from generate_kb import pair_texts
+
+
+@dataclass
+class WordSetContent:
+    """The original ContentAnalysis layout: full word sets per pair."""
+    similarity_score: float
+    word_overlap: Set[str]
+    unique_to_first: Set[str]
+    unique_to_second: Set[str]
+
+
+@dataclass
+class WordSetPair:
+    """The original PairAnalysis layout."""
+    fact_id: int
+    fact_exists: bool
+    rule_exists: bool
+    content_analysis: WordSetContent = None
+    consistency_score: float = 0.0
+    issues: List[str] = field(default_factory=list)
+
+
+def retained_bytes(build: Callable[[], Dict]) -> int:
+    """Bytes still allocated once build() has returned, while its result is alive."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    del result
+    gc.collect()
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory taken by delta pair results")
+    parser.add_argument("--pairs", default="10000,100000", help="Comma-separated pair counts")
+    args = parser.parse_args()
+
+    analyzer = DeltaAnalyzer()
+    present = Path(".")  # _build_pair only checks that both paths are given
+
+    print(f"{'pairs':>8} {'word sets B':>12} {'dicts B':>9} {'slotted B':>10} {'saving':>8}")
+    for pairs in (int(p) for p in args.pairs.split(",")):
+        words: List[PairWords] = [analyzer._compare_words(fact, rule)
+                                  for fact, rule in pair_texts(pairs)]
+        contents = []
+        for pair_words in words:
+            overlap = len(pair_words.overlap)
+            union = overlap + len(pair_words.unique_to_fact) + len(pair_words.unique_to_rule)
+            contents.append(ContentAnalysis(overlap / union if union else 0.0, overlap,
+                                            len(pair_words.unique_to_fact),
+                                            len(pair_words.unique_to_rule)))
+
+        def build_word_sets():
+            results = {}
+            for file_id, (pair_words, content) in enumerate(zip(words, contents), 1):
+                pair = WordSetPair(file_id, True, True, WordSetContent(
+                    content.similarity_score, set(pair_words.overlap),
+                    set(pair_words.unique_to_fact), set(pair_words.unique_to_rule)))
+                pair.consistency_score = content.similarity_score
+                if pair.consistency_score < 0.3:
+                    pair.issues.append("Low content similarity between fact and rule")
+                results[file_id] = pair
+            return results
+
+        def build_dicts():
+            return {f"txt:{n}": analyzer._build_pair(f"txt:{n}", present, present, content).to_dict()
+                    for n, content in enumerate(contents, 1)}
+
+        def build_slotted():
+            return {f"txt:{n}": analyzer._build_pair(f"txt:{n}", present, present, content)
+                    for n, content in enumerate(contents, 1)}
+
+        tracemalloc.start()
+        # ContentAnalysis objects are shared with the pair cache, so count them once here
+        slotted = retained_bytes(build_slotted) + \
+            retained_bytes(lambda: [ContentAnalysis(c.similarity_score, c.word_overlap_count,
+                                                    c.unique_words_in_fact, c.unique_words_in_rule)
+                                    for c in contents])
+        word_sets = retained_bytes(build_word_sets)
+        dicts = retained_bytes(build_dicts)
+        tracemalloc.stop()
+
+        print(f"{pairs:>8} {word_sets / pairs:>12.0f} {dicts / pairs:>9.0f} {slotted / pairs:>10.0f} "
+              f"{dicts / slotted:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
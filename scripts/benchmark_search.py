@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Search Index Benchmark
+======================
+
+Builds a SearchIndex over a synthetic knowledge base of YAML fact lists
+whose words follow a Zipf distribution (the generate_kb vocabulary has
+too few distinct words to exercise ranking), times an incremental update
+after a few edits, then runs multi-word queries with MaxScore top-k
+evaluation and with exhaustive scoring of every posting. Both must
+return the same hits; the table shows median and p95 latency and the
+postings scored per query.
+
+Usage:
+    python scripts/benchmark_search.py --entries 100k,1m
+"""
+
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+from itertools import accumulate
+from pathlib import Path
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.search import SearchIndex
+from generate_kb import parse_count
+
+VOCABULARY = 50000
+ENTRIES_PER_FILE = 100
+WORDS_PER_ENTRY = (4, 30)
+EDITED_FILES = 10
+QUERIES = 50
+QUERY_WORDS = (2, 5)
+
+
+class ZipfWords:
+    """Draws words w0, w1, ... with probability proportional to 1 / (rank + 1)."""
+
+    def __init__(self, rng: random.Random, size: int = VOCABULARY):
+        self.rng = rng
+        self.words = [f"w{rank}" for rank in range(size)]
+        self.cumulative = list(accumulate(1 / (rank + 1) for rank in range(size)))
+
+    def sample(self, count: int):
+        return self.rng.choices(self.words, cum_weights=self.cumulative, k=count)
+
+
+def fact_entry(words: ZipfWords) -> str:
+    text = words.sample(words.rng.randint(*WORDS_PER_ENTRY))
+    return (f"- concept: {' '.join(text[:2])}\n"
+            f"  property: {text[2]}\n"
+            f"  context: {' '.join(text[3:])}\n")
+
+
+def write_kb(root: Path, entries: int, words: ZipfWords) -> int:
+    """Write YAML fact lists holding the given number of entries; returns the file count."""
+    facts_dir = root / "facts"
+    facts_dir.mkdir(parents=True)
+    (root / "rules").mkdir()
+    files = (entries + ENTRIES_PER_FILE - 1) // ENTRIES_PER_FILE
+    for i in range(1, files + 1):
+        count = min(ENTRIES_PER_FILE, entries - (i - 1) * ENTRIES_PER_FILE)
+        (facts_dir / f"fact-{i:05d}.yaml").write_text(
+            "".join(fact_entry(words) for _ in range(count)), encoding="utf-8")
+    return files
+
+
+def timed_search(index: SearchIndex, query: str, limit: int, exhaustive: bool):
+    scored = index.stats()["scored"]
+    start = time.perf_counter()
+    hits = index.search(query, limit=limit, exhaustive=exhaustive)
+    return hits, (time.perf_counter() - start) * 1000, index.stats()["scored"] - scored
+
+
+def same_hits(a, b) -> bool:
+    """Equal rankings, allowing for float rounding when scores tie."""
+    return len(a) == len(b) and all(abs(x["score"] - y["score"]) < 1e-3 for x, y in zip(a, b)) \
+        and {(x["file"], x["entry"]) for x in a} == {(y["file"], y["entry"]) for y in b}
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 top-k search")
+    parser.add_argument("--entries", default="10k,100k", help="Comma-separated YAML entry counts")
+    parser.add_argument("--limit", type=int, default=10, help="Hits per query (k)")
+    args = parser.parse_args()
+
+    for entries in (parse_count(e) for e in args.entries.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            words = ZipfWords(random.Random(42))
+            root = Path(tmp) / "kb"
+            files = write_kb(root, entries, words)
+            index = SearchIndex(kb_path=str(root), index_file=str(Path(tmp) / "search.db"))
+
+            start = time.perf_counter()
+            index.update_from_kb()
+            build_time = time.perf_counter() - start
+            stats = index.stats()
+
+            # Append one entry to a few files and re-index just those
+            edited = [f"facts/fact-{i:05d}.yaml"
+                      for i in words.rng.sample(range(1, files + 1), min(EDITED_FILES, files))]
+            for key in edited:
+                with open(root / key, "a", encoding="utf-8") as f:
+                    f.write(fact_entry(words))
+            start = time.perf_counter()
+            index.update_from_kb(changes=edited)
+            update_time = time.perf_counter() - start
+
+            print(f"{entries:,} entries in {files:,} files: {stats['terms']:,} terms, "
+                  f"{stats['postings']:,} postings")
+            print(f"  build {build_time:.1f} s, incremental update of {len(edited)} files "
+                  f"{update_time * 1000:.1f} ms")
+
+            queries = [" ".join(words.sample(words.rng.randint(*QUERY_WORDS))) for _ in range(QUERIES)]
+            results = {True: ([], []), False: ([], [])}
+            mismatches = 0
+            for query in queries:
+                pruned, pruned_ms, pruned_scored = timed_search(index, query, args.limit, False)
+                full, full_ms, full_scored = timed_search(index, query, args.limit, True)
+                mismatches += not same_hits(pruned, full)
+                results[False][0].append(pruned_ms)
+                results[False][1].append(pruned_scored)
+                results[True][0].append(full_ms)
+                results[True][1].append(full_scored)
+
+            print(f"  {QUERIES} queries of {QUERY_WORDS[0]}-{QUERY_WORDS[1]} words, top {args.limit}"
+                  f"{'' if not mismatches else f' ({mismatches} with different hits!)'}")
+            print(f"  {'evaluation':<12} {'median ms':>10} {'p95 ms':>8} {'scored/query':>13}")
+            for name, exhaustive in (("maxscore", False), ("exhaustive", True)):
+                latencies, scored = results[exhaustive]
+                print(f"  {name:<12} {statistics.median(latencies):>10.2f} "
+                      f"{percentile(latencies, 0.95):>8.2f} {statistics.mean(scored):>13,.0f}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+End-to-End Sensing Benchmark
+============================
+
+Generates synthetic knowledge bases (see generate_kb.py) and times each
+phase of the pipeline: the initial gamma scan, an unchanged rescan, a scan
+after a controlled mutation, delta analysis and YAML validation. Every
+phase runs in a forked child process so its peak RSS and I/O syscall
+counts are its own.
+
+Results can be saved as a JSON baseline and compared against later runs.
+
+Usage:
+    python scripts/benchmark_suite.py --sizes 1k,10k --save-baseline bench.json
+    python scripts/benchmark_suite.py --sizes 1k,10k --compare bench.json
+"""
+
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.gamma_detector import GammaDetector, RACY_MTIME_WINDOW_NS
+from sensing.delta_analyzer import DeltaAnalyzer
+from generate_kb import generate_kb, mutate_kb, parse_count
+from validate_kb import validate_kb
+
+
+PHASES = ["gamma_initial", "gamma_rescan", "gamma_incremental", "delta", "validate"]
+REGRESSION_THRESHOLD = 0.10
+
+
+def _read_proc_io() -> Dict[str, int]:
+    """Syscall and byte counters from /proc/self/io (empty where unsupported)."""
+    try:
+        with open("/proc/self/io", 'r') as f:
+            return {key: int(value) for key, value in
+                    (line.split(":") for line in f if ":" in line)}
+    except OSError:
+        return {}
+
+
+def _measure(func: Callable[[], int], queue) -> None:
+    """Child process body: run func and report its cost."""
+    io_before = _read_proc_io()
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    items = func()
+    elapsed = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    io_after = _read_proc_io()
+
+    def io_delta(key):
+        return io_after[key] - io_before[key] if key in io_after and key in io_before else None
+
+    queue.put({
+        "seconds": elapsed,
+        "items": items,
+        "items_per_second": items / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mib": usage_after.ru_maxrss / 1024,  # ru_maxrss is in KiB on Linux
+        "read_syscalls": io_delta("syscr"),
+        "write_syscalls": io_delta("syscw"),
+        "bytes_read": io_delta("rchar"),
+        "context_switches": (usage_after.ru_nvcsw - usage_before.ru_nvcsw
+                             + usage_after.ru_nivcsw - usage_before.ru_nivcsw)
+    })
+
+
+def run_phase(func: Callable[[], int]) -> Dict:
+    """Run one phase in a forked child and return its measurements."""
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(func, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def benchmark_size(file_count: int, mutation_rate: float, workers: int, seed: int) -> Dict[str, Dict]:
+    """Generate a KB of file_count files and measure every phase on it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path = Path(tmp) / "kb"
+        state_file = str(Path(tmp) / "state.db")
+        generate_kb(kb_path, file_count, seed)
+        # Let freshly written files age past the racy-mtime window, otherwise
+        # the rescan would re-hash everything instead of trusting stat()
+        time.sleep(RACY_MTIME_WINDOW_NS / 1e9)
+
+        def gamma_scan():
+            detector = GammaDetector(kb_path=str(kb_path), max_workers=workers, state_file=state_file)
+            results = detector.scan_for_changes()
+            detector.close()
+            return results["gamma_metrics"]["total_files"]
+
+        def delta():
+            results = DeltaAnalyzer(kb_path=str(kb_path)).analyze_fact_rule_pairs()
+            return results["summary"]["total_pairs_found"]
+
+        def validate():
+            return len(validate_kb(str(kb_path)))
+
+        phases = {}
+        phases["gamma_initial"] = run_phase(gamma_scan)
+        phases["gamma_rescan"] = run_phase(gamma_scan)
+        mutate_kb(kb_path, mutation_rate, seed)
+        time.sleep(RACY_MTIME_WINDOW_NS / 1e9)
+        phases["gamma_incremental"] = run_phase(gamma_scan)
+        phases["delta"] = run_phase(delta)
+        phases["validate"] = run_phase(validate)
+        return phases
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare wall times against a saved baseline.
+
+    Returns:
+        Descriptions of phases that got slower by more than threshold
+    """
+    regressions = []
+    for size, phases in results["sizes"].items():
+        for phase, metrics in phases.items():
+            reference = baseline.get("sizes", {}).get(size, {}).get(phase)
+            if not reference or reference["seconds"] <= 0:
+                continue
+            change = metrics["seconds"] / reference["seconds"] - 1
+            marker = "⚠️ " if change > threshold else "  "
+            print(f"{marker}{size:>8} {phase:<18} {reference['seconds']:>9.3f}s → "
+                  f"{metrics['seconds']:>9.3f}s ({change:+.1%})")
+            if change > threshold:
+                regressions.append(f"{size} {phase}: {change:+.1%}")
+    return regressions
+
+
+def _format(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gamma, delta and validation phases")
+    parser.add_argument("--sizes", default="1k", help="Comma-separated KB sizes (e.g. 1k,10k,100k,1M)")
+    parser.add_argument("--mutation-rate", type=float, default=0.01,
+                        help="Fraction of files changed before the incremental scan")
+    parser.add_argument("--workers", type=int, default=1, help="GammaDetector max_workers")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the generated KBs")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Slowdown fraction reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mutation_rate": args.mutation_rate,
+        "workers": args.workers,
+        "sizes": {}
+    }
+
+    print(f"{'size':>8} {'phase':<18} {'seconds':>9} {'items/s':>10} {'RSS MiB':>8} "
+          f"{'read sc':>9} {'write sc':>9}")
+    for size in args.sizes.split(","):
+        phases = benchmark_size(parse_count(size), args.mutation_rate, args.workers, args.seed)
+        results["sizes"][size] = phases
+        for phase in PHASES:
+            m = phases[phase]
+            print(f"{size:>8} {phase:<18} {m['seconds']:>9.3f} {m['items_per_second']:>10.0f} "
+                  f"{m['peak_rss_mib']:>8.1f} {_format(m['read_syscalls'], '>9')} "
+                  f"{_format(m['write_syscalls'], '>9')}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f"\n📊 Compared with baseline from {baseline.get('timestamp', 'unknown')[:19]}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,13 @@
 Simple Gamma/Delta Check - builds on your existing validator
 """
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sensing.pair_index import PairIndex
+
 def check_fact_rule_pairs(kb_path="kb"):
     """Check for matching fact/rule pairs."""
     facts_dir = Path(kb_path) / "facts" 
@@ -18,18 +23,16 @@ def check_fact_rule_pairs(kb_path="kb"):
         print(f"❌ Rules directory not found: {rules_dir.absolute()}")
         return
     
-    fact_files = {f.stem.replace('fact', ''): f for f in facts_dir.glob('fact*.txt')}
-    rule_files = {f.stem.replace('rule', ''): f for f in rules_dir.glob('rule*.txt')}
-    
-    all_ids = set(fact_files.keys()) | set(rule_files.keys())
+    # factN.txt/ruleN.txt and fact-NNN.yaml/rule-NNN.yaml, from one listing
+    index = PairIndex(kb_path).build()
     
-    print(f"📊 Found {len(all_ids)} knowledge units")
+    print(f"📊 Found {len(index)} knowledge units")
     
-    for id in sorted(all_ids):
-        has_fact = id in fact_files
-        has_rule = id in rule_files
-        status = "✅" if has_fact and has_rule else "⚠️"
-        print(f"{status} Unit {id}: fact={has_fact}, rule={has_rule}")
+    for pair in index.pairs():
+        has_fact = pair.fact is not None
+        has_rule = pair.rule is not None
+        status = "✅" if pair.complete else "⚠️"
+        print(f"{status} Unit {pair.pair_id}: fact={has_fact}, rule={has_rule}")
 
 if __name__ == "__main__":
     check_fact_rule_pairs()
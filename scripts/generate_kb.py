@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Synthetic Knowledge Base Generator
+==================================
+
+Creates reproducible knowledge bases in the shapes the sensing modules
+read: numbered factN.txt/ruleN.txt pairs, fact-NNN.yaml fact lists and
+rule-NNN.yaml rules with if/then/metadata. A second pass can mutate a
+fraction of the files (modify, add, delete) to simulate edits between
+scans.
+
+Usage:
+    python scripts/generate_kb.py /tmp/kb --files 10k
+    python scripts/generate_kb.py /tmp/kb --mutate 0.01 --seed 7
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+
+CONCEPTS = ["BTN3A1", "BTN2A1", "Vγ9Vδ2 T cells", "IPP", "HMBPP", "CD277",
+            "butyrophilin", "phosphoantigen", "γδ TCR", "NKG2D", "IL-17", "IFN-γ"]
+PROPERTIES = ["activated", "bound_by", "expressed", "inhibited", "upregulated",
+              "downregulated", "recognized_by", "secreted"]
+CONTEXTS = ["infection", "tumor microenvironment", "antibody clone 20.1",
+            "zoledronate treatment", "Mycobacterium tuberculosis", "healthy donor blood"]
+VERBS = ["activates", "binds", "requires", "induces", "suppresses", "signals through"]
+
+# Share of generated files per shape; the .txt share is split into pairs
+SHAPE_MIX = {"pairs": 0.5, "fact_yaml": 0.25, "rule_yaml": 0.25}
+FACTS_PER_YAML = 5
+
+
+def parse_count(text: str) -> int:
+    """Parse counts such as "1000", "10k" or "1M"."""
+    multipliers = {"k": 1000, "m": 1000 * 1000}
+    text = text.strip().lower()
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def _sentence(rng: random.Random) -> str:
+    return f"{rng.choice(CONCEPTS)} {rng.choice(VERBS)} {rng.choice(CONCEPTS)} during {rng.choice(CONTEXTS)}"
+
+
+def _fact_text(rng: random.Random) -> str:
+    return "\n".join(_sentence(rng) for _ in range(rng.randint(1, 4))) + "\n"
+
+
+def _rule_text(rng: random.Random, fact_text: str) -> str:
+    # Rules reuse part of their fact so pairs have realistic overlap
+    first = fact_text.splitlines()[0].split()
+    keep = first[:rng.randint(1, len(first))]
+    return f"When {' '.join(keep)} then {_sentence(rng)}\n"
+
+
+def pair_texts(count: int, seed: int = 42):
+    """Yield (fact text, rule text) for count pairs without touching the disk."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        fact = _fact_text(rng)
+        yield fact, _rule_text(rng, fact)
+
+
+def _fact_entry(rng: random.Random) -> str:
+    return (f"- concept: {rng.choice(CONCEPTS)}\n"
+            f"  property: {rng.choice(PROPERTIES)}\n"
+            f"  context: {rng.choice(CONTEXTS)}\n"
+            f"  source: PMID:{rng.randrange(10**7, 10**8)}\n"
+            f"  confidence: {rng.random():.2f}\n")
+
+
+def _fact_yaml(rng: random.Random) -> str:
+    return "".join(_fact_entry(rng) for _ in range(FACTS_PER_YAML))
+
+
+def _rule_yaml(rng: random.Random, number: int) -> str:
+    return (f"rule_id: rule-{number:03d}\n"
+            f"if: {rng.choice(CONCEPTS)} is {rng.choice(PROPERTIES).replace('_', ' ')} "
+            f"in {rng.choice(CONTEXTS)}\n"
+            f"then: {rng.choice(CONCEPTS)} become {rng.choice(PROPERTIES).replace('_', ' ')}\n"
+            f"metadata:\n"
+            f"  source: PubMed:{rng.randrange(10**7, 10**8)}\n"
+            f"  year: {rng.randint(1995, 2024)}\n"
+            f"  confidence: {rng.randint(50, 99) / 100:.2f}\n")
+
+
+def shape_counts(file_count: int) -> Dict[str, int]:
+    """Split a total file count into pair, fact YAML and rule YAML counts."""
+    pairs = int(file_count * SHAPE_MIX["pairs"]) // 2
+    fact_yaml = int(file_count * SHAPE_MIX["fact_yaml"])
+    rule_yaml = file_count - 2 * pairs - fact_yaml
+    return {"pairs": pairs, "fact_yaml": fact_yaml, "rule_yaml": rule_yaml}
+
+
+def generate_kb(root: Path, file_count: int, seed: int = 42) -> Dict[str, int]:
+    """
+    Write a synthetic knowledge base.
+
+    Args:
+        root: Knowledge base directory (facts/ and rules/ are created in it)
+        file_count: Total number of files to write
+        seed: Random seed; the same seed always produces the same KB
+
+    Returns:
+        Number of files written per shape
+    """
+    rng = random.Random(seed)
+    facts_dir = Path(root) / "facts"
+    rules_dir = Path(root) / "rules"
+    facts_dir.mkdir(parents=True, exist_ok=True)
+    rules_dir.mkdir(parents=True, exist_ok=True)
+
+    counts = shape_counts(file_count)
+    for i in range(1, counts["pairs"] + 1):
+        fact = _fact_text(rng)
+        (facts_dir / f"fact{i}.txt").write_text(fact, encoding="utf-8")
+        (rules_dir / f"rule{i}.txt").write_text(_rule_text(rng, fact), encoding="utf-8")
+    for i in range(1, counts["fact_yaml"] + 1):
+        (facts_dir / f"fact-{i:03d}.yaml").write_text(_fact_yaml(rng), encoding="utf-8")
+    for i in range(1, counts["rule_yaml"] + 1):
+        (rules_dir / f"rule-{i:03d}.yaml").write_text(_rule_yaml(rng, i), encoding="utf-8")
+    return counts
+
+
+def mutate_kb(root: Path, rate: float, seed: int = 1) -> Dict[str, int]:
+    """
+    Modify, delete and add files to simulate edits between scans.
+
+    Of the affected files, 80% are modified in place, 10% are deleted and
+    the same number of new files is added.
+
+    Args:
+        root: Knowledge base directory created by generate_kb()
+        rate: Fraction of existing files to touch (0.0-1.0)
+        seed: Random seed for the choice of files and the new content
+
+    Returns:
+        Number of files modified, deleted and added
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    files: List[Path] = sorted(p for d in ("facts", "rules") for p in (root / d).iterdir()
+                               if p.is_file())
+    touched = rng.sample(files, min(len(files), round(len(files) * rate)))
+    deletes = len(touched) // 10
+    result = {"modified": 0, "deleted": 0, "added": 0}
+
+    for path in touched[deletes:]:
+        with open(path, 'a', encoding='utf-8') as f:
+            if path.name.startswith("rule-"):
+                f.write(f"# revised: {rng.choice(CONTEXTS)}\n")
+            elif path.suffix == ".yaml":
+                f.write(_fact_entry(rng))
+            else:
+                f.write(_sentence(rng) + "\n")
+        result["modified"] += 1
+
+    for path in touched[:deletes]:
+        path.unlink()
+        result["deleted"] += 1
+
+    number = len(files)
+    for _ in range(deletes):
+        number += 1
+        while (root / "facts" / f"fact-{number:03d}.yaml").exists():
+            number += 1
+        (root / "facts" / f"fact-{number:03d}.yaml").write_text(_fact_yaml(rng), encoding="utf-8")
+        result["added"] += 1
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or mutate a synthetic knowledge base")
+    parser.add_argument("kb_path", help="Knowledge base directory to write")
+    parser.add_argument("--files", default="1k", help="Total files to generate (e.g. 1k, 10k, 1M)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--mutate", type=float, metavar="RATE",
+                        help="Mutate an existing KB instead of generating (fraction of files)")
+    args = parser.parse_args()
+
+    kb_path = Path(args.kb_path)
+    if args.mutate is not None:
+        if not (kb_path / "facts").is_dir():
+            print(f"❌ No knowledge base at {kb_path}")
+            sys.exit(1)
+        result = mutate_kb(kb_path, args.mutate, args.seed)
+        print(f"✏️  {result['modified']} modified, {result['deleted']} deleted, "
+              f"{result['added']} added")
+    else:
+        counts = generate_kb(kb_path, parse_count(args.files), args.seed)
+        print(f"🏗️  Wrote {counts['pairs']} fact/rule pairs, {counts['fact_yaml']} fact lists "
+              f"and {counts['rule_yaml']} rules to {kb_path}")
+
+
+if __name__ == "__main__":
+    main()
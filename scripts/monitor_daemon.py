@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Gamma Delta Sense Monitoring Daemon
+===================================
+
+Long-running monitor that keeps the GammaDetector baseline and the latest
+DeltaAnalyzer results in memory. File events from FileMonitor trigger
+targeted scans; a full scan still runs every scan_interval (with jitter)
+as a safety net. State is written only after a scan that found changes
+and on shutdown. A scan that raises is logged and followed, after a
+growing pause, by a full rescan; the daemon keeps running.
+
+Usage:
+    python scripts/monitor_daemon.py start      # run in the foreground
+    python scripts/monitor_daemon.py status     # print scan-loop latency
+    python scripts/monitor_daemon.py stop       # send SIGTERM
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import traceback
+from collections import deque
+from pathlib import Path
+from datetime import datetime
+
+# Add the parent directory to path so we can import sensing modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from sensing.gamma_detector import GammaDetector
+    from sensing.delta_analyzer import DeltaAnalyzer
+    from sensing.file_monitor import FileMonitor
+    from sensing.near_duplicates import NearDuplicateIndex
+    from sensing.indexer import KnowledgeIndexer
+    from sensing.rule_engine import RuleEngine
+    from sensing.search import SearchIndex
+    from sensing.cross_reference import CrossReferenceChecker
+    from sensing.tokenizer import Tokenizer
+    from sensing.config import load_config, get_setting
+except ImportError as e:
+    print(f"❌ Error importing sensing modules: {e}")
+    print("Make sure you're running this from the gamma_delta_sense directory")
+    sys.exit(1)
+
+
+# Wait after a failed run-loop iteration, doubled for each further failure in a row
+ERROR_BACKOFF_SECONDS = 1.0
+ERROR_BACKOFF_MAX_SECONDS = 60.0
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted sequence."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class MonitorDaemon:
+    """
+    Warm-state monitoring loop.
+
+    Keeps one GammaDetector (with autosave disabled), one DeltaAnalyzer
+    result and one FileMonitor alive for the lifetime of the process.
+    """
+
+    def __init__(self, config: dict, kb_path: str = None):
+        self.config = config
+        daemon_config = get_setting(config, "sensing.monitor_daemon", {}) or {}
+
+        self.scan_interval = float(get_setting(
+            config, "sensing.gamma_detection.scan_interval",
+            get_setting(config, "sensing.gamma_detection.scan_interval_seconds", 60)
+        ))
+        self.jitter = float(daemon_config.get("jitter", 0.1))
+        self.status_file = Path(daemon_config.get("status_file", ".monitor_daemon_status.json"))
+
+        self.detector = GammaDetector.from_config(config, kb_path=kb_path)
+        self.detector.autosave = False
+        # One tokenizer, so delta analysis and the indexes share tokens
+        self.tokenizer = Tokenizer.from_config(config)
+        self.analyzer = DeltaAnalyzer.from_config(config, kb_path=str(self.detector.kb_path),
+                                                  tokenizer=self.tokenizer)
+        self.monitor = FileMonitor.from_config(config, kb_path=str(self.detector.kb_path))
+        self.monitor.settle_seconds = float(daemon_config.get("debounce_seconds", 0.5))
+        self.monitor.max_latency_seconds = float(daemon_config.get("max_latency_seconds", 2.0))
+        self.near_duplicates = None
+        if get_setting(config, "sensing.near_duplicates.enabled", False):
+            self.near_duplicates = NearDuplicateIndex.from_config(config, kb_path=str(self.detector.kb_path),
+                                                                  tokenizer=self.tokenizer)
+        self.indexer = None
+        if get_setting(config, "sensing.indexer.enabled", False):
+            self.indexer = KnowledgeIndexer.from_config(config, kb_path=str(self.detector.kb_path),
+                                                        tokenizer=self.tokenizer)
+        self.search_index = None
+        if get_setting(config, "sensing.search.enabled", False):
+            self.search_index = SearchIndex.from_config(config, kb_path=str(self.detector.kb_path),
+                                                        tokenizer=self.tokenizer)
+        self.rule_engine = None
+        if get_setting(config, "sensing.rule_engine.enabled", False):
+            self.rule_engine = RuleEngine.from_config(config, kb_path=str(self.detector.kb_path))
+        self.cross_references = None
+        if get_setting(config, "validation.cross_reference_check", False):
+            self.cross_references = CrossReferenceChecker.from_config(config,
+                                                                      kb_path=str(self.detector.kb_path))
+
+        # Kept current by every scan that finds changes (see _update_components)
+        self.components = {name: component for name, component in (
+            ("near_duplicates", self.near_duplicates), ("indexer", self.indexer),
+            ("search_index", self.search_index), ("rule_engine", self.rule_engine),
+            ("cross_references", self.cross_references)) if component is not None}
+        self._loaded = set()  # components given a full update since startup
+
+        self.delta_results = None
+        self.last_gamma_results = None
+        self.started_at = None
+        self.scan_counts = {"full": 0, "targeted": 0, "with_changes": 0}
+        self.scan_durations = deque(maxlen=1000)
+        self.event_latencies = deque(maxlen=1000)
+        self._next_full_scan = 0.0
+        self._stop_requested = False
+        self._status_requested = False
+        self._failures = 0  # consecutive run-loop iterations that raised
+
+    def _schedule_full_scan(self):
+        """Schedule the next safety-net full scan with +/- jitter."""
+        spread = self.scan_interval * self.jitter
+        self._next_full_scan = time.monotonic() + self.scan_interval + random.uniform(-spread, spread)
+
+    def request_stop(self, signum=None, frame=None):
+        """Signal handler for SIGTERM/SIGINT."""
+        self._stop_requested = True
+
+    def handle_status_request(self, signum=None, frame=None):
+        """Signal handler for SIGUSR1: the run loop writes the status file."""
+        self._status_requested = True
+
+    def run(self):
+        """Run until SIGTERM/SIGINT, then persist state and exit."""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGUSR1, self.handle_status_request)
+
+        try:
+            self.started_at = datetime.now().isoformat()
+            self.monitor.start()
+            print(f"🛰️  Monitoring {self.detector.kb_path} ({self.monitor.mode}, "
+                  f"full scan every {self.scan_interval:.0f}s ±{self.jitter:.0%})")
+
+            self._next_full_scan = 0.0  # the first iteration runs the startup scan
+            while not self._stop_requested:
+                try:
+                    self._run_once()
+                    self._failures = 0
+                except Exception as e:
+                    self._failures += 1
+                    delay = min(ERROR_BACKOFF_MAX_SECONDS,
+                                ERROR_BACKOFF_SECONDS * 2 ** (self._failures - 1))
+                    print(f"❌ Scan loop error ({self._failures} in a row): {e}; "
+                          f"retrying in {delay:.0f}s")
+                    traceback.print_exc()
+                    self._sleep(delay)
+                    # The failed iteration may have lost a change set: rescan everything
+                    self._next_full_scan = 0.0
+        finally:
+            self.shutdown()
+
+    def _run_once(self):
+        """One pass of the run loop: answer a status request, then scan or wait for events."""
+        if self._status_requested:
+            # Written here, never from the handler, so it cannot
+            # interleave with a scan that is updating the same state
+            self._status_requested = False
+            self.write_status()
+        remaining = self._next_full_scan - time.monotonic()
+        if remaining <= 0:
+            self.scan()
+            self._schedule_full_scan()
+            return
+
+        # Wake at least once a second so signals are honoured promptly
+        timeout = min(remaining, 1.0)
+        if not self.monitor.using_inotify:
+            time.sleep(timeout)
+            return
+
+        changes = self.monitor.wait(timeout)
+        if changes is None:
+            return
+        if changes.full_rescan:
+            print(f"⚠️  Full rescan requested: {changes.reason}")
+            self.scan()
+            self._schedule_full_scan()
+        else:
+            self.scan(changes)
+
+    def _sleep(self, seconds: float):
+        """Sleep in short steps so a stop request still ends the daemon promptly."""
+        deadline = time.monotonic() + seconds
+        while not self._stop_requested:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 1.0))
+
+    def scan(self, changes=None):
+        """Run a full scan, or a targeted one for a FileMonitor ChangeSet."""
+        start = time.monotonic()
+        if changes is None:
+            results = self.detector.scan_for_changes()
+        else:
+            results = self.detector.scan_for_changes(paths=changes.paths,
+                                                     directories=changes.directories)
+        self.scan_counts[results["scan_mode"]] += 1
+
+        metrics = results["gamma_metrics"]
+        first = self.delta_results is None
+        if metrics["total_changes"] or first:
+            # After the first scan only the pairs and files touched by a scan are updated
+            changed = DeltaAnalyzer.changed_files(results) if metrics["total_changes"] else None
+            self.delta_results = self.analyzer.analyze_fact_rule_pairs(
+                changes=changed,
+                file_hashes=self.detector.content_hashes(None if first else changed),
+                pair_index=self.detector.pair_index
+            )
+            updates = self._update_components(changed)
+            if self.indexer is not None and (updates["indexer"] or
+                                             not Path(self.indexer.snapshot_file).exists()):
+                self._export_snapshot()
+            self.detector.save_state()
+            self.analyzer.save_cache()
+        if metrics["total_changes"]:
+            self.scan_counts["with_changes"] += 1
+            print(f"[{results['scan_timestamp'][:19]}] {metrics['total_changes']} changes "
+                  f"({metrics['files_added']} added, {metrics['files_deleted']} deleted, "
+                  f"{metrics['files_modified']} modified)")
+            orphaned = [pair_id for pair_id, status in results["pair_changes"].items()
+                        if status == "orphan"]
+            if orphaned:
+                print(f"  ⚠️  {len(orphaned)} pairs now missing a fact or rule: "
+                      f"{', '.join(orphaned[:10])}{' ...' if len(orphaned) > 10 else ''}")
+            inference = updates.get("rule_engine")
+            if inference and (inference["derived_added"] or inference["derived_removed"]):
+                print(f"  🧠 {len(inference['derived_added'])} facts derived, "
+                      f"{len(inference['derived_removed'])} retracted "
+                      f"({inference['firings']} rule firings)")
+            references = updates.get("cross_references")
+            if references and (references["dangling_added"] or references["dangling_removed"]):
+                print(f"  🔗 {len(references['dangling_added'])} dangling rule references, "
+                      f"{len(references['dangling_removed'])} resolved "
+                      f"({references['rules_checked']} rules re-checked)")
+            if references and (references["unknown_conclusions_added"] or
+                               references["unknown_conclusions_removed"]):
+                print(f"  🔗 {len(references['unknown_conclusions_added'])} rule conclusions about "
+                      f"unknown concepts, {len(references['unknown_conclusions_removed'])} resolved")
+
+        end = time.monotonic()
+        self.scan_durations.append(end - start)
+        if changes is not None and changes.first_event_time:
+            self.event_latencies.append(end - changes.first_event_time)
+        self.last_gamma_results = results
+
+    def _update_components(self, changed=None) -> dict:
+        """
+        Bring every enabled index, engine and checker up to date with a scan.
+
+        A component's first update in this process covers the whole
+        knowledge base: one that starts empty (or from an index file
+        written before a restart) would otherwise only learn about the
+        files of the first scan that found changes. After that only the
+        changed files are passed.
+
+        Args:
+            changed: File keys the scan added, modified or deleted (None
+                updates from the whole knowledge base)
+
+        Returns:
+            What each component's update_from_kb() returned, by name
+        """
+        updates = {}
+        for name, component in self.components.items():
+            if changed is None or name not in self._loaded:
+                updates[name] = component.update_from_kb(file_hashes=self.detector.content_hashes())
+                self._loaded.add(name)
+            else:
+                updates[name] = component.update_from_kb(changed,
+                                                         self.detector.content_hashes(changed))
+        return updates
+
+    def latency_report(self) -> dict:
+        """Scan-loop latency statistics in milliseconds."""
+        report = {}
+        for name, values in [("scan_duration_ms", self.scan_durations),
+                             ("event_to_scan_ms", self.event_latencies)]:
+            values = [v * 1000 for v in values]
+            report[name] = {
+                "samples": len(values),
+                "p50": round(_percentile(values, 0.50), 3),
+                "p95": round(_percentile(values, 0.95), 3),
+                "max": round(max(values), 3) if values else 0.0
+            }
+        return report
+
+    def _export_snapshot(self):
+        """Swap in a fresh index snapshot for `sense_changes.py query --snapshot` readers."""
+        try:
+            self.indexer.export_snapshot()
+        except OSError as e:
+            print(f"Warning: Could not write index snapshot: {e}")
+
+    def _near_duplicate_summary(self):
+        """Near-duplicate counts from the live LSH index (None when disabled)."""
+        if self.near_duplicates is None:
+            return None
+        pairs = self.near_duplicates.near_duplicate_pairs()
+        return {
+            "documents": len(self.near_duplicates),
+            "pairs": len(pairs),
+            "contradiction_candidates": sum(1 for p in pairs if p.get("contradiction_candidate"))
+        }
+
+    def write_status(self):
+        """Write daemon status (including latency) to the status file."""
+        summary = (self.delta_results or {}).get("summary", {})
+        status = {
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "updated_at": datetime.now().isoformat(),
+            "monitor_mode": self.monitor.mode,
+            "fallback_reason": self.monitor.fallback_reason,
+            "scans": dict(self.scan_counts),
+            "tracked_files": len(self.detector.baseline_states),
+            "unsaved_changes": self.detector.has_unsaved_changes,
+            "delta_summary": summary,
+            "near_duplicates": self._near_duplicate_summary(),
+            "indexed_files": len(self.indexer) if self.indexer is not None else None,
+            "searchable_documents": len(self.search_index) if self.search_index is not None else None,
+            "rule_engine": self.rule_engine.stats() if self.rule_engine is not None else None,
+            "dangling_references": (self.cross_references.stats()["dangling"]
+                                    if self.cross_references is not None else None),
+            "unknown_conclusions": (self.cross_references.stats()["unknown_conclusions"]
+                                    if self.cross_references is not None else None),
+            "latency": self.latency_report()
+        }
+        tmp_path = self.status_file.with_name(self.status_file.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp_path, self.status_file)
+
+    def shutdown(self):
+        """Persist state and release resources."""
+        print("💾 Saving state and shutting down...")
+        self.monitor.stop()
+        self.write_status()
+        self.detector.close()
+        self.analyzer.close()
+        if self.indexer is not None:
+            self.indexer.close()
+        if self.search_index is not None:
+            self.search_index.close()
+        self.tokenizer.close()
+
+
+def _pid_file(config) -> Path:
+    return Path(get_setting(config, "sensing.monitor_daemon.pid_file", ".monitor_daemon.pid"))
+
+
+def _read_pid(config):
+    """Return the running daemon's pid, or None."""
+    try:
+        pid = int(_pid_file(config).read_text().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+
+def cmd_start(args, config):
+    """Run the daemon in the foreground."""
+    pid = _read_pid(config)
+    if pid is not None:
+        print(f"❌ Daemon already running (pid {pid})")
+        return 1
+
+    pid_file = _pid_file(config)
+    pid_file.write_text(str(os.getpid()))
+    try:
+        MonitorDaemon(config, kb_path=args.kb_path).run()
+    finally:
+        pid_file.unlink(missing_ok=True)
+    return 0
+
+
+def cmd_stop(args, config):
+    """Ask a running daemon to save state and exit."""
+    pid = _read_pid(config)
+    if pid is None:
+        print("ℹ️  Daemon is not running")
+        return 1
+    os.kill(pid, signal.SIGTERM)
+    print(f"⏹️  Sent SIGTERM to daemon (pid {pid})")
+    return 0
+
+
+def cmd_status(args, config):
+    """Print daemon status and scan-loop latency."""
+    status_file = Path(get_setting(config, "sensing.monitor_daemon.status_file",
+                                   ".monitor_daemon_status.json"))
+    pid = _read_pid(config)
+    if pid is not None:
+        # Ask for a fresh snapshot and give the daemon a moment to write it
+        before = status_file.stat().st_mtime_ns if status_file.exists() else 0
+        os.kill(pid, signal.SIGUSR1)
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            if status_file.exists() and status_file.stat().st_mtime_ns != before:
+                break
+            time.sleep(0.05)
+
+    if not status_file.exists():
+        print("ℹ️  No daemon status available")
+        return 1
+
+    with open(status_file, 'r') as f:
+        status = json.load(f)
+
+    print("🛰️  Monitor Daemon Status")
+    print("=" * 40)
+    print(f"  Running: {'✅ pid ' + str(pid) if pid else '❌ (last snapshot shown)'}")
+    print(f"  Updated: {status['updated_at'][:19]}")
+    print(f"  Mode: {status['monitor_mode']}"
+          + (f" ({status['fallback_reason']})" if status.get("fallback_reason") else ""))
+    print(f"  Tracked Files: {status['tracked_files']}")
+    near_duplicates = status.get("near_duplicates")
+    if near_duplicates:
+        print(f"  Near-Duplicates: {near_duplicates['pairs']} pairs, "
+              f"{near_duplicates['contradiction_candidates']} contradiction candidates")
+    if status.get("indexed_files") is not None:
+        print(f"  Knowledge Index: {status['indexed_files']} files")
+    rule_engine = status.get("rule_engine")
+    if rule_engine:
+        print(f"  Rule Engine: {rule_engine['rules']} rules, {rule_engine['facts']} facts, "
+              f"{rule_engine['derived_facts']} derived")
+    scans = status["scans"]
+    print(f"  Scans: {scans['full']} full, {scans['targeted']} targeted, "
+          f"{scans['with_changes']} with changes")
+    for name, label in [("scan_duration_ms", "Scan Duration"), ("event_to_scan_ms", "Event → Scan")]:
+        stats = status["latency"][name]
+        print(f"  {label}: p50 {stats['p50']:.1f} ms, p95 {stats['p95']:.1f} ms, "
+              f"max {stats['max']:.1f} ms ({stats['samples']} samples)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gamma Delta Sense monitoring daemon")
+    parser.add_argument("command", choices=["start", "stop", "status"])
+    parser.add_argument("--kb-path", default=None,
+                        help="Path to knowledge base directory (default: from config)")
+    parser.add_argument("--config", default="sense_config.yaml",
+                        help="Path to configuration file (default: sense_config.yaml)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    commands = {"start": cmd_start, "stop": cmd_stop, "status": cmd_status}
+    sys.exit(commands[args.command](args, config))
+
+
+if __name__ == "__main__":
+    main()
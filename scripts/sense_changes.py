@@ -8,29 +8,71 @@ Save this as scripts/sense_changes.py
 """
 
 import sys
+import time
 import argparse
 import json
 from pathlib import Path
 from datetime import datetime
+from itertools import islice
 
 # Add the parent directory to path so we can import sensing modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from sensing.gamma_detector import GammaDetector
-    from sensing.delta_analyzer import DeltaAnalyzer
+    from sensing.delta_analyzer import DeltaAnalyzer, DeltaSummary
+    from sensing.near_duplicates import NearDuplicateIndex
+    from sensing.indexer import FIELDS, KnowledgeIndexer, read_entry
+    from sensing.mmap_index import MappedIndex, SnapshotFormatError
+    from sensing.rule_engine import RuleEngine
+    from sensing.search import SearchIndex
+    from sensing.cross_reference import CrossReferenceChecker
+    from sensing.config import get_setting, load_config
 except ImportError as e:
     print(f"❌ Error importing sensing modules: {e}")
     print("Make sure you're running this from the gamma_delta_sense directory")
     sys.exit(1)
 
+DIFF_PREVIEW_LINES = 40
+STREAM_DISPLAY_LIMIT = 20
+DETAIL_WORD_LIMIT = 15
+QUERY_SNIPPET_LENGTH = 80
+DANGLING_DISPLAY_LIMIT = 20
+
+
+def _make_detector(args):
+    """Create a GammaDetector configured from sense_config.yaml and CLI flags."""
+    config = load_config(args.config)
+    return GammaDetector.from_config(config, kb_path=args.kb_path, paranoid=args.paranoid)
+
+
+def _current_hashes(args):
+    """
+    Content hashes of the knowledge base as it is now.
+    
+    The scan is not saved, so the gamma baseline stays where it was and
+    the next gamma run still reports every change since then.
+    """
+    detector = _make_detector(args)
+    detector.autosave = False
+    try:
+        detector.scan_for_changes()
+        return detector.content_hashes()
+    finally:
+        detector.close(save=False)
+
+
+def _make_analyzer(args):
+    """Create a DeltaAnalyzer (with its pair cache) configured from sense_config.yaml."""
+    return DeltaAnalyzer.from_config(load_config(args.config), kb_path=args.kb_path)
+
 
 def cmd_gamma(args):
     """Run gamma (change) detection."""
     print("🔍 Running Gamma Detection...")
     print("-" * 40)
     
-    detector = GammaDetector(kb_path=args.kb_path)
+    detector = _make_detector(args)
     results = detector.scan_for_changes()
     
     # Display results
@@ -39,6 +81,7 @@ def cmd_gamma(args):
     print(f"  Total Files: {metrics['total_files']}")
     print(f"  Total Changes: {metrics['total_changes']}")
     print(f"  Change Rate: {metrics['change_rate']:.2%}")
+    print(f"  Files Hashed: {metrics['files_hashed']}")
     print()
     
     if results["new_files"]:
@@ -59,13 +102,28 @@ def cmd_gamma(args):
             size_change = mod["size_change"]
             size_indicator = f"(+{size_change})" if size_change > 0 else f"({size_change})" if size_change < 0 else "(same size)"
             print(f"  ~ {mod['file']} {size_indicator}")
+            for region in mod.get("changed_regions", []):
+                print(f"      lines {region['start_line']}-{region['end_line']} "
+                      f"(bytes {region['offset']}+{region['length']})")
+        print()
+    
+    if results["pair_changes"]:
+        print(f"🔗 Pair Changes ({len(results['pair_changes'])}):")
+        for pair_id, status in results["pair_changes"].items():
+            print(f"  {pair_id}: {status}")
         print()
     
     # Show trends if available
-    trends = detector.get_change_trends()
+    if args.trend_hours:
+        trends = detector.get_change_trends(window_seconds=args.trend_hours * 3600)
+        window_label = f"last {args.trend_hours:g}h, {trends.get('scans_in_window', 0)} scans"
+    else:
+        trends = detector.get_change_trends()
+        window_label = f"last {trends.get('window_size', 0)} scans"
     if trends.get("status") != "insufficient_data":
-        print(f"📈 Change Trends (last {trends['window_size']} scans):")
+        print(f"📈 Change Trends ({window_label}):")
         print(f"  Average Rate: {trends['average_change_rate']:.2%}")
+        print(f"  Smoothed Rate (EWMA): {trends['ewma_change_rate']:.2%}")
         print(f"  Trend: {trends['trend_direction']}")
         print(f"  Total Changes: {trends['total_changes_in_window']}")
     
@@ -76,35 +134,19 @@ def cmd_gamma(args):
         print(f"💾 Detailed results saved to: {args.output}")
 
 
-def cmd_delta(args):
-    """Run delta (difference) analysis."""
-    print("📊 Running Delta Analysis...")
-    print("-" * 40)
-    
-    analyzer = DeltaAnalyzer(kb_path=args.kb_path)
-    results = analyzer.analyze_fact_rule_pairs()
-    
-    # Display summary
-    summary = results["summary"]
-    print(f"📋 Analysis Summary ({results['analysis_timestamp'][:19]})")
+def _print_delta_report(timestamp, summary, recommendations, incomplete_pairs, low_similarity_pairs,
+                        incomplete_total=None, low_similarity_total=None):
+    """Print the delta summary, problem pairs and recommendations."""
+    print(f"📋 Analysis Summary ({timestamp[:19]})")
     print(f"  Total Pairs: {summary['total_pairs_found']}")
     print(f"  Complete Pairs: {summary['complete_pairs']}")
     print(f"  Incomplete Pairs: {summary['incomplete_pairs']}")
     print(f"  Average Similarity: {summary['average_similarity']:.2%}")
     print()
     
-    # Show incomplete pairs
-    incomplete_pairs = []
-    low_similarity_pairs = []
-    
-    for pair_id, analysis in results["pair_analyses"].items():
-        if not (analysis["fact_exists"] and analysis["rule_exists"]):
-            incomplete_pairs.append((pair_id, analysis))
-        elif analysis["consistency_score"] < 0.5:
-            low_similarity_pairs.append((pair_id, analysis))
-    
+    incomplete_total = len(incomplete_pairs) if incomplete_total is None else incomplete_total
     if incomplete_pairs:
-        print(f"⚠️  Incomplete Pairs ({len(incomplete_pairs)}):")
+        print(f"⚠️  Incomplete Pairs ({incomplete_total}):")
         for pair_id, analysis in incomplete_pairs:
             missing = []
             if not analysis["fact_exists"]:
@@ -112,36 +154,145 @@ def cmd_delta(args):
             if not analysis["rule_exists"]:
                 missing.append("rule")
             print(f"  {pair_id}: Missing {', '.join(missing)}")
+        if incomplete_total > len(incomplete_pairs):
+            print(f"  ... and {incomplete_total - len(incomplete_pairs)} more")
         print()
     
+    low_similarity_total = len(low_similarity_pairs) if low_similarity_total is None else low_similarity_total
     if low_similarity_pairs:
-        print(f"🔍 Low Similarity Pairs ({len(low_similarity_pairs)}):")
+        print(f"🔍 Low Similarity Pairs ({low_similarity_total}):")
         for pair_id, analysis in low_similarity_pairs:
             score = analysis["consistency_score"]
             print(f"  {pair_id}: {score:.1%} similarity")
+        if low_similarity_total > len(low_similarity_pairs):
+            print(f"  ... and {low_similarity_total - len(low_similarity_pairs)} more")
         print()
     
     # Show recommendations
-    if results["recommendations"]:
+    if recommendations:
         print("💡 Recommendations:")
-        for rec in results["recommendations"]:
+        for rec in recommendations:
             print(f"  - {rec}")
         print()
+
+
+def _print_pair_detail(analyzer, pair_id, analysis):
+    """Print one pair's analysis and the start of its diff."""
+    print(f"🔬 Detailed Analysis for Pair {pair_id}:")
+    
+    if "content_analysis" in analysis:
+        ca = analysis["content_analysis"]
+        print(f"  Similarity Score: {ca['similarity_score']:.2%}")
+        print(f"  Word Overlap: {ca['word_overlap_count']} words")
+        print(f"  Unique to Fact: {ca['unique_words_in_fact']} words")
+        print(f"  Unique to Rule: {ca['unique_words_in_rule']} words")
+        
+        # Word sets are not kept in the results; rebuild them for this pair only
+        words = analyzer.pair_words(pair_id)
+        if words is not None:
+            for label, word_set in (("Shared", words.overlap), ("Fact only", words.unique_to_fact),
+                                    ("Rule only", words.unique_to_rule)):
+                if word_set:
+                    shown = sorted(word_set)[:DETAIL_WORD_LIMIT]
+                    more = f" (+{len(word_set) - len(shown)} more)" if len(word_set) > len(shown) else ""
+                    print(f"    {label}: {', '.join(shown)}{more}")
+    
+    if analysis["issues"]:
+        print(f"  Issues: {', '.join(analysis['issues'])}")
+    
+    # The diff is only computed here, on demand
+    diff_lines = list(islice(analyzer.pair_diff(pair_id), DIFF_PREVIEW_LINES + 1))
+    if diff_lines:
+        print("  Line Differences:")
+        for line in diff_lines[:DIFF_PREVIEW_LINES]:
+            print(f"    {line}")
+        if len(diff_lines) > DIFF_PREVIEW_LINES:
+            print(f"    ... (first {DIFF_PREVIEW_LINES} lines shown)")
+
+
+def _stream_delta(args, analyzer, detail_id):
+    """
+    Delta analysis with --format jsonl: pairs are written as they are
+    analyzed and only the first few problem pairs are kept for display.
+    """
+    timestamp = datetime.now().isoformat()
+    summary = DeltaSummary()
+    incomplete_pairs = []
+    low_similarity_pairs = []
+    detail = None
+    
+    output = open(args.output, 'w') if args.output else None
+    try:
+        for analysis in analyzer.iter_pair_analyses(summary=summary):
+            pair_id = analysis["pair_id"]
+            if output is not None:
+                output.write(json.dumps(analysis) + "\n")
+            if not (analysis["fact_exists"] and analysis["rule_exists"]):
+                if len(incomplete_pairs) < STREAM_DISPLAY_LIMIT:
+                    incomplete_pairs.append((pair_id, analysis))
+            elif analysis["consistency_score"] < 0.5:
+                if len(low_similarity_pairs) < STREAM_DISPLAY_LIMIT:
+                    low_similarity_pairs.append((pair_id, analysis))
+            if pair_id == detail_id:
+                detail = analysis
+        if output is not None:
+            # The last record carries what is only known once every pair is seen
+            output.write(json.dumps({
+                "analysis_timestamp": timestamp,
+                "summary": summary.to_dict(),
+                "recommendations": summary.recommendations()
+            }) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+    
+    summary_dict = summary.to_dict()
+    _print_delta_report(timestamp, summary_dict, summary.recommendations(),
+                        incomplete_pairs, low_similarity_pairs,
+                        incomplete_total=summary_dict["incomplete_pairs"],
+                        low_similarity_total=summary.low_similarity - summary_dict["incomplete_pairs"])
+    if detail is not None:
+        _print_pair_detail(analyzer, detail_id, detail)
+    if args.output:
+        print(f"💾 Detailed results streamed to: {args.output}")
+
+
+def cmd_delta(args):
+    """Run delta (difference) analysis."""
+    print("📊 Running Delta Analysis...")
+    print("-" * 40)
+    
+    analyzer = _make_analyzer(args)
+    detail_id = None
+    if args.detail:
+        # A bare number means the numbered text pair ("3" -> "txt:3")
+        detail_id = f"txt:{args.detail}" if args.detail.isdigit() else args.detail
+    if args.format == "jsonl":
+        try:
+            _stream_delta(args, analyzer, detail_id)
+        finally:
+            analyzer.close()
+        return
+    
+    results = analyzer.analyze_fact_rule_pairs()
+    analyzer.close()
+    
+    # Show incomplete pairs
+    incomplete_pairs = []
+    low_similarity_pairs = []
+    
+    for pair_id, analysis in results["pair_analyses"].items():
+        if not (analysis["fact_exists"] and analysis["rule_exists"]):
+            incomplete_pairs.append((pair_id, analysis))
+        elif analysis["consistency_score"] < 0.5:
+            low_similarity_pairs.append((pair_id, analysis))
+    
+    _print_delta_report(results["analysis_timestamp"], results["summary"], results["recommendations"],
+                        incomplete_pairs, low_similarity_pairs)
     
     # Detailed analysis for specific pair
-    if args.detail and args.detail in results["pair_analyses"]:
-        print(f"🔬 Detailed Analysis for Pair {args.detail}:")
-        analysis = results["pair_analyses"][args.detail]
-        
-        if "content_analysis" in analysis:
-            ca = analysis["content_analysis"]
-            print(f"  Similarity Score: {ca['similarity_score']:.2%}")
-            print(f"  Word Overlap: {ca['word_overlap_count']} words")
-            print(f"  Unique to Fact: {ca['unique_words_in_fact']} words")
-            print(f"  Unique to Rule: {ca['unique_words_in_rule']} words")
-        
-        if analysis["issues"]:
-            print(f"  Issues: {', '.join(analysis['issues'])}")
+    if detail_id in results["pair_analyses"]:
+        _print_pair_detail(analyzer, detail_id, results["pair_analyses"][detail_id])
     
     # Save detailed results if requested
     if args.output:
@@ -182,7 +333,7 @@ def cmd_status(args):
         
         # Gamma detection
         try:
-            detector = GammaDetector(kb_path=args.kb_path)
+            detector = _make_detector(args)
             gamma_results = detector.scan_for_changes()
             metrics = gamma_results["gamma_metrics"]
             print(f"  Change Rate: {metrics['change_rate']:.2%}")
@@ -192,8 +343,10 @@ def cmd_status(args):
         
         # Delta analysis
         try:
-            analyzer = DeltaAnalyzer(kb_path=args.kb_path)
-            delta_results = analyzer.analyze_fact_rule_pairs()
+            analyzer = _make_analyzer(args)
+            delta_results = analyzer.analyze_fact_rule_pairs(file_hashes=detector.content_hashes(),
+                                                             pair_index=detector.pair_index)
+            analyzer.close()
             summary = delta_results["summary"]
             print(f"  Complete Pairs: {summary['complete_pairs']}/{summary['total_pairs_found']}")
             print(f"  Average Similarity: {summary['average_similarity']:.2%}")
@@ -208,7 +361,7 @@ def cmd_validate(args):
     
     # Run gamma detection
     print("1️⃣ Gamma Detection (Change Analysis)")
-    detector = GammaDetector(kb_path=args.kb_path)
+    detector = _make_detector(args)
     gamma_results = detector.scan_for_changes()
     gamma_metrics = gamma_results["gamma_metrics"]
     
@@ -217,13 +370,40 @@ def cmd_validate(args):
     
     # Run delta analysis
     print("\n2️⃣ Delta Analysis (Content Consistency)")
-    analyzer = DeltaAnalyzer(kb_path=args.kb_path)
-    delta_results = analyzer.analyze_fact_rule_pairs()
+    # Pairs whose files have the same content hashes as before come from the cache
+    analyzer = _make_analyzer(args)
+    delta_results = analyzer.analyze_fact_rule_pairs(file_hashes=detector.content_hashes(),
+                                                     pair_index=detector.pair_index)
+    analyzer.close()
     delta_summary = delta_results["summary"]
     
     print(f"   Complete pairs: {delta_summary['complete_pairs']}")
     print(f"   Incomplete pairs: {delta_summary['incomplete_pairs']}")
     print(f"   Average similarity: {delta_summary['average_similarity']:.2%}")
+    print(f"   Pairs re-analyzed: {delta_results['pairs_analyzed']} "
+          f"({delta_results['cache_hits']} from cache)")
+    
+    dangling = None
+    unknown_conclusions = None
+    config = load_config(args.config)
+    if get_setting(config, "validation.cross_reference_check", False):
+        print("\n3️⃣ Cross-Reference Check (Rule References)")
+        checker = CrossReferenceChecker.from_config(config, kb_path=args.kb_path)
+        checker.update_from_kb(file_hashes=detector.content_hashes())
+        stats = checker.stats()
+        dangling = checker.dangling_references()
+        unknown_conclusions = checker.unknown_conclusions()
+        print(f"   Rules checked: {stats['rules']} structured ({stats['conditions']} conditions, "
+              f"{stats['facts']} facts)")
+        for label, problems in (("Dangling references", dangling),
+                                ("Unknown conclusions", unknown_conclusions)):
+            print(f"   {label}: {len(problems)}")
+            for problem in problems[:DANGLING_DISPLAY_LIMIT]:
+                pattern = ", ".join(f"{field}={value}" for field, value in problem["pattern"].items())
+                print(f"      {problem['file']} {problem['rule']} {problem['clause']}: "
+                      f"{pattern} ({problem['reason']})")
+            if len(problems) > DANGLING_DISPLAY_LIMIT:
+                print(f"      ... ({len(problems) - DANGLING_DISPLAY_LIMIT} more in the --output report)")
     
     # Overall assessment
     print("\n🎯 Overall Assessment:")
@@ -238,6 +418,12 @@ def cmd_validate(args):
     if delta_summary['average_similarity'] < 0.5:
         issues.append("Low average content similarity")
     
+    if dangling:
+        issues.append(f"{len(dangling)} dangling rule references")
+    
+    if unknown_conclusions:
+        issues.append(f"{len(unknown_conclusions)} rule conclusions about unknown concepts")
+    
     if issues:
         print("   ⚠️  Issues found:")
         for issue in issues:
@@ -253,6 +439,8 @@ def cmd_validate(args):
             "validation_timestamp": datetime.now().isoformat(),
             "gamma_results": gamma_results,
             "delta_results": delta_results,
+            "dangling_references": dangling,
+            "unknown_conclusions": unknown_conclusions,
             "issues": issues,
             "status": "failed" if issues else "passed"
         }
@@ -264,6 +452,221 @@ def cmd_validate(args):
     return exit_code
 
 
+def cmd_duplicates(args):
+    """Find near-duplicate and possibly contradictory facts and rules."""
+    print("🧬 Searching for Near-Duplicates...")
+    print("-" * 40)
+    
+    index = NearDuplicateIndex.from_config(load_config(args.config), kb_path=args.kb_path,
+                                           threshold=args.threshold)
+    index.update_from_kb()
+    pairs = index.near_duplicate_pairs()
+    clusters = index.clusters(pairs)
+    contradictions = [p for p in pairs if p.get("contradiction_candidate")]
+    
+    print(f"📋 {len(index)} documents, Jaccard threshold {index.threshold:.2f} "
+          f"({index.bands} bands x {index.rows} rows)")
+    print(f"  Near-Duplicate Pairs: {len(pairs)}")
+    print(f"  Clusters: {len(clusters)}")
+    print()
+    
+    if clusters:
+        print("🔁 Largest Clusters:")
+        for cluster in clusters[:10]:
+            shown = ", ".join(cluster[:5]) + (f" (+{len(cluster) - 5} more)" if len(cluster) > 5 else "")
+            print(f"  [{len(cluster)}] {shown}")
+        print()
+    
+    if contradictions:
+        print(f"⚠️  Contradiction Candidates ({len(contradictions)}):")
+        for pair in contradictions[:20]:
+            terms = ", ".join("/".join(t) for t in pair["opposite_terms"])
+            print(f"  {pair['documents'][0]} ↔ {pair['documents'][1]} "
+                  f"({pair['similarity']:.0%} similar; {terms})")
+        print()
+    
+    evaluation = None
+    if args.evaluate:
+        evaluation = index.evaluate(args.evaluate)
+        print(f"🎯 Exact-Jaccard check on {evaluation['sample_size']} sampled documents:")
+        print(f"  Precision: {evaluation['precision']:.2%} "
+              f"({evaluation['reported_pairs']} reported pairs)")
+        print(f"  Recall: {evaluation['recall']:.2%} ({evaluation['true_pairs']} true pairs)")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"threshold": index.threshold, "pairs": pairs, "clusters": clusters,
+                       "evaluation": evaluation}, f, indent=2)
+        print(f"💾 Detailed results saved to: {args.output}")
+
+
+def _entry_summary(kb_path: Path, hit) -> str:
+    """One line describing a query hit: its indexed YAML fields, or the start of a text file."""
+    entry = read_entry(kb_path, hit["file"], hit["entry"])
+    if entry is not None:
+        text = "  ".join(f"{field}={entry[field]}" for field in FIELDS if field in entry)
+    else:
+        try:
+            text = " ".join((kb_path / hit["file"]).read_text(encoding="utf-8").split())
+        except (OSError, UnicodeDecodeError):
+            text = ""
+    return text if len(text) <= QUERY_SNIPPET_LENGTH else text[:QUERY_SNIPPET_LENGTH - 3] + "..."
+
+
+def cmd_query(args):
+    """Look up facts and rules in the concept index."""
+    print(f"🔎 Querying Knowledge Index: {' AND '.join(args.terms)}")
+    print("-" * 40)
+    
+    config = load_config(args.config)
+    hits = None
+    if args.snapshot:
+        hits = _query_snapshot(args, get_setting(config, "sensing.indexer.snapshot_file",
+                                                 ".knowledge_index.snap"))
+    if hits is None:
+        hits = _query_index(args, config)
+    print()
+    
+    if not hits:
+        print("  No matching facts or rules")
+    else:
+        print(f"✅ Matches ({len(hits) if len(hits) <= args.limit else f'more than {args.limit}'}):")
+        for hit in hits[:args.limit]:
+            print(f"  {hit['file']} #{hit['entry']}  {_entry_summary(Path(args.kb_path), hit)}")
+        if len(hits) > args.limit:
+            print(f"  ... (first {args.limit} shown; use --limit for more)")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"terms": args.terms, "hits": hits[:args.limit]}, f, indent=2)
+        print(f"💾 Detailed results saved to: {args.output}")
+
+
+def _query_index(args, config):
+    """Bring the SQLite index up to date, refresh its snapshot and query it."""
+    # Current content hashes tell the index which files changed since it was last updated
+    file_hashes = _current_hashes(args)
+    indexer = KnowledgeIndexer.from_config(config, kb_path=args.kb_path)
+    try:
+        updated = indexer.update_from_kb(file_hashes=file_hashes)
+        if updated or not Path(indexer.snapshot_file).exists():
+            indexer.export_snapshot()
+        
+        start = time.perf_counter()
+        hits = indexer.query(args.terms, limit=args.limit + 1)
+        elapsed = time.perf_counter() - start
+        
+        print(f"📚 Index: {len(indexer)} files ({updated} re-indexed)")
+        print(f"  Query Time: {elapsed * 1000:.1f} ms")
+    finally:
+        indexer.close()
+    return hits
+
+
+def _query_snapshot(args, snapshot_file: str):
+    """Query the memory-mapped snapshot as is; None when there is no usable snapshot."""
+    start = time.perf_counter()
+    try:
+        index = MappedIndex(snapshot_file)
+    except (OSError, SnapshotFormatError) as e:
+        print(f"Warning: Could not open index snapshot {snapshot_file}: {e}; updating the index instead")
+        return None
+    try:
+        hits = index.query(args.terms, limit=args.limit + 1)
+        elapsed = time.perf_counter() - start
+        print(f"📚 Snapshot: {len(index)} files (not rescanned)")
+        print(f"  Query Time: {elapsed * 1000:.1f} ms (including open)")
+    finally:
+        index.close()
+    return hits
+
+
+def cmd_search(args):
+    """Rank facts and rules against a free-text query with BM25."""
+    query = " ".join(args.query)
+    print(f"🔎 Searching Knowledge Base: {query}")
+    print("-" * 40)
+    
+    # Current content hashes tell the index which files changed since it was last updated
+    file_hashes = _current_hashes(args)
+    index = SearchIndex.from_config(load_config(args.config), kb_path=args.kb_path)
+    try:
+        updated = index.update_from_kb(file_hashes=file_hashes)
+        
+        start = time.perf_counter()
+        hits = index.search(query, limit=args.limit)
+        elapsed = time.perf_counter() - start
+        
+        print(f"📚 Index: {len(index)} documents ({updated} files re-indexed)")
+        print(f"  Query Time: {elapsed * 1000:.1f} ms")
+        print()
+        
+        if not hits:
+            print("  No matching facts or rules")
+        else:
+            print(f"✅ Top {len(hits)} Matches:")
+            for hit in hits:
+                print(f"  {hit['score']:>7.3f}  {hit['file']} #{hit['entry']}  "
+                      f"{_entry_summary(Path(args.kb_path), hit)}")
+    finally:
+        index.close()
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"query": query, "hits": hits}, f, indent=2)
+        print(f"💾 Detailed results saved to: {args.output}")
+
+
+def _fact_text(fact) -> str:
+    """A fact as "concept (subtype) property [context]"."""
+    text = fact.get("concept", "")
+    if fact.get("subtype"):
+        text += f" ({fact['subtype']})"
+    if fact.get("property"):
+        text += f" {fact['property']}"
+    if fact.get("context"):
+        text += f" [{fact['context']}]"
+    return text
+
+
+def cmd_infer(args):
+    """Derive the conclusions of the structured rules."""
+    print("🧠 Running Forward-Chaining Inference...")
+    print("-" * 40)
+    
+    engine = RuleEngine.from_config(load_config(args.config), kb_path=args.kb_path)
+    start = time.perf_counter()
+    summary = engine.update_from_kb()
+    elapsed = time.perf_counter() - start
+    stats = engine.stats()
+    derived = engine.derived_facts()
+    
+    print(f"📚 Rules: {stats['rules']} structured"
+          + (f" ({stats['unstructured_rules']} free-text rules skipped)" if stats['unstructured_rules'] else ""))
+    print(f"  Facts: {stats['facts']}")
+    print(f"  Network: {stats['alpha_nodes']} alpha nodes, {stats['join_nodes']} join nodes")
+    print(f"  Firings: {summary['firings']} in {elapsed * 1000:.1f} ms")
+    print()
+    
+    if not derived:
+        print("  No facts derived")
+    else:
+        print(f"✅ Derived Facts ({len(derived)}):")
+        for fact in derived[:args.limit]:
+            print(f"  {_fact_text(fact)}  ← {', '.join(fact['rules'])}")
+            if args.explain:
+                for derivation in engine.explain(fact)["derivations"]:
+                    premises = "; ".join(_fact_text(premise) for premise in derivation["premises"])
+                    print(f"      {derivation['rule']}: {premises}")
+        if len(derived) > args.limit:
+            print(f"  ... (first {args.limit} shown; use --limit for more)")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"stats": stats, "derived_facts": derived}, f, indent=2)
+        print(f"💾 Detailed results saved to: {args.output}")
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -277,6 +680,12 @@ Examples:
   python scripts/sense_changes.py validate                 # Full validation
   python scripts/sense_changes.py delta --detail 1         # Detailed analysis for pair 1
   python scripts/sense_changes.py gamma --output report.json  # Save results to file
+  python scripts/sense_changes.py --paranoid gamma         # Full re-hash of every file
+  python scripts/sense_changes.py duplicates --evaluate 500   # Near-duplicates + accuracy check
+  python scripts/sense_changes.py query BTN3A1 'property:activ*'  # Facts/rules mentioning both
+  python scripts/sense_changes.py query --snapshot BTN3A1      # Fast lookup, as of the last update
+  python scripts/sense_changes.py search phosphoantigen butyrophilin  # Ranked free-text search
+  python scripts/sense_changes.py infer --explain          # Conclusions of the if/then rules
         """
     )
     
@@ -286,6 +695,18 @@ Examples:
         help="Path to knowledge base directory (default: kb)"
     )
     
+    parser.add_argument(
+        "--config",
+        default="sense_config.yaml",
+        help="Path to configuration file (default: sense_config.yaml)"
+    )
+    
+    parser.add_argument(
+        "--paranoid",
+        action="store_true",
+        help="Re-hash every file instead of trusting unchanged size/mtime"
+    )
+    
     parser.add_argument(
         "--output", 
         help="Save detailed results to JSON file"
@@ -295,10 +716,15 @@ Examples:
     
     # Gamma command
     gamma_parser = subparsers.add_parser('gamma', help='Run gamma (change) detection')
+    gamma_parser.add_argument('--trend-hours', type=float,
+                              help='Report change trends over the last N hours instead of recent scans')
     
     # Delta command  
     delta_parser = subparsers.add_parser('delta', help='Run delta (difference) analysis')
-    delta_parser.add_argument('--detail', help='Show detailed analysis for specific pair ID')
+    delta_parser.add_argument('--detail', help='Show detailed analysis for a pair ID ("3", "txt:3" or "yaml:1")')
+    delta_parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                              help='Output format: json (one document) or jsonl (streamed, one '
+                                   'record per pair, then a summary record)')
     
     # Status command
     status_parser = subparsers.add_parser('status', help='Show system status')
@@ -306,6 +732,33 @@ Examples:
     # Validate command
     validate_parser = subparsers.add_parser('validate', help='Run comprehensive validation')
     
+    # Duplicates command
+    duplicates_parser = subparsers.add_parser('duplicates', help='Find near-duplicate facts and rules')
+    duplicates_parser.add_argument('--threshold', type=float,
+                                   help='Jaccard similarity threshold (default: from config)')
+    duplicates_parser.add_argument('--evaluate', type=int, metavar='N',
+                                   help='Check precision/recall against exact Jaccard on N sampled documents')
+    
+    # Query command
+    query_parser = subparsers.add_parser('query', help='Find facts and rules by concept, field or word')
+    query_parser.add_argument('terms', nargs='+',
+                              help='Terms that must all match: a word or value, field:value '
+                                   f'({", ".join(FIELDS)}), or a prefix ending in *')
+    query_parser.add_argument('--limit', type=int, default=20, help='Matches to show (default: 20)')
+    query_parser.add_argument('--snapshot', action='store_true',
+                              help='Answer from the memory-mapped index snapshot without rescanning')
+    
+    # Search command
+    search_parser = subparsers.add_parser('search', help='Rank facts and rules against free text (BM25)')
+    search_parser.add_argument('query', nargs='+', help='Words to search for')
+    search_parser.add_argument('--limit', type=int, default=10, help='Matches to show (default: 10)')
+    
+    # Infer command
+    infer_parser = subparsers.add_parser('infer', help='Derive the conclusions of structured if/then rules')
+    infer_parser.add_argument('--limit', type=int, default=50, help='Derived facts to show (default: 50)')
+    infer_parser.add_argument('--explain', action='store_true',
+                              help='Show the rule and premises behind each derived fact')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -322,6 +775,14 @@ Examples:
         elif args.command == 'validate':
             exit_code = cmd_validate(args)
             sys.exit(exit_code)
+        elif args.command == 'duplicates':
+            cmd_duplicates(args)
+        elif args.command == 'query':
+            cmd_query(args)
+        elif args.command == 'search':
+            cmd_search(args)
+        elif args.command == 'infer':
+            cmd_infer(args)
     
     except KeyboardInterrupt:
         print("\n\n⏹️  Operation cancelled by user")
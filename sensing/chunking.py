@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Content-Defined Chunking for Large KB Files
+
+Splits a file into variable-size chunks whose boundaries depend only on
+the surrounding content, so an edit changes the chunks around it and
+leaves the rest of the manifest intact. Boundaries are placed on line
+ends: each line's CRC-32 fingerprint decides, with probability
+proportional to the line's length, whether a chunk may end after it. That
+keeps the per-byte work in C (zlib/hashlib) and lets every chunk map
+directly to a line range.
+"""
+
+import zlib
+import hashlib
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import accumulate, compress, repeat
+from operator import add, lt, mod
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+
+DEFAULT_AVG_CHUNK = 64 * 1024
+DEFAULT_MIN_CHUNK = 16 * 1024
+DEFAULT_MAX_CHUNK = 256 * 1024
+READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class Chunk:
+    """One content-defined chunk of a file."""
+    offset: int
+    length: int
+    start_line: int
+    line_count: int
+    digest: str
+
+    def to_list(self) -> list:
+        """Compact form stored in the gamma state."""
+        return [self.offset, self.length, self.start_line, self.line_count, self.digest]
+
+    @classmethod
+    def from_list(cls, values: list) -> 'Chunk':
+        return cls(*values)
+
+
+def _cut_chunks(data: bytes, final: bool, base_offset: int, start_line: int,
+                chunks: List[Chunk], avg_size: int, min_size: int,
+                max_size: int) -> Tuple[int, int]:
+    """
+    Cut as many chunks as possible from the front of data.
+
+    Line fingerprints and boundary candidates are computed with map() and
+    compress() over the split lines, so Python-level work is proportional
+    to the number of chunks rather than the number of lines.
+
+    Returns:
+        (bytes consumed, line number at the start of the remainder)
+    """
+    lines = data.split(b"\n")
+    lines.pop()  # trailing partial line (or b"" after a final newline)
+    ends = list(accumulate(map(add, map(len, lines), repeat(1))))
+    candidates = list(compress(
+        range(len(lines)),
+        map(lt, map(mod, map(zlib.crc32, lines), repeat(avg_size)), map(len, lines))
+    ))
+
+    start = 0
+    next_candidate = 0
+    while start < len(data):
+        while (next_candidate < len(candidates) and
+               ends[candidates[next_candidate]] - start < min_size):
+            next_candidate += 1
+        limit = start + max_size
+        if next_candidate < len(candidates) and ends[candidates[next_candidate]] <= limit:
+            cut = ends[candidates[next_candidate]]
+            next_candidate += 1
+        elif len(data) >= limit:
+            # Forced cut at the last line end before max_size (mid-line if none)
+            last = bisect_right(ends, limit) - 1
+            cut = ends[last] if last >= 0 and ends[last] > start else limit
+        elif final:
+            cut = len(data)
+        else:
+            break
+        piece = data[start:cut]
+        newlines = piece.count(b"\n")
+        digest = hashlib.blake2b(piece, digest_size=16).hexdigest()
+        chunks.append(Chunk(base_offset + start, cut - start, start_line, newlines, digest))
+        start_line += newlines
+        start = cut
+    return start, start_line
+
+
+def chunk_stream(stream: BinaryIO, hasher=None,
+                 avg_size: int = DEFAULT_AVG_CHUNK,
+                 min_size: int = DEFAULT_MIN_CHUNK,
+                 max_size: int = DEFAULT_MAX_CHUNK) -> List[Chunk]:
+    """
+    Chunk a binary stream in a single pass.
+
+    Args:
+        stream: Open binary file
+        hasher: Optional hashlib object updated with the whole content, so
+            the file digest comes out of the same read
+        avg_size: Target average chunk size in bytes
+        min_size: Minimum chunk size (except for the last chunk)
+        max_size: Maximum chunk size; longer lines are split
+
+    Returns:
+        Chunks in file order
+    """
+    chunks: List[Chunk] = []
+    offset = 0
+    start_line = 1
+    carry = b""
+    while True:
+        block = stream.read(READ_SIZE)
+        if hasher is not None and block:
+            hasher.update(block)
+        data = carry + block
+        consumed, start_line = _cut_chunks(data, not block, offset, start_line, chunks,
+                                           avg_size, min_size, max_size)
+        offset += consumed
+        carry = data[consumed:]
+        if not block:
+            return chunks
+
+
+def chunk_file(file_path: Path, hasher=None, **sizes) -> List[Chunk]:
+    """Chunk a file on disk; see chunk_stream()."""
+    with open(file_path, 'rb') as f:
+        return chunk_stream(f, hasher, **sizes)
+
+
+def diff_manifests(old: List[Chunk], new: List[Chunk]) -> List[Dict]:
+    """
+    Locate the regions of the new file that are not present in the old one.
+
+    Chunks are matched by digest; consecutive unmatched chunks are merged.
+    When content was only removed, the region is reported with zero length
+    at the position in the new file where it used to be.
+
+    Returns:
+        Regions as dicts with offset, length, start_line and end_line
+        (1-based, inclusive) in the new file
+    """
+    old_digests: Dict[str, int] = {}
+    for chunk in old:
+        old_digests[chunk.digest] = old_digests.get(chunk.digest, 0) + 1
+    new_digests = {chunk.digest for chunk in new}
+
+    regions: List[Dict] = []
+    previous_changed = False
+    for chunk in new:
+        unmatched = old_digests.get(chunk.digest, 0) == 0
+        if not unmatched:
+            old_digests[chunk.digest] -= 1
+        if unmatched:
+            if previous_changed:
+                region = regions[-1]
+                region["length"] += chunk.length
+                region["end_line"] = chunk.start_line + max(chunk.line_count, 1) - 1
+            else:
+                regions.append({
+                    "offset": chunk.offset,
+                    "length": chunk.length,
+                    "start_line": chunk.start_line,
+                    "end_line": chunk.start_line + max(chunk.line_count, 1) - 1
+                })
+        previous_changed = unmatched
+
+    if not regions and any(c.digest not in new_digests for c in old):
+        # Pure deletion: point at where the first missing chunk used to start
+        removed = _first_removed_position(old, new_digests)
+        regions.append({"offset": removed[0], "length": 0,
+                        "start_line": removed[1], "end_line": removed[1]})
+    return regions
+
+
+def _first_removed_position(old: List[Chunk], new_digests: set) -> Tuple[int, int]:
+    """Offset/line in the new file where the first removed old chunk began."""
+    offset = 0
+    line = 1
+    for chunk in old:
+        if chunk.digest not in new_digests:
+            return offset, line
+        offset += chunk.length
+        line += chunk.line_count
+    return offset, line
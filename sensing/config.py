@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Configuration Loading
+
+Reads the package defaults from sensing/config.yaml and overlays the
+project-level sense_config.yaml on top of them.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+
+DEFAULT_CONFIG_FILE = Path(__file__).parent / "config.yaml"
+PROJECT_CONFIG_FILE = "sense_config.yaml"
+
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    """Recursively merge override into a copy of base."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _read_yaml(path: Path) -> Dict:
+    """Read a YAML mapping, returning an empty dict on any problem."""
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        print(f"Warning: Could not load config file {path}: {e}")
+        return {}
+
+
+def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load the effective configuration.
+
+    Args:
+        config_path: Project configuration file (default: sense_config.yaml
+            in the current directory)
+
+    Returns:
+        Package defaults merged with the project configuration
+    """
+    project_file = Path(config_path or PROJECT_CONFIG_FILE)
+    return _merge(_read_yaml(DEFAULT_CONFIG_FILE), _read_yaml(project_file))
+
+
+def get_setting(config: Dict[str, Any], dotted_key: str, default: Any = None) -> Any:
+    """
+    Look up a nested setting such as "performance.max_workers".
+
+    Args:
+        config: Configuration dictionary from load_config()
+        dotted_key: Dot-separated path into the configuration
+        default: Value returned when any part of the path is missing
+
+    Returns:
+        The configured value or the default
+    """
+    node: Any = config
+    for part in dotted_key.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
+
+
+def file_monitoring_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Collect the walker/monitor options from a configuration.
+
+    watch_directories and watch_files are written relative to the project
+    ("kb/facts") and are returned relative to the knowledge base root
+    ("facts").
+
+    Returns:
+        Keyword arguments for KBWalker, GammaDetector and FileMonitor
+    """
+    monitoring = get_setting(config, "sensing.file_monitoring", {}) or {}
+    kb_parts = Path(get_setting(config, "paths.knowledge_base", "kb")).parts
+
+    def relative_to_kb(paths):
+        relative = []
+        for path in paths:
+            parts = Path(path).parts
+            if parts[:len(kb_parts)] == kb_parts:
+                parts = parts[len(kb_parts):]
+            relative.append("/".join(parts))
+        return relative
+
+    return {
+        "watch_directories": relative_to_kb(monitoring.get("watch_directories", ["facts", "rules"])),
+        "file_extensions": get_setting(config, "sensing.monitoring.file_extensions",
+                                       monitoring.get("file_extensions", [".txt", ".yaml"])),
+        "ignore_patterns": monitoring.get("ignore_patterns", ["*.tmp", "*.bak", ".*"]),
+        "recursive": monitoring.get("recursive", True),
+        "watch_files": relative_to_kb(monitoring.get("watch_files", [])),
+    }
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Cross-Reference Checker: Dangling Rule References
+
+Implements validation.cross_reference_check. Every condition in the if:
+list of a structured rule must be satisfiable by some fact: one stated in
+a fact file, or one another rule can conclude (so rule chains are not
+reported). Conditions that are not are dangling references. Every
+constant concept in a then: list should be the concept of a stated fact
+or of another rule's conclusion; those that are neither are reported
+separately, as unknown conclusions.
+
+Conditions are resolved with a hash join instead of testing each one
+against every fact. Conditions are grouped by signature: which fields
+are constant, which must be present and which must be equal (see
+compile_rule). For each signature in use, the facts are projected once
+onto a Counter of their constant fields, so a condition is resolved by a
+single lookup. Checking a whole knowledge base costs O(facts x
+signatures + conditions), and there are only a handful of signatures.
+
+Updates are incremental. A reverse map from (signature, values) to the
+rules that use that key means a change set re-checks only the rules in
+changed files, rules whose keys gained their first or lost their last
+matching fact, and rules whose keys' matching conclusions changed.
+"""
+
+import hashlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import get_setting, file_monitoring_settings
+from .gamma_detector import DEFAULT_HASH_ALGORITHM, configured_hash_algorithm
+from .indexer import YAML_SUFFIXES
+from .rule_engine import FACT_FIELDS, ROOT_FILES, Fact, compile_rule, parse_kb_file
+from .walker import KBWalker
+
+
+# Stands for a conclusion field bound from a variable: it matches any value
+WILDCARD = object()
+
+# Facts whose concept is given: what a then: concept has to refer to
+CONCEPT_SIGNATURE = ((FACT_FIELDS.index("concept"),), (), ())
+
+Signature = Tuple[Tuple[int, ...], Tuple[Tuple[int, int], ...], Tuple[int, ...]]
+
+
+def _project(fact: Fact, signature: Signature) -> Optional[Tuple]:
+    """The constant fields of a fact under a signature (None if it cannot match)."""
+    mask, same, present = signature
+    if any(fact[index] is None for index in present) or \
+            any(fact[a] != fact[b] for a, b in same):
+        return None
+    values = tuple(fact[index] for index in mask)
+    return None if None in values else values
+
+
+def _project_conclusion(template: Tuple, signature: Signature) -> Optional[Tuple]:
+    """What a compiled conclusion can produce under a signature: values and WILDCARDs."""
+    mask, same, present = signature
+    if any(template[index] is None for index in present):
+        return None
+    # Fields tied by one variable must be set, and their constants must agree
+    constants: Dict[int, set] = {}
+    for a, b in same:
+        if template[a] is None or template[b] is None:
+            return None
+        constants.setdefault(a, set()).update(field[1] for field in (template[a], template[b])
+                                              if not field[0])
+    if any(len(values) > 1 for values in constants.values()):
+        return None
+    key = []
+    for index in mask:
+        field = template[index]
+        if field is None:
+            return None
+        key.append(WILDCARD if field[0] else field[1])
+    return tuple(key)
+
+
+def _pattern(raw: Dict) -> Dict[str, str]:
+    """The fact fields of an if/then pattern, for reports."""
+    return {name: str(raw[name]) for name in FACT_FIELDS if raw.get(name) is not None}
+
+
+class _CheckedRule:
+    """A structured rule with its compiled references and current problems."""
+
+    __slots__ = ("key", "file", "rule_id", "conditions", "conclusions", "problems")
+
+    def __init__(self, key: str, file: str, rule_id: str, conditions: List, conclusions: List):
+        self.key = key
+        self.file = file
+        self.rule_id = rule_id
+        # (signature, values, raw pattern) per if: pattern
+        self.conditions = conditions
+        # (template, raw pattern) per then: pattern
+        self.conclusions = conclusions
+        self.problems: List[Dict] = []
+
+    def references(self) -> Iterable[Tuple[Signature, Tuple]]:
+        for signature, values, _ in self.conditions:
+            yield signature, values
+        for template, _ in self.conclusions:
+            concept = template[CONCEPT_SIGNATURE[0][0]]
+            if concept is not None and not concept[0]:
+                yield CONCEPT_SIGNATURE, (concept[1],)
+
+
+class CrossReferenceChecker:
+    """
+    Finds rule conditions that no fact satisfies and conclusions about unknown concepts.
+
+    Build it once with update_from_kb() and keep it current with the
+    change sets of later gamma scans.
+    """
+
+    def __init__(self, kb_path: str = "kb",
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = (),
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            watch_directories: Directories holding fact and rule files,
+                relative to kb_path (ROOT_FILES are read as well)
+            file_extensions: File suffixes to read (only YAML holds
+                structured facts and rules)
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Read subdirectories
+            watch_files: Further files to read, relative to kb_path
+            hash_algorithm: hashlib algorithm for hashing rule and fact files
+                not passed in file_hashes
+        """
+        self.kb_path = Path(kb_path)
+        self.hash_algorithm = hash_algorithm
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+
+        # File key -> (content hash, fact counts, rule keys)
+        self._files: Dict[str, Tuple[str, Counter, List[str]]] = {}
+        self._unstructured_rules: Dict[str, int] = {}
+        self._facts: Counter = Counter()
+        self._rules: Dict[str, _CheckedRule] = {}
+
+        # Signature -> projected values -> number of facts / conclusions
+        self._fact_index: Dict[Signature, Counter] = {}
+        self._conclusion_index: Dict[Signature, Counter] = {}
+        # Signature -> values -> keys of the rules that refer to them
+        self._references: Dict[Signature, Dict[Tuple, Set[str]]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None) -> 'CrossReferenceChecker':
+        """
+        Create a checker using settings from load_config().
+
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+        """
+        return cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            hash_algorithm=configured_hash_algorithm(config),
+            **file_monitoring_settings(config)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Facts, rules and conditions checked, and the problems found."""
+        return {
+            "facts": sum(self._facts.values()),
+            "rules": len(self._rules),
+            "unstructured_rules": sum(self._unstructured_rules.values()),
+            "conditions": sum(len(rule.conditions) for rule in self._rules.values()),
+            "signatures": len(self._fact_index),
+            "dangling": len(self.dangling_references()),
+            "unknown_conclusions": len(self.unknown_conclusions())
+        }
+
+    def update_from_kb(self, changes: Optional[Iterable[str]] = None,
+                       file_hashes: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        Bring facts and rules up to date with the files on disk and
+        re-check the rules the changes can affect.
+
+        Args:
+            changes: File keys added, modified or deleted since the last
+                update (e.g. DeltaAnalyzer.changed_files(gamma_results));
+                None checks the whole knowledge base
+            file_hashes: Content hashes by file key, e.g. from
+                GammaDetector.content_hashes(); a file whose hash matches
+                the loaded one is not read. Without changes, its keys are
+                taken as the complete list of files.
+
+        Returns:
+            Counts of files read and rules checked, with the dangling
+            references that appeared ("dangling_added") and were resolved
+            or removed ("dangling_removed"), and likewise for unknown
+            conclusions ("unknown_conclusions_added"/"_removed")
+        """
+        root_keys = [name for name in ROOT_FILES
+                     if name in self._files or (self.kb_path / name).is_file()]
+        if changes is None:
+            if file_hashes is not None:
+                keys = [key for key in file_hashes if self.walker.accepts(key)]
+            else:
+                keys = [key for key, _, _ in self.walker.walk()]
+            keys = [key for key in keys if key.endswith(YAML_SUFFIXES)]
+            keys.extend(key for key in root_keys if key not in keys)
+            keys.extend(key for key in self._files if key not in keys)
+        else:
+            keys = [key for key in set(changes)
+                    if key.endswith(YAML_SUFFIXES) and self.walker.accepts(key)]
+            keys.extend(key for key in root_keys if key not in keys)
+        file_hashes = file_hashes or {}
+
+        parsed = {}
+        for key in keys:
+            content_hash = file_hashes.get(key)
+            loaded = self._files.get(key)
+            if content_hash and loaded and content_hash == loaded[0]:
+                continue
+            try:
+                data = (self.kb_path / key).read_bytes()
+            except OSError:
+                if loaded is not None:
+                    parsed[key] = None
+                continue
+            content_hash = content_hash or hashlib.new(self.hash_algorithm, data).hexdigest()
+            if loaded is None or content_hash != loaded[0]:
+                parsed[key] = (content_hash,) + self._parse_file(key, data)
+
+        before: Dict[str, List[Dict]] = {}
+        affected: Set[Tuple[Signature, Tuple]] = set()
+        recheck: Set[str] = set()
+
+        # Old rules go first, so their conclusions stop counting as providers
+        for key in parsed:
+            for rule_key in (self._files[key][2] if key in self._files else []):
+                rule = self._rules.pop(rule_key)
+                before[rule_key] = rule.problems
+                self._unregister(rule, affected)
+
+        delta: Counter = Counter()
+        for key, update in parsed.items():
+            old_facts = self._files[key][1] if key in self._files else Counter()
+            new_facts = update[1] if update else Counter()
+            delta.update(new_facts)
+            delta.subtract(old_facts)
+        for fact, change in delta.items():
+            if change:
+                self._count_fact(fact, change, affected)
+
+        for key, update in parsed.items():
+            if update is None:
+                del self._files[key]
+                self._unstructured_rules.pop(key, None)
+                continue
+            content_hash, facts, rules, unstructured = update
+            for rule in rules:
+                # Registered before it is stored, so a signature it introduces
+                # does not count its conclusions twice
+                self._register(rule, affected)
+                self._rules[rule.key] = rule
+                recheck.add(rule.key)
+            self._files[key] = (content_hash, facts, [rule.key for rule in rules])
+            if unstructured:
+                self._unstructured_rules[key] = unstructured
+            else:
+                self._unstructured_rules.pop(key, None)
+
+        recheck.update(self._referring_rules(affected))
+        added, removed = [], []
+        for rule_key in recheck:
+            rule = self._rules.get(rule_key)
+            if rule is None:
+                continue
+            old = before.pop(rule_key, rule.problems)
+            self._check(rule)
+            added.extend(problem for problem in rule.problems if problem not in old)
+            removed.extend(problem for problem in old if problem not in rule.problems)
+        for problems in before.values():
+            removed.extend(problems)  # rules that are gone
+
+        added.sort(key=_problem_order)
+        removed.sort(key=_problem_order)
+        return {"files": len(parsed), "rules_checked": len(recheck),
+                "dangling_added": [p for p in added if p["clause"] == "if"],
+                "dangling_removed": [p for p in removed if p["clause"] == "if"],
+                "unknown_conclusions_added": [p for p in added if p["clause"] == "then"],
+                "unknown_conclusions_removed": [p for p in removed if p["clause"] == "then"]}
+
+    def dangling_references(self) -> List[Dict]:
+        """
+        Every if: condition that no fact satisfies.
+
+        Returns:
+            {"file", "rule", "clause" ("if"), "pattern", "reason"} dicts,
+            ordered by file and rule
+        """
+        return self._problems("if")
+
+    def unknown_conclusions(self) -> List[Dict]:
+        """
+        Every then: concept that is neither a fact's concept nor another rule's conclusion.
+
+        Returns:
+            {"file", "rule", "clause" ("then"), "pattern", "reason"} dicts,
+            ordered by file and rule
+        """
+        return self._problems("then")
+
+    def _problems(self, clause: str) -> List[Dict]:
+        return sorted((problem for rule in self._rules.values() for problem in rule.problems
+                       if problem["clause"] == clause), key=_problem_order)
+
+    def _parse_file(self, key: str, data: bytes) -> Tuple[Counter, List[_CheckedRule], int]:
+        """Fact counts, compiled rules and the number of free-text rules in one file."""
+        facts, structured, unstructured = parse_kb_file(key, data)
+        rules = []
+        for rule_key, (rule_id, conditions, conclusions) in structured.items():
+            try:
+                compiled_conditions, compiled_conclusions = compile_rule(conditions, conclusions)
+            except ValueError as e:
+                print(f"Warning: Skipping rule {rule_id} in {key}: {e}")
+                continue
+            rules.append(_CheckedRule(
+                rule_key, key, rule_id,
+                [((mask, same, present), values, _pattern(raw))
+                 for ((mask, values, same, present), _, _), raw in zip(compiled_conditions, conditions)],
+                [(template, _pattern(raw)) for template, raw in zip(compiled_conclusions, conclusions)]
+            ))
+        return facts, rules, unstructured
+
+    def _count_fact(self, fact: Fact, change: int, affected: Set) -> None:
+        """Add or remove copies of a fact; keys whose first or last fact changed are affected."""
+        old = self._facts[fact]
+        new = old + change
+        if new:
+            self._facts[fact] = new
+        else:
+            del self._facts[fact]
+        if old and new:
+            return
+        for signature, counts in self._fact_index.items():
+            values = _project(fact, signature)
+            if values is not None:
+                self._bump(counts, values, 1 if new else -1, signature, affected)
+
+    def _register(self, rule: _CheckedRule, affected: Set) -> None:
+        for signature, values in rule.references():
+            if signature not in self._fact_index:
+                self._index_signature(signature)
+            self._references[signature].setdefault(values, set()).add(rule.key)
+        for template, _ in rule.conclusions:
+            for signature, counts in self._conclusion_index.items():
+                key = _project_conclusion(template, signature)
+                if key is not None:
+                    self._bump(counts, key, 1, signature, affected, any_change=True)
+
+    def _unregister(self, rule: _CheckedRule, affected: Set) -> None:
+        for template, _ in rule.conclusions:
+            for signature, counts in self._conclusion_index.items():
+                key = _project_conclusion(template, signature)
+                if key is not None:
+                    self._bump(counts, key, -1, signature, affected, any_change=True)
+        for signature, values in rule.references():
+            references = self._references.get(signature, {})
+            users = references.get(values)
+            if users is not None:  # a rule may refer to the same values twice
+                users.discard(rule.key)
+                if not users:
+                    del references[values]
+            if not references and signature in self._references:
+                # No rule uses the signature any more: stop maintaining it
+                del self._references[signature]
+                del self._fact_index[signature]
+                del self._conclusion_index[signature]
+
+    def _index_signature(self, signature: Signature) -> None:
+        """Project every fact and conclusion onto a signature that was not in use."""
+        facts = Counter()
+        for fact in self._facts:
+            values = _project(fact, signature)
+            if values is not None:
+                facts[values] += 1
+        conclusions = Counter()
+        for rule in self._rules.values():
+            for template, _ in rule.conclusions:
+                key = _project_conclusion(template, signature)
+                if key is not None:
+                    conclusions[key] += 1
+        self._fact_index[signature] = facts
+        self._conclusion_index[signature] = conclusions
+        self._references[signature] = {}
+
+    @staticmethod
+    def _bump(counts: Counter, key: Tuple, change: int, signature: Signature, affected: Set,
+              any_change: bool = False) -> None:
+        """
+        Change a count; the key is affected when it crosses zero, or on
+        any change with any_change (a rule does not count its own
+        conclusions, so for those zero is not the only threshold).
+        """
+        old = counts[key]
+        if old + change:
+            counts[key] = old + change
+        else:
+            del counts[key]
+        if any_change or not old or not old + change:
+            affected.add((signature, key))
+
+    def _referring_rules(self, affected: Set[Tuple[Signature, Tuple]]) -> Set[str]:
+        """Rules referring to values that the affected fact or conclusion keys cover."""
+        rules: Set[str] = set()
+        # Keys with wildcards, grouped by where their constants are, so each
+        # group scans the references of its signature once
+        patterns: Dict[Tuple[Signature, Tuple[int, ...]], Set[Tuple]] = {}
+        for signature, key in affected:
+            references = self._references.get(signature)
+            if not references:
+                continue
+            if WILDCARD not in key:
+                rules.update(references.get(key, ()))
+                continue
+            positions = tuple(i for i, value in enumerate(key) if value is not WILDCARD)
+            patterns.setdefault((signature, positions), set()).add(tuple(key[i] for i in positions))
+        for (signature, positions), constants in patterns.items():
+            for values, users in self._references[signature].items():
+                if tuple(values[i] for i in positions) in constants:
+                    rules.update(users)
+        return rules
+
+    def _concluded(self, rule: _CheckedRule, signature: Signature, values: Tuple) -> bool:
+        """Whether a rule other than this one can conclude a fact matching the values."""
+        counts = self._conclusion_index[signature]
+        if not counts:
+            return False
+        provided = 0
+        for wildcards in range(1 << len(values)):
+            key = tuple(WILDCARD if wildcards >> i & 1 else value for i, value in enumerate(values))
+            provided += counts.get(key, 0)
+        if not provided:
+            return False
+        own = 0
+        for template, _ in rule.conclusions:
+            key = _project_conclusion(template, signature)
+            if key is not None and all(k is WILDCARD or k == v for k, v in zip(key, values)):
+                own += 1
+        return provided > own
+
+    def _check(self, rule: _CheckedRule) -> None:
+        problems = []
+        for signature, values, raw in rule.conditions:
+            if not self._fact_index[signature].get(values) and \
+                    not self._concluded(rule, signature, values):
+                problems.append({"file": rule.file, "rule": rule.rule_id, "clause": "if",
+                                 "pattern": raw, "reason": "no matching fact"})
+        for template, raw in rule.conclusions:
+            concept = template[CONCEPT_SIGNATURE[0][0]]
+            if concept is None or concept[0]:
+                continue
+            values = (concept[1],)
+            if not self._fact_index[CONCEPT_SIGNATURE].get(values) and \
+                    not self._concluded(rule, CONCEPT_SIGNATURE, values):
+                problems.append({"file": rule.file, "rule": rule.rule_id, "clause": "then",
+                                 "pattern": raw, "reason": "unknown concept"})
+        rule.problems = problems
+
+
+def _problem_order(problem: Dict) -> Tuple:
+    return problem["file"], problem["rule"], problem["clause"] != "if", sorted(problem["pattern"].items())
@@ -0,0 +1,816 @@
+#!/usr/bin/env python3
+"""
+Delta Analysis: Content Difference Analysis
+
+Analyzes differences between fact/rule pairs and content similarity.
+"""
+
+import time
+import queue
+import hashlib
+import multiprocessing
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple, Set, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from .config import get_setting
+from .diff_engine import DEFAULT_ALGORITHM, DEFAULT_MAX_COST, unified_diff
+from .gamma_detector import DEFAULT_HASH_ALGORITHM, FileState, configured_hash_algorithm
+from .pair_cache import PairCache, PairKey
+from .pair_index import Pair, PairIndex, pair_file_key, parse_pair_file, split_pair_id
+from .similarity import PairScore, score_pairs, tokenize
+from .tokenizer import Tokenizer
+
+
+DIFF_CACHE_SIZE = 256
+
+# Pairs read, scored and cached together by iter_pair_analyses()
+STREAM_BATCH_SIZE = 1000
+
+# (path, text or None when it still has to be read)
+Document = Tuple[Path, Optional[str]]
+
+# (pair ID, fact path, rule path), None for a missing file
+PairPaths = Tuple[str, Optional[Path], Optional[Path]]
+
+# Similarity totals are integers in units of the smallest float, 2**-1074
+EXACT_SHIFT = 1074
+
+
+def _exact(score: float) -> int:
+    """A non-negative float as an exact multiple of 2**-EXACT_SHIFT."""
+    numerator, denominator = score.as_integer_ratio()
+    return numerator << (EXACT_SHIFT + 1 - denominator.bit_length())
+
+
+class ContentAnalysis:
+    """Word-level comparison of a fact and a rule, kept as counts."""
+    __slots__ = ("similarity_score", "word_overlap_count", "unique_words_in_fact",
+                 "unique_words_in_rule")
+    
+    def __init__(self, similarity_score: float, word_overlap_count: int,
+                 unique_words_in_fact: int, unique_words_in_rule: int):
+        self.similarity_score = similarity_score
+        self.word_overlap_count = word_overlap_count
+        self.unique_words_in_fact = unique_words_in_fact
+        self.unique_words_in_rule = unique_words_in_rule
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ContentAnalysis':
+        return cls(data["similarity_score"], data["word_overlap_count"],
+                   data["unique_words_in_fact"], data["unique_words_in_rule"])
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ContentAnalysis):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        return f"ContentAnalysis({self.to_dict()})"
+    
+    def to_dict(self) -> Dict:
+        return {
+            "similarity_score": self.similarity_score,
+            "word_overlap_count": self.word_overlap_count,
+            "unique_words_in_fact": self.unique_words_in_fact,
+            "unique_words_in_rule": self.unique_words_in_rule
+        }
+
+
+class PairWords:
+    """The words behind a ContentAnalysis, built only for detail views (see pair_words())."""
+    __slots__ = ("overlap", "unique_to_fact", "unique_to_rule")
+    
+    def __init__(self, overlap: FrozenSet[str], unique_to_fact: FrozenSet[str],
+                 unique_to_rule: FrozenSet[str]):
+        self.overlap = overlap
+        self.unique_to_fact = unique_to_fact
+        self.unique_to_rule = unique_to_rule
+
+
+class PairAnalysis:
+    """
+    Analysis results for a fact/rule pair.
+    
+    Kept for every pair between runs, so it is slotted and its issues are
+    a tuple; to_dict() gives the serialized form.
+    """
+    __slots__ = ("pair_id", "fact_exists", "rule_exists", "content_analysis",
+                 "consistency_score", "issues")
+    
+    def __init__(self, pair_id: str, fact_exists: bool, rule_exists: bool,
+                 content_analysis: Optional[ContentAnalysis] = None,
+                 consistency_score: float = 0.0, issues: Tuple[str, ...] = ()):
+        self.pair_id = pair_id
+        self.fact_exists = fact_exists
+        self.rule_exists = rule_exists
+        self.content_analysis = content_analysis
+        self.consistency_score = consistency_score
+        self.issues = issues
+    
+    @property
+    def fact_id(self) -> int:
+        """The pair's number N ("txt:3" -> 3)."""
+        return split_pair_id(self.pair_id)[1]
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PairAnalysis):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        return f"PairAnalysis({self.to_dict()})"
+    
+    def to_dict(self) -> Dict:
+        result = {
+            "pair_id": self.pair_id,
+            "fact_id": self.fact_id,
+            "fact_exists": self.fact_exists,
+            "rule_exists": self.rule_exists,
+            "consistency_score": self.consistency_score,
+            "issues": list(self.issues)
+        }
+        if self.content_analysis is not None:
+            result["content_analysis"] = self.content_analysis.to_dict()
+        return result
+
+
+@dataclass
+class DeltaSummary:
+    """
+    Running totals over pair results, so a summary never needs the pairs themselves.
+    
+    similarity_sum is kept exactly (see _exact()), so however many pairs
+    are added and removed, the average matches a full run's to the bit.
+    """
+    total_pairs: int = 0
+    complete_pairs: int = 0
+    similarity_sum: int = 0
+    similarity_count: int = 0
+    low_similarity: int = 0
+    
+    def add(self, result: PairAnalysis, sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) one pair result's contribution."""
+        self.total_pairs += sign
+        if result.fact_exists and result.rule_exists:
+            self.complete_pairs += sign
+        if result.content_analysis is not None:
+            self.similarity_sum += sign * _exact(result.consistency_score)
+            self.similarity_count += sign
+        if result.consistency_score < 0.5:
+            self.low_similarity += sign
+    
+    def to_dict(self) -> Dict:
+        """The "summary" section of analyze_fact_rule_pairs() results."""
+        return {
+            "total_pairs_found": self.total_pairs,
+            "complete_pairs": self.complete_pairs,
+            "incomplete_pairs": self.total_pairs - self.complete_pairs,
+            "average_similarity": (self.similarity_sum / (self.similarity_count << EXACT_SHIFT)
+                                   if self.similarity_count else 0.0)
+        }
+    
+    def recommendations(self) -> List[str]:
+        """Follow-up actions implied by the totals."""
+        recommendations = []
+        incomplete_pairs = self.total_pairs - self.complete_pairs
+        if incomplete_pairs > 0:
+            recommendations.append(f"Create missing files for {incomplete_pairs} incomplete pairs")
+        if self.low_similarity:
+            recommendations.append(f"Review {self.low_similarity} pairs with low content similarity")
+        return recommendations
+
+
+class DeltaAnalyzer:
+    """
+    Delta (Difference) Analysis System
+    
+    Analyzes content differences between your fact/rule pairs
+    and identifies inconsistencies or missing relationships.
+    
+    Each pair's content analysis is cached under the content hashes of its
+    two files, and the results of the last run are kept so that a change
+    set from GammaDetector only re-analyzes the pairs it touches.
+    """
+    
+    def __init__(self, kb_path: str = "kb", cache_file: Optional[str] = None,
+                 diff_algorithm: str = DEFAULT_ALGORITHM,
+                 diff_max_cost: int = DEFAULT_MAX_COST, tokenizer: Optional[Tokenizer] = None,
+                 max_workers: int = 1, batch_size: int = 50, timeout_seconds: float = 30,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            cache_file: SQLite file that keeps pair analyses between runs
+                (in-memory only when None)
+            diff_algorithm: "histogram", "patience" or "myers"
+                (see sensing.diff_engine)
+            diff_max_cost: Edit steps a diff may spend on one region before
+                reporting it as replaced
+            tokenizer: Shared Tokenizer (a private in-memory one when None)
+            max_workers: Processes that score uncached pairs (1 = serial)
+            batch_size: Pairs per worker batch
+            timeout_seconds: Time a batch may take before its pairs are
+                reported as timed out
+            hash_algorithm: hashlib algorithm for the content hashes that
+                key the delta and token caches
+        """
+        self.kb_path = Path(kb_path)
+        self.facts_path = self.kb_path / "facts"
+        self.rules_path = self.kb_path / "rules"
+        self.diff_algorithm = diff_algorithm
+        self.diff_max_cost = diff_max_cost
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.timeout_seconds = timeout_seconds
+        self.hash_algorithm = hash_algorithm
+        self._owns_tokenizer = tokenizer is None
+        self.tokenizer = tokenizer if tokenizer is not None else Tokenizer()
+        
+        # (fact hash, rule hash) -> content analysis
+        self._cache: Optional[Dict[PairKey, ContentAnalysis]] = None
+        self._cache_store = PairCache(cache_file) if cache_file else None
+        self._unsaved_cache: Dict[PairKey, ContentAnalysis] = {}
+        self._stale_cache: Set[PairKey] = set()
+        
+        # Results of the last run, updated in place by incremental runs
+        self._pair_results: Optional[Dict[str, PairAnalysis]] = None
+        self._pair_keys: Dict[str, PairKey] = {}
+        self._summary = DeltaSummary()
+        self._counters = {"pairs_analyzed": 0, "cache_hits": 0}
+        
+        # Fully read diffs by content-hash pair (least recently used first)
+        self._diff_cache: "OrderedDict[PairKey, List[str]]" = OrderedDict()
+    
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None,
+                    tokenizer: Optional[Tokenizer] = None) -> 'DeltaAnalyzer':
+        """
+        Create an analyzer using settings from load_config().
+        
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+            tokenizer: Shared Tokenizer (one configured from sensing.tokenizer
+                when None)
+        """
+        parallel = get_setting(config, "sensing.parallel_processing", {}) or {}
+        use_processes = get_setting(config, "sensing.delta_analysis.parallel", False)
+        analyzer = cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            cache_file=get_setting(config, "sensing.delta_analysis.cache_file"),
+            diff_algorithm=get_setting(config, "sensing.delta_analysis.diff_algorithm",
+                                       DEFAULT_ALGORITHM),
+            diff_max_cost=get_setting(config, "sensing.delta_analysis.diff_max_cost",
+                                      DEFAULT_MAX_COST),
+            tokenizer=tokenizer if tokenizer is not None else Tokenizer.from_config(config),
+            max_workers=parallel.get("max_workers", 1) if use_processes else 1,
+            batch_size=parallel.get("batch_size", 50),
+            timeout_seconds=parallel.get("timeout_seconds", 30),
+            hash_algorithm=configured_hash_algorithm(config)
+        )
+        analyzer._owns_tokenizer = tokenizer is None
+        return analyzer
+    
+    @property
+    def cache(self) -> Dict[PairKey, ContentAnalysis]:
+        """Cached pair analyses, loaded from the cache file on first access."""
+        if self._cache is None:
+            self._cache = {}
+            if self._cache_store is not None:
+                try:
+                    self._cache = {key: ContentAnalysis.from_dict(content)
+                                   for key, content in self._cache_store.load().items()}
+                except Exception as e:
+                    print(f"Warning: Could not load delta cache: {e}")
+        return self._cache
+    
+    def analyze_fact_rule_pairs(self, changes: Optional[Iterable[str]] = None,
+                                file_hashes: Optional[Dict[str, str]] = None,
+                                pair_index: Optional[PairIndex] = None) -> Dict[str, any]:
+        """
+        Analyze all fact/rule pairs for content consistency.
+        
+        Pairs are those of the pair index, in every naming scheme
+        (factN.txt/ruleN.txt and fact-NNN.yaml/rule-NNN.yaml), keyed by
+        their scheme-qualified pair ID ("txt:3", "yaml:1").
+        
+        Args:
+            changes: File keys relative to kb_path ("facts/fact3.txt") that
+                were added, modified or deleted since the previous call;
+                only their pairs are re-analyzed. Ignored on the first call,
+                which always analyzes every pair.
+            file_hashes: Content hashes by file key, e.g. from
+                GammaDetector.content_hashes(); files missing from it are
+                hashed here
+            pair_index: Current pairs, e.g. GammaDetector.pair_index; the
+                facts/ and rules/ directories are listed when None
+        
+        Returns:
+            Comprehensive analysis results
+        """
+        results = {
+            "analysis_timestamp": datetime.now().isoformat(),
+            "analysis_mode": "full",
+            "pair_analyses": {},
+            "summary": {
+                "total_pairs_found": 0,
+                "complete_pairs": 0,
+                "incomplete_pairs": 0,
+                "average_similarity": 0.0
+            },
+            "recommendations": []
+        }
+        file_hashes = file_hashes or {}
+        analyzed_before = self._counters["pairs_analyzed"]
+        hits_before = self._counters["cache_hits"]
+        
+        incremental = changes is not None and self._pair_results is not None
+        if incremental:
+            results["analysis_mode"] = "incremental"
+            updates = []
+            for pair_id in sorted(self._changed_pair_ids(changes), key=split_pair_id):
+                if pair_index is not None:
+                    updates.append(self._pair_paths(pair_id, pair_index.get(pair_id)))
+                    continue
+                fact_path, rule_path = self._file_paths(pair_id)
+                updates.append((pair_id, fact_path if fact_path.is_file() else None,
+                                rule_path if rule_path.is_file() else None))
+        else:
+            self._reset_results()
+            
+            # Every pair, from one listing of facts/ and rules/
+            updates = self._all_pairs(pair_index)
+        
+        # Score every complete pair that is not cached in one batch
+        contents = self._pair_contents(
+            [(pair_id, fact_path, rule_path) for pair_id, fact_path, rule_path in updates
+             if fact_path is not None and rule_path is not None],
+            file_hashes
+        )
+        added = False
+        for pair_id, fact_path, rule_path in updates:
+            added |= pair_id not in self._pair_results
+            self._update_pair(pair_id, fact_path, rule_path, contents.get(pair_id))
+        
+        if incremental and added:
+            self._pair_results = dict(sorted(self._pair_results.items(),
+                                             key=lambda item: split_pair_id(item[0])))
+        if not incremental:
+            # Forget analyses no pair refers to any more
+            in_use = set(self._pair_keys.values())
+            self._stale_cache.update(key for key in self.cache if key not in in_use)
+            for key in self._stale_cache:
+                self.cache.pop(key, None)
+        
+        # Summary statistics and recommendations from the running totals
+        results["pair_analyses"] = {pair_id: analysis.to_dict()
+                                    for pair_id, analysis in self._pair_results.items()}
+        results["summary"] = self._summary.to_dict()
+        results["pairs_analyzed"] = self._counters["pairs_analyzed"] - analyzed_before
+        results["cache_hits"] = self._counters["cache_hits"] - hits_before
+        results["recommendations"] = self._summary.recommendations()
+        
+        return results
+    
+    def iter_pair_analyses(self, file_hashes: Optional[Dict[str, str]] = None,
+                           summary: Optional[DeltaSummary] = None,
+                           pair_index: Optional[PairIndex] = None) -> Iterator[Dict]:
+        """
+        Analyze every fact/rule pair and yield the results one at a time.
+        
+        Unlike analyze_fact_rule_pairs(), nothing is kept after a pair is
+        yielded: pairs are analyzed in batches of STREAM_BATCH_SIZE in ID
+        order, cached analyses are looked up per batch instead of loading
+        the whole pair cache, and new ones are written after each batch.
+        Memory stays flat however large the knowledge base is. The results
+        do not become the baseline for incremental runs.
+        
+        Args:
+            file_hashes: Content hashes by file key, as for
+                analyze_fact_rule_pairs()
+            summary: Accumulator that is updated as pairs are yielded; read
+                its to_dict() and recommendations() once the generator is
+                exhausted
+            pair_index: Current pairs, as for analyze_fact_rule_pairs()
+        
+        Returns:
+            Pair results in ID order, as in results["pair_analyses"]
+        """
+        file_hashes = file_hashes or {}
+        all_pairs = self._all_pairs(pair_index)
+        
+        for start in range(0, len(all_pairs), STREAM_BATCH_SIZE):
+            updates = all_pairs[start:start + STREAM_BATCH_SIZE]
+            contents = self._pair_contents(
+                [(pair_id, fact_path, rule_path) for pair_id, fact_path, rule_path in updates
+                 if fact_path is not None and rule_path is not None],
+                file_hashes, streaming=True
+            )
+            self.save_cache()
+            for pair_id, fact_path, rule_path in updates:
+                result = self._build_pair(pair_id, fact_path, rule_path, contents.get(pair_id))
+                if summary is not None:
+                    summary.add(result)
+                yield result.to_dict()
+    
+    def pair_diff(self, pair_id: str) -> Iterator[str]:
+        """
+        Stream the unified diff between a pair's fact and rule files.
+        
+        Nothing is diffed until the generator is iterated. A diff that is
+        read to the end is cached under the pair's content hashes, so
+        asking again for an unchanged pair costs no diffing.
+        
+        Args:
+            pair_id: Scheme-qualified pair ID ("txt:3")
+        
+        Returns:
+            Unified diff lines (empty when either file is missing or unreadable)
+        """
+        fact_path, rule_path = self._file_paths(pair_id)
+        if not (fact_path.is_file() and rule_path.is_file()):
+            return
+        
+        try:
+            key = (self._content_hash(fact_path, {}), self._content_hash(rule_path, {}))
+        except OSError:
+            return
+        cached = self._diff_cache.get(key)
+        if cached is not None:
+            self._diff_cache.move_to_end(key)
+            yield from cached
+            return
+        
+        lines = []
+        for line in self._unified_diff(self._read_file(fact_path), self._read_file(rule_path)):
+            lines.append(line)
+            yield line
+        self._diff_cache[key] = lines
+        if len(self._diff_cache) > DIFF_CACHE_SIZE:
+            self._diff_cache.popitem(last=False)
+    
+    def pair_words(self, pair_id: str) -> Optional[PairWords]:
+        """
+        The shared and unique words of a pair's fact and rule files.
+        
+        Pair results only keep word counts; the words themselves are
+        recomputed here, for detail views.
+        
+        Args:
+            pair_id: Scheme-qualified pair ID ("txt:3")
+        
+        Returns:
+            PairWords, or None when either file is missing
+        """
+        fact_path, rule_path = self._file_paths(pair_id)
+        if not (fact_path.is_file() and rule_path.is_file()):
+            return None
+        return self._compare_words(self._read_file(fact_path), self._read_file(rule_path))
+    
+    def _unified_diff(self, content1: str, content2: str) -> Iterator[str]:
+        """Line diff of two documents, computed as it is consumed."""
+        yield from unified_diff(content1.splitlines(), content2.splitlines(), lineterm="",
+                                algorithm=self.diff_algorithm, max_cost=self.diff_max_cost)
+    
+    @staticmethod
+    def changed_files(gamma_results: Dict) -> List[str]:
+        """File keys added, deleted or modified in a GammaDetector scan result."""
+        return (list(gamma_results.get("new_files", [])) +
+                list(gamma_results.get("deleted_files", [])) +
+                [mod["file"] for mod in gamma_results.get("modified_files", [])])
+    
+    def save_cache(self):
+        """Write new and stale pair analyses (and new document tokens) to their cache files."""
+        self.tokenizer.save()
+        if self._cache_store is None or not (self._unsaved_cache or self._stale_cache):
+            return
+        try:
+            self._cache_store.commit({key: content.to_dict()
+                                      for key, content in self._unsaved_cache.items()},
+                                     self._stale_cache)
+            self._unsaved_cache = {}
+            self._stale_cache = set()
+        except Exception as e:
+            print(f"Warning: Could not save delta cache: {e}")
+    
+    def close(self):
+        """Save the pair cache and close the cache file."""
+        self.save_cache()
+        if self._cache_store is not None:
+            self._cache_store.close()
+        if self._owns_tokenizer:
+            self.tokenizer.close()
+    
+    def _reset_results(self):
+        """Forget the previous run before a full analysis."""
+        self._pair_results = {}
+        self._pair_keys = {}
+        self._summary = DeltaSummary()
+    
+    def _changed_pair_ids(self, changes: Iterable[str]) -> Set[str]:
+        """Pair IDs whose fact or rule file is among the changed keys."""
+        parsed = (parse_pair_file(key) for key in changes)
+        return {pair[0] for pair in parsed if pair is not None}
+    
+    def _file_paths(self, pair_id: str) -> Tuple[Path, Path]:
+        """Paths of a pair's fact and rule files, whether or not they exist."""
+        return (self.kb_path / pair_file_key(pair_id, "fact"),
+                self.kb_path / pair_file_key(pair_id, "rule"))
+    
+    def _all_pairs(self, pair_index: Optional[PairIndex]) -> List[PairPaths]:
+        """(pair ID, fact path, rule path) of every pair, in pair ID order."""
+        if pair_index is None:
+            pair_index = PairIndex(self.kb_path).build()
+        return [self._pair_paths(pair.pair_id, pair) for pair in pair_index.pairs()]
+    
+    def _pair_paths(self, pair_id: str, pair: Optional[Pair]) -> PairPaths:
+        """(pair ID, fact path, rule path) of a pair index entry (None when it is gone)."""
+        if pair is None:
+            return pair_id, None, None
+        return (pair_id,
+                self.kb_path / pair.fact if pair.fact is not None else None,
+                self.kb_path / pair.rule if pair.rule is not None else None)
+    
+    def _update_pair(self, pair_id: str, fact_path: Optional[Path], rule_path: Optional[Path],
+                     content):
+        """Replace one pair's result and adjust the running totals."""
+        previous = self._pair_results.pop(pair_id, None)
+        if previous is not None:
+            self._summary.add(previous, -1)
+        if fact_path is None or rule_path is None:
+            self._pair_keys.pop(pair_id, None)  # only complete pairs have cache keys
+        if fact_path is None and rule_path is None:
+            return
+        
+        result = self._build_pair(pair_id, fact_path, rule_path, content)
+        self._pair_results[pair_id] = result
+        self._summary.add(result)
+    
+    def _build_pair(self, pair_id: str, fact_path: Optional[Path], rule_path: Optional[Path],
+                    content) -> PairAnalysis:
+        """
+        Result of one pair.
+        
+        content is the pair's ContentAnalysis from _pair_contents(), or the
+        exception raised while producing it.
+        """
+        issues = []
+        
+        # Check for missing files
+        for role, path in (("fact", fact_path), ("rule", rule_path)):
+            if path is None:
+                issues.append(f"Missing {pair_file_key(pair_id, role).rpartition('/')[2]}")
+        
+        # Analyze content if both files exist
+        consistency_score = 0.0
+        if isinstance(content, TimeoutError):
+            issues.append(f"Analysis timed out: {content}")
+            content = None
+        elif isinstance(content, Exception):
+            issues.append(f"Error reading files: {content}")
+            content = None
+        elif content is not None:
+            consistency_score = content.similarity_score
+            
+            # Check for potential issues
+            if consistency_score < 0.3:
+                issues.append("Low content similarity between fact and rule")
+        
+        return PairAnalysis(
+            pair_id=pair_id,
+            fact_exists=fact_path is not None,
+            rule_exists=rule_path is not None,
+            content_analysis=content,
+            consistency_score=consistency_score,
+            issues=tuple(issues)
+        )
+    
+    def _pair_contents(self, pairs: List[Tuple[str, Path, Path]],
+                       file_hashes: Dict[str, str], streaming: bool = False) -> Dict[str, any]:
+        """
+        Serialized content analyses for complete pairs, from the cache when possible.
+        
+        Pairs missing from the cache are tokenized (through the shared
+        token cache) and scored together with score_pairs(), or in batches
+        on a process pool when max_workers > 1.
+        
+        With streaming=True the pairs' cache keys are not remembered, and
+        unless the pair cache is already in memory only these pairs'
+        entries are read from the cache file.
+        
+        Returns:
+            ContentAnalysis (or the exception raised) by pair ID
+        """
+        contents: Dict[str, any] = {}
+        keyed = []
+        for pair_id, fact_path, rule_path in pairs:
+            try:
+                fact = self._hash_and_read(fact_path, file_hashes)
+                rule = self._hash_and_read(rule_path, file_hashes)
+            except Exception as e:
+                contents[pair_id] = e
+                continue
+            if fact is None or rule is None:
+                # No content to key on: neither cached nor scored
+                unreadable = fact_path if fact is None else rule_path
+                contents[pair_id] = OSError(f"Could not read {unreadable.name}")
+                if not streaming:
+                    self._pair_keys.pop(pair_id, None)
+                continue
+            key = (fact[0], rule[0])
+            if not streaming:
+                self._pair_keys[pair_id] = key
+            keyed.append((pair_id, key, (fact_path, fact[1]), (rule_path, rule[1])))
+        
+        if streaming and self._cache is None:
+            cache = self._load_cached([key for _, key, _, _ in keyed])
+        else:
+            cache = self.cache
+        misses = []
+        for pair_id, key, fact, rule in keyed:
+            content = cache.get(key)
+            if content is not None:
+                self._counters["cache_hits"] += 1
+                contents[pair_id] = content
+            else:
+                misses.append((pair_id, key, fact, rule))
+        
+        if self.max_workers > 1 and len(misses) > self.batch_size:
+            scores = self._score_parallel([(fact, rule) for _, _, fact, rule in misses])
+        else:
+            self.tokenizer.preload(content_hash for _, key, _, _ in misses for content_hash in key)
+            word_sets = [(self._token_set(fact, key[0]), self._token_set(rule, key[1]))
+                         for _, key, fact, rule in misses]
+            scores = score_pairs(word_sets)
+        for (pair_id, key, _, _), score in zip(misses, scores):
+            if isinstance(score, Exception):
+                contents[pair_id] = score
+                continue
+            similarity, overlap, unique_fact, unique_rule = score
+            content = ContentAnalysis(similarity, overlap, unique_fact, unique_rule)
+            self._counters["pairs_analyzed"] += 1
+            cache[key] = content
+            if self._cache_store is not None:
+                self._unsaved_cache[key] = content
+            self._stale_cache.discard(key)
+            contents[pair_id] = content
+        return contents
+    
+    def _load_cached(self, keys: List[PairKey]) -> Dict[PairKey, ContentAnalysis]:
+        """Cached analyses of the given keys only, straight from the cache file."""
+        if self._cache_store is None:
+            return {}
+        try:
+            return {key: ContentAnalysis.from_dict(content)
+                    for key, content in self._cache_store.get_many(keys).items()}
+        except Exception as e:
+            print(f"Warning: Could not load delta cache: {e}")
+            return {}
+    
+    def _content_hash(self, file_path: Path, file_hashes: Dict[str, str]) -> str:
+        """Content hash from GammaDetector when known, else hash the file (OSError when unreadable)."""
+        file_key = file_path.relative_to(self.kb_path).as_posix()
+        known = file_hashes.get(file_key)
+        if known:
+            return known
+        return FileState._calculate_hash(file_path, self.hash_algorithm)
+    
+    def _hash_and_read(self, file_path: Path,
+                       file_hashes: Dict[str, str]) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Content hash of a file and, when it had to be read for hashing, its text.
+        
+        A file without a known hash is read once and that read serves both
+        the hash and tokenizing on a cache miss.
+        
+        Returns:
+            (content hash, stripped text or None when the hash was known),
+            or None when the file cannot be read
+        """
+        file_key = file_path.relative_to(self.kb_path).as_posix()
+        known = file_hashes.get(file_key)
+        if known:
+            return known, None
+        try:
+            data = file_path.read_bytes()
+        except OSError:
+            return None
+        try:
+            text = data.decode('utf-8').strip()
+        except UnicodeDecodeError:
+            text = ""
+        return hashlib.new(self.hash_algorithm, data).hexdigest(), text
+    
+    def _score_parallel(self, documents: List[Tuple[Document, Document]]) -> List:
+        """
+        Score (fact, rule) documents in batches on a process pool.
+        
+        Workers tokenize with plain word sets, which give the same scores
+        as token IDs; the token cache is not consulted. Batches are started
+        only when a worker is free, so each batch's clock starts when it
+        starts running. A batch that is still running after timeout_seconds
+        yields a TimeoutError for each of its pairs, as do the batches left
+        once every worker is stuck; the pool, stuck workers included, is
+        terminated at the end.
+        
+        Returns:
+            PairScore (or the exception that replaced it) per pair, in order
+        """
+        batches = [documents[start:start + self.batch_size]
+                   for start in range(0, len(documents), self.batch_size)]
+        results: List[Optional[List]] = [None] * len(batches)
+        finished: "queue.Queue[Tuple[int, object]]" = queue.Queue()
+        running = {}  # batch index -> start time
+        stuck = 0
+        next_batch = 0
+        pool = multiprocessing.Pool(self.max_workers)
+        try:
+            while next_batch < len(batches) or running:
+                while next_batch < len(batches) and len(running) + stuck < self.max_workers:
+                    index = next_batch
+                    report = lambda outcome, index=index: finished.put((index, outcome))
+                    pool.apply_async(_score_batch, (batches[index],),
+                                     callback=report, error_callback=report)
+                    running[index] = time.monotonic()
+                    next_batch += 1
+                if not running:
+                    # Every worker is stuck on a timed-out batch
+                    for index in range(next_batch, len(batches)):
+                        results[index] = [TimeoutError("no worker available")] * len(batches[index])
+                    break
+                
+                oldest = min(running.values())
+                wait_seconds = max(0.0, oldest + self.timeout_seconds - time.monotonic())
+                try:
+                    done = [finished.get(timeout=wait_seconds)]
+                except queue.Empty:
+                    done = []
+                while not finished.empty():
+                    done.append(finished.get_nowait())
+                for index, outcome in done:
+                    if running.pop(index, None) is None:
+                        continue  # finished after it was reported as timed out
+                    if isinstance(outcome, Exception):
+                        outcome = [outcome] * len(batches[index])
+                    results[index] = outcome
+                
+                now = time.monotonic()
+                for index, started in list(running.items()):
+                    if now - started >= self.timeout_seconds:
+                        del running[index]
+                        stuck += 1
+                        error = TimeoutError(f"batch exceeded {self.timeout_seconds}s")
+                        results[index] = [error] * len(batches[index])
+        finally:
+            # Pool.terminate() also stops workers stuck on a timed-out batch,
+            # which a process pool executor cannot cancel
+            pool.terminate()
+            pool.join()
+        return [score for batch in results for score in batch]
+    
+    def _token_set(self, document: Document, content_hash: str) -> FrozenSet[int]:
+        """Token IDs of a (path, text or None) document, reading it only when not cached."""
+        file_path, text = document
+        if text is None:
+            token_ids = self.tokenizer.lookup(content_hash)
+            if token_ids is not None:
+                return frozenset(token_ids)
+            text = self._read_file(file_path)
+        return self.tokenizer.token_set(text, content_hash)
+    
+    @staticmethod
+    def _read_file(file_path: Path) -> str:
+        """Read file content with error handling."""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except Exception:
+            return ""
+    
+    def _compare_words(self, content1: str, content2: str) -> PairWords:
+        """Shared and unique words of two pieces of content."""
+        words1 = frozenset(self.tokenizer.words(self.tokenizer.token_set(content1)))
+        words2 = frozenset(self.tokenizer.words(self.tokenizer.token_set(content2)))
+        return PairWords(overlap=words1 & words2, unique_to_fact=words1 - words2,
+                         unique_to_rule=words2 - words1)
+
+
+def _score_batch(documents: List[Tuple[Document, Document]]) -> List[PairScore]:
+    """Process pool worker: read, tokenize and score a batch of (fact, rule) documents."""
+    word_sets = [
+        tuple(tokenize(text if text is not None else DeltaAnalyzer._read_file(path))
+              for path, text in pair)
+        for pair in documents
+    ]
+    return score_pairs(word_sets)
+
+
+if __name__ == "__main__":
+    # Test the delta analyzer
+    analyzer = DeltaAnalyzer()
+    results = analyzer.analyze_fact_rule_pairs()
+    print(f"Analyzed {results['summary']['total_pairs_found']} pairs")
+    print(f"Average similarity: {results['summary']['average_similarity']:.2%}")
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Line Diff Engine for Large Documents
+
+A replacement for difflib.unified_diff whose running time stays
+predictable on long, repetitive files such as YAML fact lists. Lines are
+interned to integer IDs, so every comparison is an int comparison, and
+the common prefix and suffix of each region are trimmed before any real
+work is done.
+
+Three algorithms are available:
+
+- "histogram" (default): splits each region around the longest matching
+  run that contains its least frequent common line, the way git's
+  histogram diff does, and falls back to Myers where every common line
+  is too frequent to anchor on.
+- "patience": anchors on lines that occur exactly once on both sides,
+  keeps the longest increasing sequence of them and fills the gaps the
+  same way, falling back to Myers where no unique line exists.
+- "myers": the greedy O((N+M)D) shortest edit script.
+
+Myers is bounded by max_cost edit steps per region, and all work on one
+diff by WORK_PER_LINE per input line. A region that would need more is
+reported as one replaced block: the diff stays correct but is no longer
+minimal there, which keeps pathological inputs from running away.
+"""
+
+from bisect import bisect_left
+from math import isqrt
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+ALGORITHMS = ("histogram", "patience", "myers")
+DEFAULT_ALGORITHM = "histogram"
+DEFAULT_MAX_COST = 1000
+
+# Lines occurring more often than this in a region are never used as
+# histogram anchors (git uses the same limit)
+MAX_CHAIN_LENGTH = 64
+
+# Total work allowed per input line, counted in lines scanned while
+# anchoring and in Myers steps (cost squared); once it is spent the
+# remaining regions are reported as replaced
+WORK_PER_LINE = 32
+
+# (first start, second start, length), as in difflib.get_matching_blocks()
+Block = Tuple[int, int, int]
+# (tag, i1, i2, j1, j2), as in difflib.get_opcodes()
+Opcode = Tuple[str, int, int, int, int]
+
+
+def intern_lines(a: Sequence[str], b: Sequence[str]) -> Tuple[List[int], List[int]]:
+    """Map the lines of both documents to shared integer IDs."""
+    ids: Dict[str, int] = {}
+    lookup = ids.setdefault
+    first = [lookup(line, len(ids)) for line in a]
+    second = [lookup(line, len(ids)) for line in b]
+    return first, second
+
+
+def matching_blocks(a: Sequence[str], b: Sequence[str], algorithm: str = DEFAULT_ALGORITHM,
+                    max_cost: int = DEFAULT_MAX_COST) -> List[Block]:
+    """
+    Matching line runs of two documents.
+
+    The total work is bounded by WORK_PER_LINE times the number of lines,
+    so the time stays roughly linear even for pathological inputs.
+
+    Args:
+        a: Lines of the first document
+        b: Lines of the second document
+        algorithm: "histogram", "patience" or "myers"
+        max_cost: Edit steps Myers may spend on one region before giving up
+            on it
+
+    Returns:
+        Non-overlapping (i, j, n) blocks in increasing order, terminated by
+        (len(a), len(b), 0) like difflib.SequenceMatcher.get_matching_blocks()
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown diff algorithm: {algorithm} (expected one of {ALGORITHMS})")
+    ids_a, ids_b = intern_lines(a, b)
+    blocks: List[Block] = []
+    budget = WORK_PER_LINE * (len(ids_a) + len(ids_b))
+    regions = [(0, len(ids_a), 0, len(ids_b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        alo, ahi, blo, bhi = _trim_region(ids_a, ids_b, alo, ahi, blo, bhi, blocks)
+        if alo == ahi or blo == bhi or budget <= 0:
+            continue
+        split = None
+        if algorithm != "myers":
+            budget -= (ahi - alo) + (bhi - blo)
+            if algorithm == "histogram":
+                split = _histogram_split(ids_a, ids_b, alo, ahi, blo, bhi)
+            else:
+                split = _patience_split(ids_a, ids_b, alo, ahi, blo, bhi)
+        if split is None:
+            snakes, cost = _myers(ids_a, ids_b, alo, ahi, blo, bhi,
+                                  min(max_cost, isqrt(max(budget, 0))))
+            blocks.extend(snakes)
+            budget -= cost * cost
+            continue
+        anchors, gaps = split
+        blocks.extend(anchors)
+        regions.extend(gaps)
+    return _merge_blocks(blocks, len(ids_a), len(ids_b))
+
+
+def opcodes(a: Sequence[str], b: Sequence[str], algorithm: str = DEFAULT_ALGORITHM,
+            max_cost: int = DEFAULT_MAX_COST) -> List[Opcode]:
+    """Edit operations turning a into b, in difflib.get_opcodes() form."""
+    codes: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in matching_blocks(a, b, algorithm, max_cost):
+        if i < ai and j < bj:
+            codes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            codes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            codes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            codes.append(("equal", ai, i, bj, j))
+    return codes
+
+
+def grouped_opcodes(codes: List[Opcode], n: int = 3) -> Iterator[List[Opcode]]:
+    """Group opcodes into hunks with up to n lines of context (as difflib does)."""
+    codes = list(codes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # Split a long run of context between two hunks
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def unified_diff(a: Sequence[str], b: Sequence[str], fromfile: str = "", tofile: str = "",
+                 fromfiledate: str = "", tofiledate: str = "", n: int = 3,
+                 lineterm: str = "\n", algorithm: str = DEFAULT_ALGORITHM,
+                 max_cost: int = DEFAULT_MAX_COST) -> Iterator[str]:
+    """
+    Unified diff of two line lists, in exactly difflib.unified_diff()'s format.
+
+    Args:
+        a: Lines of the first document
+        b: Lines of the second document
+        fromfile, tofile, fromfiledate, tofiledate, n, lineterm: As for
+            difflib.unified_diff()
+        algorithm: "histogram", "patience" or "myers"
+        max_cost: Edit steps Myers may spend on one region
+
+    Returns:
+        Diff lines, produced as they are consumed
+    """
+    started = False
+    for group in grouped_opcodes(opcodes(a, b, algorithm, max_cost), n):
+        if not started:
+            started = True
+            fromdate = f"\t{fromfiledate}" if fromfiledate else ""
+            todate = f"\t{tofiledate}" if tofiledate else ""
+            yield f"--- {fromfile}{fromdate}{lineterm}"
+            yield f"+++ {tofile}{todate}{lineterm}"
+
+        first, last = group[0], group[-1]
+        yield (f"@@ -{_format_range(first[1], last[2])} "
+               f"+{_format_range(first[3], last[4])} @@{lineterm}")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Hunk range in unified diff notation."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _trim_region(a: List[int], b: List[int], alo: int, ahi: int, blo: int, bhi: int,
+                 blocks: List[Block]) -> Tuple[int, int, int, int]:
+    """Record the common prefix and suffix of a region and return what is left."""
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        blocks.append((start, blo - (alo - start), alo - start))
+
+    end = ahi
+    while ahi > alo and bhi > blo and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    if ahi < end:
+        blocks.append((ahi, bhi, end - ahi))
+    return alo, ahi, blo, bhi
+
+
+def _histogram_split(a: List[int], b: List[int], alo: int, ahi: int, blo: int, bhi: int):
+    """
+    Anchor a region on the longest run around its least frequent common line.
+
+    Returns:
+        ([anchor block], [region before, region after]), an empty split when
+        the region has no common line, or None when Myers should take over
+    """
+    occurrences: Dict[int, List[int]] = {}
+    for i in range(alo, ahi):
+        positions = occurrences.get(a[i])
+        if positions is None:
+            occurrences[a[i]] = [i]
+        elif len(positions) <= MAX_CHAIN_LENGTH:
+            positions.append(i)
+
+    best: Optional[Block] = None
+    best_count = MAX_CHAIN_LENGTH
+    common = False
+    j = blo
+    while j < bhi:
+        positions = occurrences.get(b[j])
+        if positions is None:
+            j += 1
+            continue
+        common = True
+        if len(positions) > best_count:
+            j += 1
+            continue
+        next_j = j + 1
+        for i in positions:
+            # Extend the match around (i, j) in both directions
+            start_a, start_b = i, j
+            while start_a > alo and start_b > blo and a[start_a - 1] == b[start_b - 1]:
+                start_a -= 1
+                start_b -= 1
+            end_a, end_b = i + 1, j + 1
+            while end_a < ahi and end_b < bhi and a[end_a] == b[end_b]:
+                end_a += 1
+                end_b += 1
+            length = end_a - start_a
+            if best is None or len(positions) < best_count or length > best[2]:
+                best = (start_a, start_b, length)
+                best_count = len(positions)
+            next_j = max(next_j, end_b)
+        j = next_j
+
+    if best is None:
+        return None if common else ([], [])
+    start_a, start_b, length = best
+    return [best], [(alo, start_a, blo, start_b), (start_a + length, ahi, start_b + length, bhi)]
+
+
+def _patience_split(a: List[int], b: List[int], alo: int, ahi: int, blo: int, bhi: int):
+    """
+    Anchor a region on the longest increasing run of lines unique to both sides.
+
+    Returns:
+        (anchor blocks, regions between them), or None when no line is
+        unique on both sides
+    """
+    unique_a: Dict[int, int] = {}
+    for i in range(alo, ahi):
+        unique_a[a[i]] = -1 if a[i] in unique_a else i
+    unique_b: Dict[int, int] = {}
+    for j in range(blo, bhi):
+        unique_b[b[j]] = -1 if b[j] in unique_b else j
+
+    # (i, j) of every line unique to both sides, in order of j
+    pairs = [(unique_a[line], j) for line, j in unique_b.items()
+             if j >= 0 and unique_a.get(line, -1) >= 0]
+    if not pairs:
+        return None
+    pairs.sort(key=lambda pair: pair[1])
+
+    # Longest increasing subsequence of i by patience sorting
+    tops: List[int] = []
+    top_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for index, (i, _) in enumerate(pairs):
+        pile = bisect_left(tops, i)
+        if pile == len(tops):
+            tops.append(i)
+            top_index.append(index)
+        else:
+            tops[pile] = i
+            top_index[pile] = index
+        previous[index] = top_index[pile - 1] if pile else -1
+    chain = []
+    index = top_index[-1]
+    while index >= 0:
+        chain.append(pairs[index])
+        index = previous[index]
+    chain.reverse()
+
+    anchors = [(i, j, 1) for i, j in chain]
+    gaps = []
+    prev_a, prev_b = alo, blo
+    for i, j in chain:
+        gaps.append((prev_a, i, prev_b, j))
+        prev_a, prev_b = i + 1, j + 1
+    gaps.append((prev_a, ahi, prev_b, bhi))
+    return anchors, gaps
+
+
+def _myers(a: List[int], b: List[int], alo: int, ahi: int, blo: int, bhi: int,
+           max_cost: int) -> Tuple[List[Block], int]:
+    """
+    Matching blocks of a region along a shortest edit script.
+
+    Returns:
+        (blocks, edit steps taken); no blocks (the region is one
+        replacement) when the script needs more than max_cost edits
+    """
+    n = ahi - alo
+    m = bhi - blo
+    max_d = min(n + m, max_cost)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        # Furthest x on diagonals -d..d before step d, for the backtrack
+        trace.append(v[offset - d:offset + d + 1])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, d, n, m, alo, blo), d
+    return [], max_d
+
+
+def _myers_backtrack(trace: List[List[int]], cost: int, n: int, m: int,
+                     alo: int, blo: int) -> List[Block]:
+    """Walk the Myers trace back from (n, m) and collect the snakes."""
+    blocks = []
+    x, y = n, m
+    for d in range(cost, 0, -1):
+        previous = trace[d]  # diagonal k is at index k + d
+        k = x - y
+        if k == -d or (k != d and previous[k - 1 + d] < previous[k + 1 + d]):
+            prev_k = k + 1
+            prev_x = previous[prev_k + d]
+            mid_x, mid_y = prev_x, prev_x - prev_k + 1
+        else:
+            prev_k = k - 1
+            prev_x = previous[prev_k + d]
+            mid_x, mid_y = prev_x + 1, prev_x - prev_k
+        if x > mid_x:
+            blocks.append((alo + mid_x, blo + mid_y, x - mid_x))
+        x, y = prev_x, prev_x - prev_k
+    if x > 0:
+        blocks.append((alo, blo, x))
+    return blocks
+
+
+def _merge_blocks(blocks: List[Block], len_a: int, len_b: int) -> List[Block]:
+    """Sort blocks, join adjacent ones and append the terminating sentinel."""
+    merged: List[Block] = []
+    for i, j, size in sorted(blocks):
+        if merged:
+            last_i, last_j, last_size = merged[-1]
+            if last_i + last_size == i and last_j + last_size == j:
+                merged[-1] = (last_i, last_j, last_size + size)
+                continue
+        merged.append((i, j, size))
+    merged.append((len_a, len_b, 0))
+    return merged
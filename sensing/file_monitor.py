@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+File Monitoring: Event-Driven Change Feed
+
+Watches the knowledge base with Linux inotify (through ctypes, no native
+dependencies) and reports the exact paths that changed, so GammaDetector
+only has to look at those files. Falls back to stat polling when inotify
+is unavailable, the watch limit is reached, or the kernel event queue
+overflows.
+"""
+
+import os
+import time
+import posixpath
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from .config import get_setting, file_monitoring_settings
+from .walker import KBWalker
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class ChangeSet:
+    """A coalesced batch of change notifications."""
+    paths: Set[str] = field(default_factory=set)
+    directories: Set[str] = field(default_factory=set)
+    full_rescan: bool = False
+    reason: str = ""
+    event_count: int = 0
+    first_event_time: float = 0.0  # time.monotonic() of the first event
+
+    def is_empty(self) -> bool:
+        """Check if nothing needs to be scanned."""
+        return not (self.paths or self.directories or self.full_rescan)
+
+
+def _load_libc():
+    """Return libc with the inotify symbols, or None when unavailable."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        for name in ("inotify_init1", "inotify_add_watch", "inotify_rm_watch"):
+            getattr(libc, name)
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class FileMonitor:
+    """
+    Recursive knowledge base watcher.
+
+    Uses inotify where available. Events arriving within ``settle_seconds``
+    of each other are coalesced into one ChangeSet (bounded by
+    ``max_latency_seconds``), so an editor's save burst produces a single
+    targeted scan. In polling mode every wait returns a full-rescan request
+    after ``poll_interval`` seconds; GammaDetector's stat cache keeps those
+    scans cheap.
+    """
+
+    def __init__(self, kb_path: str = "kb",
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True,
+                 watch_files: Iterable[str] = (),
+                 settle_seconds: float = 0.2,
+                 max_latency_seconds: float = 2.0,
+                 poll_interval: float = 60.0,
+                 use_inotify: bool = True):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            watch_directories: Directories to watch, relative to kb_path
+            file_extensions: File suffixes that are reported
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Watch subdirectories
+            watch_files: Files outside watch_directories to report,
+                relative to kb_path (their directory is watched for them)
+            settle_seconds: Quiet period that ends an event burst
+            max_latency_seconds: Upper bound on how long a burst is coalesced
+            poll_interval: Seconds between scans when polling
+            use_inotify: Set False to force polling mode
+        """
+        self.kb_path = Path(kb_path)
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+        self.settle_seconds = settle_seconds
+        self.max_latency_seconds = max_latency_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+
+        self._libc = None
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, str] = {}
+        self._file_dirs: Set[str] = set()  # watched only for watch_files inside them
+        self._pending = ChangeSet()
+        self.mode = "stopped"
+        self.fallback_reason = ""
+
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None) -> 'FileMonitor':
+        """
+        Create a monitor using settings from load_config().
+
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+        """
+        return cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            poll_interval=get_setting(config, "sensing.gamma_detection.scan_interval", 60),
+            use_inotify=get_setting(config, "sensing.file_monitoring.use_inotify", True),
+            **file_monitoring_settings(config)
+        )
+
+    @property
+    def using_inotify(self) -> bool:
+        """True while changes are delivered by inotify."""
+        return self._fd is not None
+
+    def fileno(self) -> Optional[int]:
+        """inotify descriptor for use with select(), or None when polling."""
+        return self._fd
+
+    def start(self) -> None:
+        """Start watching; falls back to polling if inotify cannot be used."""
+        if not self.use_inotify:
+            self.mode = "polling"
+            self.fallback_reason = "polling requested"
+            return
+
+        self._libc = _load_libc()
+        if self._libc is None:
+            self._fall_back("inotify unavailable")
+            return
+
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            self._fall_back(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return
+        self._fd = fd
+        self.mode = "inotify"
+
+        for directory in self.walker.watch_directories:
+            rel_dir = directory.strip("/")
+            if (self.kb_path / rel_dir).is_dir() and not self._watch_tree(rel_dir):
+                return
+
+        for rel_dir in sorted({posixpath.dirname(f) for f in self.walker.watch_files}):
+            if rel_dir in self._watches.values():
+                continue
+            if not self._add_watch(rel_dir):
+                return
+            self._file_dirs.add(rel_dir)
+
+    def stop(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._watches = {}
+        self._file_dirs = set()
+        self.mode = "stopped"
+
+    def __enter__(self) -> 'FileMonitor':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[ChangeSet]:
+        """
+        Block until changes arrive and return them coalesced.
+
+        Args:
+            timeout: Seconds to wait for the first event (None waits forever;
+                in polling mode defaults to poll_interval)
+
+        Returns:
+            ChangeSet, or None if the timeout passed without changes
+        """
+        if self._fd is None:
+            time.sleep(self.poll_interval if timeout is None else timeout)
+            return ChangeSet(full_rescan=True, reason=self.fallback_reason or "polling")
+
+        if self._pending.is_empty():
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                return None
+
+        burst_start = time.monotonic()
+        while self._fd is not None:
+            self._read_events()
+            remaining = self.max_latency_seconds - (time.monotonic() - burst_start)
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([self._fd], [], [], min(self.settle_seconds, remaining))
+            if not ready:
+                break
+
+        changes, self._pending = self._pending, ChangeSet()
+        if self._fd is None:
+            changes.full_rescan = True
+            changes.reason = self.fallback_reason
+        return changes if not changes.is_empty() else None
+
+    def _fall_back(self, reason: str) -> None:
+        """Switch to polling mode."""
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._watches = {}
+        self._file_dirs = set()
+        self.mode = "polling"
+        self.fallback_reason = reason
+        self._pending.full_rescan = True
+        self._pending.reason = reason
+        print(f"Warning: File monitor falling back to stat polling ({reason})")
+
+    def _watch_tree(self, rel_dir: str) -> bool:
+        """Add watches for a directory and its subdirectories."""
+        if not self._add_watch(rel_dir):
+            return False
+        if not self.walker.recursive:
+            return True
+        try:
+            with os.scandir(self.kb_path / rel_dir) as entries:
+                subdirs = [e.name for e in entries
+                           if e.is_dir(follow_symlinks=False)
+                           and not self.walker.is_ignored(e.name, f"{rel_dir}/{e.name}")]
+        except OSError:
+            return True
+        return all(self._watch_tree(f"{rel_dir}/{name}") for name in subdirs)
+
+    def _add_watch(self, rel_dir: str) -> bool:
+        path = str(self.kb_path / rel_dir).encode()
+        wd = self._libc.inotify_add_watch(self._fd, path, WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                self._fall_back("inotify watch limit reached (fs.inotify.max_user_watches)")
+                return False
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return True
+            self._fall_back(f"inotify_add_watch failed: {os.strerror(err)}")
+            return False
+        self._watches[wd] = rel_dir
+        return True
+
+    def _read_events(self) -> None:
+        """Drain the inotify descriptor into the pending ChangeSet."""
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += name_len
+            if not self._pending.event_count:
+                self._pending.first_event_time = time.monotonic()
+            self._pending.event_count += 1
+
+            if mask & IN_Q_OVERFLOW:
+                self._pending.full_rescan = True
+                self._pending.reason = "inotify event queue overflow"
+                continue
+
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                self._file_dirs.discard(rel_dir)
+                continue
+            if rel_dir in self._file_dirs:
+                self._read_file_dir_event(rel_dir, mask, name)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self._pending.directories.add(rel_dir)
+                continue
+
+            rel_path = f"{rel_dir}/{name}"
+            if mask & IN_ISDIR:
+                if self.walker.is_ignored(name, rel_path) or not self.walker.recursive:
+                    continue
+                self._pending.directories.add(rel_path)
+                if mask & (IN_CREATE | IN_MOVED_TO) and self._fd is not None:
+                    self._watch_tree(rel_path)
+            elif self.walker.accepts(rel_path):
+                self._pending.paths.add(rel_path)
+
+    def _read_file_dir_event(self, rel_dir: str, mask: int, name: str) -> None:
+        """Handle an event from a directory watched only for its watch_files."""
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._pending.full_rescan = True
+            self._pending.reason = f"watched directory {rel_dir or '.'} moved or deleted"
+            return
+        rel_path = posixpath.join(rel_dir, name)
+        if not mask & IN_ISDIR and rel_path in self.walker.watch_files:
+            self._pending.paths.add(rel_path)
+
+
+if __name__ == "__main__":
+    # Print change sets as they arrive
+    with FileMonitor() as monitor:
+        print(f"Watching kb/ ({monitor.mode})")
+        while True:
+            changes = monitor.wait()
+            if changes:
+                print(f"{changes.event_count} events: {sorted(changes.paths)} "
+                      f"dirs={sorted(changes.directories)} full={changes.full_rescan}")
@@ -8,13 +8,44 @@ Designed specifically for your kb/facts and kb/rules structure.
 
 import os
 import time
+import mmap
 import hashlib
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Dict, Iterable, List, Set, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from .chunking import Chunk, chunk_file, diff_manifests
+from .config import get_setting, file_monitoring_settings
+from .pair_index import PAIR_INDEX_VERSION, PairIndex, split_pair_id
+from .state_store import open_state_store
+from .trends import ChangeTrends, DEFAULT_RING_SIZE
+from .walker import KBWalker
+
+
+# Window within which a file's mtime is too close to the moment it was hashed
+# to trust the stat tuple (git's "racy clean" problem). 2s covers filesystems
+# with coarse timestamp granularity such as FAT and some network mounts.
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+# Hashing I/O: files are read into a reusable 1 MiB buffer (or handed to
+# hashlib.file_digest where available); files from MMAP_THRESHOLD upwards
+# are memory-mapped and digested in a single call.
+HASH_BUFFER_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+
+def configured_hash_algorithm(config: Dict) -> str:
+    """
+    The content hash algorithm set under sensing.gamma_detection.
+
+    Components that hash KB files themselves use it too, so their hashes
+    can be compared with GammaDetector.content_hashes().
+    """
+    return get_setting(config, "sensing.gamma_detection.hash_algorithm", DEFAULT_HASH_ALGORITHM)
+
 
 @dataclass
 class FileState:
@@ -24,43 +55,125 @@ class FileState:
     modified_time: float
     content_hash: str
     last_checked: float = 0.0
+    mtime_ns: int = 0
+    inode: int = 0
+    checked_ns: int = 0
+    chunks: Optional[List[list]] = None
     
     @classmethod
-    def from_file(cls, file_path: Path) -> 'FileState':
-        """Create FileState from actual file."""
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+    def from_file(cls, file_path: Path, stat: Optional[os.stat_result] = None,
+                  chunk_threshold: Optional[int] = None,
+                  algorithm: str = DEFAULT_HASH_ALGORITHM) -> 'FileState':
+        """
+        Create FileState from actual file.
+        
+        Args:
+            file_path: File to read
+            stat: Pre-fetched stat result (avoids a second stat call)
+            chunk_threshold: When set, files at least this large also get a
+                content-defined chunk manifest, computed in the same read
+            algorithm: hashlib algorithm name (e.g. "sha256", "blake2b")
+        """
+        if stat is None:
+            if not file_path.exists():
+                raise FileNotFoundError(f"File not found: {file_path}")
+            stat = file_path.stat()
         
-        stat = file_path.stat()
-        content_hash = cls._calculate_hash(file_path)
+        checked_ns = time.time_ns()
+        chunks = None
+        if chunk_threshold is not None and stat.st_size >= chunk_threshold:
+            content_hash, chunks = cls._calculate_chunked_hash(file_path, algorithm)
+        else:
+            content_hash = cls._calculate_hash(file_path, algorithm, stat.st_size)
         
         return cls(
             path=str(file_path),
             size=stat.st_size,
             modified_time=stat.st_mtime,
             content_hash=content_hash,
-            last_checked=time.time()
+            last_checked=checked_ns / 1e9,
+            mtime_ns=stat.st_mtime_ns,
+            inode=stat.st_ino,
+            checked_ns=checked_ns,
+            chunks=chunks
         )
     
     @staticmethod
-    def _calculate_hash(file_path: Path) -> str:
-        """Calculate SHA-256 hash of file content."""
-        hasher = hashlib.sha256()
-        try:
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hasher.update(chunk)
+    def _calculate_hash(file_path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM,
+                        size: Optional[int] = None) -> str:
+        """
+        Calculate the hash of file content with the given algorithm.
+        
+        Raises:
+            OSError: When the file cannot be read
+        """
+        with open(file_path, 'rb') as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return hashlib.new(algorithm, mapped).hexdigest()
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, algorithm).hexdigest()
+            hasher = hashlib.new(algorithm)
+            buffer = bytearray(HASH_BUFFER_SIZE)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
             return hasher.hexdigest()
-        except Exception:
-            return ""
     
-    def has_changed(self, current_state: 'FileState') -> bool:
-        """Check if file has changed compared to current state."""
+    @staticmethod
+    def _calculate_chunked_hash(file_path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM
+                                ) -> Tuple[str, Optional[List[list]]]:
+        """Calculate the content hash and chunk manifest in one pass (OSError when unreadable)."""
+        hasher = hashlib.new(algorithm)
+        chunks = chunk_file(file_path, hasher)
+        return hasher.hexdigest(), [chunk.to_list() for chunk in chunks]
+    
+    def changed_regions(self, current_state: 'FileState') -> Optional[List[Dict]]:
+        """Regions of the current file that differ, when both have chunk manifests."""
+        if self.chunks is None or current_state.chunks is None:
+            return None
+        return diff_manifests(
+            [Chunk.from_list(c) for c in self.chunks],
+            [Chunk.from_list(c) for c in current_state.chunks]
+        )
+    
+    def has_changed(self, current_state: 'FileState', compare_hash: bool = True) -> bool:
+        """
+        Check if file has changed compared to current state.
+        
+        Args:
+            current_state: Freshly checked state of the same file
+            compare_hash: Set False when the two hashes were produced by
+                different algorithms and cannot be compared
+        """
         return (
-            self.content_hash != current_state.content_hash or
+            (compare_hash and self.content_hash != current_state.content_hash) or
             self.size != current_state.size or
             self.modified_time != current_state.modified_time
         )
+    
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """Check if a fresh stat() agrees with the recorded stat tuple."""
+        return (
+            self.mtime_ns == stat.st_mtime_ns and
+            self.size == stat.st_size and
+            self.inode == stat.st_ino
+        )
+    
+    def is_racy(self) -> bool:
+        """
+        Check if the recorded hash may predate a same-tick modification.
+        
+        A file written again within the filesystem's timestamp granularity
+        after it was hashed keeps its mtime, so its stat tuple cannot be
+        trusted until it was hashed comfortably after its last write.
+        """
+        return self.checked_ns - self.mtime_ns < RACY_MTIME_WINDOW_NS
 
 
 class GammaDetector:
@@ -71,23 +184,153 @@ class GammaDetector:
     and calculates change rates over time.
     """
     
-    def __init__(self, kb_path: str = "kb"):
+    def __init__(self, kb_path: str = "kb", paranoid: bool = False,
+                 max_workers: int = 1, batch_size: int = 50,
+                 state_file: str = ".gamma_detector_state.db",
+                 state_backend: str = "sqlite", max_history: int = 50,
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = (),
+                 autosave: bool = True,
+                 chunked: bool = False, chunk_threshold: int = 1024 * 1024,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+                 trend_ring_size: int = DEFAULT_RING_SIZE):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            paranoid: Re-hash every file on every scan instead of trusting
+                unchanged stat information (size, mtime_ns, inode)
+            max_workers: Threads used for the stat/hash phase (1 = serial)
+            batch_size: Files handed to a worker thread at a time
+            state_file: Where the baseline and scan history are persisted
+            state_backend: State store backend ("sqlite" or "json")
+            max_history: Number of scan results kept in the state store
+            watch_directories: Directories to scan, relative to kb_path
+            file_extensions: File suffixes that are tracked
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Scan subdirectories (e.g. facts/structured/)
+            watch_files: Files outside watch_directories to track as well,
+                relative to kb_path (e.g. facts.yaml)
+            autosave: Persist after every scan; when False, changes are
+                buffered in memory until save_state() is called
+            chunked: Keep content-defined chunk manifests for large files so
+                modifications report the changed byte/line regions
+            chunk_threshold: Minimum file size (bytes) for chunked hashing
+            hash_algorithm: hashlib algorithm for content hashes; switching
+                it re-baselines instead of reporting every file as modified
+            trend_ring_size: Number of recent scans kept for rolling trend
+                statistics
+        """
         self.kb_path = Path(kb_path)
+        self.paranoid = paranoid
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.chunk_threshold = chunk_threshold if chunked else None
+        hashlib.new(hash_algorithm)  # fail early on unknown algorithms
+        self.hash_algorithm = hash_algorithm
         self.facts_path = self.kb_path / "facts"
         self.rules_path = self.kb_path / "rules"
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+        
+        # State tracking (loaded lazily from the state store on first use)
+        self.state_file = state_file
+        self._store = open_state_store(state_file, backend=state_backend, max_history=max_history)
+        self._baseline_states: Optional[Dict[str, FileState]] = None
+        self._change_history: Optional[List[Dict]] = None
+        self._trends: Optional[ChangeTrends] = None
+        self._pair_index: Optional[PairIndex] = None
+        self.trend_ring_size = trend_ring_size
+        self._files_hashed = 0
         
-        # State tracking
-        self.baseline_states: Dict[str, FileState] = {}
-        self.change_history: List[Dict] = []
-        self.state_file = ".gamma_detector_state.json"
+        # Changes not yet written to the state store
+        self.autosave = autosave
+        self._unsaved_keys: Set[str] = set()
+        self._unsaved_results: List[Dict] = []
+        self._unsaved_dirs: Dict[str, Optional[Dict]] = {}
+        self._unsaved_pairs: Dict[str, Optional[Dict]] = {}
+        self._unsaved_meta: Dict[str, any] = {}
         
-        # Load previous state if exists
-        self._load_state()
+        # Algorithm that produced the stored baseline hashes
+        self._baseline_algorithm = DEFAULT_HASH_ALGORITHM
+        self._rehash_all = False
+    
+    @property
+    def baseline_states(self) -> Dict[str, FileState]:
+        """Baseline file states, loaded from the state store on first access."""
+        if self._baseline_states is None:
+            self._load_state()
+        return self._baseline_states
+    
+    @baseline_states.setter
+    def baseline_states(self, states: Dict[str, FileState]):
+        self._baseline_states = states
     
-    def scan_for_changes(self) -> Dict[str, any]:
+    @property
+    def change_history(self) -> List[Dict]:
+        """Recent scan results, loaded from the state store on first access."""
+        if self._change_history is None:
+            try:
+                self._change_history = self._store.load_history()
+            except Exception as e:
+                print(f"Warning: Could not load scan history: {e}")
+                self._change_history = []
+        return self._change_history
+    
+    @property
+    def trends(self) -> ChangeTrends:
+        """Running change statistics, loaded from the state store on first access."""
+        if self._trends is None:
+            try:
+                saved = self._store.get_meta("change_trends")
+            except Exception as e:
+                print(f"Warning: Could not load change trends: {e}")
+                saved = None
+            if saved is not None:
+                self._trends = ChangeTrends.from_dict(saved, ring_size=self.trend_ring_size)
+            else:
+                # State written before trends were kept: seed from the history once
+                self._trends = ChangeTrends(self.trend_ring_size)
+                for scan in self.change_history:
+                    self._trends.update_from_results(scan)
+        return self._trends
+    
+    @property
+    def pair_index(self) -> PairIndex:
+        """
+        Fact/rule pairs of the tracked files, loaded from the state store on
+        first access and kept current by every scan.
+        """
+        if self._pair_index is None:
+            self._pair_index = PairIndex(self.kb_path)
+            try:
+                indexed = self._store.get_meta("pairs_indexed", False)
+                if indexed:
+                    self._pair_index.load(self._store.load_pairs())
+            except Exception as e:
+                print(f"Warning: Could not load pair index: {e}")
+                indexed = False
+            if indexed != PAIR_INDEX_VERSION:
+                # State written before pairs were indexed, or under older naming
+                # rules: derive them from the baseline once (the rebuild also
+                # drops any rows that were loaded)
+                self._pair_index.rebuild(self.baseline_states.keys())
+                self._unsaved_pairs.update(self._pair_index.pop_updates())
+                self._unsaved_meta["pairs_indexed"] = PAIR_INDEX_VERSION
+        return self._pair_index
+    
+    def scan_for_changes(self, paths: Optional[Iterable[str]] = None,
+                         directories: Optional[Iterable[str]] = None) -> Dict[str, any]:
         """
         Scan knowledge base for changes since last check.
         
+        Args:
+            paths: File keys (relative to kb_path) known to have changed,
+                e.g. from FileMonitor; when given, only these are checked
+            directories: Directory keys whose whole subtree should be
+                re-checked (created, moved or deleted directories)
+        
         Returns:
             Dictionary with change detection results
         """
@@ -101,21 +344,42 @@ class GammaDetector:
             "gamma_metrics": {}
         }
         
-        # Scan both facts and rules directories
-        current_files = {}
+        baseline_states = self.baseline_states  # also loads the directory cache
         
-        for directory, dir_name in [(self.facts_path, "facts"), (self.rules_path, "rules")]:
-            if directory.exists():
-                for file_path in directory.glob("*.txt"):
-                    file_key = str(file_path.relative_to(self.kb_path))
-                    try:
-                        current_files[file_key] = FileState.from_file(file_path)
-                    except Exception as e:
-                        print(f"Warning: Could not read {file_path}: {e}")
+        # Hashes from another algorithm cannot be compared: re-hash everything
+        # and report modifications from size/mtime only for this one scan
+        rebaseline = bool(baseline_states) and self._baseline_algorithm != self.hash_algorithm
+        if rebaseline:
+            results["baseline_reset"] = {
+                "reason": "hash algorithm changed",
+                "previous_algorithm": self._baseline_algorithm,
+                "algorithm": self.hash_algorithm
+            }
+            paths = directories = None
+        self._rehash_all = rebaseline
+        
+        if paths is None and directories is None:
+            # Walk the watched directories (facts/ and rules/ by default)
+            results["scan_mode"] = "full"
+            candidates = list(self.walker.walk())
+            current_files = self._collect_states(candidates)
+            
+            baseline_keys = set(baseline_states.keys())
+            current_keys = set(current_files.keys())
+        else:
+            # Only look at what the caller reported; everything else keeps its baseline
+            results["scan_mode"] = "targeted"
+            candidates, touched = self._targeted_candidates(paths or (), directories or ())
+            checked = self._collect_states(candidates)
+            current_files = dict(baseline_states)
+            for file_key in touched:
+                current_files.pop(file_key, None)
+            current_files.update(checked)
+            
+            baseline_keys = {k for k in touched if k in baseline_states}
+            current_keys = set(checked.keys())
         
         # Compare with baseline
-        baseline_keys = set(self.baseline_states.keys())
-        current_keys = set(current_files.keys())
         
         # Detect new files
         new_files = current_keys - baseline_keys
@@ -128,19 +392,29 @@ class GammaDetector:
         # Detect modified files
         modified_files = []
         for file_key in baseline_keys & current_keys:
-            baseline_state = self.baseline_states[file_key]
+            baseline_state = baseline_states[file_key]
             current_state = current_files[file_key]
             
-            if baseline_state.has_changed(current_state):
-                modified_files.append({
+            if baseline_state.has_changed(current_state, compare_hash=not rebaseline):
+                modification = {
                     "file": file_key,
                     "old_hash": baseline_state.content_hash[:8],
                     "new_hash": current_state.content_hash[:8],
                     "size_change": current_state.size - baseline_state.size
-                })
+                }
+                regions = baseline_state.changed_regions(current_state)
+                if regions is not None:
+                    modification["changed_regions"] = regions
+                modified_files.append(modification)
         
         results["modified_files"] = modified_files
         
+        # Pairs that were completed, orphaned or removed by this scan
+        pair_index = self.pair_index
+        affected = pair_index.apply_changes(new_files, deleted_files)
+        results["pair_changes"] = {pair_id: pair_index.status(pair_id)
+                                   for pair_id in sorted(affected, key=split_pair_id)}
+        
         # Calculate gamma metrics (change rates)
         total_files = len(current_files)
         total_changes = len(new_files) + len(deleted_files) + len(modified_files)
@@ -151,83 +425,265 @@ class GammaDetector:
             "change_rate": total_changes / total_files if total_files > 0 else 0,
             "files_added": len(new_files),
             "files_deleted": len(deleted_files),
-            "files_modified": len(modified_files)
+            "files_modified": len(modified_files),
+            "files_hashed": self._files_hashed,
+            "directories_listed": self.walker.dirs_listed
         }
         
         # Update baseline and save state
         self.baseline_states = current_files
-        self.change_history.append(results)
-        self._save_state()
+        self.trends.update_from_results(results)
+        if self._change_history is not None:
+            self._change_history.append(results)
+        self._record_changes(baseline_states, results)
+        if self.autosave:
+            self.save_state()
         
         return results
     
-    def get_change_trends(self, window_size: int = 10) -> Dict[str, any]:
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None,
+                    paranoid: bool = False) -> 'GammaDetector':
         """
-        Analyze change trends over recent scans.
+        Create a detector using settings from load_config().
         
         Args:
-            window_size: Number of recent scans to analyze
-            
-        Returns:
-            Trend analysis results
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+            paranoid: Re-hash every file on every scan
+        """
+        parallel = get_setting(config, "sensing.parallel_processing", {}) or {}
+        gamma = get_setting(config, "sensing.gamma_detection", {}) or {}
+        kb_root = get_setting(config, "paths.knowledge_base", "kb")
+        
+        return cls(
+            kb_path=kb_path or kb_root,
+            paranoid=paranoid,
+            max_workers=get_setting(config, "performance.max_workers",
+                                    parallel.get("max_workers", 1)),
+            batch_size=parallel.get("batch_size", 50),
+            state_file=gamma.get("state_file", ".gamma_detector_state.db"),
+            state_backend=gamma.get("state_backend", "sqlite"),
+            max_history=gamma.get("max_history_entries", 50),
+            chunked=gamma.get("chunked", False),
+            chunk_threshold=gamma.get("chunk_threshold_bytes", 1024 * 1024),
+            hash_algorithm=configured_hash_algorithm(config),
+            trend_ring_size=gamma.get("trend_ring_size", DEFAULT_RING_SIZE),
+            **file_monitoring_settings(config)
+        )
+    
+    def _targeted_candidates(self, paths: Iterable[str], directories: Iterable[str]
+                             ) -> Tuple[List[Tuple[str, Path, os.stat_result]], Set[str]]:
         """
-        if len(self.change_history) < 2:
-            return {"status": "insufficient_data", "scans_available": len(self.change_history)}
+        Resolve reported paths and directories into scan candidates.
         
-        recent_scans = self.change_history[-window_size:]
+        Returns:
+            (candidates that currently exist, every key that was touched)
+        """
+        self.walker.reset_updates()
+        candidates = {}
+        touched = set()
         
-        change_rates = [scan["gamma_metrics"]["change_rate"] for scan in recent_scans]
-        total_changes = [scan["gamma_metrics"]["total_changes"] for scan in recent_scans]
+        for file_key in paths:
+            file_key = file_key.strip("/")
+            if not self.walker.accepts(file_key):
+                continue
+            touched.add(file_key)
+            file_path = self.kb_path / file_key
+            try:
+                candidates[file_key] = (file_key, file_path, os.stat(file_path))
+            except OSError:
+                pass  # deleted; reported by the comparison below
         
-        trends = {
-            "window_size": len(recent_scans),
-            "average_change_rate": sum(change_rates) / len(change_rates),
-            "max_change_rate": max(change_rates),
-            "min_change_rate": min(change_rates),
-            "total_changes_in_window": sum(total_changes),
-            "trend_direction": self._calculate_trend(change_rates)
-        }
+        for rel_dir in directories:
+            prefix = rel_dir.strip("/") + "/"
+            touched.update(k for k in self.baseline_states if k.startswith(prefix))
+            for candidate in self.walker.walk_directory(rel_dir):
+                touched.add(candidate[0])
+                candidates[candidate[0]] = candidate
         
-        return trends
+        return list(candidates.values()), touched
     
-    def _calculate_trend(self, values: List[float]) -> str:
-        """Calculate if trend is increasing, decreasing, or stable."""
-        if len(values) < 3:
-            return "unknown"
+    def _collect_states(self, candidates: List[Tuple[str, Path, os.stat_result]]) -> Dict[str, FileState]:
+        """
+        Stat (and where needed hash) every candidate file.
         
-        # Simple linear trend calculation
-        recent_avg = sum(values[-3:]) / 3
-        earlier_avg = sum(values[:-3]) / len(values[:-3]) if len(values) > 3 else values[0]
+        With more than one worker the candidates are split into batches and
+        hashed on a thread pool; hashlib releases the GIL while digesting, so
+        reads and hashing overlap. At most two batches per worker are in
+        flight at once, and batches are merged in submission order so the
+        result is identical to the serial path.
+        """
+        baseline_states = self.baseline_states  # load in this thread, not in workers
         
-        if recent_avg > earlier_avg * 1.1:
-            return "increasing"
-        elif recent_avg < earlier_avg * 0.9:
-            return "decreasing"
+        if self.max_workers <= 1 or len(candidates) <= self.batch_size:
+            batches = [self._check_batch(candidates)]
         else:
-            return "stable"
+            batches = []
+            pending = []
+            max_pending = self.max_workers * 2
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for start in range(0, len(candidates), self.batch_size):
+                    batch = candidates[start:start + self.batch_size]
+                    pending.append(executor.submit(self._check_batch, batch))
+                    if len(pending) >= max_pending:
+                        batches.append(pending.pop(0).result())
+                batches.extend(future.result() for future in pending)
+        
+        current_files = {}
+        for states, warnings in batches:
+            current_files.update(states)
+            for warning in warnings:
+                print(warning)
+        
+        self._files_hashed = sum(
+            1 for key, state in current_files.items()
+            if state is not baseline_states.get(key)
+        )
+        return current_files
     
-    def _load_state(self):
-        """Load previous detection state."""
-        if Path(self.state_file).exists():
+    def _check_batch(self, batch: List[Tuple[str, Path, os.stat_result]]) -> Tuple[Dict[str, FileState], List[str]]:
+        """
+        Check a batch of files, deferring warnings to the caller.
+        
+        A file that exists but cannot be read keeps its baseline state (a
+        new one stays untracked) until a later scan can hash it.
+        """
+        states = {}
+        warnings = []
+        for file_key, file_path, stat in batch:
             try:
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
-                    self.baseline_states = {
-                        k: FileState(**v) for k, v in data.get("baseline_states", {}).items()
-                    }
-                    self.change_history = data.get("change_history", [])
+                states[file_key] = self._check_file(file_key, file_path, stat)
+            except FileNotFoundError:
+                pass  # deleted since it was listed
             except Exception as e:
-                print(f"Warning: Could not load state file: {e}")
+                warnings.append(f"Warning: Could not read {file_path}: {e}")
+                baseline_state = self.baseline_states.get(file_key)
+                if baseline_state is not None:
+                    states[file_key] = baseline_state
+        return states, warnings
     
-    def _save_state(self):
-        """Save detection state."""
+    def _check_file(self, file_key: str, file_path: Path, stat: os.stat_result) -> FileState:
+        """
+        Return the current state of a file, hashing only when needed.
+        
+        Unless running in paranoid mode, a file whose stat tuple matches the
+        baseline (and was not racily clean when recorded) reuses the baseline
+        hash without reading its content.
+        """
+        baseline_state = self.baseline_states.get(file_key)
+        
+        if (not self.paranoid and not self._rehash_all and baseline_state is not None and
+                baseline_state.matches_stat(stat) and not baseline_state.is_racy()):
+            return baseline_state
+        
+        return FileState.from_file(file_path, stat, self.chunk_threshold, self.hash_algorithm)
+    
+    def get_change_trends(self, window_size: int = 10,
+                          window_seconds: Optional[float] = None) -> Dict[str, any]:
+        """
+        Analyze change trends over recent scans.
+        
+        Answered from running aggregates, so the cost does not depend on
+        how many scans have been recorded.
+        
+        Args:
+            window_size: Number of recent scans to analyze
+            window_seconds: Analyze the scans of the last N seconds instead
+                (rounded to whole hours, or whole days beyond two days)
+            
+        Returns:
+            Trend analysis results
+        """
+        if window_seconds is not None:
+            return self.trends.time_window(window_seconds)
+        return self.trends.window(window_size)
+    
+    def content_hashes(self, keys: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Baseline content hashes by file key, e.g. for DeltaAnalyzer.
+
+        Args:
+            keys: Only return these file keys (default: every tracked file)
+        """
+        states = self.baseline_states
+        if keys is None:
+            return {k: v.content_hash for k, v in states.items()}
+        return {k: states[k].content_hash for k in keys if k in states}
+
+    def close(self, save: bool = True):
+        """
+        Save any buffered changes and close the underlying state store.
+        
+        Args:
+            save: Pass False to discard buffered changes instead, e.g. after
+                a scan with autosave off that should not move the baseline
+        """
+        if save:
+            self.save_state()
+        self._store.close()
+    
+    def _load_state(self):
+        """Load previous detection state."""
         try:
-            data = {
-                "baseline_states": {k: asdict(v) for k, v in self.baseline_states.items()},
-                "change_history": self.change_history[-50:]  # Keep last 50 scans
+            self._baseline_states = {
+                k: FileState(**v) for k, v in self._store.load_baseline().items()
             }
-            with open(self.state_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.walker.load_cache(self._store.load_directories())
+            # States written before the algorithm was recorded used SHA-256
+            self._baseline_algorithm = self._store.get_meta("hash_algorithm", "sha256")
+        except Exception as e:
+            print(f"Warning: Could not load state file: {e}")
+            self._baseline_states = {}
+    
+    @property
+    def has_unsaved_changes(self) -> bool:
+        """True when buffered changes have not reached the state store."""
+        return bool(self._unsaved_keys or self._unsaved_results or
+                    self._unsaved_dirs or self._unsaved_pairs or self._unsaved_meta)
+    
+    def _record_changes(self, previous_states: Dict[str, FileState], results: Dict):
+        """
+        Remember what this scan changed for the next save_state().
+        
+        Only entries that are new, were re-hashed or were deleted are
+        recorded, along with the scan result itself.
+        """
+        current_states = self.baseline_states
+        self._unsaved_keys.update(
+            k for k, v in current_states.items() if previous_states.get(k) is not v
+        )
+        self._unsaved_keys.update(k for k in previous_states if k not in current_states)
+        self._unsaved_results.append(results)
+        self._unsaved_dirs.update(self.walker.cache_updates())
+        self._unsaved_pairs.update(self.pair_index.pop_updates())
+        if self._baseline_algorithm != self.hash_algorithm:
+            self._unsaved_meta["hash_algorithm"] = self.hash_algorithm
+            self._baseline_algorithm = self.hash_algorithm
+    
+    def save_state(self):
+        """Write buffered baseline, history, directory and pair changes in one commit."""
+        if not self.has_unsaved_changes:
+            return
+        if self._unsaved_results:
+            self._unsaved_meta["change_trends"] = self.trends.to_dict()
+        upserts = {}
+        deletes = []
+        for file_key in self._unsaved_keys:
+            state = self.baseline_states.get(file_key)
+            if state is None:
+                deletes.append(file_key)
+            else:
+                upserts[file_key] = asdict(state)
+        try:
+            self._store.commit_scan(upserts, deletes, scan_results=self._unsaved_results,
+                                    meta=self._unsaved_meta, directories=self._unsaved_dirs,
+                                    pairs=self._unsaved_pairs)
+            self._unsaved_keys = set()
+            self._unsaved_results = []
+            self._unsaved_dirs = {}
+            self._unsaved_pairs = {}
+            self._unsaved_meta = {}
         except Exception as e:
             print(f"Warning: Could not save state file: {e}")
 
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Knowledge Indexer: Inverted Concept Index
+
+Answers "which facts and rules mention BTN3A1?" without reading the
+knowledge base. The structured fields of YAML facts and rules (concept,
+property, context, subtype, rule_id, if, then) and the words of .txt
+files are kept in a SQLite inverted index, term -> (file, entry), where
+an entry is one item of a YAML list (0 for single documents and text).
+
+Every field value is indexed as a whole ("vγ9vδ2 t cells") and word by
+word ("vγ9vδ2", "t", "cells"). The index stores each file's content
+hash, so updates re-parse only the files GammaDetector reports as added,
+modified or deleted.
+"""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+from .config import get_setting, file_monitoring_settings
+from .gamma_detector import DEFAULT_HASH_ALGORITHM, configured_hash_algorithm
+from .tokenizer import WORD_PATTERN, Tokenizer
+from .walker import KBWalker
+
+
+# Field IDs are stored in the index: append new fields, never reorder
+FIELDS = ("text", "concept", "property", "context", "subtype", "rule_id", "if", "then")
+FIELD_IDS = {name: field_id for field_id, name in enumerate(FIELDS)}
+TEXT_FIELD = FIELD_IDS["text"]
+
+YAML_SUFFIXES = (".yaml", ".yml")
+
+# Terms counted when choosing which query term drives a conjunction
+_ESTIMATE_LIMIT = 10000
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def normalize(value) -> str:
+    """Lower-cased value with runs of whitespace collapsed."""
+    return " ".join(str(value).lower().split())
+
+
+def parse_term(text: str) -> Tuple[Optional[str], str, bool]:
+    """
+    Split a query term into (field, value, is_prefix).
+
+    "concept:BTN3A1" limits the match to one field, a trailing "*" makes
+    it a prefix match ("activ*"); anything before a colon that is not a
+    field name is part of the value.
+    """
+    field, separator, value = text.partition(":")
+    field = field.strip().lower()
+    if not separator or field not in FIELD_IDS:
+        field, value = None, text
+    is_prefix = value.endswith("*")
+    return field, normalize(value.rstrip("*")), is_prefix
+
+
+def _scalars(value) -> Iterable:
+    """Scalar values inside a field value (lists and nested mappings are flattened)."""
+    if isinstance(value, dict):
+        for nested in value.values():
+            yield from _scalars(nested)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _scalars(item)
+    elif value is not None:
+        yield value
+
+
+def _value_terms(value) -> Set[str]:
+    """The whole normalized value and each of its words."""
+    whole = normalize(value)
+    terms = set(WORD_PATTERN.findall(whole))
+    if whole:
+        terms.add(whole)
+    return terms
+
+
+def read_entry(kb_path: Path, key: str, entry: int) -> Optional[Dict]:
+    """The YAML mapping behind a query hit (None for text files or when it is gone)."""
+    if not key.endswith(YAML_SUFFIXES):
+        return None
+    try:
+        document = yaml.load((Path(kb_path) / key).read_text(encoding="utf-8"),
+                             Loader=_YAML_LOADER)
+    except (OSError, UnicodeDecodeError, yaml.YAMLError):
+        return None
+    entries = document if isinstance(document, list) else [document]
+    item = entries[entry] if 0 <= entry < len(entries) else None
+    return item if isinstance(item, dict) else None
+
+
+class KnowledgeIndexer:
+    """
+    Persistent inverted index over the knowledge base.
+
+    Query terms are combined with AND at entry level: a hit is a YAML
+    entry (or text file) that matches every term.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            key TEXT UNIQUE NOT NULL,
+            content_hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS postings (
+            term_id INTEGER NOT NULL,
+            file_id INTEGER NOT NULL,
+            entry INTEGER NOT NULL,
+            field INTEGER NOT NULL,
+            PRIMARY KEY (term_id, file_id, entry, field)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS postings_by_entry ON postings (file_id, entry, term_id);
+    """
+
+    def __init__(self, kb_path: str = "kb", index_file: str = ".knowledge_index.db",
+                 snapshot_file: str = ".knowledge_index.snap",
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = (),
+                 tokenizer: Optional[Tokenizer] = None,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            index_file: SQLite file holding the index (":memory:" for none)
+            snapshot_file: Default destination of export_snapshot()
+            watch_directories: Directories to index, relative to kb_path
+            file_extensions: File suffixes to index
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Index subdirectories
+            watch_files: Further files to index, relative to kb_path
+            tokenizer: Shared Tokenizer used for .txt files (a private
+                in-memory one when None)
+            hash_algorithm: hashlib algorithm for the content hash stored
+                with each indexed file
+        """
+        self.kb_path = Path(kb_path)
+        self.index_file = index_file
+        self.snapshot_file = snapshot_file
+        self._owns_tokenizer = tokenizer is None
+        self.tokenizer = tokenizer if tokenizer is not None else Tokenizer()
+        self.hash_algorithm = hash_algorithm
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+
+        self._conn = sqlite3.connect(str(index_file))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        # term -> ID, loaded on the first update
+        self._term_ids: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None,
+                    tokenizer: Optional[Tokenizer] = None) -> 'KnowledgeIndexer':
+        """
+        Create an indexer using settings from load_config().
+
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+            tokenizer: Shared Tokenizer (one configured from sensing.tokenizer
+                when None)
+        """
+        indexer = cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            index_file=get_setting(config, "sensing.indexer.index_file", ".knowledge_index.db"),
+            snapshot_file=get_setting(config, "sensing.indexer.snapshot_file", ".knowledge_index.snap"),
+            tokenizer=tokenizer if tokenizer is not None else Tokenizer.from_config(config),
+            hash_algorithm=configured_hash_algorithm(config),
+            **file_monitoring_settings(config)
+        )
+        indexer._owns_tokenizer = tokenizer is None
+        return indexer
+
+    def __len__(self) -> int:
+        """Number of indexed files."""
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed files, distinct terms and postings."""
+        return {
+            table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("files", "terms", "postings")
+        }
+
+    def update_from_kb(self, changes: Optional[Iterable[str]] = None,
+                       file_hashes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Bring the index up to date with the files on disk.
+
+        Args:
+            changes: File keys added, modified or deleted since the last
+                update (e.g. DeltaAnalyzer.changed_files(gamma_results));
+                None checks the whole knowledge base
+            file_hashes: Content hashes by file key, e.g. from
+                GammaDetector.content_hashes(); a file whose hash matches
+                the indexed one is not read. Without changes, its keys are
+                taken as the complete list of files.
+
+        Returns:
+            Number of files (re-)indexed
+        """
+        if changes is None:
+            if file_hashes is not None:
+                # The tracked files are already known: no directory walk
+                keys = [key for key in file_hashes if self.walker.accepts(key)]
+            else:
+                keys = [key for key, _, _ in self.walker.walk()]
+            indexed_files = self._indexed_files()
+            stale = set(indexed_files) - set(keys)
+        else:
+            keys = [key for key in set(changes) if self.walker.accepts(key)]
+            indexed_files = self._indexed_files(keys)
+            stale = set()
+        file_hashes = file_hashes or {}
+        if self._term_ids is None:
+            self._term_ids = dict(self._conn.execute("SELECT term, id FROM terms"))
+
+        indexed = 0
+        with self._conn:
+            for key in stale:
+                self._remove(indexed_files[key][0])
+            for key in keys:
+                file_id, indexed_hash = indexed_files.get(key, (None, None))
+                content_hash = file_hashes.get(key)
+                if content_hash and content_hash == indexed_hash:
+                    continue
+                try:
+                    data = (self.kb_path / key).read_bytes()
+                except OSError:
+                    if file_id is not None:
+                        self._remove(file_id)
+                    continue
+                content_hash = content_hash or hashlib.new(self.hash_algorithm, data).hexdigest()
+                if content_hash == indexed_hash:
+                    continue
+                self._index_file(key, file_id, data, content_hash)
+                indexed += 1
+        self.tokenizer.save()
+        return indexed
+
+    def query(self, terms: Iterable[str], limit: Optional[int] = None) -> List[Dict]:
+        """
+        Entries that match every term.
+
+        Args:
+            terms: Query terms, e.g. ["BTN3A1", "property:activ*"]; see
+                parse_term()
+            limit: Return at most this many hits
+
+        Returns:
+            Hits as {"file": key, "entry": n} dicts, in indexing order
+        """
+        parsed = [parse_term(term) for term in terms]
+        conditions = [self._term_condition(*term) for term in parsed if term[1]]
+        if not conditions:
+            return []
+
+        # The rarest term drives the query; the others are probed per entry.
+        # A single exact term needs no estimate: its postings are already in
+        # entry order.
+        source = "postings p"
+        if len(conditions) > 1 or (limit is not None and any(term[2] for term in parsed)):
+            estimates = [self._estimate(condition) for condition in conditions]
+            conditions = [condition for _, condition in
+                          sorted(zip(estimates, conditions), key=lambda pair: pair[0])]
+            # When even the rarest term is common, walking the postings in
+            # entry order finds the first hits sooner than sorting every match
+            if limit is not None and min(estimates) >= _ESTIMATE_LIMIT:
+                source = "postings p INDEXED BY postings_by_entry"
+        driver_sql, driver_params = conditions[0]
+        sql = [f"SELECT f.key, p.entry FROM {source} JOIN files f ON f.id = p.file_id "
+               f"WHERE {driver_sql.format(alias='p')}"]
+        params = list(driver_params)
+        for condition_sql, condition_params in conditions[1:]:
+            sql.append("AND EXISTS (SELECT 1 FROM postings q WHERE q.file_id = p.file_id "
+                       f"AND q.entry = p.entry AND {condition_sql.format(alias='q')})")
+            params.extend(condition_params)
+        sql.append("GROUP BY p.file_id, p.entry ORDER BY p.file_id, p.entry")
+        if limit is not None:
+            sql.append("LIMIT ?")
+            params.append(limit)
+        return [{"file": key, "entry": entry}
+                for key, entry in self._conn.execute(" ".join(sql), params)]
+
+    def entry(self, key: str, entry: int) -> Optional[Dict]:
+        """The YAML mapping behind a hit (see read_entry())."""
+        return read_entry(self.kb_path, key, entry)
+
+    def export_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Publish the index as a memory-mapped snapshot (see sensing.mmap_index).
+
+        Args:
+            path: Snapshot file (snapshot_file when None)
+
+        Returns:
+            Size of the snapshot in bytes
+        """
+        # Imported here: mmap_index takes its query syntax from this module
+        from .mmap_index import write_snapshot
+
+        files = self._conn.execute("SELECT id, key FROM files ORDER BY id").fetchall()
+        positions = {file_id: position for position, (file_id, _) in enumerate(files)}
+        documents = []
+        doc_ids = {}
+        for file_id, entry in self._conn.execute(
+                "SELECT DISTINCT file_id, entry FROM postings ORDER BY file_id, entry"):
+            doc_ids[(file_id, entry)] = len(documents)
+            documents.append((positions[file_id], entry))
+
+        def terms():
+            # BINARY collation orders terms by their UTF-8 bytes, as the snapshot needs
+            for term_id, term in self._conn.execute("SELECT id, term FROM terms ORDER BY term").fetchall():
+                postings: Dict[int, int] = {}
+                for file_id, entry, field in self._conn.execute(
+                        "SELECT file_id, entry, field FROM postings WHERE term_id = ?", (term_id,)):
+                    doc = doc_ids[(file_id, entry)]
+                    postings[doc] = postings.get(doc, 0) | (1 << field)
+                if postings:
+                    yield term, sorted(postings.items())
+
+        return write_snapshot(path or self.snapshot_file, [key for _, key in files], documents, terms())
+
+    def close(self) -> None:
+        """Close the index file."""
+        self._conn.close()
+        if self._owns_tokenizer:
+            self.tokenizer.close()
+
+    def _term_condition(self, field: Optional[str], value: str,
+                        is_prefix: bool) -> Tuple[str, List]:
+        """SQL condition (with an {alias} placeholder) and parameters for one term."""
+        if not value:
+            return "", []
+        if is_prefix:
+            sql = "{alias}.term_id IN (SELECT id FROM terms WHERE term >= ? AND term < ?)"
+            params = [value, value + "\U0010ffff"]
+        else:
+            sql = "{alias}.term_id = (SELECT id FROM terms WHERE term = ?)"
+            params = [value]
+        if field is not None:
+            sql += " AND {alias}.field = ?"
+            params.append(FIELD_IDS[field])
+        return sql, params
+
+    def _estimate(self, condition: Tuple[str, List]) -> int:
+        """Postings matching a condition, counted up to _ESTIMATE_LIMIT."""
+        sql, params = condition
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM postings p WHERE {sql.format(alias='p')} LIMIT ?)",
+            params + [_ESTIMATE_LIMIT]
+        ).fetchone()[0]
+
+    def _indexed_files(self, keys: Optional[List[str]] = None) -> Dict[str, Tuple[int, str]]:
+        """(file ID, content hash) by key, for the given keys or every indexed file."""
+        if keys is None:
+            rows = self._conn.execute("SELECT key, id, content_hash FROM files")
+            return {key: (file_id, content_hash) for key, file_id, content_hash in rows}
+        found = {}
+        for key in keys:
+            row = self._conn.execute("SELECT id, content_hash FROM files WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is not None:
+                found[key] = row
+        return found
+
+    def _remove(self, file_id: int) -> None:
+        self._conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _index_file(self, key: str, file_id: Optional[int], data: bytes, content_hash: str) -> None:
+        """Replace one file's postings (inside the caller's transaction)."""
+        if file_id is None:
+            file_id = self._conn.execute("INSERT INTO files (key, content_hash) VALUES (?, ?)",
+                                         (key, content_hash)).lastrowid
+        else:
+            self._conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+            self._conn.execute("UPDATE files SET content_hash = ? WHERE id = ?",
+                               (content_hash, file_id))
+
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            text = ""
+        postings = set()
+        for entry, field_id, term in self._entry_terms(key, text, content_hash):
+            postings.add((self._term_id(term), file_id, entry, field_id))
+        self._conn.executemany(
+            "INSERT INTO postings (term_id, file_id, entry, field) VALUES (?, ?, ?, ?)", postings
+        )
+
+    def _entry_terms(self, key: str, text: str, content_hash: str) -> Iterable[Tuple[int, int, str]]:
+        """(entry, field ID, term) of every term in a file."""
+        if key.endswith(YAML_SUFFIXES):
+            try:
+                document = yaml.load(text, Loader=_YAML_LOADER)
+            except yaml.YAMLError:
+                document = None
+            entries = document if isinstance(document, list) else [document]
+            if any(isinstance(item, dict) for item in entries):
+                for entry, item in enumerate(entries):
+                    if not isinstance(item, dict):
+                        continue
+                    for field, value in item.items():
+                        field_id = FIELD_IDS.get(str(field).lower())
+                        if field_id is None or field_id == TEXT_FIELD:
+                            continue
+                        for scalar in _scalars(value):
+                            for term in _value_terms(scalar):
+                                yield entry, field_id, term
+                return
+        # Text files, and YAML without field mappings: index the words
+        for word in self.tokenizer.words(self.tokenizer.token_set(text, content_hash)):
+            yield 0, TEXT_FIELD, word
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._conn.execute("INSERT INTO terms (term) VALUES (?)", (term,)).lastrowid
+            self._term_ids[term] = term_id
+        return term_id
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Index Snapshots
+
+A read-only, versioned binary copy of the concept index (see
+KnowledgeIndexer.export_snapshot) that a fresh process opens with mmap
+and queries in place. Nothing is parsed or loaded when it is opened, so a
+cold query costs a binary search over the term table and a few page
+faults instead of rebuilding or reading the index.
+
+Layout (little-endian; every section starts on an 8-byte boundary):
+
+    header     magic "GDIX", format version, counts, section offsets
+    file keys  uint64 offsets[files + 1] into a UTF-8 blob
+    documents  uint32 file[docs], uint32 entry[docs], in result order
+    terms      uint64 offsets[terms + 1] into a UTF-8 blob, sorted by bytes
+    postings   uint64 offsets[terms + 1] into uint32 doc[postings]
+               (ascending per term) and uint8 fields[postings] (bit mask
+               of the FIELDS the term occurs in)
+
+Snapshots are written to a temporary file and moved into place with
+os.replace(), so a reader opens either the old or the new file, never a
+partial one. A reader that already has the old file mapped keeps reading
+it (the old inode stays alive) until it reopens; see is_stale().
+"""
+
+import os
+import sys
+import mmap
+import heapq
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .indexer import FIELDS, FIELD_IDS, parse_term
+
+
+MAGIC = b"GDIX"
+FORMAT_VERSION = 1
+
+# magic, version, flags, 4 counts, 9 section offsets, total size
+HEADER = struct.Struct("<4sHH4Q9QQ")
+
+_ALIGNMENT = 8
+
+
+class SnapshotFormatError(ValueError):
+    """The file is not a snapshot this version can read."""
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path: str, file_keys: List[str], documents: List[Tuple[int, int]],
+                   terms: Iterable[Tuple[str, Iterable[Tuple[int, int]]]]) -> int:
+    """
+    Write a snapshot atomically.
+
+    Args:
+        path: Snapshot file; replaced in one step when complete
+        file_keys: Knowledge base file keys; documents refer to them by
+            position
+        documents: (file position, entry) of every document, in the
+            order query results are returned
+        terms: (term, [(document, field mask), ...]) in ascending term
+            order, each with ascending documents
+
+    Returns:
+        Size of the snapshot in bytes
+
+    Raises:
+        ValueError: When terms are out of order or there are more fields
+            than the mask can hold
+    """
+    if len(FIELDS) > 8:
+        raise ValueError("field masks hold at most 8 fields")
+
+    key_blob = [key.encode("utf-8") for key in file_keys]
+    key_offsets = array("Q", [0])
+    for key in key_blob:
+        key_offsets.append(key_offsets[-1] + len(key))
+    doc_files = array("I", (file for file, _ in documents))
+    doc_entries = array("I", (entry for _, entry in documents))
+
+    term_blob = []
+    term_offsets = array("Q", [0])
+    posting_offsets = array("Q", [0])
+    posting_docs = array("I")
+    posting_fields = array("B")
+    previous = None
+    for term, postings in terms:
+        encoded = term.encode("utf-8")
+        if previous is not None and encoded <= previous:
+            raise ValueError(f"terms out of order at {term!r}")
+        previous = encoded
+        term_blob.append(encoded)
+        term_offsets.append(term_offsets[-1] + len(encoded))
+        for doc, fields in postings:
+            posting_docs.append(doc)
+            posting_fields.append(fields)
+        posting_offsets.append(len(posting_docs))
+
+    sections = [
+        _little_endian(key_offsets), b"".join(key_blob),
+        _little_endian(doc_files), _little_endian(doc_entries),
+        _little_endian(term_offsets), b"".join(term_blob),
+        _little_endian(posting_offsets), _little_endian(posting_docs), posting_fields.tobytes(),
+    ]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        position += -position % _ALIGNMENT
+        offsets.append(position)
+        position += len(section)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(file_keys), len(documents),
+                         len(term_blob), len(posting_docs), *offsets, position)
+
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name, dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for offset, section in zip(offsets, sections):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return position
+
+
+class MappedIndex:
+    """
+    Read-only view of a snapshot, queried without loading it.
+
+    Answers the same exact, field, prefix and conjunctive queries as
+    KnowledgeIndexer.query(), with hits in the same order.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot written by write_snapshot()
+
+        Raises:
+            OSError: When the file cannot be opened
+            SnapshotFormatError: When it is not a readable snapshot
+        """
+        if sys.byteorder == "big":
+            raise SnapshotFormatError("snapshots are little-endian")
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            if self._stat.st_size < HEADER.size:
+                raise SnapshotFormatError(f"{path} is too short for a snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, files, docs, terms, postings, *offsets, size = \
+            HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise SnapshotFormatError(f"{path} is not an index snapshot")
+        if version != FORMAT_VERSION or size != len(self._mmap):
+            self._mmap.close()
+            raise SnapshotFormatError(f"{path} has format version {version} "
+                                      f"(expected {FORMAT_VERSION}) or is truncated")
+        self.file_count, self.doc_count, self.term_count, self.posting_count = \
+            files, docs, terms, postings
+
+        view = memoryview(self._mmap)
+        self._views = [view]
+        self._key_offsets = self._array(view, offsets[0], files + 1, "Q")
+        self._key_blob = view[offsets[1]:offsets[2]]
+        self._doc_files = self._array(view, offsets[2], docs, "I")
+        self._doc_entries = self._array(view, offsets[3], docs, "I")
+        self._term_offsets = self._array(view, offsets[4], terms + 1, "Q")
+        self._term_blob = view[offsets[5]:offsets[6]]
+        self._posting_offsets = self._array(view, offsets[6], terms + 1, "Q")
+        self._posting_docs = self._array(view, offsets[7], postings, "I")
+        self._posting_fields = view[offsets[8]:offsets[8] + postings]
+        self._views.extend([self._key_blob, self._term_blob, self._posting_fields])
+
+    def _array(self, view: memoryview, offset: int, count: int, typecode: str) -> memoryview:
+        size = struct.calcsize(typecode)
+        array_view = view[offset:offset + count * size].cast(typecode)
+        self._views.append(array_view)
+        return array_view
+
+    def __len__(self) -> int:
+        """Number of indexed files."""
+        return self.file_count
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed files, distinct terms and postings."""
+        return {"files": self.file_count, "terms": self.term_count, "postings": self.posting_count}
+
+    def is_stale(self) -> bool:
+        """Whether a newer snapshot has been moved into place since this one was opened."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return (stat.st_ino, stat.st_mtime_ns) != (self._stat.st_ino, self._stat.st_mtime_ns)
+
+    def query(self, terms: Iterable[str], limit: Optional[int] = None) -> List[Dict]:
+        """
+        Entries that match every term (see KnowledgeIndexer.query).
+
+        Args:
+            terms: Query terms, e.g. ["BTN3A1", "property:activ*"]
+            limit: Return at most this many hits
+
+        Returns:
+            Hits as {"file": key, "entry": n} dicts, in indexing order
+        """
+        conditions = []
+        for field, value, is_prefix in (parse_term(term) for term in terms):
+            if not value:
+                continue
+            encoded = value.encode("utf-8")
+            if is_prefix:
+                first, last = self._prefix_range(encoded)
+            else:
+                first = self._find(encoded)
+                last = first + 1 if first >= 0 else first
+            ranges = [[self._posting_offsets[t], self._posting_offsets[t + 1]]
+                      for t in range(first, last)]
+            mask = 1 << FIELD_IDS[field] if field is not None else 0
+            conditions.append((sum(end - start for start, end in ranges), ranges, mask))
+        if not conditions:
+            return []
+
+        # The rarest term drives the query; the others are probed per document
+        conditions.sort(key=lambda condition: condition[0])
+        _, driver_ranges, driver_mask = conditions[0]
+        hits = []
+        for doc in self._documents(driver_ranges, driver_mask):
+            if all(self._contains(ranges, mask, doc) for _, ranges, mask in conditions[1:]):
+                hits.append(doc)
+                if limit is not None and len(hits) >= limit:
+                    break
+        return [{"file": self._file_key(self._doc_files[doc]), "entry": self._doc_entries[doc]}
+                for doc in hits]
+
+    def close(self) -> None:
+        """Unmap the snapshot."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes with it
+
+    def _documents(self, ranges: List[List[int]], mask: int) -> Iterator[int]:
+        """Ascending, distinct documents with a posting in the ranges (and field mask)."""
+        docs, fields = self._posting_docs, self._posting_fields
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            if not mask:
+                yield from docs[start:end]
+                return
+            for position in range(start, end):
+                if fields[position] & mask:
+                    yield docs[position]
+            return
+
+        def postings(start: int, end: int) -> Iterator[int]:
+            for position in range(start, end):
+                if not mask or fields[position] & mask:
+                    yield docs[position]
+
+        previous = -1
+        for doc in heapq.merge(*(postings(start, end) for start, end in ranges)):
+            if doc != previous:
+                previous = doc
+                yield doc
+
+    def _contains(self, ranges: List[List[int]], mask: int, doc: int) -> bool:
+        """
+        Whether one of the ranges has a posting for doc (in the field mask).
+
+        Documents are probed in ascending order, so each range's start is
+        moved past the documents already probed.
+        """
+        docs, fields = self._posting_docs, self._posting_fields
+        for bounds in ranges:
+            position = bisect_left(docs, doc, bounds[0], bounds[1])
+            bounds[0] = position
+            if position < bounds[1] and docs[position] == doc and \
+                    (not mask or fields[position] & mask):
+                return True
+        return False
+
+    def _term(self, index: int) -> bytes:
+        return bytes(self._term_blob[self._term_offsets[index]:self._term_offsets[index + 1]])
+
+    def _file_key(self, index: int) -> str:
+        return bytes(self._key_blob[self._key_offsets[index]:self._key_offsets[index + 1]]).decode("utf-8")
+
+    def _lower_bound(self, value: bytes, length: Optional[int] = None) -> int:
+        """First term index whose (first length bytes) are not below value."""
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            term = self._term(middle)
+            if (term if length is None else term[:length]) < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, value: bytes) -> int:
+        index = self._lower_bound(value)
+        return index if index < self.term_count and self._term(index) == value else -1
+
+    def _prefix_range(self, prefix: bytes) -> Tuple[int, int]:
+        """Term indexes [first, last) of the terms starting with prefix."""
+        first = self._lower_bound(prefix)
+        low, high = first, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle)[:len(prefix)] <= prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return first, low
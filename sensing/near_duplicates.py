@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Search: MinHash + LSH
+
+Finds facts and rules whose word sets are nearly the same, across the
+whole knowledge base rather than only factN/ruleN pairs. Each document
+gets a MinHash signature; signatures are split into bands and indexed in
+hash buckets (locality-sensitive hashing), so only documents sharing a
+bucket are ever compared. Documents can be added, replaced and removed
+one at a time, which lets the index follow GammaDetector change sets.
+
+Pairs whose texts differ mainly by opposite terms (activated/inhibited,
+upregulated/downregulated, ...) are flagged as contradiction candidates.
+"""
+
+import random
+import struct
+import hashlib
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .config import get_setting, file_monitoring_settings
+from .gamma_detector import DEFAULT_HASH_ALGORITHM, configured_hash_algorithm
+from .tokenizer import Tokenizer
+from .walker import KBWalker
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.8
+
+# Candidates are verified exactly, so a missed pair costs more than an
+# extra comparison
+FALSE_NEGATIVE_WEIGHT = 0.8
+
+# Opposite terms that turn a near-duplicate into a possible contradiction
+OPPOSITE_TERMS = [
+    ("activated", "inhibited"), ("activates", "inhibits"), ("activation", "inhibition"),
+    ("upregulated", "downregulated"), ("increases", "decreases"), ("induces", "suppresses"),
+    ("expressed", "absent"), ("positive", "negative"), ("true", "false"),
+]
+_OPPOSITES = {a: b for a, b in OPPOSITE_TERMS}
+_OPPOSITES.update({b: a for a, b in OPPOSITE_TERMS})
+
+
+def _integrate(func, start: float, end: float, steps: int = 100) -> float:
+    """Trapezoidal integration of func over [start, end]."""
+    if end <= start:
+        return 0.0
+    width = (end - start) / steps
+    total = (func(start) + func(end)) / 2
+    total += sum(func(start + i * width) for i in range(1, steps))
+    return total * width
+
+
+def optimal_bands(threshold: float, num_perm: int,
+                  false_negative_weight: float = FALSE_NEGATIVE_WEIGHT) -> Tuple[int, int]:
+    """
+    Choose (bands, rows) that balance false positives and false negatives.
+
+    A pair with Jaccard s shares at least one bucket with probability
+    1 - (1 - s^rows)^bands; the weighted sum of the area under that curve
+    below the threshold (false positives) and the area above it that is
+    missed (false negatives) is minimized.
+    """
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        def collision(s, bands=bands, rows=rows):
+            return 1 - (1 - s ** rows) ** bands
+        false_positive = _integrate(collision, 0.0, threshold)
+        false_negative = _integrate(lambda s: 1 - collision(s), threshold, 1.0)
+        error = ((1 - false_negative_weight) * false_positive +
+                 false_negative_weight * false_negative)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def exact_jaccard(words1: FrozenSet[int], words2: FrozenSet[int]) -> float:
+    """Jaccard similarity of two word sets."""
+    union = len(words1 | words2)
+    return len(words1 & words2) / union if union else 0.0
+
+
+class MinHasher:
+    """
+    MinHash signatures over sets of token IDs.
+
+    Each token's num_perm hash values are the 32-bit words of one SHAKE-128
+    output of the token's word (an independent hash function per signature
+    slot), computed once per distinct token. With NumPy installed the
+    per-slot minimum is taken with np.minimum.reduce; the signatures are the
+    same either way.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1,
+                 tokenizer: Optional[Tokenizer] = None):
+        self.num_perm = num_perm
+        self.tokenizer = tokenizer if tokenizer is not None else Tokenizer()
+        self._seed = seed.to_bytes(8, "little")
+        self._format = struct.Struct(f"<{num_perm}I")
+        self._token_values: Dict[int, any] = {}
+
+    def _values(self, token_id: int):
+        values = self._token_values.get(token_id)
+        if values is None:
+            word = self.tokenizer.word(token_id)
+            digest = hashlib.shake_128(self._seed + word.encode("utf-8")).digest(self._format.size)
+            values = np.frombuffer(digest, dtype="<u4") if np is not None else self._format.unpack(digest)
+            self._token_values[token_id] = values
+        return values
+
+    def signature(self, words: FrozenSet[int]) -> Optional[Tuple[int, ...]]:
+        """MinHash signature of a set of token IDs (None for an empty set)."""
+        if not words:
+            return None
+        if np is not None:
+            return tuple(np.minimum.reduce(list(map(self._values, words))).tolist())
+        return tuple(map(min, zip(*map(self._values, words))))
+
+    @staticmethod
+    def estimate(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity: the share of equal signature slots."""
+        return sum(map(int.__eq__, sig1, sig2)) / len(sig1)
+
+
+class NearDuplicateIndex:
+    """
+    Incremental LSH index over knowledge base documents.
+
+    Keys are file keys relative to the knowledge base ("facts/fact3.txt").
+    """
+
+    def __init__(self, kb_path: str = "kb", threshold: float = DEFAULT_THRESHOLD,
+                 num_perm: int = DEFAULT_NUM_PERM,
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = (),
+                 tokenizer: Optional[Tokenizer] = None,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            threshold: Jaccard similarity at which documents count as near-duplicates
+            num_perm: MinHash signature length (more is slower but more accurate)
+            watch_directories: Directories to index, relative to kb_path
+            file_extensions: File suffixes to index
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Index subdirectories
+            watch_files: Further files to index, relative to kb_path
+            tokenizer: Shared Tokenizer (a private in-memory one when None)
+            hash_algorithm: hashlib algorithm for the content hashes that
+                key cached token sets
+        """
+        self.kb_path = Path(kb_path)
+        self.threshold = threshold
+        self.tokenizer = tokenizer if tokenizer is not None else Tokenizer()
+        self.hasher = MinHasher(num_perm, tokenizer=self.tokenizer)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.hash_algorithm = hash_algorithm
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], Set[str]]] = [{} for _ in range(self.bands)]
+        self._words: Dict[str, FrozenSet[int]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None,
+                    threshold: Optional[float] = None,
+                    tokenizer: Optional[Tokenizer] = None) -> 'NearDuplicateIndex':
+        """
+        Create an index using settings from load_config().
+
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+            threshold: Overrides sensing.near_duplicates.threshold when given
+            tokenizer: Shared Tokenizer (one configured from sensing.tokenizer
+                when None)
+        """
+        settings = get_setting(config, "sensing.near_duplicates", {}) or {}
+        return cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            threshold=threshold if threshold is not None else settings.get("threshold", DEFAULT_THRESHOLD),
+            num_perm=settings.get("num_perm", DEFAULT_NUM_PERM),
+            tokenizer=tokenizer if tokenizer is not None else Tokenizer.from_config(config),
+            hash_algorithm=configured_hash_algorithm(config),
+            **file_monitoring_settings(config)
+        )
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows] for band in range(self.bands)]
+
+    def add(self, key: str, text: str, content_hash: Optional[str] = None) -> None:
+        """Index (or re-index) one document, reusing its cached tokens when content_hash is given."""
+        self.remove(key)
+        words = self.tokenizer.token_set(text, content_hash)
+        signature = self.hasher.signature(words)
+        if signature is None:
+            return
+        self.signatures[key] = signature
+        self._words[key] = words
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """Drop a document from the index (no-op when absent)."""
+        signature = self.signatures.pop(key, None)
+        self._words.pop(key, None)
+        if signature is None:
+            return
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            members = buckets.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del buckets[band_key]
+
+    def update_from_kb(self, changes: Optional[Iterable[str]] = None,
+                       file_hashes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Bring the index up to date with the files on disk.
+
+        Args:
+            changes: File keys added, modified or deleted since the last
+                update (e.g. DeltaAnalyzer.changed_files(gamma_results));
+                None re-indexes the whole knowledge base
+            file_hashes: Content hashes by file key, e.g. from
+                GammaDetector.content_hashes(); a file whose tokens are
+                cached under its hash is not read
+
+        Returns:
+            Number of documents (re-)indexed
+        """
+        if changes is None:
+            keys = [key for key, _, _ in self.walker.walk()]
+            for stale in set(self.signatures) - set(keys):
+                self.remove(stale)
+        else:
+            keys = [key for key in changes if self.walker.accepts(key)]
+
+        file_hashes = file_hashes or {}
+        self.tokenizer.preload(file_hashes.get(key) for key in keys)
+        indexed = 0
+        for key in keys:
+            content_hash = file_hashes.get(key)
+            text = ""
+            if not content_hash or self.tokenizer.lookup(content_hash) is None:
+                try:
+                    data = (self.kb_path / key).read_bytes()
+                    text = data.decode("utf-8")
+                except (OSError, UnicodeDecodeError):
+                    self.remove(key)
+                    continue
+                content_hash = hashlib.new(self.hash_algorithm, data).hexdigest()
+            self.add(key, text, content_hash)
+            indexed += 1
+        self.tokenizer.save()
+        return indexed
+
+    def candidate_pairs(self) -> Set[Tuple[str, str]]:
+        """Document pairs that share at least one LSH bucket."""
+        candidates = set()
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if len(members) > 1:
+                    candidates.update(combinations(sorted(members), 2))
+        return candidates
+
+    def near_duplicate_pairs(self, exact: bool = True) -> List[Dict]:
+        """
+        Candidate pairs whose similarity reaches the threshold.
+
+        Args:
+            exact: Verify candidates with exact Jaccard instead of the
+                MinHash estimate
+
+        Returns:
+            Pairs as dicts, most similar first
+        """
+        pairs = []
+        for key1, key2 in self.candidate_pairs():
+            if exact:
+                similarity = exact_jaccard(self._words[key1], self._words[key2])
+            else:
+                similarity = MinHasher.estimate(self.signatures[key1], self.signatures[key2])
+            if similarity < self.threshold:
+                continue
+            pair = {"documents": [key1, key2], "similarity": similarity}
+            opposites = self._opposite_terms(key1, key2)
+            if opposites:
+                pair["contradiction_candidate"] = True
+                pair["opposite_terms"] = opposites
+            pairs.append(pair)
+        pairs.sort(key=lambda p: (-p["similarity"], p["documents"]))
+        return pairs
+
+    def _opposite_terms(self, key1: str, key2: str) -> List[List[str]]:
+        """Opposite-term pairs that appear on different sides of two documents."""
+        only1 = self.tokenizer.words(self._words[key1] - self._words[key2])
+        only2 = set(self.tokenizer.words(self._words[key2] - self._words[key1]))
+        return sorted([word, _OPPOSITES[word]] for word in only1
+                      if _OPPOSITES.get(word) in only2)
+
+    def clusters(self, pairs: Optional[List[Dict]] = None) -> List[List[str]]:
+        """
+        Group near-duplicate pairs into clusters (connected components).
+
+        Returns:
+            Clusters as sorted key lists, largest first
+        """
+        if pairs is None:
+            pairs = self.near_duplicate_pairs()
+        parent: Dict[str, str] = {}
+
+        def find(key):
+            parent.setdefault(key, key)
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for pair in pairs:
+            root1, root2 = (find(key) for key in pair["documents"])
+            if root1 != root2:
+                parent[root2] = root1
+
+        groups: Dict[str, List[str]] = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        return sorted((sorted(group) for group in groups.values()), key=lambda g: (-len(g), g))
+
+    def evaluate(self, sample_size: int = 500, seed: int = 0,
+                 exact: bool = True) -> Dict[str, float]:
+        """
+        Precision and recall of the LSH search against exact Jaccard.
+
+        A random sample of the indexed documents is compared all-pairs
+        (quadratic, so keep the sample small); the near-duplicate pairs the
+        index reports within the sample are scored against that truth.
+        Precision is 1.0 by construction when candidates are verified
+        exactly; recall shows how many true pairs LSH never proposed.
+
+        Args:
+            sample_size: Number of documents compared all-pairs
+            seed: Random seed for the sample
+            exact: Verify candidates exactly (as near_duplicate_pairs does
+                by default) instead of by MinHash estimate
+
+        Returns:
+            Sample size, true/reported pair counts, precision and recall
+        """
+        keys = sorted(self.signatures)
+        sample = set(random.Random(seed).sample(keys, min(sample_size, len(keys))))
+
+        truth = {
+            (key1, key2) for key1, key2 in combinations(sorted(sample), 2)
+            if exact_jaccard(self._words[key1], self._words[key2]) >= self.threshold
+        }
+        reported = {
+            tuple(pair["documents"]) for pair in self.near_duplicate_pairs(exact=exact)
+            if pair["documents"][0] in sample and pair["documents"][1] in sample
+        }
+        true_positives = len(truth & reported)
+        return {
+            "sample_size": len(sample),
+            "true_pairs": len(truth),
+            "reported_pairs": len(reported),
+            "precision": true_positives / len(reported) if reported else 1.0,
+            "recall": true_positives / len(truth) if truth else 1.0
+        }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pair Cache: Persistence for Delta Analysis
+
+Stores the content analysis of each fact/rule pair under the content
+hashes of its two files, so a pair whose files have not changed is never
+read or tokenized again, even in a new process.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from .state_store import _dumps
+
+
+PairKey = Tuple[str, str]  # (fact content hash, rule content hash)
+
+# Two host parameters per key; SQLite's limit is 999 on older builds
+_LOOKUP_BATCH = 400
+
+
+class PairCache:
+    """
+    SQLite-backed (fact hash, rule hash) -> analysis mapping.
+
+    Entries are plain dictionaries (consistency score and the serialized
+    content analysis) as produced by DeltaAnalyzer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pairs (
+            fact_hash TEXT NOT NULL,
+            rule_hash TEXT NOT NULL,
+            analysis TEXT NOT NULL,
+            PRIMARY KEY (fact_hash, rule_hash)
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def load(self) -> Dict[PairKey, Dict]:
+        """Return every cached analysis."""
+        return {
+            (fact_hash, rule_hash): json.loads(analysis)
+            for fact_hash, rule_hash, analysis in
+            self._conn.execute("SELECT fact_hash, rule_hash, analysis FROM pairs")
+        }
+
+    def get_many(self, keys: Iterable[PairKey]) -> Dict[PairKey, Dict]:
+        """Return the cached analyses of the given keys that are present."""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                "SELECT fact_hash, rule_hash, analysis FROM pairs WHERE (fact_hash, rule_hash) IN "
+                f"(VALUES {','.join(['(?, ?)'] * len(batch))})",
+                [value for key in batch for value in key]
+            )
+            found.update(((fact_hash, rule_hash), json.loads(analysis))
+                         for fact_hash, rule_hash, analysis in rows)
+        return found
+
+    def commit(self, upserts: Dict[PairKey, Dict], deletes: Iterable[PairKey] = ()) -> None:
+        """
+        Write new analyses and drop stale ones in a single transaction.
+
+        Args:
+            upserts: Analyses computed since the last commit
+            deletes: Keys no longer referenced by any pair
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pairs (fact_hash, rule_hash, analysis) VALUES (?, ?, ?)",
+                [(fact_hash, rule_hash, _dumps(analysis))
+                 for (fact_hash, rule_hash), analysis in upserts.items()]
+            )
+            self._conn.executemany(
+                "DELETE FROM pairs WHERE fact_hash = ? AND rule_hash = ?", list(deletes)
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Pair Index: Fact/Rule Pairing Across Naming Schemes
+
+Maps every fact file to its rule file under one normalized pair ID,
+qualified by naming scheme so that numbered text files and zero-padded
+YAML files never collide:
+
+    facts/fact3.txt     + rules/rule3.txt      -> "txt:3"
+    facts/fact-001.yaml + rules/rule-001.yaml  -> "yaml:1"
+
+Each pair ID has exactly one file name per role (pair_file_key()):
+numbers are written without leading zeros in .txt names and padded to
+three digits in .yaml names. Other spellings such as fact-3.txt,
+fact03.txt or fact-1.yaml are not pair files, so two files can never
+claim the same side of a pair.
+
+The index is built from one listing of facts/ and rules/ (or from file
+keys that are already known, such as a GammaDetector baseline) and is
+then updated from change events, so learning about new or orphaned pairs
+costs O(changes) rather than another directory scan.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Naming scheme -> (file name pattern, file name of a role and number)
+SCHEMES = {
+    "txt": (re.compile(r"(fact|rule)(0|[1-9]\d*)\.txt$"), "{role}{number}.txt"),
+    "yaml": (re.compile(r"(fact|rule)-(\d{3}|[1-9]\d{3,})\.yaml$"), "{role}-{number:03d}.yaml"),
+}
+
+# Bumped whenever the naming rules change, so that pair indexes persisted
+# under older rules are rebuilt (see GammaDetector.pair_index)
+PAIR_INDEX_VERSION = 2
+
+# Role -> directory (relative to the knowledge base) holding its files
+ROLE_DIRECTORIES = {"fact": "facts", "rule": "rules"}
+
+
+def parse_pair_file(file_key: str) -> Optional[Tuple[str, str]]:
+    """
+    Pair ID and role of a file key.
+
+    Args:
+        file_key: Path relative to the knowledge base ("facts/fact-001.yaml")
+
+    Returns:
+        (pair ID, "fact" or "rule"), or None for files that are not part of
+        a pair (wrong directory, subdirectory or name)
+    """
+    directory, _, name = str(file_key).replace("\\", "/").partition("/")
+    for scheme, (pattern, _) in SCHEMES.items():
+        match = pattern.match(name)
+        if match is not None and ROLE_DIRECTORIES[match.group(1)] == directory:
+            return f"{scheme}:{int(match.group(2))}", match.group(1)
+    return None
+
+
+def pair_file_key(pair_id: str, role: str) -> str:
+    """
+    The one file key that belongs to a side of a pair.
+
+    Args:
+        pair_id: Scheme-qualified pair ID ("txt:3")
+        role: "fact" or "rule"
+
+    Returns:
+        File key relative to the knowledge base ("facts/fact3.txt")
+    """
+    scheme, number = split_pair_id(pair_id)
+    name = SCHEMES[scheme][1].format(role=role, number=number)
+    return f"{ROLE_DIRECTORIES[role]}/{name}"
+
+
+def split_pair_id(pair_id: str) -> Tuple[str, int]:
+    """("txt", 3) for "txt:3"; also the sort key of pair IDs."""
+    scheme, _, number = pair_id.partition(":")
+    return scheme, int(number)
+
+
+class Pair:
+    """The fact and rule file keys of one pair ID (None when missing)."""
+    __slots__ = ("pair_id", "fact", "rule")
+
+    def __init__(self, pair_id: str, fact: Optional[str] = None, rule: Optional[str] = None):
+        self.pair_id = pair_id
+        self.fact = fact
+        self.rule = rule
+
+    @property
+    def complete(self) -> bool:
+        return self.fact is not None and self.rule is not None
+
+    @property
+    def status(self) -> str:
+        """"complete", "orphan" (one file) or "removed" (no files left)."""
+        if self.complete:
+            return "complete"
+        return "orphan" if self.fact is not None or self.rule is not None else "removed"
+
+    def to_dict(self) -> Dict:
+        return {"fact": self.fact, "rule": self.rule}
+
+    def __repr__(self) -> str:
+        return f"Pair({self.pair_id!r}, fact={self.fact!r}, rule={self.rule!r})"
+
+
+class PairIndex:
+    """
+    Fact/rule pairs of a knowledge base by scheme-qualified pair ID.
+
+    Changes since the last pop_updates() are tracked so that a persistent
+    copy (see GammaDetector.pair_index) can be updated row by row.
+    """
+
+    def __init__(self, kb_path: str = "kb"):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+        """
+        self.kb_path = Path(kb_path)
+        self._pairs: Dict[str, Pair] = {}
+        self._changed: Set[str] = set()
+
+    def build(self) -> 'PairIndex':
+        """Rebuild from a single listing of the facts/ and rules/ directories."""
+        file_keys = []
+        for directory in ROLE_DIRECTORIES.values():
+            try:
+                with os.scandir(self.kb_path / directory) as entries:
+                    file_keys.extend(f"{directory}/{entry.name}" for entry in entries
+                                     if entry.is_file())
+            except OSError:
+                continue
+        return self.rebuild(file_keys)
+
+    def rebuild(self, file_keys: Iterable[str]) -> 'PairIndex':
+        """Rebuild from every file key of the knowledge base."""
+        self._changed.update(self._pairs)
+        self._pairs = {}
+        self.apply_changes(added=file_keys)
+        return self
+
+    def load(self, rows: Dict[str, Dict]) -> None:
+        """Replace the index with persisted rows (pair ID -> to_dict())."""
+        self._pairs = {pair_id: Pair(pair_id, row.get("fact"), row.get("rule"))
+                       for pair_id, row in rows.items()}
+        self._changed = set()
+
+    def apply_changes(self, added: Iterable[str] = (), deleted: Iterable[str] = ()) -> Set[str]:
+        """
+        Update the index from file change events.
+
+        Modified files do not change any pairing and need not be passed.
+
+        Args:
+            added: File keys that were created
+            deleted: File keys that were removed
+
+        Returns:
+            IDs of the pairs that were affected; see status() for their
+            new state
+        """
+        affected = set()
+        for file_key in deleted:
+            parsed = parse_pair_file(file_key)
+            pair = self._pairs.get(parsed[0]) if parsed else None
+            if pair is None or getattr(pair, parsed[1]) != file_key:
+                continue
+            setattr(pair, parsed[1], None)
+            if pair.status == "removed":
+                del self._pairs[pair.pair_id]
+            affected.add(pair.pair_id)
+        for file_key in added:
+            parsed = parse_pair_file(file_key)
+            if parsed is None:
+                continue
+            pair_id, role = parsed
+            pair = self._pairs.get(pair_id)
+            if pair is None:
+                pair = self._pairs[pair_id] = Pair(pair_id)
+            setattr(pair, role, file_key)
+            affected.add(pair_id)
+        self._changed.update(affected)
+        return affected
+
+    def pop_updates(self) -> Dict[str, Optional[Dict]]:
+        """Rows changed since the previous call (None marks a removed pair)."""
+        updates = {}
+        for pair_id in self._changed:
+            pair = self._pairs.get(pair_id)
+            updates[pair_id] = pair.to_dict() if pair is not None else None
+        self._changed = set()
+        return updates
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def __contains__(self, pair_id: str) -> bool:
+        return pair_id in self._pairs
+
+    def get(self, pair_id: str) -> Optional[Pair]:
+        return self._pairs.get(pair_id)
+
+    def status(self, pair_id: str) -> str:
+        """"complete", "orphan" or "removed" (also for unknown IDs)."""
+        pair = self._pairs.get(pair_id)
+        return pair.status if pair is not None else "removed"
+
+    def path(self, file_key: Optional[str]) -> Optional[Path]:
+        """Path of a file key under kb_path (None stays None)."""
+        return self.kb_path / file_key if file_key is not None else None
+
+    def pairs(self, scheme: Optional[str] = None) -> List[Pair]:
+        """Pairs in (scheme, number) order, optionally of one scheme only."""
+        selected = (pair for pair in self._pairs.values()
+                    if scheme is None or pair.pair_id.startswith(scheme + ":"))
+        return sorted(selected, key=lambda pair: split_pair_id(pair.pair_id))
+
+    def complete_pairs(self) -> List[Pair]:
+        return [pair for pair in self.pairs() if pair.complete]
+
+    def orphans(self) -> List[Pair]:
+        """Pairs with only a fact or only a rule file."""
+        return [pair for pair in self.pairs() if not pair.complete]
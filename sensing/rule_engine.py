@@ -0,0 +1,914 @@
+#!/usr/bin/env python3
+"""
+Rule Engine: Forward Chaining over a Rete Network
+
+Evaluates the structured rules of the knowledge base, whose if/then lists
+hold concept/subtype/property/context patterns:
+
+    - rule_id: rule_001
+      if:
+        - concept: BTN3A1
+          property: activated
+          context: ?ctx
+      then:
+        - concept: gamma_delta_t_cell
+          property: activated
+          context: ?ctx
+
+Facts are the concept entries of YAML fact files. A value starting with
+"?" is a variable; a field a pattern leaves out matches anything.
+
+Rule conditions are compiled into a Rete network instead of matching
+every rule against every fact:
+
+- alpha nodes test the constant fields of one condition and are found
+  through a discrimination index on (concept, subtype, property,
+  context), so a fact only visits the conditions it can satisfy;
+- join nodes combine the conditions of a rule left to right, hashed on
+  the variables they share, and are shared by rules with a common
+  prefix of conditions;
+- partial matches are kept between updates, so asserting or retracting
+  a fact only does the work that fact causes.
+
+Derived facts are asserted back into the network (forward chaining) and
+counted by their derivations, so a change to a fact or rule file
+retracts exactly the conclusions that lost their support.
+"""
+
+import gc
+import hashlib
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+from .config import get_setting, file_monitoring_settings
+from .gamma_detector import DEFAULT_HASH_ALGORITHM, configured_hash_algorithm
+from .indexer import YAML_SUFFIXES, normalize
+from .walker import KBWalker
+
+
+# Fact fields, in the order of fact tuples
+FACT_FIELDS = ("concept", "subtype", "property", "context")
+
+# Files at the knowledge base root that hold facts or rules as well
+ROOT_FILES = ("facts.yaml", "rules.yaml")
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+Fact = Tuple[Optional[str], ...]
+
+
+def fact_tuple(item: Dict) -> Fact:
+    """Normalized (concept, subtype, property, context) of a fact mapping."""
+    return tuple(normalize(item[name]) if item.get(name) is not None else None
+                 for name in FACT_FIELDS)
+
+
+def fact_dict(fact: Fact) -> Dict[str, str]:
+    """The fields of a fact tuple that are set."""
+    return {name: value for name, value in zip(FACT_FIELDS, fact) if value is not None}
+
+
+def parse_kb_file(key: str, data: bytes) -> Tuple[Counter, Dict[str, Tuple[str, List, List]], int]:
+    """
+    Facts and structured rules of one YAML file.
+
+    Args:
+        key: File key, used to name rules without a rule_id
+        data: File contents
+
+    Returns:
+        (fact counts, rule key -> (rule ID, if patterns, then patterns),
+        number of free-text rules)
+    """
+    facts: Counter = Counter()
+    rules: Dict[str, Tuple[str, List, List]] = {}
+    unstructured = 0
+    try:
+        document = yaml.load(data.decode("utf-8"), Loader=_YAML_LOADER)
+    except (UnicodeDecodeError, yaml.YAMLError) as e:
+        print(f"Warning: Could not parse {key}: {e}")
+        return facts, rules, unstructured
+    items = document if isinstance(document, list) else [document]
+    for number, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        if "if" in item and "then" in item:
+            conditions, conclusions = item["if"], item["then"]
+            if isinstance(conditions, dict):
+                conditions = [conditions]
+            if isinstance(conclusions, dict):
+                conclusions = [conclusions]
+            if not isinstance(conditions, list) or not isinstance(conclusions, list):
+                unstructured += 1  # free-text if/then
+                continue
+            rule_id = str(item.get("rule_id") or f"{key}#{number}")
+            rule_key = f"{key}:{rule_id}"
+            if rule_key in rules:
+                rule_key = f"{rule_key}#{number}"
+            rules[rule_key] = (rule_id, conditions, conclusions)
+        elif item.get("concept") is not None:
+            facts[fact_tuple(item)] += 1
+    return facts, rules, unstructured
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend cyclic garbage collection while the network changes.
+
+    Partial matches link to their parents and children, so building many
+    of them would otherwise trigger collections that traverse the whole
+    network; unlinked matches are still freed by reference counting.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _variable(value) -> Optional[str]:
+    """Name of a variable ("?ctx"), or None for a constant."""
+    if isinstance(value, str) and value.strip().startswith("?"):
+        return value.strip()
+    return None
+
+
+def compile_rule(conditions: List[Dict], conclusions: List[Dict]) -> Tuple[Tuple, Tuple]:
+    """
+    Compile the if/then patterns of a rule.
+
+    Variables are numbered in order of first appearance, so the bindings of
+    a partial match form a tuple that grows by one slice per condition and
+    rules that differ only in variable names compile to the same network.
+
+    Args:
+        conditions: Patterns of the if: list
+        conclusions: Patterns of the then: list
+
+    Returns:
+        (conditions, conclusions). Each condition is (alpha key, tests,
+        binds): the alpha key holds the constant fields, fields that must
+        be equal within the fact, and fields that must be present; tests
+        pairs earlier bindings with fields of the fact; binds lists the
+        fields whose values extend the bindings. Each conclusion is a
+        tuple over FACT_FIELDS of None, (False, constant) or (True,
+        binding index).
+
+    Raises:
+        ValueError: For empty patterns or variables a conclusion uses but
+            no condition binds
+    """
+    variables: Dict[str, int] = {}
+    compiled_conditions = []
+    for condition in conditions:
+        if not isinstance(condition, dict):
+            raise ValueError(f"condition is not a mapping: {condition!r}")
+        mask, values, same, tests, binds = [], [], [], [], []
+        local: Dict[str, int] = {}
+        for index, name in enumerate(FACT_FIELDS):
+            value = condition.get(name)
+            if value is None:
+                continue
+            variable = _variable(value)
+            if variable is None:
+                mask.append(index)
+                values.append(normalize(value))
+            elif variable in local:
+                same.append((local[variable], index))
+            else:
+                local[variable] = index
+                if variable in variables:
+                    tests.append((variables[variable], index))
+                else:
+                    variables[variable] = len(variables)
+                    binds.append(index)
+        if not mask and not local:
+            raise ValueError(f"condition has no {'/'.join(FACT_FIELDS)} field")
+        present = tuple(sorted(local.values()))
+        alpha_key = (tuple(mask), tuple(values), tuple(same), present)
+        compiled_conditions.append((alpha_key, tuple(tests), tuple(binds)))
+
+    compiled_conclusions = []
+    for conclusion in conclusions:
+        if not isinstance(conclusion, dict):
+            raise ValueError(f"conclusion is not a mapping: {conclusion!r}")
+        template = []
+        for name in FACT_FIELDS:
+            value = conclusion.get(name)
+            variable = _variable(value)
+            if value is None:
+                template.append(None)
+            elif variable is None:
+                template.append((False, normalize(value)))
+            elif variable in variables:
+                template.append((True, variables[variable]))
+            else:
+                raise ValueError(f"variable {variable} is not bound by any condition")
+        if not any(template):
+            raise ValueError(f"conclusion has no {'/'.join(FACT_FIELDS)} field")
+        compiled_conclusions.append(tuple(template))
+    return tuple(compiled_conditions), tuple(compiled_conclusions)
+
+
+class _WME:
+    """A fact in working memory with its support."""
+    __slots__ = ("fact", "asserted", "derivations", "alphas", "tokens")
+
+    def __init__(self, fact: Fact):
+        self.fact = fact
+        self.asserted = 0  # fact file entries stating it
+        self.derivations: Set[Tuple] = set()  # (terminal, token) that derived it
+        self.alphas: List["_AlphaNode"] = []
+        self.tokens: Set["_Token"] = set()
+
+
+class _Token:
+    """A partial match: one fact per condition so far, and the variable bindings."""
+    __slots__ = ("parent", "wme", "bindings", "memory", "children")
+
+    def __init__(self, parent: Optional["_Token"], wme: Optional[_WME],
+                 bindings: Tuple, memory: "_BetaMemory"):
+        self.parent = parent
+        self.wme = wme
+        self.bindings = bindings
+        self.memory = memory
+        self.children: Set["_Token"] = set()
+
+    def wmes(self) -> List[_WME]:
+        """The facts of the match, first condition first."""
+        wmes = []
+        token = self
+        while token is not None and token.wme is not None:
+            wmes.append(token.wme)
+            token = token.parent
+        wmes.reverse()
+        return wmes
+
+
+class _AlphaNode:
+    """Facts matching the constant part of one condition."""
+    __slots__ = ("key", "wmes", "joins")
+
+    def __init__(self, key: Tuple):
+        self.key = key
+        self.wmes: Set[_WME] = set()
+        self.joins: Dict["_JoinNode", None] = {}
+
+    def accepts(self, fact: Fact) -> bool:
+        _, _, same, present = self.key
+        return all(fact[index] is not None for index in present) and \
+            all(fact[first] == fact[second] for first, second in same)
+
+
+class _BetaMemory:
+    """Partial matches of the conditions above it."""
+    __slots__ = ("parent", "tokens", "children")
+
+    def __init__(self, parent: Optional["_JoinNode"]):
+        self.parent = parent
+        self.tokens: Set[_Token] = set()
+        self.children: Dict[object, None] = {}  # _JoinNode or _Terminal
+
+
+class _JoinNode:
+    """Extends the partial matches of a memory with the facts of an alpha node."""
+    __slots__ = ("parent", "alpha", "tests", "binds", "child", "left_index", "right_index")
+
+    def __init__(self, parent: _BetaMemory, alpha: _AlphaNode, tests: Tuple, binds: Tuple):
+        self.parent = parent
+        self.alpha = alpha
+        self.tests = tests
+        self.binds = binds
+        self.child = _BetaMemory(self)
+        # Join key -> tokens of the parent memory / facts of the alpha node
+        self.left_index: Dict[Tuple, Set[_Token]] = {}
+        self.right_index: Dict[Tuple, Set[_WME]] = {}
+
+    def left_key(self, token: _Token) -> Tuple:
+        return tuple(token.bindings[binding] for binding, _ in self.tests)
+
+    def right_key(self, wme: _WME) -> Tuple:
+        return tuple(wme.fact[index] for _, index in self.tests)
+
+
+class _Terminal:
+    """Fires a rule for every complete match."""
+    __slots__ = ("rule", "memory", "conclusions")
+
+    def __init__(self, rule: "_Rule", memory: _BetaMemory):
+        self.rule = rule
+        self.memory = memory
+        self.conclusions: Dict[_Token, List[_WME]] = {}
+
+
+class _Rule:
+    __slots__ = ("key", "rule_id", "signature", "terminal")
+
+    def __init__(self, key: str, rule_id: str, signature: Tuple):
+        self.key = key
+        self.rule_id = rule_id
+        self.signature = signature
+        self.terminal: Optional[_Terminal] = None
+
+
+class RuleEngine:
+    """
+    Forward-chaining inference over the facts and rules of a knowledge base.
+
+    The network lives in memory: build it once with update_from_kb() and
+    keep it current with the change sets of later gamma scans.
+    """
+
+    def __init__(self, kb_path: str = "kb",
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = (),
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            watch_directories: Directories holding fact and rule files,
+                relative to kb_path (ROOT_FILES are read as well)
+            file_extensions: File suffixes to read (only YAML holds
+                structured facts and rules)
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Read subdirectories
+            watch_files: Further files to read, relative to kb_path
+            hash_algorithm: hashlib algorithm for hashing rule and fact files
+                not passed in file_hashes
+        """
+        self.kb_path = Path(kb_path)
+        self.hash_algorithm = hash_algorithm
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+
+        self._wm: Dict[Fact, _WME] = {}
+        self._rules: Dict[str, _Rule] = {}
+        self._top = _BetaMemory(None)
+        self._top.tokens.add(_Token(None, None, (), self._top))
+        # Discrimination index: constant fields -> their values -> alpha nodes
+        self._alpha_index: Dict[Tuple, Dict[Tuple, List[_AlphaNode]]] = {}
+        self._alpha_nodes: Dict[Tuple, _AlphaNode] = {}
+        self._joins: Dict[Tuple, _JoinNode] = {}
+
+        # File key -> (content hash, fact counts, rule key -> (rule ID, signature))
+        self._files: Dict[str, Tuple[str, Counter, Dict[str, Tuple[str, Tuple]]]] = {}
+        self._unstructured_rules: Dict[str, int] = {}
+
+        self._asserting: deque = deque()
+        self._retracting: deque = deque()
+        self._suspect = False  # a derived fact lost support but still has some
+        self._new_alphas: List[_AlphaNode] = []
+        self._new_joins: List[_JoinNode] = []
+        self._new_terminals: List[_Terminal] = []
+        self._created: Set[_WME] = set()
+        self._removed: Set[Fact] = set()
+        self._unstated: Set[Fact] = set()  # lost their last statement this batch
+        self.firings = 0
+
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None) -> 'RuleEngine':
+        """
+        Create a rule engine using settings from load_config().
+
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+        """
+        return cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            hash_algorithm=configured_hash_algorithm(config),
+            **file_monitoring_settings(config)
+        )
+
+    def __len__(self) -> int:
+        """Facts in working memory, asserted and derived."""
+        return len(self._wm)
+
+    def stats(self) -> Dict[str, int]:
+        """Sizes of the rule set, working memory and network."""
+        derived = sum(1 for wme in self._wm.values() if not wme.asserted)
+        return {
+            "rules": len(self._rules),
+            "unstructured_rules": sum(self._unstructured_rules.values()),
+            "facts": len(self._wm) - derived,
+            "derived_facts": derived,
+            "alpha_nodes": len(self._alpha_nodes),
+            "join_nodes": len(self._joins),
+            "firings": self.firings
+        }
+
+    # ------------------------------------------------------------------
+    # Public operations
+
+    def add_rules(self, rules: Iterable[Tuple[str, List[Dict], List[Dict]]]) -> None:
+        """
+        Add (or replace) rules and fire them on the facts already known.
+
+        Args:
+            rules: (rule ID, if: patterns, then: patterns) per rule; the
+                rule ID is also its key
+
+        Raises:
+            ValueError: When a rule does not compile (see compile_rule); no
+                rule is added then
+        """
+        compiled = [(rule_id, compile_rule(conditions, conclusions))
+                    for rule_id, conditions, conclusions in rules]
+        with _gc_paused():
+            self._begin()
+            for rule_id, signature in compiled:
+                self._add_rule(rule_id, rule_id, signature)
+            self._finish_rules()
+            self._assert_pending()
+
+    def add_rule(self, rule_id: str, conditions: List[Dict], conclusions: List[Dict]) -> None:
+        """Add (or replace) one rule; see add_rules()."""
+        self.add_rules([(rule_id, conditions, conclusions)])
+
+    def remove_rule(self, rule_id: str) -> None:
+        """Remove a rule and retract what only it derived."""
+        rule = self._rules.get(rule_id)
+        if rule is not None:
+            with _gc_paused():
+                self._begin()
+                self._remove_rule(rule)
+                self._retract_unsupported()
+
+    def assert_facts(self, facts: Iterable[Dict]) -> None:
+        """State facts (again) and derive their consequences."""
+        with _gc_paused():
+            self._begin()
+            for fact in facts:
+                self._support(fact_tuple(fact))
+            self._assert_pending()
+
+    def assert_fact(self, fact: Dict) -> None:
+        self.assert_facts([fact])
+
+    def retract_facts(self, facts: Iterable[Dict]) -> None:
+        """Withdraw one statement of each fact, and what no longer follows."""
+        with _gc_paused():
+            self._begin()
+            for fact in facts:
+                wme = self._wm.get(fact_tuple(fact))
+                if wme is not None and wme.asserted:
+                    self._drop_support(wme)
+            self._retract_unsupported()
+
+    def retract_fact(self, fact: Dict) -> None:
+        self.retract_facts([fact])
+
+    def update_from_kb(self, changes: Optional[Iterable[str]] = None,
+                       file_hashes: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        Bring facts, rules and conclusions up to date with the files on disk.
+
+        Within a changed file only the facts and rules that differ are
+        retracted or added.
+
+        Args:
+            changes: File keys added, modified or deleted since the last
+                update (e.g. DeltaAnalyzer.changed_files(gamma_results));
+                None checks the whole knowledge base
+            file_hashes: Content hashes by file key, e.g. from
+                GammaDetector.content_hashes(); a file whose hash matches
+                the loaded one is not read. Without changes, its keys are
+                taken as the complete list of files.
+
+        Returns:
+            Counts of files read, rules and facts added and removed, and
+            rule firings, with the derived facts that appeared
+            ("derived_added") and disappeared ("derived_removed")
+        """
+        root_keys = [name for name in ROOT_FILES
+                     if name in self._files or (self.kb_path / name).is_file()]
+        if changes is None:
+            if file_hashes is not None:
+                keys = [key for key in file_hashes if self.walker.accepts(key)]
+            else:
+                keys = [key for key, _, _ in self.walker.walk()]
+            keys = [key for key in keys if key.endswith(YAML_SUFFIXES)]
+            keys.extend(key for key in root_keys if key not in keys)
+            keys.extend(key for key in self._files if key not in keys)
+        else:
+            keys = [key for key in set(changes)
+                    if key.endswith(YAML_SUFFIXES) and self.walker.accepts(key)]
+            keys.extend(key for key in root_keys if key not in keys)
+        file_hashes = file_hashes or {}
+
+        updates = {}
+        for key in keys:
+            content_hash = file_hashes.get(key)
+            loaded = self._files.get(key)
+            if content_hash and loaded and content_hash == loaded[0]:
+                continue
+            try:
+                data = (self.kb_path / key).read_bytes()
+            except OSError:
+                if loaded is not None:
+                    updates[key] = None
+                continue
+            content_hash = content_hash or hashlib.new(self.hash_algorithm, data).hexdigest()
+            if loaded is None or content_hash != loaded[0]:
+                updates[key] = (content_hash, data)
+
+        summary = {"files": len(updates), "rules_added": 0, "rules_removed": 0,
+                   "facts_asserted": 0, "facts_retracted": 0}
+        parsed = {}
+        for key, update in updates.items():
+            parsed[key] = self._parse_file(key, update[1]) if update else (Counter(), {})
+
+        start_firings = self.firings
+        with _gc_paused():
+            self._apply(updates, parsed, summary)
+        summary["firings"] = self.firings - start_firings
+        summary.update(self._batch_changes())
+        return summary
+
+    def derived_facts(self) -> List[Dict]:
+        """Facts that follow from the rules but are not stated in a fact file."""
+        derived = []
+        for fact, wme in sorted(self._wm.items(), key=lambda item: _sort_key(item[0])):
+            if not wme.asserted:
+                item = fact_dict(fact)
+                item["rules"] = sorted({terminal.rule.rule_id for terminal, _ in wme.derivations})
+                derived.append(item)
+        return derived
+
+    def explain(self, fact: Dict) -> Optional[Dict]:
+        """
+        Why a fact holds.
+
+        Returns:
+            {"asserted": n, "derivations": [{"rule": ID, "premises": [...]}]}
+            or None when the fact is not known
+        """
+        wme = self._wm.get(fact_tuple(fact))
+        if wme is None:
+            return None
+        derivations = [{"rule": terminal.rule.rule_id,
+                        "premises": [fact_dict(premise.fact) for premise in token.wmes()]}
+                       for terminal, token in wme.derivations]
+        derivations.sort(key=lambda derivation: derivation["rule"])
+        return {"asserted": wme.asserted, "derivations": derivations}
+
+    # ------------------------------------------------------------------
+    # Knowledge base files
+
+    def _apply(self, updates: Dict, parsed: Dict, summary: Dict) -> None:
+        """Apply the parsed contents of changed files as one batch."""
+        self._begin()
+        # Retractions first, so replaced rules never fire on stale facts.
+        # A fact that only moves between files keeps its support throughout.
+        additions: Counter = Counter()
+        retractions: Counter = Counter()
+        for key, (facts, _) in parsed.items():
+            old_facts = self._files[key][1] if key in self._files else Counter()
+            additions.update(facts - old_facts)
+            retractions.update(old_facts - facts)
+        moved = additions & retractions
+        additions -= moved
+        retractions -= moved
+        for key, (_, rules) in parsed.items():
+            old_rules = self._files[key][2] if key in self._files else {}
+            for rule_key, (_, signature) in old_rules.items():
+                new = rules.get(rule_key)
+                if (new is None or new[1] != signature) and rule_key in self._rules:
+                    self._remove_rule(self._rules[rule_key])
+                    summary["rules_removed"] += 1
+        for fact, count in retractions.items():
+            wme = self._wm[fact]
+            for _ in range(count):
+                self._drop_support(wme)
+            summary["facts_retracted"] += count
+        self._retract_unsupported()
+
+        for key, (facts, rules) in parsed.items():
+            old_rules = self._files[key][2] if key in self._files else {}
+            for rule_key, (rule_id, signature) in rules.items():
+                old = old_rules.get(rule_key)
+                if old is None or old[1] != signature or rule_key not in self._rules:
+                    self._add_rule(rule_key, rule_id, signature)
+                    summary["rules_added"] += 1
+            if updates[key] is None:
+                del self._files[key]
+                self._unstructured_rules.pop(key, None)
+            else:
+                self._files[key] = (updates[key][0], facts, rules)
+        self._finish_rules()
+
+        for fact, count in additions.items():
+            for _ in range(count):
+                self._support(fact)
+            summary["facts_asserted"] += count
+        self._assert_pending()
+
+    def _parse_file(self, key: str, data: bytes) -> Tuple[Counter, Dict[str, Tuple[str, Tuple]]]:
+        """Fact counts and compiled rules (rule key -> (rule ID, signature)) of one file."""
+        facts, structured, unstructured = parse_kb_file(key, data)
+        rules: Dict[str, Tuple[str, Tuple]] = {}
+        for rule_key, (rule_id, conditions, conclusions) in structured.items():
+            try:
+                rules[rule_key] = (rule_id, compile_rule(conditions, conclusions))
+            except ValueError as e:
+                print(f"Warning: Skipping rule {rule_id} in {key}: {e}")
+        if unstructured:
+            self._unstructured_rules[key] = unstructured
+        else:
+            self._unstructured_rules.pop(key, None)
+        return facts, rules
+
+    # ------------------------------------------------------------------
+    # Network construction
+
+    def _begin(self) -> None:
+        """Start recording the derived facts a batch adds and removes."""
+        self._created = set()
+        self._removed = set()
+        self._unstated = set()
+
+    def _batch_changes(self) -> Dict[str, List[Dict]]:
+        added = {wme.fact for wme in self._created
+                 if self._wm.get(wme.fact) is wme and not wme.asserted}
+        removed = {fact for fact in self._removed
+                   if fact not in self._wm and fact not in self._unstated}
+        return {
+            "derived_added": [fact_dict(fact) for fact in sorted(added - removed, key=_sort_key)],
+            "derived_removed": [fact_dict(fact) for fact in sorted(removed - added, key=_sort_key)]
+        }
+
+    def _add_rule(self, key: str, rule_id: str, signature: Tuple) -> None:
+        """Build (or share) the nodes of a rule; _finish_rules() fills them."""
+        if key in self._rules:
+            self._remove_rule(self._rules[key])
+            self._retract_unsupported()
+        rule = self._rules[key] = _Rule(key, rule_id, signature)
+        memory = self._top
+        for alpha_key, tests, binds in signature[0]:
+            alpha = self._alpha(alpha_key)
+            join_key = (memory, alpha_key, tests, binds)
+            join = self._joins.get(join_key)
+            if join is None:
+                join = self._joins[join_key] = _JoinNode(memory, alpha, tests, binds)
+                for token in memory.tokens:
+                    join.left_index.setdefault(join.left_key(token), set()).add(token)
+                for wme in alpha.wmes:
+                    join.right_index.setdefault(join.right_key(wme), set()).add(wme)
+                alpha.joins[join] = None
+                memory.children[join] = None
+                self._new_joins.append(join)
+            memory = join.child
+        rule.terminal = _Terminal(rule, memory)
+        memory.children[rule.terminal] = None
+        self._new_terminals.append(rule.terminal)
+
+    def _alpha(self, alpha_key: Tuple) -> _AlphaNode:
+        alpha = self._alpha_nodes.get(alpha_key)
+        if alpha is None:
+            alpha = self._alpha_nodes[alpha_key] = _AlphaNode(alpha_key)
+            mask, values = alpha_key[0], alpha_key[1]
+            self._alpha_index.setdefault(mask, {}).setdefault(values, []).append(alpha)
+            self._new_alphas.append(alpha)
+        return alpha
+
+    def _finish_rules(self) -> None:
+        """Fill the nodes built since the last call from the facts already known."""
+        new_alphas = [alpha for alpha in self._new_alphas
+                      if self._alpha_nodes.get(alpha.key) is alpha]
+        if new_alphas and self._wm:
+            # One pass over working memory for all new alpha nodes
+            index: Dict[Tuple, Dict[Tuple, List[_AlphaNode]]] = {}
+            for alpha in new_alphas:
+                index.setdefault(alpha.key[0], {}).setdefault(alpha.key[1], []).append(alpha)
+            for wme in self._wm.values():
+                for alpha in _matching_alphas(index, wme.fact):
+                    alpha.wmes.add(wme)
+                    wme.alphas.append(alpha)
+                    for join in alpha.joins:
+                        join.right_index.setdefault(join.right_key(wme), set()).add(wme)
+
+        # Seed each new branch where it leaves the existing network; the
+        # nodes below it are new as well and are filled by propagation
+        new_memories = {join.child for join in self._new_joins}
+        for join in self._new_joins:
+            if join.parent not in new_memories and join in join.parent.children:
+                for token in list(join.parent.tokens):
+                    for wme in list(join.right_index.get(join.left_key(token), ())):
+                        self._add_token(join, token, wme)
+        for terminal in self._new_terminals:
+            if terminal.memory not in new_memories and terminal in terminal.memory.children:
+                for token in list(terminal.memory.tokens):
+                    self._fire(terminal, token)
+        self._new_alphas = []
+        self._new_joins = []
+        self._new_terminals = []
+
+    def _remove_rule(self, rule: _Rule) -> None:
+        """Retract a rule's conclusions and drop the nodes no other rule uses."""
+        del self._rules[rule.key]
+        terminal = rule.terminal
+        for token, wmes in terminal.conclusions.items():
+            for wme in wmes:
+                self._drop_support(wme, (terminal, token))
+        terminal.conclusions = {}
+        memory = terminal.memory
+        del memory.children[terminal]
+
+        while memory is not self._top and not memory.children:
+            join = memory.parent
+            for token in memory.tokens:
+                token.wme.tokens.discard(token)
+                token.parent.children.discard(token)
+            memory.tokens = set()
+            del join.parent.children[join]
+            del self._joins[(join.parent, join.alpha.key, join.tests, join.binds)]
+            alpha = join.alpha
+            del alpha.joins[join]
+            if not alpha.joins:
+                del self._alpha_nodes[alpha.key]
+                by_values = self._alpha_index[alpha.key[0]]
+                by_values[alpha.key[1]].remove(alpha)
+                if not by_values[alpha.key[1]]:
+                    del by_values[alpha.key[1]]
+                    if not by_values:
+                        del self._alpha_index[alpha.key[0]]
+                for wme in alpha.wmes:
+                    wme.alphas.remove(alpha)
+            memory = join.parent
+
+    # ------------------------------------------------------------------
+    # Assertion
+
+    def _support(self, fact: Fact, derivation: Optional[Tuple] = None) -> _WME:
+        """Add a statement or derivation of a fact, queueing new facts for matching."""
+        wme = self._wm.get(fact)
+        if wme is None:
+            wme = self._wm[fact] = _WME(fact)
+            self._asserting.append(wme)
+            self._created.add(wme)
+        if derivation is None:
+            wme.asserted += 1
+        else:
+            wme.derivations.add(derivation)
+        return wme
+
+    def _assert_pending(self) -> None:
+        """Match queued facts; conclusions join the queue (no recursion per chain step)."""
+        while self._asserting:
+            wme = self._asserting.popleft()
+            if self._wm.get(wme.fact) is not wme:
+                continue
+            for alpha in _matching_alphas(self._alpha_index, wme.fact):
+                alpha.wmes.add(wme)
+                wme.alphas.append(alpha)
+                for join in list(alpha.joins):
+                    key = join.right_key(wme)
+                    join.right_index.setdefault(key, set()).add(wme)
+                    for token in list(join.left_index.get(key, ())):
+                        self._add_token(join, token, wme)
+
+    def _add_token(self, join: _JoinNode, parent: _Token, wme: _WME) -> None:
+        """Store a new partial match below a join and pass it on."""
+        memory = join.child
+        token = _Token(parent, wme, parent.bindings + tuple(wme.fact[index] for index in join.binds),
+                       memory)
+        parent.children.add(token)
+        wme.tokens.add(token)
+        memory.tokens.add(token)
+        for child in list(memory.children):
+            if isinstance(child, _Terminal):
+                self._fire(child, token)
+                continue
+            key = child.left_key(token)
+            child.left_index.setdefault(key, set()).add(token)
+            for right in list(child.right_index.get(key, ())):
+                self._add_token(child, token, right)
+
+    def _fire(self, terminal: _Terminal, token: _Token) -> None:
+        """Derive the conclusions of a complete match."""
+        self.firings += 1
+        derivation = (terminal, token)
+        bindings = token.bindings
+        terminal.conclusions[token] = [
+            self._support(tuple(None if slot is None else bindings[slot[1]] if slot[0] else slot[1]
+                                for slot in template), derivation)
+            for template in terminal.rule.signature[1]
+        ]
+
+    # ------------------------------------------------------------------
+    # Retraction
+
+    def _drop_support(self, wme: _WME, derivation: Optional[Tuple] = None) -> None:
+        """Remove a statement or derivation of a fact, queueing it once unsupported."""
+        if derivation is None:
+            wme.asserted -= 1
+            if not wme.asserted:
+                self._unstated.add(wme.fact)
+        else:
+            wme.derivations.discard(derivation)
+        if wme.asserted <= 0 and not wme.derivations:
+            self._retracting.append(wme)
+        elif wme.derivations and not wme.asserted:
+            # It may be supported only by its own consequences (a cycle)
+            self._suspect = True
+
+    def _retract_unsupported(self) -> None:
+        """Retract queued facts, what follows only from them, and unfounded cycles."""
+        while True:
+            while self._retracting:
+                wme = self._retracting.popleft()
+                if self._wm.get(wme.fact) is wme and wme.asserted <= 0 and not wme.derivations:
+                    self._retract(wme)
+            if not self._suspect:
+                return
+            self._suspect = False
+            for wme in self._unfounded():
+                wme.derivations.clear()
+                self._retracting.append(wme)
+
+    def _retract(self, wme: _WME) -> None:
+        del self._wm[wme.fact]
+        if wme in self._created:
+            self._created.discard(wme)
+        else:
+            self._removed.add(wme.fact)
+        for alpha in wme.alphas:
+            alpha.wmes.discard(wme)
+            for join in alpha.joins:
+                key = join.right_key(wme)
+                bucket = join.right_index.get(key)
+                if bucket is not None:
+                    bucket.discard(wme)
+                    if not bucket:
+                        del join.right_index[key]
+        wme.alphas = []
+        for token in list(wme.tokens):
+            self._delete_token(token)
+
+    def _delete_token(self, token: _Token) -> None:
+        """Remove a partial match and every match built on it."""
+        if token.parent is not None:
+            token.parent.children.discard(token)
+        stack = [token]
+        while stack:
+            token = stack.pop()
+            memory = token.memory
+            if token not in memory.tokens:
+                continue
+            memory.tokens.discard(token)
+            token.wme.tokens.discard(token)
+            stack.extend(token.children)
+            token.children = set()
+            for child in memory.children:
+                if isinstance(child, _Terminal):
+                    for wme in child.conclusions.pop(token, ()):
+                        self._drop_support(wme, (child, token))
+                    continue
+                key = child.left_key(token)
+                bucket = child.left_index.get(key)
+                if bucket is not None:
+                    bucket.discard(token)
+                    if not bucket:
+                        del child.left_index[key]
+
+    def _unfounded(self) -> List[_WME]:
+        """Derived facts that no chain of derivations connects to a stated fact."""
+        founded = {wme for wme in self._wm.values() if wme.asserted > 0}
+        pending = [wme for wme in self._wm.values() if wme.asserted <= 0]
+        progress = True
+        while progress and pending:
+            progress = False
+            remaining = []
+            for wme in pending:
+                if any(all(premise in founded for premise in token.wmes())
+                       for _, token in wme.derivations):
+                    founded.add(wme)
+                    progress = True
+                else:
+                    remaining.append(wme)
+            pending = remaining
+        return pending
+
+
+def _matching_alphas(index: Dict[Tuple, Dict[Tuple, List[_AlphaNode]]],
+                     fact: Fact) -> Iterable[_AlphaNode]:
+    """Alpha nodes of an index whose conditions a fact satisfies."""
+    for mask, by_values in index.items():
+        alphas = by_values.get(tuple(fact[i] for i in mask))
+        if alphas:
+            for alpha in alphas:
+                if alpha.accepts(fact):
+                    yield alpha
+
+
+def _sort_key(fact: Fact) -> Tuple:
+    return tuple(value or "" for value in fact)
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Full-Text Search: BM25 Ranking over Facts and Rules
+
+Ranks knowledge base entries against a free-text query ("phosphoantigen
+presentation butyrophilin") with Okapi BM25. Documents are the same
+units KnowledgeIndexer returns: one item of a YAML list (all of its
+string values) or a whole .txt file.
+
+Postings are precomputed in SQLite with each term's frequency in the
+document and the document's length, so a query reads only the posting
+lists of its own terms. Each term also records its document frequency
+and the largest tf / smallest document length among its postings, which
+bound the most any one document can score for it. Top-k evaluation uses
+MaxScore: once k documents are held, terms whose combined bounds cannot
+lift a document past the k-th score are no longer walked, only probed
+for the documents the other terms propose, and a document whose partial
+score plus the remaining bounds falls short is dropped without further
+lookups.
+
+Like the concept index, the search index stores every file's content
+hash and re-reads only the files that changed.
+"""
+
+import math
+import heapq
+import hashlib
+import sqlite3
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .config import get_setting, file_monitoring_settings
+from .gamma_detector import DEFAULT_HASH_ALGORITHM, configured_hash_algorithm
+from .indexer import YAML_SUFFIXES, _YAML_LOADER, _scalars
+from .tokenizer import WORD_PATTERN, Tokenizer
+from .walker import KBWalker
+
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Postings fetched per read of a posting list; doubled while it is walked
+# sequentially, reset when it skips ahead
+_FIRST_BATCH = 64
+_MAX_BATCH = 4096
+
+_END = float("inf")
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+class _PostingCursor:
+    """Reads one term's postings in document order, with skipping."""
+
+    __slots__ = ("_conn", "term_id", "upper", "idf", "doc", "tf", "length",
+                 "_docs", "_tfs", "_lengths", "_position", "_batch", "_exhausted")
+
+    def __init__(self, conn: sqlite3.Connection, term_id: int, idf: float, upper: float):
+        self._conn = conn
+        self.term_id = term_id
+        self.idf = idf
+        self.upper = upper
+        self._batch = _FIRST_BATCH
+        self._read(-1)
+
+    def _read(self, after: int) -> None:
+        """Load the next batch of postings with doc > after."""
+        rows = self._conn.execute(
+            "SELECT doc_id, tf, length FROM postings WHERE term_id = ? AND doc_id > ? "
+            "ORDER BY doc_id LIMIT ?", (self.term_id, after, self._batch)
+        ).fetchall()
+        self._exhausted = len(rows) < self._batch
+        self._docs = [row[0] for row in rows]
+        self._tfs = [row[1] for row in rows]
+        self._lengths = [row[2] for row in rows]
+        self._position = 0
+        self._load()
+
+    def _load(self) -> None:
+        if self._position < len(self._docs):
+            self.doc = self._docs[self._position]
+            self.tf = self._tfs[self._position]
+            self.length = self._lengths[self._position]
+        else:
+            self.doc = _END
+
+    def next(self) -> None:
+        """Move to the next posting."""
+        self._position += 1
+        if self._position >= len(self._docs) and not self._exhausted:
+            self._batch = min(self._batch * 2, _MAX_BATCH)
+            self._read(self._docs[-1])
+        else:
+            self._load()
+
+    def seek(self, doc: int) -> None:
+        """Move to the first posting with a document >= doc."""
+        if self.doc >= doc:
+            return
+        if self._docs[-1] >= doc:
+            self._position = bisect_left(self._docs, doc, self._position)
+            self._load()
+        elif self._exhausted:
+            self.doc = _END
+        else:
+            self._batch = _FIRST_BATCH
+            self._read(doc - 1)
+
+
+class SearchIndex:
+    """
+    Persistent BM25 index over the knowledge base.
+
+    Scores use the non-negative BM25 IDF, log(1 + (N - df + 0.5) / (df + 0.5)),
+    with the corpus statistics (N, average length) of the whole index.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            key TEXT UNIQUE NOT NULL,
+            content_hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            file_id INTEGER NOT NULL,
+            entry INTEGER NOT NULL,
+            length INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS documents_by_file ON documents (file_id);
+        CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE NOT NULL,
+            df INTEGER NOT NULL,
+            max_tf INTEGER NOT NULL,
+            min_length INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS postings (
+            term_id INTEGER NOT NULL,
+            doc_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            PRIMARY KEY (term_id, doc_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id);
+        CREATE TABLE IF NOT EXISTS corpus (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO corpus (name, value) VALUES ('documents', 0), ('length', 0);
+    """
+
+    def __init__(self, kb_path: str = "kb", index_file: str = ".search_index.db",
+                 k1: float = DEFAULT_K1, b: float = DEFAULT_B,
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = (),
+                 tokenizer: Optional[Tokenizer] = None,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Args:
+            kb_path: Root of the knowledge base
+            index_file: SQLite file holding the index (":memory:" for none)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization (0 to 1)
+            watch_directories: Directories to index, relative to kb_path
+            file_extensions: File suffixes to index
+            ignore_patterns: Glob patterns for files and folders to skip
+            recursive: Index subdirectories
+            watch_files: Further files to index, relative to kb_path
+            tokenizer: Shared Tokenizer used for .txt files (a private
+                in-memory one when None)
+            hash_algorithm: hashlib algorithm for the content hash stored
+                with each indexed file
+        """
+        self.kb_path = Path(kb_path)
+        self.index_file = index_file
+        self.k1 = k1
+        self.b = b
+        self._owns_tokenizer = tokenizer is None
+        self.tokenizer = tokenizer if tokenizer is not None else Tokenizer()
+        self.hash_algorithm = hash_algorithm
+        self.walker = KBWalker(self.kb_path, watch_directories, file_extensions,
+                               ignore_patterns, recursive, watch_files)
+
+        self._conn = sqlite3.connect(str(index_file))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        # term -> (ID, max tf, min length), loaded on the first update
+        self._terms: Optional[Dict[str, List[int]]] = None
+        self._stats = {"scored": 0, "probed": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict, kb_path: Optional[str] = None,
+                    tokenizer: Optional[Tokenizer] = None) -> 'SearchIndex':
+        """
+        Create a search index using settings from load_config().
+
+        Args:
+            config: Configuration dictionary
+            kb_path: Overrides paths.knowledge_base when given
+            tokenizer: Shared Tokenizer (one configured from sensing.tokenizer
+                when None)
+        """
+        index = cls(
+            kb_path=kb_path or get_setting(config, "paths.knowledge_base", "kb"),
+            index_file=get_setting(config, "sensing.search.index_file", ".search_index.db"),
+            k1=get_setting(config, "sensing.search.k1", DEFAULT_K1),
+            b=get_setting(config, "sensing.search.b", DEFAULT_B),
+            tokenizer=tokenizer if tokenizer is not None else Tokenizer.from_config(config),
+            hash_algorithm=configured_hash_algorithm(config),
+            **file_monitoring_settings(config)
+        )
+        index._owns_tokenizer = tokenizer is None
+        return index
+
+    def __len__(self) -> int:
+        """Number of indexed documents."""
+        return self._corpus()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed files, documents, distinct terms and postings; postings scored and probes so far."""
+        stats = {
+            table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("files", "documents", "terms", "postings")
+        }
+        stats.update(self._stats)
+        return stats
+
+    def update_from_kb(self, changes: Optional[Iterable[str]] = None,
+                       file_hashes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Bring the index up to date with the files on disk.
+
+        Args:
+            changes: File keys added, modified or deleted since the last
+                update (e.g. DeltaAnalyzer.changed_files(gamma_results));
+                None checks the whole knowledge base
+            file_hashes: Content hashes by file key, e.g. from
+                GammaDetector.content_hashes(); a file whose hash matches
+                the indexed one is not read. Without changes, its keys are
+                taken as the complete list of files.
+
+        Returns:
+            Number of files (re-)indexed
+        """
+        if changes is None:
+            if file_hashes is not None:
+                keys = [key for key in file_hashes if self.walker.accepts(key)]
+            else:
+                keys = [key for key, _, _ in self.walker.walk()]
+            indexed_files = self._indexed_files()
+            stale = set(indexed_files) - set(keys)
+        else:
+            keys = [key for key in set(changes) if self.walker.accepts(key)]
+            indexed_files = self._indexed_files(keys)
+            stale = set()
+        file_hashes = file_hashes or {}
+        if self._terms is None:
+            self._terms = {term: [term_id, max_tf, min_length] for term_id, term, max_tf, min_length
+                           in self._conn.execute("SELECT id, term, max_tf, min_length FROM terms")}
+
+        indexed = 0
+        with self._conn:
+            for key in stale:
+                self._remove(indexed_files[key][0])
+            for key in keys:
+                file_id, indexed_hash = indexed_files.get(key, (None, None))
+                content_hash = file_hashes.get(key)
+                if content_hash and content_hash == indexed_hash:
+                    continue
+                try:
+                    data = (self.kb_path / key).read_bytes()
+                except OSError:
+                    if file_id is not None:
+                        self._remove(file_id)
+                    continue
+                content_hash = content_hash or hashlib.new(self.hash_algorithm, data).hexdigest()
+                if content_hash == indexed_hash:
+                    continue
+                self._index_file(key, file_id, data, content_hash)
+                indexed += 1
+        self.tokenizer.save()
+        return indexed
+
+    def search(self, query: str, limit: int = 10, exhaustive: bool = False) -> List[Dict]:
+        """
+        The best-scoring documents for a free-text query.
+
+        Args:
+            query: Query text; its words are matched case-insensitively
+            limit: Number of hits to return
+            exhaustive: Score every posting of every query term instead of
+                evaluating with MaxScore (same hits; for comparison)
+
+        Returns:
+            Hits as {"file": key, "entry": n, "score": s} dicts, best first
+            (ties in indexing order)
+        """
+        cursors = self._cursors(query)
+        if not cursors or limit <= 0:
+            return []
+        scorer = self._score_all if exhaustive else self._max_score
+        ranked = sorted(scorer(cursors, limit), key=lambda hit: (-hit[0], hit[1]))
+        hits = []
+        for score, doc in ranked:
+            key, entry = self._conn.execute(
+                "SELECT f.key, d.entry FROM documents d JOIN files f ON f.id = d.file_id "
+                "WHERE d.id = ?", (doc,)).fetchone()
+            hits.append({"file": key, "entry": entry, "score": round(score, 4)})
+        return hits
+
+    def close(self) -> None:
+        """Close the index file."""
+        self._conn.close()
+        if self._owns_tokenizer:
+            self.tokenizer.close()
+
+    def _corpus(self) -> Tuple[int, int]:
+        """Number of documents and their total length."""
+        values = dict(self._conn.execute("SELECT name, value FROM corpus"))
+        return values["documents"], values["length"]
+
+    def _cursors(self, query: str) -> List[_PostingCursor]:
+        """A posting cursor for each distinct indexed query word, with its IDF and score bound."""
+        documents, total_length = self._corpus()
+        if not documents:
+            return []
+        average_length = total_length / documents or 1.0
+        cursors = []
+        for term in dict.fromkeys(_words(query)):
+            row = self._conn.execute("SELECT id, df, max_tf, min_length FROM terms WHERE term = ?",
+                                     (term,)).fetchone()
+            if row is None or not row[1]:
+                continue
+            term_id, df, max_tf, min_length = row
+            idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+            # Scores rise with tf and fall with length: these two bound every posting
+            upper = idf * (self.k1 + 1) * max_tf / (
+                max_tf + self.k1 * (1 - self.b + self.b * min_length / average_length))
+            cursors.append(_PostingCursor(self._conn, term_id, idf, upper))
+        self._average_length = average_length
+        return cursors
+
+    def _term_score(self, cursor: _PostingCursor, tf: int, length: int) -> float:
+        k1 = self.k1
+        return cursor.idf * tf * (k1 + 1) / (
+            tf + k1 * (1 - self.b + self.b * length / self._average_length))
+
+    def _score_all(self, cursors: List[_PostingCursor], limit: int) -> List[Tuple[float, int]]:
+        """Term-at-a-time scoring of every posting; the top hits as (score, doc)."""
+        scores: Dict[int, float] = {}
+        for cursor in cursors:
+            while cursor.doc != _END:
+                scores[cursor.doc] = scores.get(cursor.doc, 0.0) + \
+                    self._term_score(cursor, cursor.tf, cursor.length)
+                cursor.next()
+                self._stats["scored"] += 1
+        return heapq.nsmallest(limit, ((score, doc) for doc, score in scores.items()),
+                               key=lambda hit: (-hit[0], hit[1]))
+
+    def _max_score(self, cursors: List[_PostingCursor], limit: int) -> List[Tuple[float, int]]:
+        """
+        Document-at-a-time MaxScore; the top hits as (score, doc).
+
+        Cursors are ordered by score bound. The lowest-bound prefix whose
+        bounds sum to at most the current k-th score is non-essential: a
+        document found only in those lists cannot enter the top k, so
+        candidates come from the essential lists alone.
+        """
+        cursors.sort(key=lambda cursor: cursor.upper)
+        bounds = [0.0]
+        for cursor in cursors:
+            bounds.append(bounds[-1] + cursor.upper)
+        # Min-heap of (score, -doc): the root is the hit to drop next
+        top: List[Tuple[float, int]] = []
+        threshold = 0.0
+        first_essential = 0
+        term_score = self._term_score
+
+        while first_essential < len(cursors):
+            essential = cursors[first_essential:]
+            doc = min(cursor.doc for cursor in essential)
+            if doc == _END:
+                break
+            score = 0.0
+            for cursor in essential:
+                if cursor.doc == doc:
+                    score += term_score(cursor, cursor.tf, cursor.length)
+                    self._stats["scored"] += 1
+                    cursor.next()
+
+            # Probe the non-essential lists, highest bound first, while the
+            # document can still beat the threshold
+            for position in range(first_essential - 1, -1, -1):
+                if len(top) == limit and score + bounds[position + 1] <= threshold:
+                    break
+                cursor = cursors[position]
+                cursor.seek(doc)
+                self._stats["probed"] += 1
+                if cursor.doc == doc:
+                    score += term_score(cursor, cursor.tf, cursor.length)
+                    self._stats["scored"] += 1
+
+            if len(top) < limit:
+                heapq.heappush(top, (score, -doc))
+            elif score > threshold:
+                heapq.heapreplace(top, (score, -doc))
+            else:
+                continue
+            if len(top) == limit:
+                threshold = top[0][0]
+                while first_essential < len(cursors) and bounds[first_essential + 1] <= threshold:
+                    first_essential += 1
+        return [(score, -negative_doc) for score, negative_doc in top]
+
+    def _indexed_files(self, keys: Optional[List[str]] = None) -> Dict[str, Tuple[int, str]]:
+        """(file ID, content hash) by key, for the given keys or every indexed file."""
+        if keys is None:
+            rows = self._conn.execute("SELECT key, id, content_hash FROM files")
+            return {key: (file_id, content_hash) for key, file_id, content_hash in rows}
+        found = {}
+        for key in keys:
+            row = self._conn.execute("SELECT id, content_hash FROM files WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is not None:
+                found[key] = row
+        return found
+
+    def _remove_documents(self, file_id: int) -> None:
+        """Drop a file's documents and postings, keeping df and corpus totals exact."""
+        documents = self._conn.execute("SELECT id, length FROM documents WHERE file_id = ?",
+                                       (file_id,)).fetchall()
+        if not documents:
+            return
+        removed = Counter()
+        for doc, _ in documents:
+            removed.update(term_id for term_id, in self._conn.execute(
+                "SELECT term_id FROM postings WHERE doc_id = ?", (doc,)))
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc,))
+        # max_tf and min_length are left as they are: still valid bounds
+        self._conn.executemany("UPDATE terms SET df = df - ? WHERE id = ?",
+                               [(count, term_id) for term_id, count in removed.items()])
+        self._conn.execute("DELETE FROM documents WHERE file_id = ?", (file_id,))
+        self._add_to_corpus(-len(documents), -sum(length for _, length in documents))
+
+    def _remove(self, file_id: int) -> None:
+        self._remove_documents(file_id)
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add_to_corpus(self, documents: int, length: int) -> None:
+        self._conn.executemany("UPDATE corpus SET value = value + ? WHERE name = ?",
+                               [(documents, "documents"), (length, "length")])
+
+    def _index_file(self, key: str, file_id: Optional[int], data: bytes, content_hash: str) -> None:
+        """Replace one file's documents and postings (inside the caller's transaction)."""
+        if file_id is None:
+            file_id = self._conn.execute("INSERT INTO files (key, content_hash) VALUES (?, ?)",
+                                         (key, content_hash)).lastrowid
+        else:
+            self._remove_documents(file_id)
+            self._conn.execute("UPDATE files SET content_hash = ? WHERE id = ?",
+                               (content_hash, file_id))
+
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            text = ""
+        postings = []
+        df = Counter()
+        documents = 0
+        total_length = 0
+        for entry, words in self._documents(key, text, content_hash):
+            if not words:
+                continue
+            length = len(words)
+            doc = self._conn.execute(
+                "INSERT INTO documents (file_id, entry, length) VALUES (?, ?, ?)",
+                (file_id, entry, length)).lastrowid
+            for term, tf in Counter(words).items():
+                term_id = self._term(term, tf, length)
+                postings.append((term_id, doc, tf, length))
+                df[term_id] += 1
+            documents += 1
+            total_length += length
+        self._conn.executemany(
+            "INSERT INTO postings (term_id, doc_id, tf, length) VALUES (?, ?, ?, ?)", postings)
+        self._conn.executemany("UPDATE terms SET df = df + ? WHERE id = ?",
+                               [(count, term_id) for term_id, count in df.items()])
+        self._add_to_corpus(documents, total_length)
+
+    def _documents(self, key: str, text: str, content_hash: str) -> Iterable[Tuple[int, List[str]]]:
+        """(entry, words) of every document in a file."""
+        if key.endswith(YAML_SUFFIXES):
+            try:
+                document = yaml.load(text, Loader=_YAML_LOADER)
+            except yaml.YAMLError:
+                document = None
+            entries = document if isinstance(document, list) else [document]
+            if any(isinstance(item, dict) for item in entries):
+                for entry, item in enumerate(entries):
+                    if isinstance(item, dict):
+                        yield entry, [word for value in _scalars(item) if isinstance(value, str)
+                                      for word in _words(value)]
+                return
+        yield 0, self.tokenizer.words(self.tokenizer.encode(text, content_hash))
+
+    def _term(self, term: str, tf: int, length: int) -> int:
+        """ID of a term, widening its stored score bounds to cover a new posting."""
+        known = self._terms.get(term)
+        if known is None:
+            term_id = self._conn.execute(
+                "INSERT INTO terms (term, df, max_tf, min_length) VALUES (?, 0, ?, ?)",
+                (term, tf, length)).lastrowid
+            self._terms[term] = [term_id, tf, length]
+            return term_id
+        term_id, max_tf, min_length = known
+        if tf > max_tf or length < min_length:
+            known[1], known[2] = max(tf, max_tf), min(length, min_length)
+            self._conn.execute("UPDATE terms SET max_tf = ?, min_length = ? WHERE id = ?",
+                               (known[1], known[2], term_id))
+        return term_id
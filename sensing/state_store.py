@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+State Stores: Persistence for Gamma Detection
+
+Backends that persist GammaDetector baselines and scan history. The SQLite
+store (default) updates only the rows that changed in a scan, inside a
+single transaction; the JSON store keeps the legacy file format but writes
+it compactly and atomically.
+"""
+
+import os
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _dumps(value: Any) -> str:
+    """Serialize to compact JSON."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class StateStore:
+    """
+    Interface for gamma detection state backends.
+
+    Baseline entries are plain dictionaries (the fields of a FileState)
+    keyed by the file's path relative to the knowledge base.
+    """
+
+    def __init__(self, path: str, max_history: int = 50):
+        self.path = Path(path)
+        self.max_history = max_history
+
+    def load_baseline(self) -> Dict[str, Dict]:
+        """Return every baseline entry."""
+        raise NotImplementedError
+
+    def load_history(self) -> List[Dict]:
+        """Return retained scan results, oldest first."""
+        raise NotImplementedError
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Return a stored metadata value."""
+        raise NotImplementedError
+
+    def load_directories(self) -> Dict[str, Dict]:
+        """Return cached directory listings keyed by relative directory."""
+        raise NotImplementedError
+
+    def load_pairs(self) -> Dict[str, Dict]:
+        """Return fact/rule pair index rows keyed by pair ID."""
+        raise NotImplementedError
+
+    def commit_scan(self, upserts: Dict[str, Dict], deletes: Iterable[str],
+                    scan_results: Optional[List[Dict]] = None,
+                    meta: Optional[Dict[str, Any]] = None,
+                    directories: Optional[Dict[str, Optional[Dict]]] = None,
+                    pairs: Optional[Dict[str, Optional[Dict]]] = None) -> None:
+        """
+        Atomically apply one scan's changes.
+
+        Args:
+            upserts: Baseline entries that are new or were re-checked
+            deletes: Keys of baseline entries to remove
+            scan_results: Scan results to append to the history
+            meta: Metadata values to store alongside the baseline
+            directories: Directory listings to store (None removes one)
+            pairs: Pair index rows to store (None removes one)
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite-backed state store (stdlib sqlite3).
+
+    Each scan touches only the rows of files that were added, re-hashed or
+    deleted, and the whole update commits in one transaction. A legacy JSON
+    state file found next to a new database is imported once and renamed.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS baseline (
+            key TEXT PRIMARY KEY,
+            state TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            result TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS directories (
+            key TEXT PRIMARY KEY,
+            listing TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS pairs (
+            pair_id TEXT PRIMARY KEY,
+            files TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, max_history: int = 50,
+                 legacy_json: Optional[str] = None):
+        super().__init__(path, max_history)
+        is_new = not self.path.exists()
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        if is_new and legacy_json and Path(legacy_json).exists():
+            self._migrate_json(Path(legacy_json))
+
+    def _migrate_json(self, legacy_path: Path) -> None:
+        """Import a legacy .gamma_detector_state.json file once."""
+        try:
+            with open(legacy_path, 'r') as f:
+                data = json.load(f)
+            self.commit_scan(data.get("baseline_states", {}), [])
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO history (result) VALUES (?)",
+                    [(_dumps(r),) for r in data.get("change_history", [])[-self.max_history:]]
+                )
+            legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+            print(f"Migrated gamma state from {legacy_path} to {self.path}")
+        except Exception as e:
+            print(f"Warning: Could not migrate state file {legacy_path}: {e}")
+
+    def load_baseline(self) -> Dict[str, Dict]:
+        return {
+            key: json.loads(state)
+            for key, state in self._conn.execute("SELECT key, state FROM baseline")
+        }
+
+    def load_history(self) -> List[Dict]:
+        rows = self._conn.execute(
+            "SELECT result FROM history ORDER BY id DESC LIMIT ?", (self.max_history,)
+        ).fetchall()
+        return [json.loads(result) for (result,) in reversed(rows)]
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def load_directories(self) -> Dict[str, Dict]:
+        return {
+            key: json.loads(listing)
+            for key, listing in self._conn.execute("SELECT key, listing FROM directories")
+        }
+
+    def load_pairs(self) -> Dict[str, Dict]:
+        return {
+            pair_id: json.loads(files)
+            for pair_id, files in self._conn.execute("SELECT pair_id, files FROM pairs")
+        }
+
+    def commit_scan(self, upserts: Dict[str, Dict], deletes: Iterable[str],
+                    scan_results: Optional[List[Dict]] = None,
+                    meta: Optional[Dict[str, Any]] = None,
+                    directories: Optional[Dict[str, Optional[Dict]]] = None,
+                    pairs: Optional[Dict[str, Optional[Dict]]] = None) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO baseline (key, state) VALUES (?, ?)",
+                [(key, _dumps(state)) for key, state in upserts.items()]
+            )
+            self._conn.executemany(
+                "DELETE FROM baseline WHERE key = ?", [(key,) for key in deletes]
+            )
+            self._conn.executemany(
+                "INSERT INTO history (result) VALUES (?)", [(_dumps(r),) for r in scan_results or []]
+            )
+            if scan_results:
+                self._conn.execute(
+                    "DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?",
+                    (self.max_history,)
+                )
+            for key, value in (meta or {}).items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value))
+                )
+            for key, listing in (directories or {}).items():
+                if listing is None:
+                    self._conn.execute("DELETE FROM directories WHERE key = ?", (key,))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO directories (key, listing) VALUES (?, ?)",
+                        (key, _dumps(listing))
+                    )
+            for pair_id, files in (pairs or {}).items():
+                if files is None:
+                    self._conn.execute("DELETE FROM pairs WHERE pair_id = ?", (pair_id,))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO pairs (pair_id, files) VALUES (?, ?)",
+                        (pair_id, _dumps(files))
+                    )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class JSONStateStore(StateStore):
+    """
+    Single-file JSON state store (the original format).
+
+    The whole document is rewritten on each commit, so this backend is only
+    suited to small knowledge bases. Writes go to a temporary file that is
+    atomically renamed over the previous state.
+    """
+
+    def __init__(self, path: str, max_history: int = 50):
+        super().__init__(path, max_history)
+        self._data: Optional[Dict] = None
+
+    def _load(self) -> Dict:
+        if self._data is None:
+            self._data = {"baseline_states": {}, "change_history": [], "meta": {}, "directories": {},
+                          "pairs": {}}
+            if self.path.exists():
+                try:
+                    with open(self.path, 'r') as f:
+                        self._data.update(json.load(f))
+                except Exception as e:
+                    print(f"Warning: Could not load state file: {e}")
+        return self._data
+
+    def load_baseline(self) -> Dict[str, Dict]:
+        return dict(self._load()["baseline_states"])
+
+    def load_history(self) -> List[Dict]:
+        return list(self._load()["change_history"][-self.max_history:])
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        return self._load()["meta"].get(key, default)
+
+    def load_directories(self) -> Dict[str, Dict]:
+        return dict(self._load()["directories"])
+
+    def load_pairs(self) -> Dict[str, Dict]:
+        return dict(self._load()["pairs"])
+
+    def commit_scan(self, upserts: Dict[str, Dict], deletes: Iterable[str],
+                    scan_results: Optional[List[Dict]] = None,
+                    meta: Optional[Dict[str, Any]] = None,
+                    directories: Optional[Dict[str, Optional[Dict]]] = None,
+                    pairs: Optional[Dict[str, Optional[Dict]]] = None) -> None:
+        data = self._load()
+        data["baseline_states"].update(upserts)
+        for key in deletes:
+            data["baseline_states"].pop(key, None)
+        data["change_history"] = (data["change_history"] + (scan_results or []))[-self.max_history:]
+        data["meta"].update(meta or {})
+        for key, listing in (directories or {}).items():
+            if listing is None:
+                data["directories"].pop(key, None)
+            else:
+                data["directories"][key] = listing
+        for pair_id, files in (pairs or {}).items():
+            if files is None:
+                data["pairs"].pop(pair_id, None)
+            else:
+                data["pairs"][pair_id] = files
+
+        fd, tmp_path = tempfile.mkstemp(prefix=self.path.name, dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(_dumps(data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+STATE_BACKENDS = {
+    "sqlite": SQLiteStateStore,
+    "json": JSONStateStore,
+}
+
+
+def open_state_store(path: str, backend: str = "sqlite", max_history: int = 50) -> StateStore:
+    """
+    Open a state store.
+
+    Args:
+        path: State file location
+        backend: "sqlite" (default) or "json"
+        max_history: Number of scan results to retain
+
+    Returns:
+        StateStore instance
+    """
+    if backend not in STATE_BACKENDS:
+        raise ValueError(f"Unknown state backend: {backend} (choose from {', '.join(STATE_BACKENDS)})")
+    if backend == "sqlite":
+        legacy_json = str(Path(path).with_suffix(".json"))
+        return SQLiteStateStore(path, max_history=max_history, legacy_json=legacy_json)
+    return STATE_BACKENDS[backend](path, max_history=max_history)
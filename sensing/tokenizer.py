@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Shared Tokenizer with Interning and a Token Cache
+
+Splits documents into lower-cased words and interns every word to an
+integer ID, so similarity and indexing code compares small ints instead
+of strings. The token array of each document is cached under its content
+hash: in memory (least recently used entries are evicted) and optionally
+in a SQLite file, so a file is tokenized once per content version rather
+than once per command.
+
+Token IDs belong to one Tokenizer instance. The cache file stores the
+words themselves, which keeps it valid for every process reading it.
+"""
+
+import re
+import sqlite3
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from .config import get_setting
+
+
+WORD_PATTERN = re.compile(r'\w+')
+
+DEFAULT_CACHE_SIZE = 100000
+
+# SQLite host parameter limit is 999 on older builds
+_LOOKUP_BATCH = 500
+
+
+class TokenCache:
+    """SQLite-backed content hash -> document words mapping."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            content_hash TEXT PRIMARY KEY,
+            tokens TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def load(self, content_hashes: Iterable[str]) -> Dict[str, List[str]]:
+        """Return the cached words of every given hash that is present."""
+        hashes = list(content_hashes)
+        found = {}
+        for start in range(0, len(hashes), _LOOKUP_BATCH):
+            batch = hashes[start:start + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                "SELECT content_hash, tokens FROM documents WHERE content_hash IN "
+                f"({','.join('?' * len(batch))})", batch
+            )
+            found.update((content_hash, tokens.split(" ") if tokens else [])
+                         for content_hash, tokens in rows)
+        return found
+
+    def commit(self, documents: Dict[str, List[str]]) -> None:
+        """Write newly tokenized documents in a single transaction."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (content_hash, tokens) VALUES (?, ?)",
+                [(content_hash, " ".join(tokens)) for content_hash, tokens in documents.items()]
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class Tokenizer:
+    """
+    Word tokenizer shared by delta analysis, near-duplicate search and indexing.
+
+    Pass the same instance to several components to share one vocabulary
+    and one token cache between them.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            cache_file: SQLite file that keeps document tokens between runs
+                (in-memory only when None)
+            cache_size: Documents kept in the in-memory cache
+        """
+        self.cache_size = cache_size
+        self._ids: Dict[str, int] = {}
+        self._words: List[str] = []
+
+        # Content hash -> token IDs (least recently used first)
+        self._cache: "OrderedDict[str, array]" = OrderedDict()
+        self._store = TokenCache(cache_file) if cache_file else None
+        self._unsaved: Dict[str, List[str]] = {}
+        self._not_stored: Set[str] = set()  # hashes already looked up on disk in vain
+        self._stats = {"tokenized": 0, "memory_hits": 0, "disk_hits": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'Tokenizer':
+        """Create a tokenizer using the sensing.tokenizer settings from load_config()."""
+        return cls(
+            cache_file=get_setting(config, "sensing.tokenizer.cache_file"),
+            cache_size=get_setting(config, "sensing.tokenizer.cache_size", DEFAULT_CACHE_SIZE)
+        )
+
+    def __len__(self) -> int:
+        """Vocabulary size."""
+        return len(self._words)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Documents tokenized and cache hits so far."""
+        return dict(self._stats)
+
+    def intern(self, word: str) -> int:
+        """ID of a word, assigning the next free one to a new word."""
+        token_id = self._ids.get(word)
+        if token_id is None:
+            token_id = self._ids[word] = len(self._words)
+            self._words.append(word)
+        return token_id
+
+    def word(self, token_id: int) -> str:
+        """The word behind a token ID."""
+        return self._words[token_id]
+
+    def words(self, token_ids: Iterable[int]) -> List[str]:
+        """The words behind several token IDs."""
+        return [self._words[token_id] for token_id in token_ids]
+
+    def lookup(self, content_hash: str) -> Optional[array]:
+        """Cached token IDs of a content version, without reading the file."""
+        if not content_hash:
+            return None
+        token_ids = self._cache.get(content_hash)
+        if token_ids is not None:
+            self._cache.move_to_end(content_hash)
+            self._stats["memory_hits"] += 1
+            return token_ids
+        if self._store is not None and self.preload([content_hash]):
+            return self._cache.get(content_hash)
+        return None
+
+    def preload(self, content_hashes: Iterable[str]) -> int:
+        """
+        Load the cached tokens of many content versions with batched queries.
+
+        Returns:
+            Number of documents loaded from the cache file
+        """
+        if self._store is None:
+            return 0
+        missing = [h for h in content_hashes
+                   if h and h not in self._cache and h not in self._not_stored]
+        if not missing:
+            return 0
+        try:
+            found = self._store.load(missing)
+        except Exception as e:
+            print(f"Warning: Could not load token cache: {e}")
+            return 0
+        self._not_stored.update(h for h in missing if h not in found)
+        for content_hash, words in found.items():
+            self._remember(content_hash, self._intern_all(words))
+        self._stats["disk_hits"] += len(found)
+        return len(found)
+
+    def encode(self, content: str, content_hash: Optional[str] = None) -> array:
+        """
+        Token IDs of a document, in order and with repeats.
+
+        Args:
+            content: Document text
+            content_hash: Content hash of the document; the result is
+                cached under it when given
+
+        Returns:
+            array('I') of token IDs
+        """
+        token_ids = self.lookup(content_hash) if content_hash else None
+        if token_ids is not None:
+            return token_ids
+        words = WORD_PATTERN.findall(content.lower())
+        token_ids = self._intern_all(words)
+        self._stats["tokenized"] += 1
+        if content_hash:
+            self._remember(content_hash, token_ids)
+            if self._store is not None:
+                self._unsaved[content_hash] = words
+                self._not_stored.discard(content_hash)
+        return token_ids
+
+    def token_set(self, content: str, content_hash: Optional[str] = None) -> FrozenSet[int]:
+        """Distinct token IDs of a document (see encode())."""
+        return frozenset(self.encode(content, content_hash))
+
+    def save(self) -> None:
+        """Write newly tokenized documents to the cache file."""
+        if self._store is None or not self._unsaved:
+            return
+        try:
+            self._store.commit(self._unsaved)
+            self._unsaved = {}
+        except Exception as e:
+            print(f"Warning: Could not save token cache: {e}")
+
+    def close(self) -> None:
+        """Save the token cache and close the cache file."""
+        self.save()
+        if self._store is not None:
+            self._store.close()
+
+    def _intern_all(self, words: List[str]) -> array:
+        """Token IDs of a word list; known words are looked up without a Python call each."""
+        try:
+            return array("I", map(self._ids.__getitem__, words))
+        except KeyError:
+            return array("I", map(self.intern, words))
+
+    def _remember(self, content_hash: str, token_ids: array) -> None:
+        self._cache[content_hash] = token_ids
+        self._cache.move_to_end(content_hash)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Streaming Change Trends
+
+Running aggregates over gamma scan results, updated once per scan so that
+trend queries never have to walk the scan history. Keeps an exponentially
+weighted moving average of the change rate, a fixed-size ring buffer of
+recent scans for rolling mean/min/max, and per-hour and per-day buckets
+for time-based windows.
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+DEFAULT_RING_SIZE = 100
+DEFAULT_EWMA_ALPHA = 0.2
+HOUR_BUCKETS = 48
+DAY_BUCKETS = 30
+
+HOUR = 3600
+DAY = 86400
+
+
+def _new_bucket() -> List[float]:
+    """[scans, total_changes, change_rate sum, max change_rate]"""
+    return [0, 0, 0.0, 0.0]
+
+
+class ChangeTrends:
+    """
+    Incrementally maintained change statistics.
+
+    Every update and query is O(1) in the number of scans seen; queries
+    touch at most ``ring_size`` recent scans or the fixed number of
+    hour/day buckets.
+    """
+
+    def __init__(self, ring_size: int = DEFAULT_RING_SIZE, alpha: float = DEFAULT_EWMA_ALPHA):
+        """
+        Args:
+            ring_size: Number of recent scans kept for rolling statistics
+            alpha: EWMA smoothing factor (higher reacts faster)
+        """
+        self.ring_size = max(1, ring_size)
+        self.alpha = alpha
+        self.scan_count = 0
+        self.total_changes = 0
+        self.ewma_change_rate: Optional[float] = None
+        # (timestamp, change_rate, total_changes)
+        self.recent: Deque[Tuple[float, float, int]] = deque(maxlen=self.ring_size)
+        self.hourly: Dict[int, List[float]] = {}
+        self.daily: Dict[int, List[float]] = {}
+
+    def update(self, change_rate: float, total_changes: int,
+               timestamp: Optional[float] = None) -> None:
+        """
+        Fold one scan into the aggregates.
+
+        Args:
+            change_rate: gamma_metrics["change_rate"] of the scan
+            total_changes: gamma_metrics["total_changes"] of the scan
+            timestamp: POSIX time of the scan (default: now)
+        """
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+
+        self.scan_count += 1
+        self.total_changes += total_changes
+        if self.ewma_change_rate is None:
+            self.ewma_change_rate = change_rate
+        else:
+            self.ewma_change_rate += self.alpha * (change_rate - self.ewma_change_rate)
+        self.recent.append((timestamp, change_rate, total_changes))
+
+        for buckets, width, keep in [(self.hourly, HOUR, HOUR_BUCKETS),
+                                     (self.daily, DAY, DAY_BUCKETS)]:
+            key = int(timestamp // width)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _new_bucket()
+                # Drop buckets that fell out of the retention period
+                for old_key in [k for k in buckets if k <= key - keep]:
+                    del buckets[old_key]
+            bucket[0] += 1
+            bucket[1] += total_changes
+            bucket[2] += change_rate
+            bucket[3] = max(bucket[3], change_rate)
+
+    def update_from_results(self, results: Dict[str, Any]) -> None:
+        """Fold a scan_for_changes() result into the aggregates."""
+        metrics = results["gamma_metrics"]
+        try:
+            timestamp = datetime.fromisoformat(results["scan_timestamp"]).timestamp()
+        except (KeyError, ValueError):
+            timestamp = None
+        self.update(metrics["change_rate"], metrics["total_changes"], timestamp)
+
+    def window(self, window_size: int) -> Dict[str, Any]:
+        """
+        Rolling statistics over the last window_size scans.
+
+        Args:
+            window_size: Number of recent scans (capped at ring_size)
+
+        Returns:
+            Trend analysis results, or an insufficient_data status
+        """
+        if len(self.recent) < 2:
+            return {"status": "insufficient_data", "scans_available": len(self.recent)}
+
+        count = min(max(1, window_size), len(self.recent))
+        scans = [self.recent[i] for i in range(len(self.recent) - count, len(self.recent))]
+        change_rates = [scan[1] for scan in scans]
+
+        return {
+            "window_size": count,
+            "average_change_rate": sum(change_rates) / count,
+            "max_change_rate": max(change_rates),
+            "min_change_rate": min(change_rates),
+            "total_changes_in_window": sum(scan[2] for scan in scans),
+            "ewma_change_rate": self.ewma_change_rate,
+            "trend_direction": calculate_trend(change_rates)
+        }
+
+    def time_window(self, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Statistics over the scans of the last ``seconds`` seconds.
+
+        Windows up to two days are answered from hourly buckets, longer
+        ones from daily buckets, so the window edge is rounded to whole
+        hours/days.
+
+        Args:
+            seconds: Length of the window
+            now: POSIX time the window ends at (default: now)
+
+        Returns:
+            Trend analysis results, or an insufficient_data status
+        """
+        if now is None:
+            now = datetime.now().timestamp()
+
+        if seconds <= HOUR_BUCKETS * HOUR:
+            buckets, width = self.hourly, HOUR
+        else:
+            buckets, width = self.daily, DAY
+        first_key = int((now - seconds) // width)
+        last_key = int(now // width)
+        selected = [(key, buckets[key]) for key in sorted(buckets)
+                    if first_key <= key <= last_key]
+
+        scans = sum(bucket[0] for _, bucket in selected)
+        if scans == 0:
+            return {"status": "insufficient_data", "scans_available": 0}
+
+        # One value per bucket (average rate) gives the direction over time
+        bucket_rates = [bucket[2] / bucket[0] for _, bucket in selected]
+        return {
+            "window_seconds": seconds,
+            "bucket_seconds": width,
+            "scans_in_window": scans,
+            "average_change_rate": sum(bucket[2] for _, bucket in selected) / scans,
+            "max_change_rate": max(bucket[3] for _, bucket in selected),
+            "total_changes_in_window": sum(bucket[1] for _, bucket in selected),
+            "ewma_change_rate": self.ewma_change_rate,
+            "trend_direction": calculate_trend(bucket_rates)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form for the state store."""
+        return {
+            "ring_size": self.ring_size,
+            "alpha": self.alpha,
+            "scan_count": self.scan_count,
+            "total_changes": self.total_changes,
+            "ewma_change_rate": self.ewma_change_rate,
+            "recent": [list(scan) for scan in self.recent],
+            "hourly": [[key] + bucket for key, bucket in self.hourly.items()],
+            "daily": [[key] + bucket for key, bucket in self.daily.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], ring_size: Optional[int] = None) -> 'ChangeTrends':
+        """Restore aggregates saved with to_dict()."""
+        trends = cls(ring_size or data.get("ring_size", DEFAULT_RING_SIZE),
+                     data.get("alpha", DEFAULT_EWMA_ALPHA))
+        trends.scan_count = data.get("scan_count", 0)
+        trends.total_changes = data.get("total_changes", 0)
+        trends.ewma_change_rate = data.get("ewma_change_rate")
+        trends.recent.extend(tuple(scan) for scan in data.get("recent", []))
+        trends.hourly = {int(row[0]): list(row[1:]) for row in data.get("hourly", [])}
+        trends.daily = {int(row[0]): list(row[1:]) for row in data.get("daily", [])}
+        return trends
+
+
+def calculate_trend(values: List[float]) -> str:
+    """Calculate if trend is increasing, decreasing, or stable."""
+    if len(values) < 3:
+        return "unknown"
+
+    # Simple linear trend calculation
+    recent_avg = sum(values[-3:]) / 3
+    earlier_avg = sum(values[:-3]) / len(values[:-3]) if len(values) > 3 else values[0]
+
+    if recent_avg > earlier_avg * 1.1:
+        return "increasing"
+    elif recent_avg < earlier_avg * 0.9:
+        return "decreasing"
+    else:
+        return "stable"
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Knowledge Base Walker
+
+Single-pass os.scandir traversal of the watched knowledge base directories,
+filtered by file extension and ignore patterns, plus individually watched
+files outside them (such as kb/facts.yaml).
+"""
+
+import os
+import re
+import time
+import fnmatch
+from dataclasses import dataclass, field, fields, asdict
+from pathlib import Path
+from stat import S_ISREG
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Directory listings taken within this window of the directory's mtime are
+# not trusted on the next walk (same reasoning as FileState.is_racy).
+RACY_DIR_WINDOW_NS = 2_000_000_000
+
+
+@dataclass
+class DirectoryListing:
+    """
+    Cached, already-filtered listing of one directory.
+
+    Validated by mtime and inode only. An entry count would need the
+    directory listed again to compare, and every entry created, removed or
+    renamed already moves the directory's mtime.
+    """
+    mtime_ns: int
+    inode: int
+    files: List[str] = field(default_factory=list)
+    subdirs: List[str] = field(default_factory=list)
+    listed_ns: int = 0
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """Check if the directory is unchanged since it was listed."""
+        return (
+            self.mtime_ns == stat.st_mtime_ns and
+            self.inode == stat.st_ino and
+            self.listed_ns - self.mtime_ns >= RACY_DIR_WINDOW_NS
+        )
+
+
+def compile_ignore_patterns(patterns: Iterable[str]) -> Optional["re.Pattern"]:
+    """Combine glob-style ignore patterns into a single compiled regex."""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+
+
+class KBWalker:
+    """
+    Walks the watched knowledge base directories with os.scandir.
+
+    Each directory is listed at most once per walk and the DirEntry stat
+    results are reused. A directory whose mtime and inode are unchanged
+    since the previous walk is not listed again: its cached, pre-filtered
+    entries are reused. Files are still stat'ed individually because an
+    in-place edit does not change the containing directory's mtime.
+    """
+
+    def __init__(self, kb_path: Path,
+                 watch_directories: Iterable[str] = ("facts", "rules"),
+                 file_extensions: Iterable[str] = (".txt", ".yaml"),
+                 ignore_patterns: Iterable[str] = ("*.tmp", "*.bak", ".*"),
+                 recursive: bool = True, watch_files: Iterable[str] = ()):
+        """
+        Args:
+            kb_path: Knowledge base root; keys are relative to it
+            watch_directories: Directories to walk, relative to kb_path
+            file_extensions: File suffixes to include
+            ignore_patterns: Glob patterns matched against entry names
+                (or against the relative path for patterns containing "/")
+            recursive: Descend into subdirectories
+            watch_files: Files outside the watched directories to include,
+                relative to kb_path (stat'ed on every walk; no suffix or
+                ignore pattern applies to them)
+        """
+        self.kb_path = Path(kb_path)
+        self.watch_directories = list(watch_directories)
+        self.watch_files = [f.strip("/") for f in watch_files]
+        self.file_extensions = tuple(file_extensions)
+        self.recursive = recursive
+
+        ignore_patterns = list(ignore_patterns)
+        self._ignore_name = compile_ignore_patterns(p for p in ignore_patterns if "/" not in p)
+        self._ignore_path = compile_ignore_patterns(p for p in ignore_patterns if "/" in p)
+
+        self.dir_cache: Dict[str, DirectoryListing] = {}
+        self.changed_dirs: Dict[str, DirectoryListing] = {}
+        self.removed_dirs: List[str] = []
+        self.dirs_listed = 0
+
+    def load_cache(self, listings: Dict[str, Dict]) -> None:
+        """Seed the directory cache from persisted listings (dropping fields no longer kept)."""
+        names = {f.name for f in fields(DirectoryListing)}
+        self.dir_cache = {k: DirectoryListing(**{n: v for n, v in listing.items() if n in names})
+                          for k, listing in listings.items()}
+
+    def cache_updates(self) -> Dict[str, Optional[Dict]]:
+        """Directory cache changes from the last walk (None marks removal)."""
+        updates: Dict[str, Optional[Dict]] = {k: asdict(v) for k, v in self.changed_dirs.items()}
+        updates.update({k: None for k in self.removed_dirs})
+        return updates
+
+    def reset_updates(self) -> None:
+        """Forget directory cache changes recorded by earlier walks."""
+        self.changed_dirs = {}
+        self.removed_dirs = []
+        self.dirs_listed = 0
+
+    def is_ignored(self, name: str, rel_path: str) -> bool:
+        """Check an entry against the ignore patterns."""
+        if self._ignore_name is not None and self._ignore_name.match(name):
+            return True
+        return self._ignore_path is not None and bool(self._ignore_path.match(rel_path))
+
+    def accepts(self, rel_path: str) -> bool:
+        """Check whether a file path relative to kb_path would be walked."""
+        if rel_path in self.watch_files:
+            return True
+        parts = rel_path.replace(os.sep, "/").split("/")
+        if not rel_path.endswith(self.file_extensions):
+            return False
+        if any(self.is_ignored(part, "/".join(parts[:i + 1])) for i, part in enumerate(parts)):
+            return False
+        for directory in self.watch_directories:
+            prefix = directory.strip("/").split("/")
+            depth = len(parts) - len(prefix)
+            if parts[:len(prefix)] == prefix and (depth == 1 or (self.recursive and depth > 1)):
+                return True
+        return False
+
+    def walk(self) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        """
+        Yield (key, path, stat) for every matching file.
+
+        Keys are "/"-separated paths relative to kb_path.
+        """
+        self.reset_updates()
+        visited = set()
+
+        for directory in self.watch_directories:
+            rel_dir = directory.strip("/")
+            try:
+                dir_stat = os.stat(self.kb_path / rel_dir)
+            except OSError:
+                continue
+            yield from self._walk_dir(rel_dir, dir_stat, visited)
+
+        for rel_path in self.watch_files:
+            file_path = self.kb_path / rel_path
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                continue
+            if S_ISREG(file_stat.st_mode):
+                yield rel_path, file_path, file_stat
+
+        self.removed_dirs = [k for k in self.dir_cache if k not in visited]
+        for key in self.removed_dirs:
+            del self.dir_cache[key]
+
+    def walk_directory(self, rel_dir: str) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        """
+        Yield matching files below one directory relative to kb_path.
+
+        Used for targeted scans of a directory that was created or moved
+        into the tree; the directory cache is updated but not pruned.
+        """
+        rel_dir = rel_dir.strip("/")
+        try:
+            dir_stat = os.stat(self.kb_path / rel_dir)
+        except OSError:
+            return
+        yield from self._walk_dir(rel_dir, dir_stat, set())
+
+    def _walk_dir(self, rel_dir: str, dir_stat: os.stat_result,
+                  visited: set) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        visited.add(rel_dir)
+        dir_path = self.kb_path / rel_dir
+        cached = self.dir_cache.get(rel_dir)
+
+        if cached is not None and cached.matches_stat(dir_stat):
+            for name in cached.files:
+                file_path = dir_path / name
+                try:
+                    yield f"{rel_dir}/{name}", file_path, os.stat(file_path)
+                except OSError:
+                    continue
+            subdirs = []
+            for name in cached.subdirs:
+                try:
+                    subdirs.append((name, os.stat(dir_path / name)))
+                except OSError:
+                    continue
+        else:
+            listing = DirectoryListing(
+                mtime_ns=dir_stat.st_mtime_ns,
+                inode=dir_stat.st_ino,
+                listed_ns=time.time_ns()
+            )
+            subdirs = []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        rel_path = f"{rel_dir}/{entry.name}"
+                        if self.is_ignored(entry.name, rel_path):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive:
+                                    listing.subdirs.append(entry.name)
+                                    subdirs.append((entry.name, entry.stat(follow_symlinks=False)))
+                            elif entry.name.endswith(self.file_extensions) and entry.is_file():
+                                listing.files.append(entry.name)
+                                yield rel_path, Path(entry.path), entry.stat()
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Warning: Could not list {dir_path}: {e}")
+                return
+            self.dirs_listed += 1
+            self.dir_cache[rel_dir] = listing
+            self.changed_dirs[rel_dir] = listing
+
+        for name, stat in subdirs:
+            yield from self._walk_dir(f"{rel_dir}/{name}", stat, visited)
@@ -0,0 +1,122 @@
+"""Tests for the cross-reference checker."""
+
+import pytest
+
+from sensing.cross_reference import CrossReferenceChecker
+
+FACTS = """\
+- concept: BTN3A1
+  property: activated
+  context: liver
+- concept: BTN2A1
+  property: expressed
+"""
+
+RULES = """\
+- rule_id: rule_001
+  if:
+    - concept: BTN3A1
+      property: activated
+      context: ?ctx
+  then:
+    - concept: gamma_delta_t_cell
+      property: activated
+      context: ?ctx
+- rule_id: rule_002
+  if:
+    - concept: gamma_delta_t_cell
+      property: activated
+  then:
+    - concept: BTN2A1
+      property: bound
+- rule_id: rule_003
+  if:
+    - concept: BTN3A1
+      property: inhibited
+  then:
+    - concept: tumor_cell
+      property: lysed
+"""
+
+
+def _rule(rule_id, condition, conclusion):
+    return (f"- rule_id: {rule_id}\n  if:\n    - concept: {condition}\n      property: activated\n"
+            f"  then:\n    - concept: {conclusion}\n      property: activated\n")
+
+
+@pytest.fixture
+def kb(tmp_path):
+    (tmp_path / "facts").mkdir()
+    (tmp_path / "rules").mkdir()
+    (tmp_path / "facts" / "fact-001.yaml").write_text(FACTS)
+    (tmp_path / "rules" / "rule-001.yaml").write_text(RULES)
+    return tmp_path
+
+
+def _summary(problems):
+    return [(p["rule"], p["clause"], p["pattern"]["concept"], p["reason"]) for p in problems]
+
+
+def test_dangling_conditions_and_unknown_conclusions_are_reported_apart(kb):
+    checker = CrossReferenceChecker(kb_path=str(kb))
+    result = checker.update_from_kb()
+
+    # rule_002's condition is concluded by rule_001, so only rule_003's is dangling
+    assert _summary(checker.dangling_references()) == [
+        ("rule_003", "if", "BTN3A1", "no matching fact")]
+    # BTN2A1 is a fact concept; no other rule derives gamma_delta_t_cell or tumor_cell
+    assert _summary(checker.unknown_conclusions()) == [
+        ("rule_001", "then", "gamma_delta_t_cell", "unknown concept"),
+        ("rule_003", "then", "tumor_cell", "unknown concept")]
+    assert _summary(result["dangling_added"]) == _summary(checker.dangling_references())
+    assert _summary(result["unknown_conclusions_added"]) == _summary(checker.unknown_conclusions())
+    assert checker.stats()["dangling"] == 1
+    assert checker.stats()["unknown_conclusions"] == 2
+
+
+def test_conclusion_derived_by_another_rule_is_known(kb):
+    (kb / "rules" / "rule-002.yaml").write_text(_rule("rule_004", "BTN2A1", "tumor_cell"))
+    checker = CrossReferenceChecker(kb_path=str(kb))
+    checker.update_from_kb()
+    assert [p["rule"] for p in checker.unknown_conclusions()] == ["rule_001"]
+
+    # Once the other rule is gone, tumor_cell is unknown again
+    (kb / "rules" / "rule-002.yaml").unlink()
+    result = checker.update_from_kb(changes=["rules/rule-002.yaml"])
+    assert _summary(result["unknown_conclusions_added"]) == [
+        ("rule_003", "then", "tumor_cell", "unknown concept")]
+
+
+def test_only_rules_touched_by_a_change_are_rechecked(kb):
+    for n in range(2, 12):
+        (kb / "rules" / f"rule-{n:03d}.yaml").write_text(_rule(f"rule_{n:03d}", f"concept{n}", f"outcome{n}"))
+    checker = CrossReferenceChecker(kb_path=str(kb))
+    assert checker.update_from_kb()["rules_checked"] == 13
+    assert checker.stats()["dangling"] == 11
+
+    # A new fact resolves one rule's condition; no other rule is re-checked
+    (kb / "facts" / "fact-002.yaml").write_text("- concept: concept5\n  property: activated\n")
+    result = checker.update_from_kb(changes=["facts/fact-002.yaml"])
+    assert result["rules_checked"] == 1
+    assert _summary(result["dangling_removed"]) == [
+        ("rule_005", "if", "concept5", "no matching fact")]
+    assert result["dangling_added"] == []
+
+    # Editing a rule file re-checks only the rules in it
+    (kb / "rules" / "rule-007.yaml").write_text(_rule("rule_007", "BTN2A1", "outcome7"))
+    result = checker.update_from_kb(changes=["rules/rule-007.yaml"])
+    assert result["rules_checked"] == 1
+    assert _summary(result["dangling_removed"]) == [
+        ("rule_007", "if", "concept7", "no matching fact")]
+
+    # Removing the fact brings the dangling reference back
+    (kb / "facts" / "fact-002.yaml").unlink()
+    result = checker.update_from_kb(changes=["facts/fact-002.yaml"])
+    assert result["rules_checked"] == 1
+    assert _summary(result["dangling_added"]) == [
+        ("rule_005", "if", "concept5", "no matching fact")]
+
+    full = CrossReferenceChecker(kb_path=str(kb))
+    full.update_from_kb()
+    assert checker.dangling_references() == full.dangling_references()
+    assert checker.unknown_conclusions() == full.unknown_conclusions()
@@ -0,0 +1,139 @@
+"""Tests for DeltaAnalyzer's pair scoring paths."""
+
+import pathlib
+import re
+
+import pytest
+
+from sensing.delta_analyzer import DeltaAnalyzer, DeltaSummary
+
+
+def _kb(tmp_path, pairs=12):
+    (tmp_path / "facts").mkdir()
+    (tmp_path / "rules").mkdir()
+    for n in range(1, pairs + 1):
+        (tmp_path / "facts" / f"fact{n}.txt").write_text(f"gamma delta t cells fact {n} " * (n % 3 + 1))
+        (tmp_path / "rules" / f"rule{n}.txt").write_text(f"if gamma delta then rule {n}")
+    return tmp_path
+
+
+def test_process_pool_scores_like_the_serial_path(tmp_path):
+    kb = _kb(tmp_path)
+    serial = DeltaAnalyzer(kb_path=str(kb)).analyze_fact_rule_pairs()
+    pooled = DeltaAnalyzer(kb_path=str(kb), max_workers=2, batch_size=2).analyze_fact_rule_pairs()
+
+    assert pooled["pair_analyses"] == serial["pair_analyses"]
+    assert pooled["pairs_analyzed"] == 12
+
+
+def test_unreadable_files_are_reported_and_not_cached(tmp_path, monkeypatch):
+    kb = _kb(tmp_path, pairs=3)
+    read_bytes = pathlib.Path.read_bytes
+
+    def failing_read_bytes(path):
+        if path.name in ("fact1.txt", "rule2.txt"):
+            raise PermissionError(13, "Permission denied", str(path))
+        return read_bytes(path)
+
+    monkeypatch.setattr(pathlib.Path, "read_bytes", failing_read_bytes)
+    analyzer = DeltaAnalyzer(kb_path=str(kb))
+    results = analyzer.analyze_fact_rule_pairs()
+
+    assert results["pair_analyses"]["txt:1"]["issues"] == ["Error reading files: Could not read fact1.txt"]
+    assert results["pair_analyses"]["txt:2"]["issues"] == ["Error reading files: Could not read rule2.txt"]
+    assert "content_analysis" in results["pair_analyses"]["txt:3"]
+    assert results["pairs_analyzed"] == 1
+    assert len(analyzer.cache) == 1
+
+
+def _add_yaml_pairs(kb, numbers):
+    for n in numbers:
+        (kb / "facts" / f"fact-{n:03d}.yaml").write_text(f"- concept: BTN3A{n}\n  property: activated\n")
+        (kb / "rules" / f"rule-{n:03d}.yaml").write_text(
+            f"- rule_id: rule_{n:03d}\n  if:\n    - concept: BTN3A{n}\n      property: activated\n")
+
+
+def test_yaml_pairs_are_analyzed_alongside_text_pairs(tmp_path):
+    kb = _kb(tmp_path, pairs=2)
+    _add_yaml_pairs(kb, [1])
+    (kb / "rules" / "rule-002.yaml").write_text("- rule_id: rule_002\n")
+    results = DeltaAnalyzer(kb_path=str(kb)).analyze_fact_rule_pairs()
+
+    assert list(results["pair_analyses"]) == ["txt:1", "txt:2", "yaml:1", "yaml:2"]
+    assert results["pair_analyses"]["yaml:1"]["content_analysis"]["word_overlap_count"] > 0
+    assert results["pair_analyses"]["yaml:2"]["issues"] == ["Missing fact-002.yaml"]
+    assert results["summary"]["complete_pairs"] == 3
+
+
+def test_incremental_runs_match_a_full_run(tmp_path):
+    from sensing.gamma_detector import GammaDetector
+
+    (tmp_path / "kb").mkdir()
+    kb = _kb(tmp_path / "kb", pairs=30)
+    _add_yaml_pairs(kb, range(1, 11))
+    detector = GammaDetector(kb_path=str(kb), state_file=str(tmp_path / "gamma.db"))
+    detector.scan_for_changes()
+    analyzer = DeltaAnalyzer(kb_path=str(kb))
+    analyzer.analyze_fact_rule_pairs(file_hashes=detector.content_hashes(),
+                                     pair_index=detector.pair_index)
+
+    # Several rounds of edits, additions and deletions across both schemes
+    for round_number in range(1, 4):
+        for n in range(round_number, 31, 4):
+            (kb / "facts" / f"fact{n}.txt").write_text(f"edited fact {n} round {round_number} " * n)
+        (kb / "rules" / f"rule-{round_number:03d}.yaml").write_text(f"- rule_id: edited_{round_number}\n")
+        (kb / "rules" / f"rule{round_number + 5}.txt").unlink()
+        _add_yaml_pairs(kb, [10 + round_number])
+        gamma = detector.scan_for_changes()
+        incremental = analyzer.analyze_fact_rule_pairs(
+            changes=DeltaAnalyzer.changed_files(gamma), file_hashes=detector.content_hashes(),
+            pair_index=detector.pair_index)
+        full = DeltaAnalyzer(kb_path=str(kb)).analyze_fact_rule_pairs()
+
+        assert incremental["analysis_mode"] == "incremental"
+        assert incremental["pairs_analyzed"] < len(full["pair_analyses"])
+        assert list(incremental["pair_analyses"]) == list(full["pair_analyses"])
+        assert incremental["pair_analyses"] == full["pair_analyses"]
+        assert incremental["summary"] == full["summary"]
+        assert incremental["recommendations"] == full["recommendations"]
+
+
+def test_streamed_pairs_match_the_batch_results(tmp_path):
+    kb = _kb(tmp_path, pairs=5)
+    _add_yaml_pairs(kb, [1, 2])
+    (kb / "rules" / "rule3.txt").unlink()
+    batch = DeltaAnalyzer(kb_path=str(kb)).analyze_fact_rule_pairs()
+
+    summary = DeltaSummary()
+    streamed = list(DeltaAnalyzer(kb_path=str(kb)).iter_pair_analyses(summary=summary))
+    assert streamed == list(batch["pair_analyses"].values())
+    assert summary.to_dict() == batch["summary"]
+    assert summary.recommendations() == batch["recommendations"]
+
+
+def test_slotted_results_keep_the_word_set_totals(tmp_path):
+    kb = _kb(tmp_path)
+    analyzer = DeltaAnalyzer(kb_path=str(kb))
+    results = analyzer.analyze_fact_rule_pairs()
+
+    # The word sets the results were once built from
+    scores = []
+    for n in range(1, 13):
+        fact = set(re.findall(r'\w+', (kb / "facts" / f"fact{n}.txt").read_text().strip().lower()))
+        rule = set(re.findall(r'\w+', (kb / "rules" / f"rule{n}.txt").read_text().strip().lower()))
+        scores.append(len(fact & rule) / len(fact | rule))
+        assert results["pair_analyses"][f"txt:{n}"]["content_analysis"] == {
+            "similarity_score": scores[-1],
+            "word_overlap_count": len(fact & rule),
+            "unique_words_in_fact": len(fact - rule),
+            "unique_words_in_rule": len(rule - fact),
+        }
+        words = analyzer.pair_words(f"txt:{n}")
+        assert (words.overlap, words.unique_to_fact, words.unique_to_rule) == \
+            (fact & rule, fact - rule, rule - fact)
+
+    assert results["summary"]["average_similarity"] == pytest.approx(sum(scores) / len(scores))
+    assert results["summary"]["complete_pairs"] == 12
+    for analysis in analyzer._pair_results.values():
+        assert not hasattr(analysis, "__dict__")
+        assert not hasattr(analysis.content_analysis, "__dict__")
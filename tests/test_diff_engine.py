@@ -0,0 +1,109 @@
+"""Tests for the histogram/patience/Myers line diff engine."""
+
+import difflib
+import random
+
+import pytest
+
+from sensing.diff_engine import ALGORITHMS, matching_blocks, opcodes, unified_diff
+
+
+def _edited(rng, lines, edits):
+    """A copy of lines with in-place inserts, deletes and replacements (no moves)."""
+    edited = list(lines)
+    for number in range(edits):
+        position = rng.randrange(len(edited) + 1)
+        kind = rng.choice(["insert", "delete", "replace"])
+        if kind == "insert" or position == len(edited):
+            edited.insert(position, f"new line {number}")
+        elif kind == "delete":
+            del edited[position]
+        else:
+            edited[position] = f"replaced line {number}"
+    return edited
+
+
+def _apply(a, b, codes):
+    """Rebuild b from a and the opcodes, checking that "equal" runs really are equal."""
+    result = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("seed", range(20))
+def test_unified_diff_matches_difflib(algorithm, seed):
+    # With distinct lines and no moves there is one best diff, so the output
+    # must be byte-for-byte what difflib produces
+    rng = random.Random(seed)
+    a = [f"fact {n}: gamma delta line" for n in range(rng.randint(0, 120))]
+    b = _edited(rng, a, rng.randint(0, 8))
+    for n in (0, 3):
+        expected = list(difflib.unified_diff(a, b, "fact1.txt", "rule1.txt", n=n, lineterm=""))
+        actual = list(unified_diff(a, b, "fact1.txt", "rule1.txt", n=n, lineterm="",
+                                   algorithm=algorithm))
+        assert actual == expected
+
+
+def test_header_dates_and_line_terminators_match_difflib():
+    a, b = ["one\n", "two\n", "three\n"], ["one\n", "2\n", "three\n", "four\n"]
+    kwargs = dict(fromfile="a", tofile="b", fromfiledate="2026-01-01", tofiledate="2026-01-02")
+    assert list(unified_diff(a, b, **kwargs)) == list(difflib.unified_diff(a, b, **kwargs))
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_identical_and_empty_documents(algorithm):
+    assert list(unified_diff([], [], algorithm=algorithm)) == []
+    assert list(unified_diff(["same"], ["same"], algorithm=algorithm)) == []
+    assert opcodes([], ["x"], algorithm) == [("insert", 0, 0, 0, 1)]
+    assert opcodes(["x"], [], algorithm) == [("delete", 0, 1, 0, 0)]
+    assert matching_blocks(["a", "b"], ["a", "b"], algorithm) == [(0, 0, 2), (2, 2, 0)]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("seed", range(30))
+def test_opcodes_rebuild_repetitive_documents(algorithm, seed):
+    # Few distinct lines: many equally good alignments, YAML-like repetition
+    rng = random.Random(seed)
+    alphabet = ["- concept: x", "  property: y", "  context: z", "", "---"]
+    a = [rng.choice(alphabet) for _ in range(rng.randint(0, 80))]
+    b = [rng.choice(alphabet) for _ in range(rng.randint(0, 80))]
+    assert _apply(a, b, opcodes(a, b, algorithm)) == b
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_myers_finds_a_longest_common_subsequence(seed):
+    rng = random.Random(seed)
+    a = [rng.choice("abcd") for _ in range(rng.randint(0, 40))]
+    b = [rng.choice("abcd") for _ in range(rng.randint(0, 40))]
+    matched = sum(size for _, _, size in matching_blocks(a, b, "myers"))
+    assert matched == _lcs_length(a, b)
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_bounded_cost_still_gives_a_correct_diff(algorithm):
+    rng = random.Random(1)
+    a = [rng.choice("ab") for _ in range(3000)]
+    b = [rng.choice("ab") for _ in range(3000)]
+    codes = opcodes(a, b, algorithm, max_cost=5)
+    assert _apply(a, b, codes) == b
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        matching_blocks(["a"], ["b"], algorithm="minimal")
@@ -0,0 +1,113 @@
+"""Tests for the inotify change feed and its polling fallback."""
+
+import ctypes
+import errno
+from pathlib import Path
+
+import pytest
+
+from sensing import file_monitor
+from sensing.file_monitor import FileMonitor
+
+
+@pytest.fixture
+def kb(tmp_path):
+    (tmp_path / "facts").mkdir()
+    (tmp_path / "rules").mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def monitor(kb):
+    monitor = FileMonitor(str(kb), settle_seconds=0.2, max_latency_seconds=5.0)
+    monitor.start()
+    if not monitor.using_inotify:
+        pytest.skip(f"inotify not available ({monitor.fallback_reason})")
+    yield monitor
+    monitor.stop()
+
+
+def test_event_burst_is_coalesced(kb, monitor):
+    fact = kb / "facts" / "fact1.txt"
+    for n in range(5):
+        fact.write_text(f"version {n}")
+    (kb / "rules" / "rule1.txt").write_text("rule")
+    (kb / "facts" / "draft.tmp").write_text("ignored")
+
+    changes = monitor.wait(timeout=2)
+    assert changes.paths == {"facts/fact1.txt", "rules/rule1.txt"}
+    assert changes.event_count > len(changes.paths)
+    assert not changes.full_rescan
+    assert monitor.wait(timeout=0.1) is None
+
+
+def test_new_directories_are_reported_and_watched(kb, monitor):
+    (kb / "facts" / "structured").mkdir()
+    changes = monitor.wait(timeout=2)
+    assert changes.directories == {"facts/structured"}
+
+    (kb / "facts" / "structured" / "fact2.yaml").write_text("- concept: BTN3A1\n")
+    assert monitor.wait(timeout=2).paths == {"facts/structured/fact2.yaml"}
+
+
+def _max_queued_events():
+    try:
+        return int(Path("/proc/sys/fs/inotify/max_queued_events").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def test_queue_overflow_requests_a_full_rescan(kb, monitor):
+    limit = _max_queued_events()
+    if limit is None or limit > 50000:
+        pytest.skip("inotify queue limit unknown or too large to overflow quickly")
+    # Each new file queues at least create, modify and close-write events
+    for n in range(limit // 2):
+        (kb / "facts" / f"fact{n}.txt").write_text("x")
+
+    changes = monitor.wait(timeout=2)
+    assert changes.full_rescan
+    assert changes.reason == "inotify event queue overflow"
+
+
+def test_watch_limit_falls_back_to_polling(kb, monkeypatch, capsys):
+    libc = file_monitor._load_libc()
+    if libc is None:
+        pytest.skip("inotify not available")
+
+    class WatchLimitedLibc:
+        inotify_init1 = libc.inotify_init1
+
+        @staticmethod
+        def inotify_add_watch(fd, path, mask):
+            ctypes.set_errno(errno.ENOSPC)
+            return -1
+
+    monkeypatch.setattr(file_monitor, "_load_libc", WatchLimitedLibc)
+    monitor = FileMonitor(str(kb), poll_interval=0.01)
+    monitor.start()
+    try:
+        assert monitor.mode == "polling"
+        assert not monitor.using_inotify
+        assert "falling back to stat polling" in capsys.readouterr().out
+        changes = monitor.wait(timeout=0)
+        assert changes.full_rescan
+        assert "watch limit" in changes.reason
+    finally:
+        monitor.stop()
+
+
+def test_watch_files_at_the_root_are_reported(kb):
+    monitor = FileMonitor(str(kb), watch_files=("facts.yaml",), settle_seconds=0.2)
+    monitor.start()
+    try:
+        if not monitor.using_inotify:
+            pytest.skip(f"inotify not available ({monitor.fallback_reason})")
+        (kb / "facts.yaml").write_text("- concept: BTN3A1\n")
+        (kb / "notes.yaml").write_text("not watched")
+        (kb / "archive").mkdir()
+        changes = monitor.wait(timeout=2)
+        assert changes.paths == {"facts.yaml"}
+        assert not changes.directories and not changes.full_rescan
+    finally:
+        monitor.stop()
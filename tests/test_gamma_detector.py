@@ -0,0 +1,178 @@
+"""Tests for GammaDetector's change detection."""
+
+import builtins
+import os
+
+import pytest
+
+from sensing.gamma_detector import GammaDetector
+
+
+@pytest.fixture
+def kb(tmp_path):
+    root = tmp_path / "kb"
+    (root / "facts").mkdir(parents=True)
+    (root / "rules").mkdir()
+    (root / "facts" / "fact1.txt").write_text("gamma delta t cells")
+    (root / "rules" / "rule1.txt").write_text("if gamma delta then activate")
+    return root
+
+
+def _detector(kb, **options):
+    return GammaDetector(kb_path=str(kb), state_file=str(kb.parent / "gamma.db"), **options)
+
+
+@pytest.fixture
+def unreadable(monkeypatch):
+    """Names of files that open() refuses to read inside gamma_detector."""
+    names = set()
+
+    def guarded_open(file, *args, **kwargs):
+        if getattr(file, "name", None) in names:
+            raise PermissionError(13, "Permission denied", str(file))
+        return builtins.open(file, *args, **kwargs)
+
+    monkeypatch.setattr("sensing.gamma_detector.open", guarded_open, raising=False)
+    return names
+
+
+def test_unreadable_file_keeps_its_baseline(kb, unreadable, capsys):
+    detector = _detector(kb)
+    detector.scan_for_changes()
+    baseline_hash = detector.content_hashes()["facts/fact1.txt"]
+
+    (kb / "facts" / "fact1.txt").write_text("gamma delta t cells, edited")
+    unreadable.add("fact1.txt")
+    results = detector.scan_for_changes()
+
+    assert "Could not read" in capsys.readouterr().out
+    assert results["gamma_metrics"]["total_changes"] == 0
+    assert detector.content_hashes()["facts/fact1.txt"] == baseline_hash
+
+    # Once readable, the edit is reported against the real baseline hash
+    unreadable.clear()
+    results = detector.scan_for_changes()
+    assert [change["file"] for change in results["modified_files"]] == ["facts/fact1.txt"]
+    assert detector.content_hashes()["facts/fact1.txt"] not in ("", baseline_hash)
+
+
+def test_unreadable_new_file_stays_untracked(kb, unreadable):
+    detector = _detector(kb)
+    detector.scan_for_changes()
+
+    (kb / "facts" / "fact2.txt").write_text("new fact")
+    unreadable.add("fact2.txt")
+    assert detector.scan_for_changes()["new_files"] == []
+    assert "facts/fact2.txt" not in detector.content_hashes()
+
+    unreadable.clear()
+    assert detector.scan_for_changes()["new_files"] == ["facts/fact2.txt"]
+
+
+def _age(path, seconds=3600):
+    """Backdate a file's mtime so its baseline hash is outside the racy window."""
+    mtime_ns = path.stat().st_mtime_ns - seconds * 1_000_000_000
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return mtime_ns
+
+
+def _edit_in_place(path, text, mtime_ns):
+    """Rewrite a file with same-size content and put its old mtime back."""
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_stat_skips_hashing(kb):
+    fact = kb / "facts" / "fact1.txt"
+    mtime_ns = _age(fact)
+    _age(kb / "rules" / "rule1.txt")
+    detector = _detector(kb)
+    assert detector.scan_for_changes()["gamma_metrics"]["files_hashed"] == 2
+
+    # The stat tuple is trusted, so a same-size edit that keeps mtime goes unseen
+    _edit_in_place(fact, "GAMMA DELTA T CELLS", mtime_ns)
+    results = detector.scan_for_changes()
+    assert results["gamma_metrics"]["files_hashed"] == 0
+    assert results["gamma_metrics"]["total_changes"] == 0
+
+
+def test_racily_clean_file_is_rehashed(kb):
+    fact = kb / "facts" / "fact1.txt"
+    mtime_ns = fact.stat().st_mtime_ns
+    detector = _detector(kb)
+    detector.scan_for_changes()
+    assert detector.baseline_states["facts/fact1.txt"].is_racy()
+
+    # Written again within the same timestamp tick: only the hash can tell
+    _edit_in_place(fact, "GAMMA DELTA T CELLS", mtime_ns)
+    results = detector.scan_for_changes()
+    assert [change["file"] for change in results["modified_files"]] == ["facts/fact1.txt"]
+
+
+def test_replaced_file_is_rehashed(kb):
+    fact = kb / "facts" / "fact1.txt"
+    mtime_ns = _age(fact)
+    _age(kb / "rules" / "rule1.txt")
+    detector = _detector(kb)
+    detector.scan_for_changes()
+
+    # Same size and mtime, but a new inode (an editor's write-and-rename)
+    replacement = kb / "facts" / "fact1.txt.new"
+    _edit_in_place(replacement, "GAMMA DELTA T CELLS", mtime_ns)
+    os.replace(replacement, fact)
+    results = detector.scan_for_changes()
+    assert results["gamma_metrics"]["files_hashed"] == 1
+    assert [change["file"] for change in results["modified_files"]] == ["facts/fact1.txt"]
+
+
+def test_paranoid_mode_hashes_every_file(kb):
+    fact = kb / "facts" / "fact1.txt"
+    mtime_ns = _age(fact)
+    _age(kb / "rules" / "rule1.txt")
+    detector = _detector(kb)
+    detector.scan_for_changes()
+    detector.close()
+    _edit_in_place(fact, "GAMMA DELTA T CELLS", mtime_ns)
+
+    # The baseline's stat tuples match, but paranoid mode ignores them
+    results = _detector(kb, paranoid=True).scan_for_changes()
+    assert results["gamma_metrics"]["files_hashed"] == 2
+    assert [change["file"] for change in results["modified_files"]] == ["facts/fact1.txt"]
+
+
+def test_parallel_hashing_matches_serial(kb):
+    for n in range(2, 40):
+        (kb / "facts" / f"fact{n}.txt").write_text(f"fact {n} " * n)
+        (kb / "rules" / f"rule{n}.txt").write_text(f"rule {n} " * (40 - n))
+    serial = GammaDetector(kb_path=str(kb), state_file=str(kb.parent / "serial.db"))
+    parallel = GammaDetector(kb_path=str(kb), state_file=str(kb.parent / "parallel.db"),
+                             max_workers=4, batch_size=3)
+
+    def scan_both():
+        serial_results = serial.scan_for_changes()
+        parallel_results = parallel.scan_for_changes()
+        for field in ("new_files", "deleted_files", "modified_files"):
+            assert sorted(map(str, parallel_results[field])) == sorted(map(str, serial_results[field]))
+        assert parallel_results["gamma_metrics"]["files_hashed"] == \
+            serial_results["gamma_metrics"]["files_hashed"]
+        assert parallel.content_hashes() == serial.content_hashes()
+
+    scan_both()
+    assert len(parallel.content_hashes()) == 78
+    (kb / "facts" / "fact7.txt").write_text("edited")
+    (kb / "rules" / "rule30.txt").unlink()
+    scan_both()
+    assert len(parallel.content_hashes()) == 77
+
+
+def test_root_watch_file_reports_changed_regions(kb):
+    facts = kb / "facts.yaml"
+    facts.write_text("".join(f"- concept: C{n}\n  property: p{n}\n" for n in range(20000)))
+    detector = _detector(kb, watch_files=("facts.yaml",), chunked=True, chunk_threshold=0)
+    assert "facts.yaml" in detector.scan_for_changes()["new_files"]
+
+    facts.write_text(facts.read_text().replace("property: p15000\n", "property: changed\n"))
+    modified = detector.scan_for_changes()["modified_files"]
+    assert [change["file"] for change in modified] == ["facts.yaml"]
+    regions = modified[0]["changed_regions"]
+    assert regions and all(region["length"] < facts.stat().st_size for region in regions)
@@ -0,0 +1,93 @@
+"""Tests for memory-mapped index snapshots."""
+
+import struct
+
+import pytest
+
+from sensing.indexer import KnowledgeIndexer
+from sensing.mmap_index import FORMAT_VERSION, HEADER, MappedIndex, SnapshotFormatError
+
+QUERIES = [
+    ["BTN3A1"],
+    ["btn*"],
+    ["concept:BTN3A1"],
+    ["property:activ*"],
+    ["BTN3A1", "property:activated"],
+    ["context:liver", "activated"],
+    ["rule_id:rule_002"],
+    ["if:BTN3A1"],
+    ["then:gamma_delta_t_cell"],
+    ["phosphoantigen"],
+    ["phospho*", "binds"],
+    ["Vγ9Vδ2"],
+    ["unknown"],
+    ["BTN3A1", "unknown"],
+]
+
+
+@pytest.fixture
+def indexer(tmp_path):
+    kb = tmp_path / "kb"
+    (kb / "facts").mkdir(parents=True)
+    (kb / "rules").mkdir()
+    (kb / "facts" / "fact1.txt").write_text("BTN3A1 binds phosphoantigen in Vγ9Vδ2 T cells")
+    (kb / "facts" / "fact-001.yaml").write_text(
+        "- concept: BTN3A1\n  property: activated\n  context: liver\n"
+        "- concept: BTN2A1\n  property: expressed\n  context: liver\n"
+        "- concept: BTN3A1\n  subtype: BTN3A1-2\n  property: activating\n")
+    (kb / "rules" / "rule-001.yaml").write_text(
+        "- rule_id: rule_001\n  if:\n    - concept: BTN3A1\n      property: activated\n"
+        "  then:\n    - concept: gamma_delta_t_cell\n      property: activated\n"
+        "- rule_id: rule_002\n  if:\n    - concept: BTN2A1\n      property: expressed\n"
+        "  then:\n    - concept: BTN3A1\n      property: activated\n")
+    (kb / "rules" / "rule1.txt").write_text("if BTN3A1 binds phosphoantigen then activate")
+    indexer = KnowledgeIndexer(kb_path=str(kb), index_file=str(tmp_path / "index.db"),
+                               snapshot_file=str(tmp_path / "index.snap"))
+    indexer.update_from_kb()
+    indexer.export_snapshot()
+    yield indexer
+    indexer.close()
+
+
+@pytest.mark.parametrize("terms", QUERIES, ids=" ".join)
+def test_snapshot_answers_like_the_indexer(indexer, terms):
+    index = MappedIndex(indexer.snapshot_file)
+    try:
+        assert len(index) == len(indexer)
+        assert index.query(terms) == indexer.query(terms)
+        assert index.query(terms, limit=1) == indexer.query(terms, limit=1)
+    finally:
+        index.close()
+
+
+def test_snapshot_follows_index_updates(indexer):
+    (indexer.kb_path / "facts" / "fact1.txt").write_text("HMBPP is a phosphoantigen")
+    indexer.update_from_kb(changes=["facts/fact1.txt"])
+    indexer.export_snapshot()
+
+    index = MappedIndex(indexer.snapshot_file)
+    try:
+        for terms in (["BTN3A1"], ["hmbpp"], ["phosphoantigen"]):
+            assert index.query(terms) == indexer.query(terms)
+    finally:
+        index.close()
+
+
+def _rewrite(path, data):
+    path.write_bytes(data)
+    with pytest.raises(SnapshotFormatError):
+        MappedIndex(str(path))
+
+
+def test_damaged_snapshots_are_rejected(indexer, tmp_path):
+    data = (tmp_path / "index.snap").read_bytes()
+    broken = tmp_path / "broken.snap"
+
+    _rewrite(broken, data[:HEADER.size // 2])
+    _rewrite(broken, data[:-8])
+    _rewrite(broken, b"XXXX" + data[4:])
+    _rewrite(broken, data[:4] + struct.pack("<H", FORMAT_VERSION + 1) + data[6:])
+    _rewrite(broken, b"")
+
+    with pytest.raises(OSError):
+        MappedIndex(str(tmp_path / "missing.snap"))
@@ -0,0 +1,147 @@
+"""Tests for the monitoring daemon's run loop."""
+
+import importlib.util
+import signal
+from pathlib import Path
+
+import pytest
+
+from sensing.config import load_config
+
+_SPEC = importlib.util.spec_from_file_location(
+    "monitor_daemon", Path(__file__).parent.parent / "scripts" / "monitor_daemon.py")
+monitor_daemon = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(monitor_daemon)
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    """A daemon over a small knowledge base, with its state files in tmp_path."""
+    kb = tmp_path / "kb"
+    (kb / "facts").mkdir(parents=True)
+    (kb / "rules").mkdir()
+    (kb / "facts" / "fact1.txt").write_text("BTN3A1 binds phosphoantigen")
+    (kb / "rules" / "rule1.txt").write_text("if BTN3A1 binds phosphoantigen then activate")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(monitor_daemon, "ERROR_BACKOFF_SECONDS", 0.01)
+    handlers = {signum: signal.getsignal(signum)
+                for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1)}
+
+    config = load_config(str(tmp_path / "sense_config.yaml"))
+    config["sensing"]["file_monitoring"]["use_inotify"] = False
+    daemon = monitor_daemon.MonitorDaemon(config, kb_path=str(kb))
+    daemon.monitor.poll_interval = 0.01
+    yield daemon
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def _failing_scans(daemon, failures, stop_after):
+    """Make the first `failures` scans raise and stop the daemon after `stop_after` scans."""
+    real_scan = daemon.scan
+    calls = []
+
+    def scan(changes=None):
+        calls.append(changes)
+        if len(calls) >= stop_after:
+            daemon.request_stop()
+        if len(calls) <= failures:
+            raise RuntimeError("disk on fire")
+        real_scan(changes)
+
+    daemon.scan = scan
+    return calls
+
+
+def test_scan_errors_do_not_stop_the_daemon(daemon, capsys):
+    calls = _failing_scans(daemon, failures=2, stop_after=3)
+    daemon.run()
+
+    assert len(calls) == 3
+    assert "Scan loop error (2 in a row): disk on fire" in capsys.readouterr().out
+    assert daemon.delta_results["summary"]["complete_pairs"] == 1
+    assert daemon._failures == 0
+
+
+def test_failed_startup_scan_still_shuts_down(daemon):
+    _failing_scans(daemon, failures=1, stop_after=1)
+    daemon.run()
+
+    assert daemon.monitor.mode == "stopped"
+    assert daemon.status_file.exists()
+
+
+@pytest.fixture
+def full_daemon(tmp_path, monkeypatch):
+    """A daemon with every optional component enabled, over an existing gamma baseline."""
+    kb = tmp_path / "kb"
+    (kb / "facts").mkdir(parents=True)
+    (kb / "rules").mkdir()
+    (kb / "facts" / "fact1.txt").write_text("BTN3A1 binds phosphoantigen")
+    (kb / "rules" / "rule1.txt").write_text("if BTN3A1 binds phosphoantigen then activate")
+    (kb / "facts" / "fact-001.yaml").write_text(
+        "- concept: BTN3A1\n  property: activated\n  context: liver\n"
+        "- concept: BTN2A1\n  property: expressed\n")
+    (kb / "rules" / "rule-001.yaml").write_text(
+        "- rule_id: rule_001\n  if:\n    - concept: BTN3A1\n      property: activated\n"
+        "      context: ?ctx\n  then:\n    - concept: gamma_delta_t_cell\n"
+        "      property: activated\n      context: ?ctx\n")
+    monkeypatch.chdir(tmp_path)
+    handlers = {signum: signal.getsignal(signum)
+                for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1)}
+
+    config = load_config(str(tmp_path / "sense_config.yaml"))
+    for name in ("near_duplicates", "indexer", "search", "rule_engine"):
+        config["sensing"][name]["enabled"] = True
+    config.setdefault("validation", {})["cross_reference_check"] = True
+    config["sensing"]["file_monitoring"]["use_inotify"] = False
+
+    baseline = monitor_daemon.GammaDetector.from_config(config, kb_path=str(kb))
+    baseline.scan_for_changes()
+    baseline.close()
+
+    daemon = monitor_daemon.MonitorDaemon(config, kb_path=str(kb))
+    calls = []
+    for name, component in daemon.components.items():
+        def spy(changes=None, file_hashes=None, name=name, update=component.update_from_kb):
+            calls.append((name, None if changes is None else sorted(changes)))
+            return update(changes, file_hashes)
+        component.update_from_kb = spy
+    yield daemon, kb, calls
+    daemon.shutdown()
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def test_first_scan_with_changes_loads_every_component_fully(full_daemon):
+    daemon, kb, calls = full_daemon
+    assert sorted(daemon.components) == ["cross_references", "indexer", "near_duplicates",
+                                         "rule_engine", "search_index"]
+
+    # The daemon starts up to find one file changed since the baseline
+    (kb / "facts" / "fact1.txt").write_text("BTN3A1 binds phosphoantigen strongly")
+    daemon.scan()
+    assert daemon.scan_counts["with_changes"] == 1
+    assert sorted(calls) == sorted((name, None) for name in daemon.components)
+    assert len(daemon.indexer) == 4
+    assert len(daemon.search_index) == 5
+    assert daemon.rule_engine.stats()["facts"] == 2
+    assert daemon.rule_engine.stats()["derived_facts"] == 1
+    assert daemon.cross_references.stats()["facts"] == 2
+    assert Path(daemon.indexer.snapshot_file).exists()
+
+    # Later scans only pass what changed
+    calls.clear()
+    (kb / "rules" / "rule1.txt").write_text("if BTN3A1 binds then activate")
+    daemon.scan()
+    assert sorted(calls) == sorted((name, ["rules/rule1.txt"]) for name in daemon.components)
+    assert len(daemon.indexer) == 4
+
+
+def test_scan_without_changes_leaves_loaded_components_alone(full_daemon):
+    daemon, _, calls = full_daemon
+    daemon.scan()
+    assert len(calls) == len(daemon.components)
+    calls.clear()
+    daemon.scan()
+    assert calls == []
@@ -0,0 +1,117 @@
+"""Tests for the MinHash/LSH near-duplicate index."""
+
+import random
+from itertools import combinations
+
+import pytest
+
+from sensing.near_duplicates import MinHasher, NearDuplicateIndex, optimal_bands
+from sensing.tokenizer import Tokenizer
+
+
+def _jaccard(text1, text2):
+    words1, words2 = set(text1.split()), set(text2.split())
+    return len(words1 & words2) / len(words1 | words2)
+
+
+def _corpus(seed=7, bases=40, variants=4, words=30, vocabulary=3000):
+    """Base documents plus variants with a few words replaced, so similarities spread out."""
+    rng = random.Random(seed)
+    vocabulary = [f"w{n}" for n in range(vocabulary)]
+    documents = {}
+    for base in range(bases):
+        text = rng.sample(vocabulary, words)
+        documents[f"facts/base{base}.txt"] = " ".join(text)
+        for variant in range(variants):
+            changed = list(text)
+            for position in rng.sample(range(words), rng.randint(0, 6)):
+                changed[position] = rng.choice(vocabulary)
+            documents[f"rules/base{base}-{variant}.txt"] = " ".join(changed)
+    return documents
+
+
+@pytest.mark.parametrize("threshold,num_perm", [(0.5, 64), (0.8, 128), (0.9, 256)])
+def test_optimal_bands_fit_the_signature(threshold, num_perm):
+    bands, rows = optimal_bands(threshold, num_perm)
+    assert bands * rows <= num_perm
+    # The S-curve's steepest point, (1/bands)^(1/rows), lies near the threshold
+    assert abs((1 / bands) ** (1 / rows) - threshold) < 0.15
+
+
+def test_minhash_estimate_tracks_exact_jaccard():
+    tokenizer = Tokenizer()
+    hasher = MinHasher(num_perm=256, tokenizer=tokenizer)
+    documents = list(_corpus(bases=10).values())
+    errors = []
+    for text1, text2 in combinations(documents[:15], 2):
+        estimate = MinHasher.estimate(hasher.signature(tokenizer.token_set(text1)),
+                                      hasher.signature(tokenizer.token_set(text2)))
+        errors.append(abs(estimate - _jaccard(text1, text2)))
+    assert max(errors) < 0.15
+    assert sum(errors) / len(errors) < 0.04
+
+
+def test_empty_documents_have_no_signature():
+    assert MinHasher().signature(frozenset()) is None
+
+
+def test_lsh_recall_against_exact_jaccard():
+    documents = _corpus()
+    index = NearDuplicateIndex(threshold=0.8)
+    for key, text in documents.items():
+        index.add(key, text)
+
+    truth = {(key1, key2) for key1, key2 in combinations(sorted(documents), 2)
+             if _jaccard(documents[key1], documents[key2]) >= 0.8}
+    reported = {tuple(pair["documents"]): pair["similarity"] for pair in index.near_duplicate_pairs()}
+
+    assert len(truth) > 50
+    assert set(reported) <= truth  # candidates are verified exactly
+    for (key1, key2), similarity in reported.items():
+        assert similarity == pytest.approx(_jaccard(documents[key1], documents[key2]))
+    assert len(truth & set(reported)) / len(truth) >= 0.9
+    assert index.evaluate(sample_size=len(documents))["recall"] == len(reported) / len(truth)
+
+
+def test_remove_and_replace_update_the_buckets():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("facts/a.txt", "gamma delta t cells recognize phosphoantigens in tissue")
+    index.add("rules/b.txt", "gamma delta t cells recognize phosphoantigens in tissue")
+    assert [pair["documents"] for pair in index.near_duplicate_pairs()] == [["facts/a.txt", "rules/b.txt"]]
+
+    index.add("rules/b.txt", "completely unrelated text about something else entirely")
+    assert index.near_duplicate_pairs() == []
+    index.remove("rules/b.txt")
+    index.remove("rules/b.txt")  # no-op when absent
+    assert len(index) == 1
+    assert index.candidate_pairs() == set()
+
+
+def test_opposite_terms_mark_contradiction_candidates():
+    index = NearDuplicateIndex(threshold=0.7)
+    shared = "il17 production by dermal gamma delta t cells in psoriasis lesions is strongly"
+    index.add("facts/a.txt", f"{shared} activated")
+    index.add("facts/b.txt", f"{shared} inhibited")
+
+    [pair] = index.near_duplicate_pairs()
+    assert pair["contradiction_candidate"] is True
+    assert pair["opposite_terms"] == [["activated", "inhibited"]]
+    assert index.clusters() == [["facts/a.txt", "facts/b.txt"]]
+
+
+def test_update_from_kb_follows_file_changes(tmp_path):
+    (tmp_path / "facts").mkdir()
+    (tmp_path / "rules").mkdir()
+    text = "vgamma9 vdelta2 t cells sense butyrophilin bound phosphoantigens"
+    (tmp_path / "facts" / "fact1.txt").write_text(text)
+    (tmp_path / "rules" / "rule1.txt").write_text(text)
+    (tmp_path / "rules" / "rule2.txt").write_text("an unrelated rule")
+
+    index = NearDuplicateIndex(kb_path=str(tmp_path), threshold=0.8)
+    assert index.update_from_kb() == 3
+    assert len(index.near_duplicate_pairs()) == 1
+
+    (tmp_path / "rules" / "rule1.txt").unlink()
+    assert index.update_from_kb(changes=["rules/rule1.txt"]) == 0
+    assert len(index) == 2
+    assert index.near_duplicate_pairs() == []
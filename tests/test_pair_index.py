@@ -0,0 +1,65 @@
+"""Tests for fact/rule pairing."""
+
+import pytest
+
+from sensing.gamma_detector import GammaDetector
+from sensing.pair_index import PairIndex, pair_file_key, parse_pair_file
+
+
+@pytest.mark.parametrize("file_key,expected", [
+    ("facts/fact3.txt", ("txt:3", "fact")),
+    ("rules/rule3.txt", ("txt:3", "rule")),
+    ("facts/fact-001.yaml", ("yaml:1", "fact")),
+    ("rules/rule-1000.yaml", ("yaml:1000", "rule")),
+    ("facts/fact-3.txt", None),
+    ("facts/fact_3.txt", None),
+    ("facts/fact03.txt", None),
+    ("facts/fact-1.yaml", None),
+    ("facts/fact-0001.yaml", None),
+    ("facts/fact-001.yml", None),
+    ("rules/fact3.txt", None),
+    ("facts/archive/fact3.txt", None),
+])
+def test_parse_pair_file(file_key, expected):
+    assert parse_pair_file(file_key) == expected
+
+
+@pytest.mark.parametrize("file_key", ["facts/fact3.txt", "rules/rule0.txt", "facts/fact-001.yaml",
+                                      "rules/rule-042.yaml", "facts/fact-1234.yaml"])
+def test_pair_file_key_is_the_inverse_of_parse_pair_file(file_key):
+    pair_id, role = parse_pair_file(file_key)
+    assert pair_file_key(pair_id, role) == file_key
+
+
+def test_other_spellings_do_not_replace_a_pair_file():
+    index = PairIndex().rebuild(["facts/fact3.txt", "rules/rule3.txt", "facts/fact-3.txt",
+                                 "facts/fact03.txt", "facts/fact_3.txt"])
+    assert index.get("txt:3").to_dict() == {"fact": "facts/fact3.txt", "rule": "rules/rule3.txt"}
+
+    index.apply_changes(deleted=["facts/fact-3.txt"])
+    assert index.status("txt:3") == "complete"
+    assert index.apply_changes(deleted=["facts/fact3.txt"]) == {"txt:3"}
+    assert index.status("txt:3") == "orphan"
+
+
+def test_index_persisted_under_older_naming_rules_is_rebuilt(tmp_path):
+    kb = tmp_path / "kb"
+    (kb / "facts").mkdir(parents=True)
+    (kb / "rules").mkdir()
+    for name in ("facts/fact3.txt", "facts/fact-3.txt", "rules/rule3.txt"):
+        (kb / name).write_text(name)
+    state_file = str(tmp_path / "state.db")
+    detector = GammaDetector(kb_path=str(kb), state_file=state_file)
+    detector.scan_for_changes()
+    # What the looser pattern used to store: the later file won the slot
+    detector._store.commit_scan({}, [], meta={"pairs_indexed": True},
+                                pairs={"txt:3": {"fact": "facts/fact-3.txt", "rule": "rules/rule3.txt"}})
+    detector.close()
+
+    detector = GammaDetector(kb_path=str(kb), state_file=state_file)
+    assert detector.pair_index.get("txt:3").fact == "facts/fact3.txt"
+    detector.save_state()
+    detector.close()
+    detector = GammaDetector(kb_path=str(kb), state_file=state_file)
+    assert detector._store.load_pairs() == {"txt:3": {"fact": "facts/fact3.txt", "rule": "rules/rule3.txt"}}
+    detector.close()
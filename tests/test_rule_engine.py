@@ -0,0 +1,132 @@
+"""Tests for forward chaining over the Rete network."""
+
+import pytest
+
+from sensing.rule_engine import RuleEngine
+
+ACTIVATION_RULES = """\
+- rule_id: rule_001
+  if:
+    - concept: BTN3A1
+      property: activated
+      context: ?ctx
+  then:
+    - concept: gamma_delta_t_cell
+      property: activated
+      context: ?ctx
+- rule_id: rule_002
+  if:
+    - concept: gamma_delta_t_cell
+      property: activated
+      context: ?ctx
+    - concept: ?ctx
+      property: infected
+  then:
+    - concept: ?ctx
+      property: cleared
+      context: ?ctx
+"""
+
+FACTS = """\
+- concept: BTN3A1
+  property: activated
+  context: liver
+- concept: BTN3A1
+  property: activated
+  context: skin
+- concept: liver
+  property: infected
+"""
+
+CHAIN = [
+    {"concept": "gamma_delta_t_cell", "property": "activated", "context": "liver"},
+    {"concept": "gamma_delta_t_cell", "property": "activated", "context": "skin"},
+    {"concept": "liver", "property": "cleared", "context": "liver"},
+]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    (tmp_path / "facts").mkdir()
+    (tmp_path / "rules").mkdir()
+    (tmp_path / "rules" / "rule-001.yaml").write_text(ACTIVATION_RULES)
+    (tmp_path / "facts" / "fact-001.yaml").write_text(FACTS)
+    return tmp_path
+
+
+def _derived(engine):
+    return [{key: value for key, value in fact.items() if key != "rules"}
+            for fact in engine.derived_facts()]
+
+
+def test_rule_chain_derives_facts(kb):
+    engine = RuleEngine(kb_path=str(kb))
+    summary = engine.update_from_kb()
+
+    assert summary["files"] == 2
+    assert summary["rules_added"] == 2
+    assert summary["facts_asserted"] == 3
+    assert summary["derived_added"] == CHAIN
+    assert summary["derived_removed"] == []
+    assert _derived(engine) == CHAIN
+    assert engine.stats()["facts"] == 3
+    assert engine.stats()["derived_facts"] == 3
+
+    # The second step of the chain rests on the first
+    explanation = engine.explain(CHAIN[2])
+    assert explanation["asserted"] == 0
+    assert explanation["derivations"] == [{
+        "rule": "rule_002",
+        "premises": [CHAIN[0], {"concept": "liver", "property": "infected"}]
+    }]
+
+
+def test_unchanged_kb_is_not_reread(kb):
+    engine = RuleEngine(kb_path=str(kb))
+    engine.update_from_kb()
+    summary = engine.update_from_kb()
+    assert summary["files"] == 0
+    assert summary["derived_added"] == summary["derived_removed"] == []
+
+
+def test_removing_a_fact_retracts_what_it_supported(kb):
+    engine = RuleEngine(kb_path=str(kb))
+    engine.update_from_kb()
+
+    # Drop the liver activation: both steps of its chain lose support
+    (kb / "facts" / "fact-001.yaml").write_text(FACTS.replace(
+        "- concept: BTN3A1\n  property: activated\n  context: liver\n", ""))
+    summary = engine.update_from_kb(["facts/fact-001.yaml"])
+
+    assert summary["facts_retracted"] == 1
+    assert summary["derived_added"] == []
+    assert summary["derived_removed"] == [CHAIN[0], CHAIN[2]]
+    assert _derived(engine) == [CHAIN[1]]
+    assert engine.explain(CHAIN[2]) is None
+
+
+def test_deleting_a_rule_file_retracts_its_conclusions(kb):
+    engine = RuleEngine(kb_path=str(kb))
+    engine.update_from_kb()
+
+    (kb / "rules" / "rule-001.yaml").unlink()
+    summary = engine.update_from_kb(["rules/rule-001.yaml"])
+
+    assert summary["rules_removed"] == 2
+    assert summary["derived_removed"] == CHAIN
+    assert _derived(engine) == []
+    stats = engine.stats()
+    assert (stats["rules"], stats["alpha_nodes"], stats["join_nodes"]) == (0, 0, 0)
+
+
+def test_fact_stated_twice_needs_both_retractions():
+    engine = RuleEngine(kb_path="/nonexistent")
+    engine.add_rule("r", [{"concept": "a", "property": "p"}], [{"concept": "b", "property": "p"}])
+    engine.assert_facts([{"concept": "a", "property": "p"}] * 2)
+    derived = {"concept": "b", "property": "p"}
+
+    engine.retract_fact({"concept": "a", "property": "p"})
+    assert engine.explain(derived) is not None
+    engine.retract_fact({"concept": "a", "property": "p"})
+    assert engine.explain(derived) is None
+    assert len(engine) == 0
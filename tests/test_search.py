@@ -0,0 +1,139 @@
+"""Tests for the BM25 search index and its MaxScore evaluation."""
+
+import math
+import random
+from collections import Counter
+from itertools import accumulate
+
+import pytest
+
+from sensing.search import SearchIndex
+
+FILES = 12
+ENTRIES_PER_FILE = 20
+VOCABULARY = 400
+
+
+def _zipf_corpus(seed=3):
+    """YAML fact lists with Zipf-distributed words, so terms range from common to rare."""
+    rng = random.Random(seed)
+    words = [f"w{rank}" for rank in range(VOCABULARY)]
+    cumulative = list(accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    files = {}
+    for number in range(1, FILES + 1):
+        entries = []
+        for _ in range(ENTRIES_PER_FILE):
+            text = rng.choices(words, cum_weights=cumulative, k=rng.randint(4, 20))
+            entries.append(f"- concept: {' '.join(text[:2])}\n"
+                           f"  property: {text[2]}\n"
+                           f"  context: {' '.join(text[3:])}\n")
+        files[f"facts/fact-{number:03d}.yaml"] = "".join(entries)
+    return files, rng, words, cumulative
+
+
+def _write(root, files):
+    for key, text in files.items():
+        path = root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def _bm25(files, query, k1=1.2, b=0.75):
+    """Reference BM25 over every entry, straight from the definition."""
+    documents = {}
+    for key, text in files.items():
+        for entry, block in enumerate(text.split("- concept: ")[1:]):
+            words = [word for line in block.splitlines() for word in line.split()
+                     if word not in ("property:", "context:")]
+            documents[(key, entry)] = Counter(words)
+    average_length = sum(sum(words.values()) for words in documents.values()) / len(documents)
+    scores = Counter()
+    for term in dict.fromkeys(query.split()):
+        df = sum(1 for words in documents.values() if term in words)
+        if not df:
+            continue
+        idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        for document, words in documents.items():
+            tf = words[term]
+            if tf:
+                length = sum(words.values())
+                scores[document] += idf * tf * (k1 + 1) / (
+                    tf + k1 * (1 - b + b * length / average_length))
+    return scores
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    files, rng, words, cumulative = _zipf_corpus()
+    _write(tmp_path / "kb", files)
+    index = SearchIndex(kb_path=str(tmp_path / "kb"), index_file=str(tmp_path / "search.db"))
+    index.update_from_kb()
+    queries = [" ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(2, 5)))
+               for _ in range(30)]
+    yield index, files, queries
+    index.close()
+
+
+def test_index_counts(corpus):
+    index, _, _ = corpus
+    stats = index.stats()
+    assert stats["files"] == FILES
+    assert stats["documents"] == len(index) == FILES * ENTRIES_PER_FILE
+
+
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_max_score_matches_exhaustive(corpus, limit):
+    index, _, queries = corpus
+    for query in queries:
+        assert index.search(query, limit) == index.search(query, limit, exhaustive=True), query
+
+
+def test_scores_follow_bm25(corpus):
+    index, files, queries = corpus
+    for query in queries:
+        expected = _bm25(files, query)
+        hits = index.search(query, limit=10)
+        assert len(hits) == min(10, len(expected))
+        for hit in hits:
+            assert hit["score"] == pytest.approx(expected[(hit["file"], hit["entry"])], abs=1e-4)
+        # Nothing left out scores above the last hit
+        if hits:
+            assert sorted(expected.values(), reverse=True)[len(hits) - 1] == \
+                pytest.approx(hits[-1]["score"], abs=1e-4)
+
+
+def test_max_score_skips_postings(corpus):
+    index, _, queries = corpus
+    for query in queries:
+        index.search(query, limit=3, exhaustive=True)
+    exhaustive = index.stats()["scored"]
+    for query in queries:
+        index.search(query, limit=3)
+    assert index.stats()["scored"] - exhaustive < exhaustive
+
+
+def test_incremental_update_and_removal(tmp_path, corpus):
+    index, files, _ = corpus
+    kb = tmp_path / "kb"
+    files["facts/fact-001.yaml"] = "- concept: zebrafish\n  property: regenerates\n"
+    files["facts/fact-013.yaml"] = "- concept: zebrafish zebrafish\n  property: swims\n"
+    del files["facts/fact-002.yaml"]
+    _write(kb, {key: files[key] for key in ("facts/fact-001.yaml", "facts/fact-013.yaml")})
+    (kb / "facts" / "fact-002.yaml").unlink()
+
+    changes = ["facts/fact-001.yaml", "facts/fact-002.yaml", "facts/fact-013.yaml"]
+    assert index.update_from_kb(changes) == 2
+    assert index.stats()["files"] == FILES
+    assert len(index) == (FILES - 2) * ENTRIES_PER_FILE + 2
+
+    hits = index.search("zebrafish", limit=5)
+    assert [(hit["file"], hit["entry"]) for hit in hits] == \
+        [("facts/fact-013.yaml", 0), ("facts/fact-001.yaml", 0)]
+    expected = _bm25(files, "zebrafish")
+    for hit in hits:
+        assert hit["score"] == pytest.approx(expected[(hit["file"], hit["entry"])], abs=1e-4)
+    assert all(hit["file"] != "facts/fact-002.yaml"
+               for query in ("w0 w1", "w2 w5") for hit in index.search(query, limit=50))
+
+    # A full check finds nothing more to do
+    assert index.update_from_kb() == 0
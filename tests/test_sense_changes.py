@@ -0,0 +1,81 @@
+"""End-to-end tests of the sense_changes.py commands."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "sense_changes.py"
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project directory with a small knowledge base; state files land here too."""
+    kb = tmp_path / "kb"
+    (kb / "facts").mkdir(parents=True)
+    (kb / "rules").mkdir()
+    (kb / "facts" / "fact1.txt").write_text("BTN3A1 binds phosphoantigen")
+    (kb / "rules" / "rule1.txt").write_text("if BTN3A1 binds phosphoantigen then activate")
+    (kb / "facts" / "fact-001.yaml").write_text("- concept: BTN3A1\n  property: activated\n")
+    for path in kb.rglob("*.*"):
+        # Outside the racy-mtime window, so unchanged files are not re-hashed
+        mtime_ns = path.stat().st_mtime_ns - 3600 * 1_000_000_000
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    shutil.copy(Path(__file__).parent.parent / "sense_config.yaml", tmp_path)
+    return tmp_path
+
+
+def sense(project, *args):
+    """Run sense_changes.py in the project directory and return its output."""
+    completed = subprocess.run([sys.executable, str(SCRIPT), *args], cwd=str(project),
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               universal_newlines=True, check=True)
+    return completed.stdout
+
+
+def test_paranoid_gamma_hashes_every_file(project):
+    sense(project, "gamma")
+    assert "Files Hashed: 0" in sense(project, "gamma")
+    assert "Files Hashed: 3" in sense(project, "--paranoid", "gamma")
+
+
+def test_delta_jsonl_streams_one_record_per_pair(project):
+    (project / "kb" / "rules" / "rule-001.yaml").write_text("- rule_id: rule_001\n")
+    output = sense(project, "--output", "pairs.jsonl", "delta", "--format", "jsonl")
+    assert "Detailed results streamed to: pairs.jsonl" in output
+
+    records = [json.loads(line) for line in (project / "pairs.jsonl").read_text().splitlines()]
+    pairs, summary = records[:-1], records[-1]
+    assert [pair["pair_id"] for pair in pairs] == ["txt:1", "yaml:1"]
+    assert all(pair["fact_exists"] and pair["rule_exists"] for pair in pairs)
+    assert summary["summary"]["total_pairs_found"] == 2
+    assert summary["summary"]["complete_pairs"] == 2
+    assert "recommendations" in summary
+
+
+def _edit_after_baseline(project):
+    sense(project, "gamma")
+    (project / "kb" / "facts" / "fact1.txt").write_text("BTN3A1 binds phosphoantigen strongly")
+
+
+def _gamma_still_reports_the_edit(project):
+    output = sense(project, "gamma")
+    assert "Total Changes: 1" in output
+    assert "~ facts/fact1.txt" in output
+    assert "Total Changes: 0" in sense(project, "gamma")
+
+
+def test_query_leaves_gamma_changes_pending(project):
+    _edit_after_baseline(project)
+    assert "BTN3A1 binds phosphoantigen strongly" in sense(project, "query", "BTN3A1")
+    _gamma_still_reports_the_edit(project)
+
+
+def test_search_leaves_gamma_changes_pending(project):
+    _edit_after_baseline(project)
+    assert "facts/fact1.txt" in sense(project, "search", "phosphoantigen", "strongly")
+    _gamma_still_reports_the_edit(project)
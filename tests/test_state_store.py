@@ -0,0 +1,132 @@
+"""Tests for the gamma state stores and the legacy JSON migration."""
+
+import json
+
+import pytest
+
+from sensing.gamma_detector import GammaDetector
+from sensing.state_store import JSONStateStore, SQLiteStateStore, open_state_store
+
+
+def _entry(key, content_hash):
+    return {"path": key, "size": 1, "modified_time": 1.0, "content_hash": content_hash}
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_path):
+    store = open_state_store(str(tmp_path / f"state.{request.param}"), backend=request.param,
+                             max_history=3)
+    yield store
+    store.close()
+
+
+def test_commit_scan_upserts_and_deletes(store):
+    store.commit_scan({"facts/fact1.txt": _entry("facts/fact1.txt", "a"),
+                       "facts/fact2.txt": _entry("facts/fact2.txt", "b")}, [])
+    store.commit_scan({"facts/fact1.txt": _entry("facts/fact1.txt", "c")}, ["facts/fact2.txt"],
+                      meta={"hash_algorithm": "sha256"})
+
+    assert store.load_baseline() == {"facts/fact1.txt": _entry("facts/fact1.txt", "c")}
+    assert store.get_meta("hash_algorithm") == "sha256"
+    assert store.get_meta("missing", "default") == "default"
+
+
+def test_history_keeps_the_newest_results(store):
+    for number in range(5):
+        store.commit_scan({}, [], scan_results=[{"scan": number}])
+
+    assert store.load_history() == [{"scan": 2}, {"scan": 3}, {"scan": 4}]
+
+
+def test_directories_and_pairs_can_be_removed(store):
+    store.commit_scan({}, [], directories={"facts": {"files": ["fact1.txt"]}},
+                      pairs={"txt:1": {"fact": "facts/fact1.txt", "rule": None}})
+    assert store.load_directories() == {"facts": {"files": ["fact1.txt"]}}
+    assert store.load_pairs() == {"txt:1": {"fact": "facts/fact1.txt", "rule": None}}
+
+    store.commit_scan({}, [], directories={"facts": None}, pairs={"txt:1": None})
+    assert store.load_directories() == {}
+    assert store.load_pairs() == {}
+
+
+def test_state_survives_reopening(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SQLiteStateStore(path)
+    store.commit_scan({"rules/rule1.txt": _entry("rules/rule1.txt", "a")}, [],
+                      scan_results=[{"scan": 1}])
+    store.close()
+
+    reopened = SQLiteStateStore(path)
+    assert reopened.load_baseline() == {"rules/rule1.txt": _entry("rules/rule1.txt", "a")}
+    assert reopened.load_history() == [{"scan": 1}]
+    reopened.close()
+
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    legacy = tmp_path / "state.json"
+    baseline = {f"facts/fact{n}.txt": _entry(f"facts/fact{n}.txt", str(n)) for n in range(3)}
+    history = [{"scan": n} for n in range(10)]
+    legacy.write_text(json.dumps({"baseline_states": baseline, "change_history": history}))
+
+    store = open_state_store(str(tmp_path / "state.db"), max_history=4)
+    assert store.load_baseline() == baseline
+    assert store.load_history() == history[-4:]
+    store.close()
+    assert not legacy.exists()
+    assert (tmp_path / "state.json.migrated").exists()
+
+    # A later JSON file next to an existing database is left alone
+    legacy.write_text(json.dumps({"baseline_states": {}, "change_history": []}))
+    store = open_state_store(str(tmp_path / "state.db"), max_history=4)
+    assert store.load_baseline() == baseline
+    store.close()
+    assert legacy.exists()
+
+
+def test_unreadable_legacy_json_is_not_migrated(tmp_path, capsys):
+    legacy = tmp_path / "state.json"
+    legacy.write_text("{not json")
+
+    store = open_state_store(str(tmp_path / "state.db"))
+    assert store.load_baseline() == {}
+    store.close()
+    assert legacy.exists()
+    assert "Could not migrate" in capsys.readouterr().out
+
+
+def test_json_store_writes_atomically(tmp_path):
+    path = tmp_path / "state.json"
+    store = JSONStateStore(str(path))
+    store.commit_scan({"facts/fact1.txt": _entry("facts/fact1.txt", "a")}, [])
+
+    assert json.loads(path.read_text())["baseline_states"] == {
+        "facts/fact1.txt": _entry("facts/fact1.txt", "a")}
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_state_store(str(tmp_path / "state"), backend="csv")
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "json"])
+def test_detector_baseline_round_trips(tmp_path, backend):
+    kb = tmp_path / "kb"
+    (kb / "facts").mkdir(parents=True)
+    (kb / "rules").mkdir()
+    (kb / "facts" / "fact1.txt").write_text("gamma delta t cells")
+    (kb / "rules" / "rule1.txt").write_text("if gamma delta then t cells")
+    state_file = str(tmp_path / f"state.{backend}")
+
+    detector = GammaDetector(kb_path=str(kb), state_file=state_file, state_backend=backend)
+    assert detector.scan_for_changes()["gamma_metrics"]["files_added"] == 2
+    hashes = detector.content_hashes()
+    detector.close()
+
+    (kb / "facts" / "fact1.txt").write_text("gamma delta t cells respond")
+    detector = GammaDetector(kb_path=str(kb), state_file=state_file, state_backend=backend)
+    assert detector.content_hashes() == hashes
+    results = detector.scan_for_changes()
+    assert [change["file"] for change in results["modified_files"]] == ["facts/fact1.txt"]
+    assert len(detector.change_history) == 2
+    detector.close()
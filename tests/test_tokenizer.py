@@ -0,0 +1,55 @@
+"""Tests for the shared tokenizer and its token cache."""
+
+import re
+
+from sensing.similarity import tokenize
+from sensing.tokenizer import Tokenizer
+
+DOCUMENTS = [
+    "BTN3A1 binds phosphoantigen; BTN2A1 is required.",
+    "Vγ9Vδ2 T cells respond to HMBPP (IPP) - see PMID:12345678",
+    "- concept: gamma_delta_t_cell\n  property: activated\n  context: ?ctx\n",
+    "Ünïcödé wörds, MIXED case and repeated repeated REPEATED words",
+    "",
+]
+
+
+def _baseline(text):
+    """The word split used before the shared tokenizer existed."""
+    return re.findall(r'\w+', text.lower())
+
+
+def test_tokens_match_the_baseline_word_split():
+    tokenizer = Tokenizer()
+    for text in DOCUMENTS:
+        assert tokenizer.words(tokenizer.encode(text)) == _baseline(text)
+        assert set(tokenizer.words(tokenizer.token_set(text))) == set(_baseline(text))
+        assert tokenize(text) == set(_baseline(text))
+
+
+def test_token_ids_are_shared_across_documents():
+    tokenizer = Tokenizer()
+    first = tokenizer.encode("BTN3A1 binds")
+    second = tokenizer.encode("binds BTN3A1")
+    assert list(first) == list(reversed(second))
+    assert len(tokenizer) == 2
+
+
+def test_token_cache_survives_a_reopen(tmp_path):
+    cache_file = str(tmp_path / "tokens.db")
+    tokenizer = Tokenizer(cache_file=cache_file)
+    for number, text in enumerate(DOCUMENTS):
+        tokenizer.encode(text, f"hash{number}")
+    tokenizer.close()
+
+    reopened = Tokenizer(cache_file=cache_file)
+    for number, text in enumerate(DOCUMENTS):
+        token_ids = reopened.lookup(f"hash{number}")
+        assert token_ids is not None
+        assert reopened.words(token_ids) == _baseline(text)
+        # A cached document is not tokenized again, whatever text is passed
+        assert reopened.encode("ignored", f"hash{number}") is token_ids
+    assert reopened.stats["tokenized"] == 0
+    assert reopened.stats["disk_hits"] == len(DOCUMENTS)
+    assert reopened.lookup("unknown") is None
+    reopened.close()
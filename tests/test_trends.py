@@ -0,0 +1,77 @@
+"""Tests for the streaming change trend aggregates."""
+
+import pytest
+
+from sensing.trends import DAY, DAY_BUCKETS, HOUR, HOUR_BUCKETS, ChangeTrends
+
+START = 1_700_000_000 // DAY * DAY  # midnight UTC
+
+
+def test_ewma_follows_the_textbook_recurrence():
+    trends = ChangeTrends(alpha=0.5)
+    rates = [0.4, 0.0, 0.2, 1.0]
+    for n, rate in enumerate(rates):
+        trends.update(rate, 1, START + n)
+
+    expected = rates[0]
+    for rate in rates[1:]:
+        expected = 0.5 * rate + 0.5 * expected
+    assert trends.ewma_change_rate == pytest.approx(expected)
+    assert trends.scan_count == 4
+    assert trends.total_changes == 4
+
+
+def test_ring_buffer_window_keeps_the_latest_scans():
+    trends = ChangeTrends(ring_size=3)
+    for n, rate in enumerate([0.9, 0.1, 0.2, 0.3]):
+        trends.update(rate, n, START + n)
+
+    window = trends.window(10)
+    assert window["window_size"] == 3
+    assert window["average_change_rate"] == pytest.approx(0.2)
+    assert window["max_change_rate"] == 0.3
+    assert window["min_change_rate"] == 0.1
+    assert window["total_changes_in_window"] == 1 + 2 + 3
+
+
+def test_hour_buckets_roll_over_and_expire():
+    trends = ChangeTrends()
+    trends.update(0.1, 1, START)
+    trends.update(0.3, 2, START + HOUR - 1)
+    trends.update(0.5, 4, START + HOUR)
+    assert sorted(trends.hourly) == [START // HOUR, START // HOUR + 1]
+    assert trends.hourly[START // HOUR][:2] == [2, 3]
+
+    last_hour = trends.time_window(HOUR - 1, now=START + 2 * HOUR - 1)
+    assert last_hour["scans_in_window"] == 1
+    assert last_hour["total_changes_in_window"] == 4
+
+    # A scan HOUR_BUCKETS hours later pushes the first hour out of retention
+    trends.update(0.2, 1, START + HOUR_BUCKETS * HOUR)
+    assert START // HOUR not in trends.hourly
+    assert START // HOUR + 1 in trends.hourly
+    assert sorted(trends.daily) == [START // DAY, START // DAY + 2]
+
+
+def test_day_buckets_answer_long_windows_and_expire():
+    trends = ChangeTrends()
+    for day in range(DAY_BUCKETS + 2):
+        trends.update(0.1 * (day % 3), day, START + day * DAY)
+    assert len(trends.daily) == DAY_BUCKETS
+    assert min(trends.daily) == START // DAY + 2
+
+    now = START + (DAY_BUCKETS + 1) * DAY
+    week = trends.time_window(7 * DAY, now=now)
+    assert week["bucket_seconds"] == DAY
+    assert week["scans_in_window"] == 8
+    assert week["total_changes_in_window"] == sum(range(DAY_BUCKETS - 6, DAY_BUCKETS + 2))
+
+
+def test_round_trip_through_to_dict():
+    trends = ChangeTrends(ring_size=5)
+    for n in range(8):
+        trends.update(n / 10, n, START + n * HOUR)
+
+    restored = ChangeTrends.from_dict(trends.to_dict())
+    assert restored.to_dict() == trends.to_dict()
+    assert restored.window(5) == trends.window(5)
@@ -0,0 +1,109 @@
+"""Tests for the os.scandir knowledge base walker and its directory cache."""
+
+import os
+
+import pytest
+
+from sensing.walker import KBWalker
+
+
+def _backdate(path, seconds=3600):
+    """Move an mtime out of the racy window so a listing of it can be trusted."""
+    mtime_ns = path.stat().st_mtime_ns - seconds * 1_000_000_000
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def kb(tmp_path):
+    for name in ("facts/fact1.txt", "facts/fact-001.yaml", "facts/notes.md", "facts/draft.tmp",
+                 "facts/.hidden.txt", "facts/structured/fact2.yaml", "facts/.git/config.txt",
+                 "rules/rule1.txt", "rules/archive/old.txt", "raw_docs/doc.txt"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    for directory in ("facts", "facts/structured", "facts/.git", "rules", "rules/archive"):
+        _backdate(tmp_path / directory)
+    return tmp_path
+
+
+def _keys(walker):
+    return sorted(key for key, _, _ in walker.walk())
+
+
+def test_extensions_ignore_patterns_and_recursion(kb):
+    walker = KBWalker(kb, ignore_patterns=("*.tmp", ".*", "rules/archive"))
+    assert _keys(walker) == ["facts/fact-001.yaml", "facts/fact1.txt",
+                             "facts/structured/fact2.yaml", "rules/rule1.txt"]
+    assert walker.accepts("facts/structured/fact2.yaml")
+    assert not walker.accepts("facts/draft.tmp")
+    assert not walker.accepts("rules/archive/old.txt")
+    assert not walker.accepts("raw_docs/doc.txt")
+
+    flat = KBWalker(kb, file_extensions=(".txt",), recursive=False)
+    assert _keys(flat) == ["facts/fact1.txt", "rules/rule1.txt"]
+    assert not flat.accepts("facts/structured/fact2.yaml")
+
+
+def test_unchanged_directories_are_not_listed_again(kb):
+    walker = KBWalker(kb)
+    first = _keys(walker)
+    assert walker.dirs_listed == 4
+
+    assert _keys(walker) == first
+    assert walker.dirs_listed == 0
+    assert walker.cache_updates() == {}
+
+
+def test_directory_cache_survives_a_reload(kb):
+    walker = KBWalker(kb)
+    first = _keys(walker)
+    saved = walker.cache_updates()
+    # Listings persisted by older versions carried an entry count as well
+    saved = {key: dict(listing, entry_count=5) for key, listing in saved.items()}
+
+    reloaded = KBWalker(kb)
+    reloaded.load_cache(saved)
+    assert _keys(reloaded) == first
+    assert reloaded.dirs_listed == 0
+
+
+def test_changed_directories_are_listed_again(kb):
+    walker = KBWalker(kb)
+    _keys(walker)
+
+    (kb / "facts" / "structured" / "fact3.yaml").write_text("new")
+    (kb / "rules" / "rule1.txt").unlink()
+    keys = _keys(walker)
+    assert "facts/structured/fact3.yaml" in keys
+    assert "rules/rule1.txt" not in keys
+    assert sorted(walker.cache_updates()) == ["facts/structured", "rules"]
+
+    # A removed subtree is dropped from the cache
+    for path in (kb / "facts" / "structured").iterdir():
+        path.unlink()
+    (kb / "facts" / "structured").rmdir()
+    keys = _keys(walker)
+    assert not any(key.startswith("facts/structured/") for key in keys)
+    assert walker.cache_updates()["facts/structured"] is None
+    assert "facts/structured" not in walker.dir_cache
+
+
+def test_in_place_edits_are_seen_through_a_cached_listing(kb):
+    walker = KBWalker(kb)
+    sizes = {key: stat.st_size for key, _, stat in walker.walk()}
+
+    (kb / "facts" / "fact1.txt").write_text("a longer fact than before")
+    resized = {key: stat.st_size for key, _, stat in walker.walk()}
+    assert walker.dirs_listed == 0
+    assert resized["facts/fact1.txt"] != sizes["facts/fact1.txt"]
+
+
+def test_watch_files_outside_the_watched_directories(kb):
+    (kb / "facts.yaml").write_text("- concept: BTN3A1\n")
+    (kb / "notes.txt").write_text("not watched")
+    walker = KBWalker(kb, watch_files=("facts.yaml", "rules.yaml"))
+    keys = _keys(walker)
+    assert "facts.yaml" in keys
+    assert "notes.txt" not in keys and "rules.yaml" not in keys
+    assert walker.accepts("facts.yaml")
+    assert not walker.accepts("notes.txt")